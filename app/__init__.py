@@ -1,18 +1,18 @@
 import os
 import subprocess
-import click
 from datetime import datetime, timedelta, timezone
 
+import click
+from dotenv import load_dotenv
 from flask import Flask, flash, jsonify, redirect, request, session, url_for
-from flask_wtf.csrf import CSRFError, CSRFProtect
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager, current_user
+from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy
+from flask_wtf.csrf import CSRFError, CSRFProtect
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash
-from dotenv import load_dotenv
 
-from .config import Config, DEFAULT_SECRET_KEY, is_development_environment
+from .config import DEFAULT_SECRET_KEY, Config, is_development_environment
 from .security import get_csp_nonce, is_safe_redirect_target
 
 db = SQLAlchemy()
@@ -195,6 +195,14 @@ def create_app():
         os.path.join(app.static_folder, "uploads", "avatars"),
     )
     app.config["AVATAR_WEB_PREFIX"] = os.getenv("AVATAR_WEB_PREFIX", "uploads/avatars")
+    app.config["REQUEST_PROFILE_DIR"] = os.getenv(
+        "REQUEST_PROFILE_DIR",
+        os.path.join(app.instance_path, "profiles"),
+    )
+    app.config["RATE_LIMIT_FILE"] = os.getenv(
+        "RATE_LIMIT_FILE",
+        os.path.join(app.instance_path, "rate_limits.sqlite3"),
+    )
     if (
         app.config["SECRET_KEY"] == DEFAULT_SECRET_KEY
         and not app.debug
@@ -217,6 +225,24 @@ def create_app():
 
     db.init_app(app)
     migrate.init_app(app, db)
+    from .services.metrics import init_metrics
+    init_metrics(app)
+    from .services.query_budget import init_query_budget
+    init_query_budget(app)
+    from .services.server_timing import init_server_timing
+    init_server_timing(app)
+    from .services.request_performance import init_request_performance
+    init_request_performance(app)
+    from .services.request_profiling import init_request_profiling
+    init_request_profiling(app)
+    from .services.allocation_profiling import init_allocation_profiling
+    init_allocation_profiling(app)
+    from .services.rate_limits import init_rate_limits
+    init_rate_limits(app)
+    from .services.mail_outbox import init_mail_outbox
+    init_mail_outbox(app)
+    from .services.database_busy import init_database_busy_responses
+    init_database_busy_responses(app)
     csrf.init_app(app)
     login_manager.init_app(app)
 
@@ -438,4 +464,134 @@ def create_app():
 
         db.session.commit()
         click.echo("Seeded dev auth users: admin, staff, viewer, inactive, and locked.")
+
+    @app.cli.command("mail-worker")
+    @click.option("--once", is_flag=True, help="Send what is due now, then exit.")
+    @click.option("--status", "show_status", is_flag=True, help="Print outbox counts and exit.")
+    def mail_worker_command(once, show_status):
+        from .services.mail_outbox import run_outbox_worker, summarize_outbox
+
+        if show_status:
+            summary = summarize_outbox()
+            click.echo(
+                ", ".join(f"{status}: {count}" for status, count in summary["counts"].items())
+            )
+            if summary["oldest_queued_seconds"] is not None:
+                click.echo(f"Oldest queued message: {summary['oldest_queued_seconds']:.0f}s")
+            return
+        run_outbox_worker(app, once=once, echo=click.echo)
+
+    @app.cli.command("rebuild-venue-item-state")
+    def rebuild_venue_item_state_command():
+        from .services.venue_item_state import rebuild_venue_item_state
+
+        summary = rebuild_venue_item_state()
+        db.session.commit()
+        click.echo(
+            "Rebuilt venue item state: "
+            f"{summary['state_rows']} venue/item rows "
+            f"({summary['status_rows']} statuses, {summary['count_rows']} counts)."
+        )
+
+    @app.cli.command("rebuild-venue-rollups")
+    def rebuild_venue_rollups_command():
+        from .services.venue_rollups import rebuild_venue_rollups
+
+        venue_count = rebuild_venue_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt dashboard rollups for {venue_count} venue(s).")
+
+    @app.cli.command("rebuild-item-network-rollups")
+    def rebuild_item_network_rollups_command():
+        from .services.item_network_rollups import rebuild_item_network_rollups
+
+        item_count = rebuild_item_network_rollups()
+        db.session.commit()
+        click.echo(f"Rebuilt network rollups for {item_count} item(s).")
+
+    @app.cli.command("rebuild-inventory-activity")
+    def rebuild_inventory_activity_command():
+        from .services.inventory_activity import rebuild_inventory_activity_events
+
+        summary = rebuild_inventory_activity_events()
+        db.session.commit()
+        click.echo(
+            "Rebuilt inventory activity log: "
+            f"{summary['status_events']} status change(s), "
+            f"{summary['count_events']} count change(s)."
+        )
+
+    @app.cli.command("perf-seed")
+    @click.option(
+        "--venues",
+        default=20,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Venues to create.",
+    )
+    @click.option(
+        "--items",
+        default=150,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Items to create.",
+    )
+    @click.option(
+        "--days",
+        default=365,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Days of history.",
+    )
+    @click.option(
+        "--checks-per-day",
+        default=1,
+        show_default=True,
+        type=click.IntRange(min=1),
+        help="Quick checks (status check plus count session) per venue per day.",
+    )
+    @click.option("--seed", default=20261018, show_default=True, type=int, help="Random seed.")
+    @click.option(
+        "--rebuild/--no-rebuild",
+        default=True,
+        show_default=True,
+        help="Rebuild the derived state, rollup and activity tables afterwards.",
+    )
+    def perf_seed_command(venues, items, days, checks_per_day, seed, rebuild):
+        """Bulk-load a deterministic, production-sized dataset for performance work."""
+        import time
+
+        from .services.perf_seed import PerfSeedError, rebuild_derived_tables, seed_perf_dataset
+
+        def report(label, rows, elapsed, done):
+            rate = rows / elapsed if elapsed > 0 else 0
+            prefix = "" if done else "  ... "
+            click.echo(f"{prefix}{label}: {rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+
+        started = time.perf_counter()
+        try:
+            summary = seed_perf_dataset(
+                venues=venues,
+                items=items,
+                days=days,
+                checks_per_day=checks_per_day,
+                seed=seed,
+                progress=report,
+            )
+        except PerfSeedError as exc:
+            db.session.rollback()
+            raise click.ClickException(str(exc)) from exc
+        db.session.commit()
+
+        if rebuild:
+            rebuild_derived_tables(
+                lambda label, elapsed: click.echo(f"Rebuilt {label} in {elapsed:.1f}s.")
+            )
+            db.session.commit()
+
+        click.echo(
+            f"Seeded {summary['venues']} venue(s), {summary['items']} item(s) and "
+            f"{summary['tracked_pairs']:,} tracked venue/item pair(s) "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
     return app
@@ -131,7 +131,33 @@ class Config:
     FEEDBACK_SUBMISSION_WINDOW_SECONDS = max(
         60, _env_int("FEEDBACK_SUBMISSION_WINDOW_SECONDS", 300)
     )
+    # memory | counter | database | file: where login, password and feedback throttles count.
+    RATE_LIMIT_BACKEND = (os.getenv("RATE_LIMIT_BACKEND") or "memory").strip().lower()
+    RATE_LIMIT_SUBWINDOWS = min(60, max(1, _env_int("RATE_LIMIT_SUBWINDOWS", 10)))
+    RATE_LIMIT_MAX_KEYS = max(1_000, _env_int("RATE_LIMIT_MAX_KEYS", 100_000))
+    RATE_LIMIT_SWEEP_SECONDS = max(5, _env_int("RATE_LIMIT_SWEEP_SECONDS", 60))
     VENUE_FILE_MAX_BYTES = max(1, _env_int("VENUE_FILE_MAX_BYTES", 25 * 1024 * 1024))
+    # off | log | raise; unset means raise under TESTING, log in development, off elsewhere.
+    QUERY_BUDGET_MODE = (os.getenv("QUERY_BUDGET_MODE") or "").strip().lower() or None
+    QUERY_BUDGET_MAX_REPEATS = max(2, _env_int("QUERY_BUDGET_MAX_REPEATS", 5))
+    # off | admins | all: who receives Server-Timing response headers.
+    SERVER_TIMING_MODE = (os.getenv("SERVER_TIMING_MODE") or "off").strip().lower()
+    # Lock and pool timeouts answer 503 + Retry-After + X-Database-Busy instead of a plain 500.
+    DATABASE_BUSY_RESPONSES_ENABLED = _env_flag("DATABASE_BUSY_RESPONSES_ENABLED", default=True)
+    METRICS_ENABLED = _env_flag("METRICS_ENABLED", default=True)
+    # Scrapers send `Authorization: Bearer <token>`; without a token only admins can read /metrics.
+    METRICS_TOKEN = (os.getenv("METRICS_TOKEN") or "").strip()
+    # Shared by every gunicorn worker; clear it before starting the server.
+    METRICS_MULTIPROC_DIR = (os.getenv("METRICS_MULTIPROC_DIR") or "").strip() or None
+    METRICS_FLUSH_SECONDS = max(1, _env_int("METRICS_FLUSH_SECONDS", 1))
+    # Requests slower than PERF_SAMPLE_SLOW_MS are always journaled; the rest at
+    # PERF_SAMPLE_RATE_PERCENT, weighted back up when Admin > Performance summarizes them.
+    PERF_SAMPLES_ENABLED = _env_flag("PERF_SAMPLES_ENABLED", default=True)
+    PERF_SAMPLE_SLOW_MS = max(1, _env_int("PERF_SAMPLE_SLOW_MS", 500))
+    PERF_SAMPLE_RATE_PERCENT = min(100, max(0, _env_int("PERF_SAMPLE_RATE_PERCENT", 1)))
+    PERF_SAMPLE_RETENTION_DAYS = max(1, _env_int("PERF_SAMPLE_RETENTION_DAYS", 14))
+    REQUEST_PROFILING_ENABLED = _env_flag("REQUEST_PROFILING_ENABLED", default=True)
+    REQUEST_PROFILE_KEEP = max(1, _env_int("REQUEST_PROFILE_KEEP", 50))
     AUTH_ALLOW_DEV_QUICK_LOGIN = _env_flag(
         "AUTH_ALLOW_DEV_QUICK_LOGIN",
         default=is_development_environment(),
@@ -151,8 +177,22 @@ class Config:
     MAIL_DEFAULT_SENDER = (os.getenv("MAIL_DEFAULT_SENDER") or "").strip()
     MAIL_SUPPRESS_SEND = _env_flag("MAIL_SUPPRESS_SEND", default=False)
     MAIL_TIMEOUT_SECONDS = max(1, _env_int("MAIL_TIMEOUT_SECONDS", 10))
+    MAIL_SMTP_IDLE_SECONDS = max(0, _env_int("MAIL_SMTP_IDLE_SECONDS", 30))
+    MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION = max(
+        1, _env_int("MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION", 100)
+    )
     MAIL_CAPTURE_UI_URL = (
         (os.getenv("MAIL_CAPTURE_UI_URL") or "http://127.0.0.1:8025").strip()
         if is_development_environment()
         else (os.getenv("MAIL_CAPTURE_UI_URL") or "").strip()
     )
+    MAIL_OUTBOX_ENABLED = _env_flag("MAIL_OUTBOX_ENABLED", default=True)
+    MAIL_OUTBOX_DISPATCHER = (os.getenv("MAIL_OUTBOX_DISPATCHER") or "thread").strip().lower()
+    MAIL_OUTBOX_MAX_ATTEMPTS = max(1, _env_int("MAIL_OUTBOX_MAX_ATTEMPTS", 6))
+    MAIL_OUTBOX_RETRY_SECONDS = max(1, _env_int("MAIL_OUTBOX_RETRY_SECONDS", 30))
+    MAIL_OUTBOX_POLL_SECONDS = max(1, _env_int("MAIL_OUTBOX_POLL_SECONDS", 5))
+    MAIL_OUTBOX_BATCH_SIZE = max(1, _env_int("MAIL_OUTBOX_BATCH_SIZE", 20))
+    MAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS = max(
+        60, _env_int("MAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS", 300)
+    )
+    MAIL_OUTBOX_RETENTION_DAYS = max(1, _env_int("MAIL_OUTBOX_RETENTION_DAYS", 14))
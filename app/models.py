@@ -1,5 +1,8 @@
 from datetime import datetime, timezone
+
 from flask_login import UserMixin
+from sqlalchemy import DDL, event
+
 from . import db
 
 VALID_ROLES = ("viewer", "staff", "admin")
@@ -197,6 +200,12 @@ class Venue(db.Model):
     stale_threshold_days = db.Column(db.Integer, nullable=True)
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
 
     files = db.relationship(
         "VenueFile",
@@ -319,6 +328,12 @@ class Item(db.Model):
     active = db.Column(db.Boolean, default=True, nullable=False)
 
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
 
     parent_item = db.relationship(
         "Item",
@@ -369,10 +384,18 @@ class VenueItem(db.Model):
 
     active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
 
     # Prevent duplicate “venue has this item” rows
     __table_args__ = (
         db.UniqueConstraint("venue_id", "item_id", name="uq_venue_item"),
+        db.Index("ix_venue_items_venue_active", "venue_id", "active"),
+        db.Index("ix_venue_items_item_active", "item_id", "active"),
     )
 
 
@@ -401,6 +424,11 @@ class Check(db.Model):
     # later: user_id (when we add login)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
+    # Latest-check lookups filter by venue and order by (created_at, id).
+    __table_args__ = (
+        db.Index("ix_checks_venue_created", "venue_id", "created_at", "id"),
+    )
+
 
 class CheckLine(db.Model):
     __tablename__ = "check_lines"
@@ -415,6 +443,7 @@ class CheckLine(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("check_id", "item_id", name="uq_checkline_check_item"),
+        db.Index("ix_check_lines_item_check", "item_id", "check_id"),
     )
 
 
@@ -426,6 +455,10 @@ class CountSession(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
+    __table_args__ = (
+        db.Index("ix_count_sessions_venue_created", "venue_id", "created_at", "id"),
+    )
+
 
 class CountLine(db.Model):
     __tablename__ = "count_lines"
@@ -437,6 +470,7 @@ class CountLine(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint("count_session_id", "item_id", name="uq_countline_session_item"),
+        db.Index("ix_count_lines_item_session", "item_id", "count_session_id"),
     )
 
 
@@ -459,6 +493,207 @@ class VenueItemCount(db.Model):
     )
 
 
+class VenueItemState(db.Model):
+    """Latest status and count signal per venue/item, maintained at write time."""
+
+    __tablename__ = "venue_item_state"
+
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False, index=True)
+    item_id = db.Column(db.Integer, db.ForeignKey("items.id"), nullable=False, index=True)
+
+    status = db.Column(db.String(20), nullable=True)
+    status_updated_at = db.Column(db.DateTime, nullable=True)
+    status_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    status_check_id = db.Column(db.Integer, db.ForeignKey("checks.id"), nullable=True)
+
+    raw_count = db.Column(db.Integer, nullable=True)
+    count_updated_at = db.Column(db.DateTime, nullable=True)
+    count_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    count_session_id = db.Column(db.Integer, db.ForeignKey("count_sessions.id"), nullable=True)
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint("venue_id", "item_id", name="uq_venue_item_state"),
+    )
+
+
+class InventoryActivityEvent(db.Model):
+    """One recorded status or count change, appended when a quick check is saved."""
+
+    __tablename__ = "inventory_activity_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # status | raw_count
+    event_type = db.Column(db.String(20), nullable=False)
+    # check id for status events, count session id for count events
+    source_id = db.Column(db.Integer, nullable=False)
+
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey("items.id"), nullable=False, index=True)
+    actor_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+
+    old_status = db.Column(db.String(20), nullable=True)
+    new_status = db.Column(db.String(20), nullable=True)
+    old_raw_count = db.Column(db.Integer, nullable=True)
+    new_raw_count = db.Column(db.Integer, nullable=True)
+    changed_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    # Display names at write time; renames update them in place.
+    venue_name = db.Column(db.String(120), nullable=False)
+    item_name = db.Column(db.String(120), nullable=False)
+    actor_name = db.Column(db.String(255), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "event_type", "source_id", "item_id", name="uq_inventory_activity_event_source"
+        ),
+        db.Index("ix_inventory_activity_events_venue_changed", "venue_id", "changed_at"),
+        db.Index("ix_inventory_activity_events_actor_changed", "actor_user_id", "changed_at"),
+        db.Index("ix_inventory_activity_events_type_changed", "event_type", "changed_at"),
+    )
+
+
+ACTIVITY_SEARCH_FTS_TABLE = "inventory_activity_events_fts"
+
+
+def activity_search_document_sql(prefix=""):
+    """SQL text of the searchable document for one activity event row.
+
+    Built only from immutable functions so Postgres can index it, and shared by
+    the SQLite FTS triggers (`new.` / `old.` prefixes) and the search queries.
+    """
+    return (
+        f"{prefix}venue_name || ' ' || {prefix}item_name || ' ' || {prefix}actor_name || ' ' || "
+        f"CASE WHEN {prefix}event_type = 'status' THEN "
+        f"'status ' || replace(coalesce({prefix}old_status, 'not checked'), '_', ' ') "
+        "|| ' ' || "
+        f"replace(coalesce({prefix}new_status, ''), '_', ' ') "
+        f"ELSE 'raw count ' || coalesce(CAST({prefix}old_raw_count AS TEXT), 'no prior count') "
+        "|| ' ' || "
+        f"coalesce(CAST({prefix}new_raw_count AS TEXT), '') END"
+    )
+
+
+def activity_search_tsvector_sql(prefix=""):
+    return (
+        "to_tsvector('simple', regexp_replace("
+        f"{activity_search_document_sql(prefix)}, '[^[:alnum:]]+', ' ', 'g'))"
+    )
+
+
+def _activity_search_sqlite_ddl():
+    new_document = activity_search_document_sql("new.")
+    old_document = activity_search_document_sql("old.")
+    table = ACTIVITY_SEARCH_FTS_TABLE
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(document, content='')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON inventory_activity_events BEGIN "
+        f"INSERT INTO {table}(rowid, document) VALUES (new.id, {new_document}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON inventory_activity_events BEGIN "
+        f"INSERT INTO {table}({table}, rowid, document) "
+        f"VALUES ('delete', old.id, {old_document}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON inventory_activity_events BEGIN "
+        f"INSERT INTO {table}({table}, rowid, document) VALUES ('delete', old.id, {old_document}); "
+        f"INSERT INTO {table}(rowid, document) VALUES (new.id, {new_document}); END",
+    ]
+
+
+for _statement in _activity_search_sqlite_ddl():
+    event.listen(
+        InventoryActivityEvent.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="sqlite"),
+    )
+event.listen(
+    InventoryActivityEvent.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_inventory_activity_events_search "
+        f"ON inventory_activity_events USING gin ({activity_search_tsvector_sql()})"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    InventoryActivityEvent.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {ACTIVITY_SEARCH_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+class VenueRollup(db.Model):
+    """Per-venue dashboard totals, refreshed whenever their inputs change."""
+
+    __tablename__ = "venue_rollups"
+
+    id = db.Column(db.Integer, primary_key=True)
+    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False, unique=True)
+
+    total_tracked = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    ok_count = db.Column(db.Integer, nullable=False, default=0)
+    low_count = db.Column(db.Integer, nullable=False, default=0)
+    out_count = db.Column(db.Integer, nullable=False, default=0)
+    not_checked_count = db.Column(db.Integer, nullable=False, default=0)
+    low_quantity_count = db.Column(db.Integer, nullable=False, default=0)
+    low_singleton_count = db.Column(db.Integer, nullable=False, default=0)
+    out_quantity_count = db.Column(db.Integer, nullable=False, default=0)
+    out_singleton_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity_count_total = db.Column(db.Integer, nullable=False, default=0)
+    singleton_current_total = db.Column(db.Integer, nullable=False, default=0)
+    total_par = db.Column(db.Integer, nullable=False, default=0)
+    par_item_count = db.Column(db.Integer, nullable=False, default=0)
+    notes_count = db.Column(db.Integer, nullable=False, default=0)
+    last_updated_at = db.Column(db.DateTime, nullable=True)
+
+    refreshed_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+class ItemNetworkRollup(db.Model):
+    """Cross-venue totals per item for the supplies audit and venue profile."""
+
+    __tablename__ = "item_network_rollups"
+
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey("items.id"), nullable=False, unique=True)
+
+    tracked_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    counted_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    missing_count_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    zero_count_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    total_raw_count = db.Column(db.Integer, nullable=False, default=0)
+    singleton_present_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    singleton_missing_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    singleton_damaged_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    total_par_count = db.Column(db.Integer, nullable=False, default=0)
+    par_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    # Latest count-history totals, used by the venue profile network summary.
+    signal_count_total = db.Column(db.Integer, nullable=False, default=0)
+    signal_counted_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    singleton_checked_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    singleton_issue_venue_count = db.Column(db.Integer, nullable=False, default=0)
+    last_count_updated_at = db.Column(db.DateTime, nullable=True)
+    # One compact entry per active venue assignment, expanded by the supplies audit.
+    venue_details_json = db.Column(db.Text, nullable=False, default="[]")
+
+    refreshed_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
 class OrderBatch(db.Model):
     __tablename__ = "order_batches"
 
@@ -536,3 +771,75 @@ class OrderLine(db.Model):
     batch = db.relationship("OrderBatch", back_populates="lines")
     item = db.relationship("Item", foreign_keys=[item_id])
     venue = db.relationship("Venue", foreign_keys=[venue_id])
+
+
+class RequestPerformanceSample(db.Model):
+    """One timed request: every request over the slow threshold plus a random sample of the rest."""
+
+    __tablename__ = "request_performance_samples"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recorded_at = db.Column(db.DateTime, nullable=False, index=True)
+    endpoint = db.Column(db.String(120), nullable=False)
+    method = db.Column(db.String(10), nullable=False)
+    # Hash of the sorted URL and query arguments; the readable form is kept in args_summary.
+    args_fingerprint = db.Column(db.String(16), nullable=False)
+    args_summary = db.Column(db.String(255), nullable=False, default="")
+    user_role = db.Column(db.String(20), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    total_ms = db.Column(db.Float, nullable=False)
+    db_ms = db.Column(db.Float, nullable=False, default=0.0)
+    statement_count = db.Column(db.Integer, nullable=False, default=0)
+    response_bytes = db.Column(db.Integer, nullable=True)
+    # slow | sampled
+    reason = db.Column(db.String(10), nullable=False)
+    # Requests this row stands for: 1 when slow, 100 / PERF_SAMPLE_RATE_PERCENT when sampled.
+    weight = db.Column(db.Float, nullable=False, default=1.0)
+    top_statements_json = db.Column(db.Text, nullable=False, default="[]")
+
+    __table_args__ = (
+        db.Index("ix_request_performance_samples_endpoint_recorded", "endpoint", "recorded_at"),
+    )
+
+
+class RateLimitCounter(db.Model):
+    """Attempts in one bucket/key during one sub-window; see app/services/rate_limits.py."""
+
+    __tablename__ = "rate_limit_counters"
+
+    bucket = db.Column(db.String(64), primary_key=True)
+    # Client key (email, IP, user id); keys over 255 characters are stored as a hash.
+    key = db.Column(db.String(255), primary_key=True)
+    # Unix seconds at which the sub-window starts.
+    window_start = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # Unix seconds after which the row no longer counts toward any window.
+    expires_at = db.Column(db.BigInteger, nullable=False, index=True)
+
+
+class OutboxMessage(db.Model):
+    """One transactional email waiting for, or done with, the background dispatcher."""
+
+    __tablename__ = "outbox_messages"
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    # queued | sending | sent | dead
+    status = db.Column(db.String(16), nullable=False, default="queued")
+    to_address = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    # Bodies are cleared once the message is sent; they can hold codes and reset links.
+    body_text = db.Column(db.Text, nullable=True)
+    body_html = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    # Messages past this time (for example an expired login code) are dead-lettered unsent.
+    expires_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_outbox_messages_status_next_attempt", "status", "next_attempt_at"),
+    )
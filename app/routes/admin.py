@@ -2,12 +2,14 @@ import hmac
 
 from flask import (
     Blueprint,
+    abort,
     current_app,
     flash,
     jsonify,
     redirect,
     render_template,
     request,
+    send_file,
     session,
     url_for,
 )
@@ -24,6 +26,7 @@ from app.models import (
     User,
     Venue,
     VenueItem,
+    VenueItemState,
     normalize_item_category,
     normalize_tracking_mode,
 )
@@ -38,16 +41,26 @@ from app.services.account_security import (
     update_managed_user,
 )
 from app.services.admin_hub import (
+    build_admin_allocations_view_model,
     build_admin_history_view_model,
     build_admin_overview_view_model,
+    build_admin_performance_view_model,
+    build_admin_profile_detail_view_model,
+    build_admin_profiles_view_model,
     build_admin_user_audit_view_model,
     build_admin_user_detail_view_model,
     build_admin_user_list_view_model,
 )
+from app.services.allocation_profiling import (
+    ALL_ENDPOINTS,
+    AllocationProfileError,
+    start_allocation_window,
+    stop_allocation_window,
+)
 from app.services.csv_exports import (
     EXPORT_SCOPE_FILTERED,
-    build_csv_response,
     build_dated_csv_filename,
+    build_streaming_csv_response,
     normalize_export_scope,
     sanitize_csv_cell,
 )
@@ -55,6 +68,10 @@ from app.services.feedback import (
     FEEDBACK_REVIEW_SESSION_KEY,
     build_feedback_inbox_view_model,
 )
+from app.services.inventory_activity import (
+    delete_inventory_activity_events,
+    sync_item_activity_name,
+)
 from app.services.inventory_rules import (
     ITEM_HARD_DELETE_WINDOW_DAYS,
     InventoryRuleError,
@@ -70,14 +87,32 @@ from app.services.inventory_rules import (
     resolve_effective_stale_threshold_days,
     sync_item_venue_assignments,
 )
+from app.services.item_network_rollups import (
+    delete_item_network_rollups,
+    refresh_item_network_rollups,
+)
 from app.services.login_verification import revoke_all_trusted_devices_for_user
 from app.services.mail_service import (
     MAIL_STATUS_DISABLED,
     MAIL_STATUS_FAILED,
+    MAIL_STATUS_QUEUED,
     MAIL_STATUS_SENT,
     MAIL_STATUS_SUPPRESSED,
     send_password_action_email,
 )
+from app.services.request_profiling import (
+    RequestProfileError,
+    clear_sampling_rule,
+    request_profile_path,
+    save_sampling_rule,
+)
+from app.services.search_index import (
+    CONTAINS_MATCH,
+    SearchField,
+    get_search_index,
+    inventory_search_generation,
+    normalize_search_query,
+)
 from app.services.spreadsheet_compat import (
     CUSTOM_SETUP_GROUP_OPTION_VALUE,
     SpreadsheetCompatibilityError,
@@ -85,6 +120,7 @@ from app.services.spreadsheet_compat import (
     get_distinct_setup_groups,
     resolve_setup_group_selection,
 )
+from app.services.venue_rollups import refresh_item_venue_rollups, refresh_venue_rollups
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -114,6 +150,22 @@ ITEM_CATEGORY_FORM_OPTIONS = [
     ("other", "Other"),
 ]
 ITEM_CATALOG_PER_PAGE = 50
+ITEM_CATALOG_SEARCH_FIELDS = tuple(
+    SearchField(name, CONTAINS_MATCH)
+    for name in (
+        "name",
+        "parent_name",
+        "unit",
+        "setup_group_code",
+        "setup_group_label",
+        "setup_group_display",
+        "category",
+        "family_organizer",
+        "family_member",
+        "direct_item",
+        "tracking_mode",
+    )
+)
 ITEM_CATALOG_EXPORT_HEADERS = (
     "Item Name",
     "Active",
@@ -194,6 +246,10 @@ def flash_password_email_delivery(user, delivery_result):
         flash(f"Password email sent to {user.email}.", "success")
         return
 
+    if delivery_result.status == MAIL_STATUS_QUEUED:
+        flash(f"Password email queued for {user.email}.", "success")
+        return
+
     if delivery_result.status == MAIL_STATUS_SUPPRESSED:
         flash("Mail sending is suppressed; no password email was sent.", "warning")
         return
@@ -369,10 +425,9 @@ def parse_item_catalog_filters(source):
     }
 
 
-def item_matches_catalog_filters(item, filters):
+def item_matches_catalog_scope(item, filters):
     status = filters["status"]
     structure = filters["structure"]
-    query = filters["q"].lower()
 
     if status == "active" and not item.active:
         return False
@@ -387,11 +442,11 @@ def item_matches_catalog_filters(item, filters):
         return False
     if structure == "singleton_asset" and (item.is_group_parent or not item.is_singleton_asset):
         return False
+    return True
 
-    if not query:
-        return True
 
-    search_haystack = [
+def build_item_catalog_search_values(item):
+    return (
         item.name or "",
         item.parent_item.name if item.parent_item else "",
         item.unit or "",
@@ -403,8 +458,28 @@ def item_matches_catalog_filters(item, filters):
         "family member" if item.parent_item_id is not None else "",
         "direct item" if not item.is_group_parent and item.parent_item_id is None else "",
         "singleton asset" if item.is_singleton_asset else "quantity",
+    )
+
+
+def filter_item_catalog(items, filters, *, search_generation=None):
+    query = normalize_search_query(filters["q"])
+    if query:
+        if search_generation is None:
+            search_generation = inventory_search_generation()
+        search_index = get_search_index(
+            "item_catalog",
+            (search_generation, len(items)),
+            lambda: [build_item_catalog_search_values(item) for item in items],
+            ITEM_CATALOG_SEARCH_FIELDS,
+        )
+        search_ranks = search_index.ranks(query)
+    else:
+        search_ranks = [0] * len(items)
+    return [
+        item
+        for search_rank, item in zip(search_ranks, items)
+        if search_rank is not None and item_matches_catalog_scope(item, filters)
     ]
-    return any(query in value.lower() for value in search_haystack if value)
 
 
 def build_item_catalog_pagination(rows, page, per_page=ITEM_CATALOG_PER_PAGE):
@@ -446,8 +521,12 @@ def build_item_catalog_query_args(filters, *, page=None):
     return args
 
 
-def build_item_catalog_view_model(all_items, catalog_filters):
-    filtered_items = [item for item in all_items if item_matches_catalog_filters(item, catalog_filters)]
+def build_item_catalog_view_model(all_items, catalog_filters, *, search_generation=None):
+    filtered_items = filter_item_catalog(
+        all_items,
+        catalog_filters,
+        search_generation=search_generation,
+    )
     filtered_rows = build_item_rows(filtered_items)
     paginated_catalog = build_item_catalog_pagination(filtered_rows, catalog_filters["page"])
     pagination = paginated_catalog["pagination"]
@@ -474,30 +553,26 @@ def build_item_catalog_view_model(all_items, catalog_filters):
 
 
 def build_item_catalog_export_rows(item_rows):
-    rows = []
     for item, _depth in item_rows:
         tracking_mode = "Singleton Asset" if item.is_singleton_asset else "Quantity"
-        rows.append(
-            {
-                "Item Name": sanitize_csv_cell(item.name or ""),
-                "Active": "Yes" if item.active else "No",
-                "Tracking Mode": tracking_mode,
-                "Category": sanitize_csv_cell(
-                    normalize_item_category(item.item_category or item.item_type)
-                ),
-                "Parent Item": sanitize_csv_cell(item.parent_item.name if item.parent_item else ""),
-                "Setup Group Code": sanitize_csv_cell(item.setup_group_code or ""),
-                "Setup Group Label": sanitize_csv_cell(item.setup_group_label or ""),
-                "Default Par": "" if item.default_par_level is None else item.default_par_level,
-                "Item Stale Override": (
-                    "" if item.stale_threshold_days is None else item.stale_threshold_days
-                ),
-                "Created At": (
-                    item.created_at.strftime("%Y-%m-%d") if item.created_at else ""
-                ),
-            }
-        )
-    return rows
+        yield {
+            "Item Name": sanitize_csv_cell(item.name or ""),
+            "Active": "Yes" if item.active else "No",
+            "Tracking Mode": tracking_mode,
+            "Category": sanitize_csv_cell(
+                normalize_item_category(item.item_category or item.item_type)
+            ),
+            "Parent Item": sanitize_csv_cell(item.parent_item.name if item.parent_item else ""),
+            "Setup Group Code": sanitize_csv_cell(item.setup_group_code or ""),
+            "Setup Group Label": sanitize_csv_cell(item.setup_group_label or ""),
+            "Default Par": "" if item.default_par_level is None else item.default_par_level,
+            "Item Stale Override": (
+                "" if item.stale_threshold_days is None else item.stale_threshold_days
+            ),
+            "Created At": (
+                item.created_at.strftime("%Y-%m-%d") if item.created_at else ""
+            ),
+        }
 
 
 def build_item_catalog_export_filename(*, scope):
@@ -798,6 +873,7 @@ def users():
                 "success",
             )
             delivery_result = send_password_action_email(user, issued_link)
+            db.session.commit()
             flash_password_email_delivery(user, delivery_result)
             if current_app.config["AUTH_DEV_EXPOSE_PASSWORD_LINKS"]:
                 flash(build_dev_password_link_message(user, issued_link), "success")
@@ -930,6 +1006,7 @@ def issue_user_password_link(user_id):
         purpose_label = "setup" if issued_link.purpose == "password_setup" else "reset"
         flash(f"Password {purpose_label} link prepared for {user.email}.", "success")
         delivery_result = send_password_action_email(user, issued_link)
+        db.session.commit()
         flash_password_email_delivery(user, delivery_result)
         if current_app.config["AUTH_DEV_EXPOSE_PASSWORD_LINKS"]:
             flash(build_dev_password_link_message(user, issued_link), "success")
@@ -1031,6 +1108,8 @@ def tracking_setup():
                         subject_label=selected_item.name,
                         details=summary,
                     )
+                    refresh_item_venue_rollups([selected_item.id])
+                    refresh_item_network_rollups([selected_item.id])
                     db.session.commit()
                     flash("Bulk tracking setup saved.", "success")
                 else:
@@ -1109,6 +1188,105 @@ def history():
     )
 
 
+@admin_bp.get("/performance")
+@roles_required("admin")
+def performance():
+    return render_template(
+        "admin/performance.html",
+        admin_page_key="performance",
+        performance=build_admin_performance_view_model(
+            days=request.args.get("days"),
+            endpoint=request.args.get("view"),
+        ),
+    )
+
+
+@admin_bp.get("/profiles")
+@roles_required("admin")
+def profiles():
+    return render_template(
+        "admin/profiles.html",
+        admin_page_key="profiles",
+        profiles=build_admin_profiles_view_model(current_user),
+    )
+
+
+@admin_bp.post("/profiles/sampling")
+@roles_required("admin")
+def update_profile_sampling():
+    if request.form.get("action") == "clear":
+        clear_sampling_rule()
+        flash("Profile sampling stopped.", "success")
+        return redirect(url_for("admin.profiles"))
+    try:
+        rule = save_sampling_rule(request.form.get("endpoint"), request.form.get("percent"))
+    except RequestProfileError as exc:
+        flash(str(exc), "error")
+    else:
+        flash(f"Profiling {rule['percent']:g}% of {rule['endpoint']} requests.", "success")
+    return redirect(url_for("admin.profiles"))
+
+
+@admin_bp.get("/profiles/<request_id>")
+@roles_required("admin")
+def profile_detail(request_id):
+    try:
+        detail = build_admin_profile_detail_view_model(
+            request_id,
+            sort=request.args.get("sort"),
+            search=request.args.get("q"),
+        )
+    except RequestProfileError:
+        abort(404)
+    return render_template(
+        "admin/profile_detail.html",
+        admin_page_key="profiles",
+        profile=detail,
+    )
+
+
+@admin_bp.get("/profiles/<request_id>/download")
+@roles_required("admin")
+def download_profile(request_id):
+    try:
+        path = request_profile_path(request_id)
+    except RequestProfileError:
+        abort(404)
+    return send_file(
+        path,
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=f"profile-{request_id}.prof",
+    )
+
+
+@admin_bp.get("/allocations")
+@roles_required("admin")
+def allocations():
+    return render_template(
+        "admin/allocations.html",
+        admin_page_key="allocations",
+        allocations=build_admin_allocations_view_model(),
+    )
+
+
+@admin_bp.post("/allocations/window")
+@roles_required("admin")
+def update_allocation_window():
+    if request.form.get("action") == "stop":
+        stop_allocation_window()
+        flash("Allocation tracing stopped.", "success")
+        return redirect(url_for("admin.allocations"))
+    try:
+        mode = start_allocation_window(request.form.get("endpoint"), request.form.get("minutes"))
+    except AllocationProfileError as exc:
+        flash(str(exc), "error")
+    else:
+        target = "all endpoints" if mode["endpoint"] == ALL_ENDPOINTS else mode["endpoint"]
+        flash(f"Tracing allocations for {target}.", "success")
+    return redirect(url_for("admin.allocations"))
+
+
 @admin_bp.route("/items", methods=["GET", "POST"])
 @roles_required("admin")
 def items():
@@ -1173,16 +1351,23 @@ def items():
                     subject_label=item.name,
                     details=assignment_summary,
                 )
+            refresh_item_venue_rollups([item.id])
+            refresh_item_network_rollups([item.id])
             db.session.commit()
             flash("Item added.", "success")
             return redirect(url_for("admin.items", **build_item_catalog_query_args(catalog_filters, page=catalog_filters["page"])))
 
+    search_generation = inventory_search_generation() if catalog_filters["q"] else None
     all_items = (
         Item.query.options(selectinload(Item.parent_item), selectinload(Item.child_items))
         .order_by(Item.sort_order.asc(), Item.name.asc(), Item.id.asc())
         .all()
     )
-    catalog_view = build_item_catalog_view_model(all_items, catalog_filters)
+    catalog_view = build_item_catalog_view_model(
+        all_items,
+        catalog_filters,
+        search_generation=search_generation,
+    )
 
     if request.method == "GET" and request.args.get("catalog_partial") == "1":
         return jsonify(
@@ -1223,6 +1408,8 @@ def items():
 def export_item_catalog():
     catalog_filters = parse_item_catalog_filters(request.args)
     scope = normalize_export_scope(request.args.get("scope"), default=EXPORT_SCOPE_FILTERED)
+    filtered = scope == EXPORT_SCOPE_FILTERED
+    search_generation = inventory_search_generation() if filtered and catalog_filters["q"] else None
     all_items = (
         Item.query.options(selectinload(Item.parent_item), selectinload(Item.child_items))
         .order_by(Item.sort_order.asc(), Item.name.asc(), Item.id.asc())
@@ -1230,14 +1417,16 @@ def export_item_catalog():
     )
 
     export_items = all_items
-    if scope == EXPORT_SCOPE_FILTERED:
-        export_items = [
-            item for item in all_items if item_matches_catalog_filters(item, catalog_filters)
-        ]
+    if filtered:
+        export_items = filter_item_catalog(
+            all_items,
+            catalog_filters,
+            search_generation=search_generation,
+        )
 
     csv_rows = build_item_catalog_export_rows(build_item_rows(export_items))
     filename = build_item_catalog_export_filename(scope=scope)
-    return build_csv_response(ITEM_CATALOG_EXPORT_HEADERS, csv_rows, filename)
+    return build_streaming_csv_response(ITEM_CATALOG_EXPORT_HEADERS, csv_rows, filename)
 
 
 @admin_bp.route("/items/<int:item_id>/edit", methods=["GET", "POST"])
@@ -1325,6 +1514,10 @@ def edit_item(item_id):
                     subject_label=item.name,
                     details=assignment_summary,
                 )
+            if "name" in changed_fields:
+                sync_item_activity_name(item)
+            refresh_item_venue_rollups([item.id])
+            refresh_item_network_rollups([item.id])
             db.session.commit()
             flash("Item updated.", "success")
             return redirect(url_for("admin.items"))
@@ -1375,8 +1568,15 @@ def hard_delete_item(item_id):
         subject_id=item.id,
         subject_label=item_name,
     )
+    affected_venue_ids = [
+        link.venue_id for link in VenueItem.query.filter(VenueItem.item_id == item.id).all()
+    ]
     VenueItem.query.filter(VenueItem.item_id == item.id).delete(synchronize_session=False)
+    VenueItemState.query.filter(VenueItemState.item_id == item.id).delete(synchronize_session=False)
+    delete_item_network_rollups([item.id])
+    delete_inventory_activity_events(item_ids=[item.id])
     db.session.delete(item)
+    refresh_venue_rollups(affected_venue_ids)
     db.session.commit()
     flash(f"{item_name} was permanently deleted.", "success")
     return redirect(url_for("admin.items"))
@@ -1412,6 +1612,8 @@ def deactivate_item(item_id):
         subject_label=it.name,
         details={"changed_fields": ["active status"]},
     )
+    refresh_item_venue_rollups([it.id])
+    refresh_item_network_rollups([it.id])
     db.session.commit()
 
     flash(f"Item deactivated and removed from {len(venues)} venue(s).", "success")
@@ -1431,6 +1633,8 @@ def activate_item(item_id):
         subject_label=it.name,
         details={"changed_fields": ["active status"]},
     )
+    refresh_item_venue_rollups([it.id])
+    refresh_item_network_rollups([it.id])
     db.session.commit()
     flash("Item activated.", "success")
     return redirect(url_for("admin.items"))
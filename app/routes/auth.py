@@ -19,8 +19,8 @@ from werkzeug.utils import secure_filename
 
 from app import ACTIVE_UI_THEME_SESSION_KEY, AUTH_SESSION_VERSION_SESSION_KEY, db
 from app.models import (
-    LoginVerificationChallenge,
     VALID_THEME_PREFERENCES,
+    LoginVerificationChallenge,
     User,
     normalize_theme_preference,
 )
@@ -42,6 +42,7 @@ from app.services.account_security import (
     validate_password_not_reused,
 )
 from app.services.feedback import FEEDBACK_REVIEW_SESSION_KEY
+from app.services.inventory_activity import sync_actor_activity_name
 from app.services.inventory_status import ensure_utc
 from app.services.login_verification import (
     create_login_verification_challenge,
@@ -589,7 +590,7 @@ def login():
                 user_agent=request_user_agent,
                 reason_codes=verification_decision.reasons,
             )
-            if not delivery.sent:
+            if not delivery.accepted:
                 db.session.rollback()
                 _clear_pending_login_state()
                 _log_auth_security_event(
@@ -755,7 +756,7 @@ def resend_verify_login():
         reason_codes=tuple(session.get(PENDING_LOGIN_REASON_CODES_SESSION_KEY, [])),
         event_type="login_verification_resent",
     )
-    if not delivery.sent:
+    if not delivery.accepted:
         db.session.rollback()
         _clear_pending_login_state()
         flash("Unable to send a new verification code right now. Please sign in again.", "error")
@@ -797,6 +798,7 @@ def forgot_password():
         )
         if issued_link:
             delivery_result = send_password_action_email(user, issued_link)
+            db.session.commit()
             _log_auth_security_event(
                 "password_email_delivery",
                 email=user.email,
@@ -1003,6 +1005,7 @@ def update_profile():
         return redirect(url_for("auth.account"))
 
     current_user.display_name = display_name or None
+    sync_actor_activity_name(current_user)
     db.session.commit()
     flash("Profile updated.", "success")
     return redirect(url_for("auth.account"))
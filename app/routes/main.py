@@ -1,17 +1,26 @@
+import base64
+import json
 from datetime import datetime, time, timedelta, timezone
 
-from flask import Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file, url_for
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
 from flask_login import current_user
-from sqlalchemy import Integer, String, and_, case, cast, func, literal, or_, select, union_all
+from sqlalchemy import and_, func, literal, or_, select
 from sqlalchemy.orm import selectinload
 
 from app import db
 from app.authz import roles_required
 from app.models import (
-    Check,
-    CheckLine,
-    CountLine,
-    CountSession,
     Item,
     User,
     Venue,
@@ -22,9 +31,10 @@ from app.models import (
 from app.security import normalize_safe_redirect_path
 from app.services.csv_exports import (
     EXPORT_SCOPE_FILTERED,
-    build_csv_response,
+    build_streaming_csv_response,
     normalize_export_scope,
 )
+from app.services.inventory_activity import build_recent_activity_event_rows, select_activity_events
 from app.services.inventory_rules import (
     InventoryRuleError,
     copy_venue_tracking_setup,
@@ -34,11 +44,8 @@ from app.services.inventory_rules import (
     resolve_effective_stale_threshold_days,
     sync_venue_tracked_items,
 )
-from app.services.inventory_signals import (
-    build_latest_count_signal_map,
-    build_latest_status_signal_map,
-)
-from app.services.inventory_status import normalize_singleton_status, normalize_status
+from app.services.inventory_status import normalize_status
+from app.services.item_network_rollups import refresh_venue_item_network_rollups
 from app.services.notes import (
     NOTE_BODY_MAX_LENGTH,
     NOTE_TITLE_MAX_LENGTH,
@@ -47,20 +54,15 @@ from app.services.notes import (
     normalize_note_page,
     validate_note_fields,
 )
+from app.services.query_budget import query_budget
 from app.services.restocking import (
     RESTOCK_STATUS_META,
     build_restock_rows,
     normalize_restock_mode,
     normalize_restock_sort,
 )
-from app.services.venue_profile import (
-    VENUE_INVENTORY_EXPORT_HEADERS,
-    build_venue_inventory_csv_rows,
-    build_venue_inventory_export_filename,
-    build_venue_profile_view_model,
-    filter_venue_inventory_rows,
-    normalize_venue_inventory_filters,
-)
+from app.services.search_index import inventory_search_generation
+from app.services.server_timing import timing_span
 from app.services.venue_files import (
     VENUE_FILE_ACCEPT,
     VenueFileError,
@@ -74,6 +76,19 @@ from app.services.venue_files import (
     save_uploaded_venue_file,
     stored_file_path,
 )
+from app.services.venue_profile import (
+    VENUE_INVENTORY_EXPORT_HEADERS,
+    build_venue_inventory_csv_rows,
+    build_venue_inventory_export_filename,
+    build_venue_profile_view_model,
+    filter_venue_inventory_rows,
+    normalize_venue_inventory_filters,
+)
+from app.services.venue_rollups import (
+    build_empty_rollup_values,
+    build_venue_rollup_map,
+    refresh_venue_rollups,
+)
 
 main_bp = Blueprint("main", __name__)
 RESTOCK_PAGE_SIZE = 50
@@ -93,6 +108,64 @@ ACTIVITY_TYPE_META = {
 }
 
 ACTIVITY_SORT_OPTIONS = {"newest", "oldest", "venue", "item", "actor", "type"}
+ACTIVITY_COUNT_CAP = 1000
+# (column, descending) per sort mode; the trailing keys make every ordering total,
+# which keyset cursors rely on. "status" sorts after "raw_count" as text, so
+# type_key descending lists status changes first.
+ACTIVITY_SORT_KEYS = {
+    "newest": (
+        ("changed_at", True),
+        ("venue_name", False),
+        ("item_name", False),
+        ("type_key", True),
+        ("event_id", True),
+    ),
+    "oldest": (
+        ("changed_at", False),
+        ("venue_name", False),
+        ("item_name", False),
+        ("type_key", True),
+        ("event_id", False),
+    ),
+    "venue": (
+        ("venue_name", False),
+        ("item_name", False),
+        ("changed_at", True),
+        ("type_key", True),
+        ("event_id", True),
+    ),
+    "item": (
+        ("item_name", False),
+        ("venue_name", False),
+        ("changed_at", True),
+        ("type_key", True),
+        ("event_id", True),
+    ),
+    "actor": (
+        ("actor_name", False),
+        ("changed_at", True),
+        ("venue_name", False),
+        ("item_name", False),
+        ("type_key", True),
+        ("event_id", True),
+    ),
+    "type": (
+        ("type_key", True),
+        ("changed_at", True),
+        ("venue_name", False),
+        ("item_name", False),
+        ("event_id", True),
+    ),
+}
+# JSON type of each sort column inside a cursor; `changed_at` travels as ISO text.
+ACTIVITY_CURSOR_VALUE_TYPES = {
+    "changed_at": str,
+    "venue_name": str,
+    "item_name": str,
+    "actor_name": str,
+    "type_key": str,
+    "event_id": int,
+}
 
 
 def normalize_next_path(next_candidate, fallback_path):
@@ -306,20 +379,79 @@ def activity_date_boundary_utc(date_value, day_offset=0):
     return datetime.combine(boundary_date, time.min, tzinfo=timezone.utc)
 
 
-def activity_actor_name_expr(display_name_col, email_col):
-    trimmed_display_name = func.nullif(func.trim(display_name_col), "")
-    trimmed_email = func.nullif(func.trim(email_col), "")
-    return func.coalesce(trimmed_display_name, func.lower(trimmed_email), literal("Unknown user"))
+def build_activity_order_by(columns, sort_keys, backward=False):
+    return [
+        columns[column_name].desc() if descending != backward else columns[column_name].asc()
+        for column_name, descending in sort_keys
+    ]
 
 
-def activity_status_text_expr(column):
-    return case(
-        (column == "good", literal("Good")),
-        (column == "ok", literal("OK")),
-        (column == "low", literal("Low")),
-        (column == "out", literal("Out")),
-        else_=literal("Not Checked"),
+def build_activity_keyset_clause(columns, sort_keys, values, backward=False):
+    """Match rows strictly after (or, going `backward`, before) the cursor row."""
+    clauses = []
+    for index, (column_name, descending) in enumerate(sort_keys):
+        column = columns[column_name]
+        value = values[index]
+        comparison = column < value if descending != backward else column > value
+        equal_prefix = [
+            columns[prefix_name] == values[prefix_index]
+            for prefix_index, (prefix_name, _) in enumerate(sort_keys[:index])
+        ]
+        clauses.append(and_(*equal_prefix, comparison))
+    return or_(*clauses)
+
+
+def encode_activity_cursor(row, sort, page, direction):
+    values = []
+    for column_name, _ in ACTIVITY_SORT_KEYS[sort]:
+        value = row[column_name]
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    payload = json.dumps(
+        {"s": sort, "p": page, "d": direction, "k": values}, separators=(",", ":")
     )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def is_activity_cursor_value(column_name, value):
+    expected_type = ACTIVITY_CURSOR_VALUE_TYPES[column_name]
+    return isinstance(value, expected_type) and not isinstance(value, bool)
+
+
+def decode_activity_cursor(token, sort):
+    """Return the cursor's page, direction and keyset values, or None for any invalid token.
+
+    Cursors come back from the client unsigned, so every field is type-checked
+    before its values reach the keyset filter.
+    """
+    raw_token = (token or "").strip()
+    if not raw_token:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(raw_token + "=" * (-len(raw_token) % 4)))
+        if not isinstance(payload, dict) or payload.get("s") != sort:
+            return None
+        sort_keys = ACTIVITY_SORT_KEYS[sort]
+        page = payload["p"]
+        direction = payload["d"]
+        raw_values = payload["k"]
+        if not isinstance(page, int) or isinstance(page, bool) or page < 1:
+            return None
+        if direction not in ("next", "prev") or not isinstance(raw_values, list):
+            return None
+        if len(raw_values) != len(sort_keys):
+            return None
+        if not all(
+            is_activity_cursor_value(column_name, value)
+            for (column_name, _), value in zip(sort_keys, raw_values)
+        ):
+            return None
+        values = [
+            datetime.fromisoformat(value) if column_name == "changed_at" else value
+            for (column_name, _), value in zip(sort_keys, raw_values)
+        ]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+    return {"page": page, "direction": direction, "values": values}
 
 
 def serialize_activity_row(row):
@@ -405,6 +537,7 @@ def serialize_activity_row(row):
     }
 
 
+@timing_span("activity_page")
 def build_activity_page(
     search="",
     activity_type="all",
@@ -414,83 +547,12 @@ def build_activity_page(
     page=1,
     actor_user_id=None,
     page_size=None,
+    cursor=None,
+    exact_count=False,
 ):
     requested_page = max(int(page or 1), 1)
 
-    status_actor_name = activity_actor_name_expr(User.display_name, User.email)
-    previous_status = func.lag(CheckLine.status).over(
-        partition_by=(Check.venue_id, CheckLine.item_id),
-        order_by=(Check.created_at.asc(), Check.id.asc()),
-    )
-    status_inner = (
-        select(
-            literal("status").label("type_key"),
-            Check.id.label("event_id"),
-            Check.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            Check.user_id.label("actor_user_id"),
-            status_actor_name.label("actor_name"),
-            previous_status.label("old_status_key"),
-            CheckLine.status.label("new_status_key"),
-            cast(literal(None), Integer).label("old_raw_count"),
-            cast(literal(None), Integer).label("new_raw_count"),
-        )
-        .select_from(Check)
-        .join(Venue, Venue.id == Check.venue_id)
-        .join(CheckLine, CheckLine.check_id == Check.id)
-        .join(Item, Item.id == CheckLine.item_id)
-        .outerjoin(User, User.id == Check.user_id)
-        .subquery()
-    )
-    status_events = select(status_inner).where(
-        or_(
-            and_(
-                status_inner.c.old_status_key.is_(None),
-                status_inner.c.new_status_key != "not_checked",
-            ),
-            status_inner.c.old_status_key != status_inner.c.new_status_key,
-        )
-    )
-    if actor_user_id is not None:
-        status_events = status_events.where(status_inner.c.actor_user_id == actor_user_id)
-
-    count_actor_name = activity_actor_name_expr(User.display_name, User.email)
-    previous_raw_count = func.lag(CountLine.raw_count).over(
-        partition_by=(CountSession.venue_id, CountLine.item_id),
-        order_by=(CountSession.created_at.asc(), CountSession.id.asc()),
-    )
-    count_inner = (
-        select(
-            literal("raw_count").label("type_key"),
-            CountSession.id.label("event_id"),
-            CountSession.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            CountSession.user_id.label("actor_user_id"),
-            count_actor_name.label("actor_name"),
-            cast(literal(None), String).label("old_status_key"),
-            cast(literal(None), String).label("new_status_key"),
-            previous_raw_count.label("old_raw_count"),
-            CountLine.raw_count.label("new_raw_count"),
-        )
-        .select_from(CountSession)
-        .join(Venue, Venue.id == CountSession.venue_id)
-        .join(CountLine, CountLine.count_session_id == CountSession.id)
-        .join(Item, Item.id == CountLine.item_id)
-        .outerjoin(User, User.id == CountSession.user_id)
-        .subquery()
-    )
-    count_events = select(count_inner).where(
-        or_(
-            count_inner.c.old_raw_count.is_(None),
-            count_inner.c.old_raw_count != count_inner.c.new_raw_count,
-        )
-    )
-    if actor_user_id is not None:
-        count_events = count_events.where(count_inner.c.actor_user_id == actor_user_id)
-
-    activity_events = union_all(status_events, count_events).subquery()
+    activity_events = select_activity_events(actor_user_id=actor_user_id, search=search).subquery()
     filtered_activity = select(activity_events)
 
     if activity_type in ACTIVITY_TYPE_META:
@@ -505,116 +567,114 @@ def build_activity_page(
             activity_events.c.changed_at < activity_date_boundary_utc(end_date, day_offset=1)
         )
 
-    search_query = (search or "").strip().lower()
-    if search_query:
-        old_value_search = case(
-            (
-                activity_events.c.type_key == "status",
-                func.lower(activity_status_text_expr(activity_events.c.old_status_key)),
-            ),
-            else_=func.lower(
-                func.coalesce(cast(activity_events.c.old_raw_count, String), literal("no prior count"))
-            ),
-        )
-        new_value_search = case(
-            (
-                activity_events.c.type_key == "status",
-                func.lower(activity_status_text_expr(activity_events.c.new_status_key)),
-            ),
-            else_=func.lower(func.coalesce(cast(activity_events.c.new_raw_count, String), literal(""))),
-        )
-        filtered_activity = filtered_activity.where(
-            or_(
-                func.lower(activity_events.c.venue_name).contains(search_query),
-                func.lower(activity_events.c.item_name).contains(search_query),
-                func.lower(activity_events.c.actor_name).contains(search_query),
-                func.lower(func.replace(activity_events.c.type_key, "_", " ")).contains(search_query),
-                old_value_search.contains(search_query),
-                new_value_search.contains(search_query),
-            )
-        )
-
     filtered_subquery = filtered_activity.subquery()
-    total_count = db.session.execute(
-        select(func.count()).select_from(filtered_subquery)
-    ).scalar_one()
-
     effective_page_size = max(int(page_size or ACTIVITY_PAGE_SIZE), 1)
-    total_pages = max((total_count + effective_page_size - 1) // effective_page_size, 1) if total_count else 1
-    current_page = min(requested_page, total_pages) if total_count else 1
-    offset = (current_page - 1) * effective_page_size
-
-    type_sort_rank = case(
-        (filtered_subquery.c.type_key == "status", 0),
-        else_=1,
-    )
-    if sort == "oldest":
-        order_by = (
-            filtered_subquery.c.changed_at.asc(),
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.item_name.asc(),
-            type_sort_rank.asc(),
-            filtered_subquery.c.event_id.asc(),
+    sort = normalize_activity_sort(sort)
+    sort_keys = ACTIVITY_SORT_KEYS[sort]
+    cursor_state = decode_activity_cursor(cursor, sort)
+
+    def count_activity_rows(exact):
+        if exact:
+            count_statement = select(func.count()).select_from(filtered_subquery)
+            return db.session.execute(count_statement).scalar_one(), False
+        capped_rows = (
+            select(literal(1))
+            .select_from(filtered_subquery)
+            .limit(ACTIVITY_COUNT_CAP + 1)
+            .subquery()
         )
-    elif sort == "venue":
-        order_by = (
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.item_name.asc(),
-            filtered_subquery.c.changed_at.desc(),
-            type_sort_rank.asc(),
-            filtered_subquery.c.event_id.desc(),
-        )
-    elif sort == "item":
-        order_by = (
-            filtered_subquery.c.item_name.asc(),
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.changed_at.desc(),
-            type_sort_rank.asc(),
-            filtered_subquery.c.event_id.desc(),
+        capped_statement = select(func.count()).select_from(capped_rows)
+        capped_count = db.session.execute(capped_statement).scalar_one()
+        return min(capped_count, ACTIVITY_COUNT_CAP), capped_count > ACTIVITY_COUNT_CAP
+
+    def fetch_activity_rows(statement):
+        rows = list(db.session.execute(statement.limit(effective_page_size + 1)).mappings().all())
+        return rows[:effective_page_size], len(rows) > effective_page_size
+
+    total_count, total_count_capped = count_activity_rows(exact_count)
+
+    if cursor_state is not None:
+        backward = cursor_state["direction"] == "prev"
+        current_page = cursor_state["page"]
+        page_rows, has_more = fetch_activity_rows(
+            select(filtered_subquery)
+            .where(
+                build_activity_keyset_clause(
+                    filtered_subquery.c,
+                    sort_keys,
+                    cursor_state["values"],
+                    backward=backward,
+                )
+            )
+            .order_by(*build_activity_order_by(filtered_subquery.c, sort_keys, backward=backward))
         )
-    elif sort == "actor":
-        order_by = (
-            filtered_subquery.c.actor_name.asc(),
-            filtered_subquery.c.changed_at.desc(),
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.item_name.asc(),
-            type_sort_rank.asc(),
-            filtered_subquery.c.event_id.desc(),
+        if backward:
+            page_rows.reverse()
+            if not has_more:
+                current_page = 1
+            has_prev = current_page > 1
+            has_next = True
+        else:
+            has_prev = current_page > 1
+            has_next = has_more
+    else:
+        current_page = requested_page
+        if not total_count_capped:
+            last_page = max((total_count + effective_page_size - 1) // effective_page_size, 1)
+            current_page = min(current_page, last_page)
+        order_by = build_activity_order_by(filtered_subquery.c, sort_keys)
+        page_rows, has_next = fetch_activity_rows(
+            select(filtered_subquery)
+            .order_by(*order_by)
+            .offset((current_page - 1) * effective_page_size)
         )
-    elif sort == "type":
-        order_by = (
-            type_sort_rank.asc(),
-            filtered_subquery.c.changed_at.desc(),
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.item_name.asc(),
-            filtered_subquery.c.event_id.desc(),
+        if not page_rows and current_page > 1 and total_count_capped:
+            # Jumped past the end of a capped result set: settle the real last page.
+            total_count, total_count_capped = count_activity_rows(True)
+            current_page = max((total_count + effective_page_size - 1) // effective_page_size, 1)
+            page_rows, has_next = fetch_activity_rows(
+                select(filtered_subquery)
+                .order_by(*order_by)
+                .offset((current_page - 1) * effective_page_size)
+            )
+        has_prev = current_page > 1
+
+    if total_count_capped:
+        total_pages = max(
+            (ACTIVITY_COUNT_CAP + effective_page_size - 1) // effective_page_size,
+            current_page + (1 if has_next else 0),
         )
     else:
-        order_by = (
-            filtered_subquery.c.changed_at.desc(),
-            filtered_subquery.c.venue_name.asc(),
-            filtered_subquery.c.item_name.asc(),
-            type_sort_rank.asc(),
-            filtered_subquery.c.event_id.desc(),
+        total_pages = max(
+            (total_count + effective_page_size - 1) // effective_page_size, current_page, 1
         )
 
-    page_rows = db.session.execute(
-        select(filtered_subquery).order_by(*order_by).offset(offset).limit(effective_page_size)
-    ).mappings().all()
     serialized_rows = [serialize_activity_row(row) for row in page_rows]
-
-    showing_from = offset + 1 if total_count else 0
-    showing_to = min(offset + len(serialized_rows), total_count)
+    showing_from = (current_page - 1) * effective_page_size + 1 if page_rows else 0
+    showing_to = showing_from + len(page_rows) - 1 if page_rows else 0
     return {
         "rows": serialized_rows,
         "total_count": total_count,
+        "total_count_capped": total_count_capped,
+        "total_count_text": f"{total_count:,}+" if total_count_capped else f"{total_count:,}",
         "page_size": effective_page_size,
         "current_page": current_page,
         "total_pages": total_pages,
-        "has_prev": current_page > 1,
-        "has_next": current_page < total_pages,
+        "total_pages_text": f"{total_pages:,}+" if total_count_capped else f"{total_pages:,}",
+        "has_prev": has_prev,
+        "has_next": has_next,
         "showing_from": showing_from,
         "showing_to": showing_to,
+        "prev_cursor": (
+            encode_activity_cursor(page_rows[0], sort, current_page - 1, "prev")
+            if has_prev and page_rows
+            else None
+        ),
+        "next_cursor": (
+            encode_activity_cursor(page_rows[-1], sort, current_page + 1, "next")
+            if has_next and page_rows
+            else None
+        ),
     }
 
 
@@ -643,6 +703,8 @@ def parse_activity_request_args(args):
         "start_date": activity_start_date,
         "end_date": activity_end_date,
         "page": activity_page,
+        "cursor": (args.get("activity_cursor", "") or "").strip(),
+        "exact_count": (args.get("activity_exact_count", "") or "").strip() == "1",
     }
 
 
@@ -660,6 +722,8 @@ def build_activity_base_params(activity_filters):
         params["activity_start"] = activity_filters["start_date"].isoformat()
     if activity_filters["end_date"]:
         params["activity_end"] = activity_filters["end_date"].isoformat()
+    if activity_filters.get("exact_count"):
+        params["activity_exact_count"] = "1"
     return params
 
 
@@ -672,6 +736,7 @@ def build_activity_pagination(activity_page_data, activity_filters):
             "main.dashboard",
             **activity_base_params,
             activity_page=activity_page_data["current_page"] - 1,
+            activity_cursor=activity_page_data["prev_cursor"],
         )
 
     activity_next_url = None
@@ -680,6 +745,7 @@ def build_activity_pagination(activity_page_data, activity_filters):
             "main.dashboard",
             **activity_base_params,
             activity_page=activity_page_data["current_page"] + 1,
+            activity_cursor=activity_page_data["next_cursor"],
         )
 
     return {
@@ -687,12 +753,17 @@ def build_activity_pagination(activity_page_data, activity_filters):
         "current_page": activity_page_data["current_page"],
         "total_pages": activity_page_data["total_pages"],
         "total_count": activity_page_data["total_count"],
+        "total_count_capped": activity_page_data["total_count_capped"],
+        "total_count_text": activity_page_data["total_count_text"],
+        "total_pages_text": activity_page_data["total_pages_text"],
         "showing_from": activity_page_data["showing_from"],
         "showing_to": activity_page_data["showing_to"],
         "has_prev": activity_page_data["has_prev"],
         "has_next": activity_page_data["has_next"],
         "prev_url": activity_prev_url,
         "next_url": activity_next_url,
+        "prev_cursor": activity_page_data["prev_cursor"],
+        "next_cursor": activity_page_data["next_cursor"],
     }
 
 
@@ -704,6 +775,7 @@ def serialize_activity_filters(activity_filters):
         "actor_user_id": activity_filters["actor_user_id"],
         "start_date": activity_filters["start_date"].isoformat() if activity_filters["start_date"] else "",
         "end_date": activity_filters["end_date"].isoformat() if activity_filters["end_date"] else "",
+        "exact_count": activity_filters["exact_count"],
     }
 
 
@@ -746,126 +818,12 @@ def format_updated_label(value, stale_threshold=None):
     }
 
 
-def build_venue_last_updated_map(venue_ids):
-    if not venue_ids:
-        return {}
-
-    last_check_map = {
-        row.venue_id: row.last_check_at
-        for row in (
-            db.session.query(
-                Check.venue_id.label("venue_id"),
-                func.max(Check.created_at).label("last_check_at"),
-            )
-            .filter(Check.venue_id.in_(venue_ids))
-            .group_by(Check.venue_id)
-            .all()
-        )
-    }
-    last_count_map = {
-        row.venue_id: row.last_count_at
-        for row in (
-            db.session.query(
-                CountSession.venue_id.label("venue_id"),
-                func.max(CountSession.created_at).label("last_count_at"),
-            )
-            .filter(CountSession.venue_id.in_(venue_ids))
-            .group_by(CountSession.venue_id)
-            .all()
-        )
-    }
-
-    output = {}
-    for venue_id in venue_ids:
-        last_check_at = ensure_utc(last_check_map.get(venue_id))
-        last_count_at = ensure_utc(last_count_map.get(venue_id))
-        if last_check_at and last_count_at:
-            output[venue_id] = max(last_check_at, last_count_at)
-        else:
-            output[venue_id] = last_check_at or last_count_at
-    return output
-
-
 def build_recent_venue_activity_rows(venue_id, limit=20):
-    max_rows = max(int(limit or 0), 1)
-    status_actor_name = activity_actor_name_expr(User.display_name, User.email)
-    previous_status = func.lag(CheckLine.status).over(
-        partition_by=(Check.venue_id, CheckLine.item_id),
-        order_by=(Check.created_at.asc(), Check.id.asc()),
-    )
-    status_inner = (
-        select(
-            literal("status").label("type_key"),
-            Check.id.label("event_id"),
-            Check.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            status_actor_name.label("actor_name"),
-            previous_status.label("old_status_key"),
-            CheckLine.status.label("new_status_key"),
-            cast(literal(None), Integer).label("old_raw_count"),
-            cast(literal(None), Integer).label("new_raw_count"),
-        )
-        .select_from(Check)
-        .join(Venue, Venue.id == Check.venue_id)
-        .join(CheckLine, CheckLine.check_id == Check.id)
-        .join(Item, Item.id == CheckLine.item_id)
-        .outerjoin(User, User.id == Check.user_id)
-        .where(Check.venue_id == venue_id)
-        .subquery()
-    )
-    status_events = select(status_inner).where(
-        or_(
-            and_(
-                status_inner.c.old_status_key.is_(None),
-                status_inner.c.new_status_key != "not_checked",
-            ),
-            status_inner.c.old_status_key != status_inner.c.new_status_key,
-        )
-    )
-
-    count_actor_name = activity_actor_name_expr(User.display_name, User.email)
-    previous_raw_count = func.lag(CountLine.raw_count).over(
-        partition_by=(CountSession.venue_id, CountLine.item_id),
-        order_by=(CountSession.created_at.asc(), CountSession.id.asc()),
-    )
-    count_inner = (
-        select(
-            literal("raw_count").label("type_key"),
-            CountSession.id.label("event_id"),
-            CountSession.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            count_actor_name.label("actor_name"),
-            cast(literal(None), String).label("old_status_key"),
-            cast(literal(None), String).label("new_status_key"),
-            previous_raw_count.label("old_raw_count"),
-            CountLine.raw_count.label("new_raw_count"),
-        )
-        .select_from(CountSession)
-        .join(Venue, Venue.id == CountSession.venue_id)
-        .join(CountLine, CountLine.count_session_id == CountSession.id)
-        .join(Item, Item.id == CountLine.item_id)
-        .outerjoin(User, User.id == CountSession.user_id)
-        .where(CountSession.venue_id == venue_id)
-        .subquery()
-    )
-    count_events = select(count_inner).where(
-        or_(
-            count_inner.c.old_raw_count.is_(None),
-            count_inner.c.old_raw_count != count_inner.c.new_raw_count,
-        )
-    )
-
-    activity_events = union_all(status_events, count_events).subquery()
-    rows = db.session.execute(
-        select(activity_events)
-        .order_by(activity_events.c.changed_at.desc(), activity_events.c.event_id.desc())
-        .limit(max_rows)
-    ).mappings().all()
+    rows = build_recent_activity_event_rows(venue_id=venue_id, limit=limit)
     return [serialize_activity_row(row) for row in rows]
 
 
+@timing_span("venue_rows")
 def build_venue_rows(include_inactive=False):
     global_stale_threshold_days = get_default_stale_threshold_days()
     q = Venue.query
@@ -875,140 +833,19 @@ def build_venue_rows(include_inactive=False):
     if not venues:
         return []
 
-    venue_ids = [v.id for v in venues]
-    tracked_item_rows = (
-        db.session.query(
-            VenueItem.venue_id.label("venue_id"),
-            VenueItem.item_id.label("item_id"),
-            Item.tracking_mode.label("tracking_mode"),
-        )
-        .join(Item, Item.id == VenueItem.item_id)
-        .filter(
-            VenueItem.venue_id.in_(venue_ids),
-            VenueItem.active == True,
-            Item.active == True,
-            Item.is_group_parent == False,
-        )
-        .all()
-    )
-    tracked_totals = {}
-    tracked_item_ids = set()
-    for row in tracked_item_rows:
-        tracked_totals[row.venue_id] = int(tracked_totals.get(row.venue_id, 0) or 0) + 1
-        tracked_item_ids.add(row.item_id)
-
-    notes_count_map = {
-        row.venue_id: row.notes_count
-        for row in (
-            db.session.query(
-                VenueNote.venue_id.label("venue_id"),
-                func.count(VenueNote.id).label("notes_count"),
-            )
-            .filter(VenueNote.venue_id.in_(venue_ids))
-            .group_by(VenueNote.venue_id)
-            .all()
-        )
-    }
-
-    latest_status_counts = {}
-    latest_status_detail_counts = {}
-    latest_singleton_current_totals = {}
-    latest_quantity_count_totals = {}
-    latest_status_by_pair = {}
-    latest_count_by_pair = {}
-    if tracked_item_ids:
-        tracked_item_id_list = sorted(tracked_item_ids)
-        latest_status_by_pair = build_latest_status_signal_map(
-            venue_ids=venue_ids,
-            item_ids=tracked_item_id_list,
-        )
-        latest_count_by_pair = build_latest_count_signal_map(
-            venue_ids=venue_ids,
-            item_ids=tracked_item_id_list,
-        )
-
-    for row in tracked_item_rows:
-        counts = latest_status_counts.setdefault(
-            row.venue_id,
-            {"good": 0, "ok": 0, "low": 0, "out": 0, "not_checked": 0},
-        )
-        status_signal = latest_status_by_pair.get((row.venue_id, row.item_id))
-        if row.tracking_mode == "singleton_asset":
-            normalized_status = (
-                normalize_singleton_status(status_signal["status"])
-                if status_signal
-                else "not_checked"
-            )
-        else:
-            normalized_status = normalize_status(status_signal["status"]) if status_signal else "not_checked"
-
-        counts[normalized_status] += 1
-
-        if normalized_status in {"low", "out"}:
-            detail_counts = latest_status_detail_counts.setdefault(row.venue_id, build_status_detail_counts())
-            suffix = "singleton" if row.tracking_mode == "singleton_asset" else "quantity"
-            detail_counts[f"{normalized_status}_{suffix}"] += 1
-
-        if row.tracking_mode == "singleton_asset":
-            if normalized_status in {"good", "low"}:
-                latest_singleton_current_totals[row.venue_id] = (
-                    int(latest_singleton_current_totals.get(row.venue_id, 0) or 0) + 1
-                )
-            continue
-
-        count_signal = latest_count_by_pair.get((row.venue_id, row.item_id))
-        if count_signal and count_signal["raw_count"] is not None:
-            latest_quantity_count_totals[row.venue_id] = (
-                int(latest_quantity_count_totals.get(row.venue_id, 0) or 0)
-                + int(count_signal["raw_count"] or 0)
-            )
-
-    par_value_expr = func.coalesce(VenueItem.expected_qty, Item.default_par_level)
-    par_totals_map = {
-        row.venue_id: {
-            "total_par": int(row.total_par or 0),
-            "par_item_count": int(row.par_item_count or 0),
-        }
-        for row in (
-            db.session.query(
-                VenueItem.venue_id.label("venue_id"),
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (par_value_expr.is_(None), 0),
-                            else_=par_value_expr,
-                        )
-                    ),
-                    0,
-                ).label("total_par"),
-                func.sum(
-                    case(
-                        (par_value_expr.is_(None), 0),
-                        else_=1,
-                    )
-                ).label("par_item_count"),
-            )
-            .join(Item, Item.id == VenueItem.item_id)
-            .filter(
-                VenueItem.venue_id.in_(venue_ids),
-                VenueItem.active == True,
-                Item.active == True,
-                Item.is_group_parent == False,
-            )
-            .group_by(VenueItem.venue_id)
-            .all()
-        )
-    }
-
-    last_updated_map = build_venue_last_updated_map(venue_ids)
+    rollup_map = build_venue_rollup_map([v.id for v in venues])
     venue_rows = []
 
     for v in venues:
-        total_tracked = tracked_totals.get(v.id, 0)
+        rollup = rollup_map.get(v.id) or build_empty_rollup_values()
+        total_tracked = rollup["total_tracked"]
         counts = {"good": 0, "ok": 0, "low": 0, "out": 0, "not_checked": 0}
-        detail_counts = latest_status_detail_counts.get(v.id, build_status_detail_counts()).copy()
-        notes_count = int(notes_count_map.get(v.id, 0) or 0)
-        last_updated_at = last_updated_map.get(v.id)
+        detail_counts = {
+            key: rollup[f"{key}_count"]
+            for key in build_status_detail_counts()
+        }
+        notes_count = rollup["notes_count"]
+        last_updated_at = rollup["last_updated_at"]
         venue_stale_threshold = resolve_effective_stale_threshold_days(
             venue_stale_threshold_days=v.stale_threshold_days,
             global_stale_threshold_days=global_stale_threshold_days,
@@ -1045,18 +882,13 @@ def build_venue_rows(include_inactive=False):
             )
             continue
 
-        venue_status_counts = latest_status_counts.get(v.id)
-        if venue_status_counts:
-            counts = venue_status_counts.copy()
-        else:
-            counts["not_checked"] = total_tracked
+        counts = {status_key: rollup[f"{status_key}_count"] for status_key in counts}
 
         badge = build_overall_status_badge(total_tracked, counts, detail_counts)
-        quantity_current_total = latest_quantity_count_totals.get(v.id, 0)
-        singleton_current_total = latest_singleton_current_totals.get(v.id, 0)
-        current_total_count = int(quantity_current_total + singleton_current_total)
-        par_meta = par_totals_map.get(v.id, {"total_par": 0, "par_item_count": 0})
-        total_par_count = par_meta["total_par"] if par_meta["par_item_count"] > 0 else None
+        current_total_count = int(
+            rollup["quantity_count_total"] + rollup["singleton_current_total"]
+        )
+        total_par_count = rollup["total_par"] if rollup["par_item_count"] > 0 else None
 
         operational_issue_count = int(counts["low"] + counts["out"])
         stale_follow_up = bool(freshness["is_stale"])
@@ -1224,6 +1056,7 @@ def help_page():
 
 @main_bp.route("/dashboard")
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=14)
 def dashboard():
     requested_tab = request.args.get("tab")
     active_tab = requested_tab or "venues"
@@ -1289,6 +1122,7 @@ def dashboard():
             "activity_start",
             "activity_end",
             "activity_page",
+            "activity_cursor",
         )
     )
     if activity_params_seen and requested_tab is None:
@@ -1304,6 +1138,8 @@ def dashboard():
             end_date=activity_filters["end_date"],
             sort=activity_filters["sort"],
             page=activity_filters["page"],
+            cursor=activity_filters["cursor"],
+            exact_count=activity_filters["exact_count"],
         )
         activity_rows = activity_page_data["rows"]
         activity_pagination = build_activity_pagination(activity_page_data, activity_filters)
@@ -1314,12 +1150,17 @@ def dashboard():
             "current_page": 1,
             "total_pages": 1,
             "total_count": 0,
+            "total_count_capped": False,
+            "total_count_text": "0",
+            "total_pages_text": "1",
             "showing_from": 0,
             "showing_to": 0,
             "has_prev": False,
             "has_next": False,
             "prev_url": None,
             "next_url": None,
+            "prev_cursor": None,
+            "next_cursor": None,
         }
 
     initial_restock_page = build_restock_rows(
@@ -1437,6 +1278,8 @@ def dashboard_activity_rows():
         end_date=activity_filters["end_date"],
         sort=activity_filters["sort"],
         page=activity_filters["page"],
+        cursor=activity_filters["cursor"],
+        exact_count=activity_filters["exact_count"],
     )
     return jsonify(
         {
@@ -1449,6 +1292,7 @@ def dashboard_activity_rows():
 
 @main_bp.route("/dashboard/restocking_rows")
 @roles_required("viewer", "staff", "admin")
+@query_budget(5)
 def dashboard_restocking_rows():
     restock_status_submitted = "restock_status_submitted" in request.args
     restock_item_submitted = "restock_item_submitted" in request.args
@@ -1593,6 +1437,8 @@ def create_venue():
                             details=summary,
                         )
 
+                refresh_venue_rollups([venue.id])
+                refresh_venue_item_network_rollups([venue.id])
                 db.session.commit()
                 flash("Venue created.", "success")
                 return redirect(
@@ -1614,6 +1460,7 @@ def create_venue():
 
 @main_bp.route("/venues", methods=["GET", "POST"])
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=8)
 def venues():
     if request.method == "POST":
         if not current_user.has_role("admin"):
@@ -1634,6 +1481,8 @@ def venues():
         is_core = (request.form.get("is_core") == "true")
         v = Venue(name=name, is_core=is_core, active=True)
         db.session.add(v)
+        db.session.flush()
+        refresh_venue_rollups([v.id])
         db.session.commit()
 
         flash("Venue added!", "success")
@@ -1644,6 +1493,7 @@ def venues():
 
 @main_bp.route("/venues/<int:venue_id>", methods=["GET", "POST"])
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=24)
 def venue_detail(venue_id):
     venue = Venue.query.get_or_404(venue_id)
     active_profile_tab = (request.args.get("profile_tab") or request.form.get("profile_tab") or "overview").strip().lower()
@@ -1731,6 +1581,7 @@ def venue_detail(venue_id):
                 body=body,
             )
             db.session.add(new_note)
+            refresh_venue_rollups([venue.id])
             db.session.commit()
             flash("Note added.", "success")
             return redirect_to_venue_detail(
@@ -1827,6 +1678,7 @@ def venue_detail(venue_id):
                 active_note_item_id if active_note_item_id is not None else note.item_id
             )
             db.session.delete(note)
+            refresh_venue_rollups([venue.id])
             db.session.commit()
             flash("Note deleted.", "success")
             return redirect_to_venue_detail(
@@ -2119,6 +1971,7 @@ def create_venue_note_inline(venue_id):
             body=body,
         )
     )
+    refresh_venue_rollups([venue.id])
     db.session.commit()
 
     note_count = (
@@ -2144,9 +1997,8 @@ def create_venue_note_inline(venue_id):
 
 @main_bp.get("/venues/<int:venue_id>/inventory/export.csv")
 @roles_required("viewer", "staff", "admin")
+@query_budget(16)
 def export_venue_inventory(venue_id):
-    venue_profile = build_venue_profile_view_model(venue_id)
-    venue = venue_profile["venue"]
     scope = normalize_export_scope(request.args.get("scope"), default=EXPORT_SCOPE_FILTERED)
     requested_filters = normalize_venue_inventory_filters(request.args)
     filters = {
@@ -2157,8 +2009,16 @@ def export_venue_inventory(venue_id):
     }
     if scope == EXPORT_SCOPE_FILTERED:
         filters = requested_filters
+    search_generation = inventory_search_generation() if filters["q"] else None
+    venue_profile = build_venue_profile_view_model(venue_id)
+    venue = venue_profile["venue"]
 
-    rows = filter_venue_inventory_rows(venue_profile["item_rows"], filters)
+    rows = filter_venue_inventory_rows(
+        venue_profile["item_rows"],
+        filters,
+        venue_id=venue.id,
+        search_generation=search_generation,
+    )
     csv_rows = build_venue_inventory_csv_rows(venue, rows)
     filename = build_venue_inventory_export_filename(venue, scope=scope)
-    return build_csv_response(VENUE_INVENTORY_EXPORT_HEADERS, csv_rows, filename)
+    return build_streaming_csv_response(VENUE_INVENTORY_EXPORT_HEADERS, csv_rows, filename)
@@ -17,7 +17,7 @@ from app.models import (
 from app.services.csv_exports import (
     EXPORT_SCOPE_FILTERED,
     EXPORT_SCOPE_FULL,
-    build_csv_response,
+    build_streaming_csv_response,
     normalize_export_scope,
 )
 from app.services.inventory_rules import InventoryRuleError
@@ -52,6 +52,7 @@ from app.services.orders import (
     validate_order_scope_setup_group,
     validate_order_scope_venue_id,
 )
+from app.services.query_budget import query_budget
 
 orders_bp = Blueprint("orders", __name__)
 
@@ -393,6 +394,7 @@ def build_order_purchase_summary_export_url(
 
 @orders_bp.get("/orders")
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=8)
 def index():
     filters = normalize_order_list_filters()
     return render_orders_index_page(batch_filters=filters)
@@ -535,7 +537,7 @@ def export_line_batch(batch_id):
     line_rows = build_order_line_rows(batch, filters=line_filters)
     csv_rows = build_order_line_csv_rows(batch, line_rows)
     filename = build_order_line_export_filename(batch, scope=scope)
-    return build_csv_response(ORDER_LINE_EXPORT_HEADERS, csv_rows, filename)
+    return build_streaming_csv_response(ORDER_LINE_EXPORT_HEADERS, csv_rows, filename)
 
 
 @orders_bp.get("/orders/<int:batch_id>/purchase-summary-export.csv")
@@ -557,7 +559,7 @@ def export_purchase_summary(batch_id):
     )
     csv_rows = build_purchase_summary_csv_rows(batch, purchase_summary_rows)
     filename = build_order_purchase_summary_export_filename(batch, scope=scope)
-    return build_csv_response(ORDER_PURCHASE_SUMMARY_EXPORT_HEADERS, csv_rows, filename)
+    return build_streaming_csv_response(ORDER_PURCHASE_SUMMARY_EXPORT_HEADERS, csv_rows, filename)
 
 
 @orders_bp.post("/orders/<int:batch_id>")
@@ -1,19 +1,18 @@
 from datetime import datetime, timedelta, timezone
 from math import ceil
 
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user
-from sqlalchemy import and_, func
 from sqlalchemy.orm import aliased
 
 from app import db
 from app.authz import roles_required
-from app.models import Item, SupplyNote, User, Venue, VenueItem, VenueItemCount
+from app.models import Item, SupplyNote, User, Venue
 from app.services.csv_exports import (
     EXPORT_SCOPE_FILTERED,
     EXPORT_SCOPE_FULL,
-    build_csv_response,
     build_dated_csv_filename,
+    build_streaming_csv_response,
     normalize_export_scope,
     sanitize_csv_cell,
 )
@@ -22,10 +21,7 @@ from app.services.inventory_rules import (
     resolve_effective_par_level,
     resolve_effective_stale_threshold_days,
 )
-from app.services.inventory_signals import (
-    build_latest_count_signal_map,
-    build_latest_status_signal_map,
-)
+from app.services.inventory_signals import build_actor_label_map
 from app.services.inventory_status import (
     derive_singleton_count_from_status as shared_derive_singleton_count,
 )
@@ -39,9 +35,9 @@ from app.services.inventory_status import (
     normalize_singleton_status as shared_normalize_singleton_status,
 )
 from app.services.inventory_status import (
-    normalize_status,
     restock_status_meta_for_item,
 )
+from app.services.item_network_rollups import NETWORK_COUNT_FIELDS
 from app.services.notes import (
     NOTE_BODY_MAX_LENGTH,
     NOTE_TITLE_MAX_LENGTH,
@@ -50,7 +46,17 @@ from app.services.notes import (
     normalize_note_page,
     validate_note_fields,
 )
+from app.services.query_budget import query_budget
 from app.services.restocking import build_restock_count_state
+from app.services.search_index import (
+    CONTAINS_MATCH,
+    SearchField,
+    get_search_index,
+    inventory_search_generation,
+    normalize_search_query,
+)
+from app.services.server_timing import timing_span
+from app.services.signal_loader import get_inventory_signal_loader
 from app.services.spreadsheet_compat import format_setup_group_display
 
 supplies_bp = Blueprint("supplies", __name__)
@@ -65,6 +71,7 @@ SUPPLY_QUICK_FILTER_OPTIONS = {
     "singleton_asset",
 }
 SUPPLY_NOTE_FOCUS_OPTIONS = {"list", "compose"}
+SUPPLY_SEARCH_FIELDS = (SearchField("haystack", CONTAINS_MATCH),)
 SUPPLIES_AUDIT_EXPORT_HEADERS = (
     "Venue Name",
     "Item Name",
@@ -606,21 +613,6 @@ def build_attention_level(row, updated_label):
     return "healthy"
 
 
-def resolve_supply_last_actor_label(*, tracking_mode, latest_status_meta, latest_count_meta):
-    status_updated_at = ensure_utc((latest_status_meta or {}).get("updated_at"))
-    count_updated_at = ensure_utc((latest_count_meta or {}).get("updated_at"))
-    status_actor_label = (latest_status_meta or {}).get("actor_label", "")
-    count_actor_label = (latest_count_meta or {}).get("actor_label", "")
-
-    if tracking_mode == "singleton_asset":
-        return status_actor_label or count_actor_label or ""
-    if count_updated_at and (not status_updated_at or count_updated_at >= status_updated_at):
-        return count_actor_label or status_actor_label or ""
-    if status_updated_at:
-        return status_actor_label or count_actor_label or ""
-    return count_actor_label or status_actor_label or ""
-
-
 def coverage_meta_for_row(row):
     if row["tracked_venue_count"] == 0:
         return {
@@ -654,10 +646,16 @@ def coverage_meta_for_row(row):
     }
 
 
-def build_supply_audit_rows():
+@timing_span("supply_audit_rows")
+def build_supply_audit_rows(item_ids=None):
+    """Build one summary row per active item (or per item in `item_ids`).
+
+    Each row keeps its compact `venue_details`; `expand_supply_venue_rows` turns
+    them into display rows only for the items whose venues are shown.
+    """
     global_stale_threshold_days = get_default_stale_threshold_days()
     parent_alias = aliased(Item)
-    active_items = (
+    item_query = (
         db.session.query(
             Item.id,
             Item.name,
@@ -673,9 +671,10 @@ def build_supply_audit_rows():
         )
         .outerjoin(parent_alias, parent_alias.id == Item.parent_item_id)
         .filter(Item.active == True, Item.is_group_parent == False)
-        .order_by(Item.name.asc())
-        .all()
     )
+    if item_ids is not None:
+        item_query = item_query.filter(Item.id.in_([int(item_id) for item_id in item_ids]))
+    active_items = item_query.order_by(Item.name.asc()).all()
 
     items_by_id = {
         item.id: {
@@ -706,184 +705,76 @@ def build_supply_audit_rows():
             "minimum_stale_threshold_days": None,
             "notes_count": 0,
             "has_notes": False,
-            "venue_rows": [],
+            "venue_details": [],
         }
         for item in active_items
     }
 
-    if items_by_id:
-        note_count_rows = (
-            db.session.query(
-                SupplyNote.item_id.label("item_id"),
-                func.count(SupplyNote.id).label("note_count"),
-            )
-            .filter(SupplyNote.item_id.in_(list(items_by_id.keys())))
-            .group_by(SupplyNote.item_id)
-            .all()
-        )
-        for note_count_row in note_count_rows:
-            item_row = items_by_id.get(note_count_row.item_id)
-            if item_row is None:
-                continue
-            item_row["notes_count"] = note_count_row.note_count
-            item_row["has_notes"] = note_count_row.note_count > 0
-
-    item_ids = list(items_by_id.keys())
-    latest_status_by_venue_item = build_latest_status_signal_map(item_ids=item_ids)
-    latest_count_by_venue_item = build_latest_count_signal_map(item_ids=item_ids)
-
-    query_rows = (
-        db.session.query(
-            Item.id.label("item_id"),
-            Item.name.label("item_name"),
-            Item.item_type.label("item_type"),
-            Item.item_category.label("item_category"),
-            Item.tracking_mode.label("tracking_mode"),
-            Item.parent_item_id.label("parent_item_id"),
-            parent_alias.name.label("parent_name"),
-            Venue.id.label("venue_id"),
-            Venue.name.label("venue_name"),
-            Venue.stale_threshold_days.label("venue_stale_threshold_days"),
-            VenueItem.expected_qty.label("par_override"),
-            VenueItemCount.raw_count.label("raw_count"),
-            VenueItemCount.updated_at.label("updated_at"),
+    signal_loader = get_inventory_signal_loader()
+    note_counts_by_item = signal_loader.load_supply_note_counts(list(items_by_id.keys()))
+    for item_id, note_count in note_counts_by_item.items():
+        item_row = items_by_id[item_id]
+        item_row["notes_count"] = note_count
+        item_row["has_notes"] = note_count > 0
+
+    network_by_item = signal_loader.load_item_network_rollups(list(items_by_id.keys()))
+    venue_meta_by_id = {
+        venue.id: venue
+        for venue in db.session.query(
+            Venue.id,
+            Venue.name,
+            Venue.stale_threshold_days,
         )
-        .select_from(VenueItem)
-        .join(Item, Item.id == VenueItem.item_id)
-        .outerjoin(parent_alias, parent_alias.id == Item.parent_item_id)
-        .join(Venue, Venue.id == VenueItem.venue_id)
-        .outerjoin(
-            VenueItemCount,
-            and_(
-                VenueItemCount.venue_id == VenueItem.venue_id,
-                VenueItemCount.item_id == VenueItem.item_id,
-            ),
-        )
-        .filter(
-            VenueItem.active == True,
-            Item.active == True,
-            Item.is_group_parent == False,
-            Venue.active == True,
-        )
-        .order_by(Item.name.asc(), Venue.name.asc())
+        .filter(Venue.active == True)
         .all()
-    )
-
-    for row in query_rows:
-        item_row = items_by_id[row.item_id]
-        is_singleton = item_row["tracking_mode"] == "singleton_asset"
-        latest_status_meta = latest_status_by_venue_item.get((row.venue_id, row.item_id))
-        latest_count_meta = latest_count_by_venue_item.get((row.venue_id, row.item_id))
-        singleton_status = "not_checked"
-        updated_at = ensure_utc(row.updated_at)
-        effective_raw_count = row.raw_count
-        effective_par = resolve_effective_par_level(
-            item_default_par_level=item_row["default_par_level"],
-            venue_par_override=row.par_override,
-        )
-        effective_stale_threshold = resolve_effective_stale_threshold_days(
-            item_stale_threshold_days=item_row["item_stale_threshold_days"],
-            venue_stale_threshold_days=row.venue_stale_threshold_days,
-            global_stale_threshold_days=global_stale_threshold_days,
-        )
-        status_key = normalize_status((latest_status_meta or {}).get("status"))
+    }
 
-        if latest_count_meta and latest_count_meta.get("updated_at"):
-            updated_at = latest_count_meta["updated_at"]
+    for item_id, item_row in items_by_id.items():
+        network = network_by_item.get(item_id)
+        if network is None:
+            continue
+        for field in NETWORK_COUNT_FIELDS:
+            if field in item_row:
+                item_row[field] = network[field]
+        item_row["last_count_updated_at"] = network["last_count_updated_at"]
 
-        if is_singleton:
-            if latest_status_meta:
-                singleton_status = normalize_singleton_status_key(latest_status_meta["status"])
-                updated_at = latest_status_meta["updated_at"] or updated_at
-            else:
-                singleton_status = normalize_singleton_status_key(
-                    "good" if row.raw_count and row.raw_count > 0 else ("out" if row.raw_count == 0 else "not_checked")
+        venue_details = [
+            detail for detail in network["venue_details"] if detail["venue_id"] in venue_meta_by_id
+        ]
+        venue_details.sort(key=lambda detail: venue_meta_by_id[detail["venue_id"]].name)
+        for detail in venue_details:
+            venue_meta = venue_meta_by_id[detail["venue_id"]]
+            effective_stale_threshold = resolve_effective_stale_threshold_days(
+                item_stale_threshold_days=item_row["item_stale_threshold_days"],
+                venue_stale_threshold_days=venue_meta.stale_threshold_days,
+                global_stale_threshold_days=global_stale_threshold_days,
+            )
+            venue_is_stale = (
+                is_supply_update_stale(
+                    detail["updated_at"], stale_threshold=effective_stale_threshold.value
                 )
-            effective_raw_count = derive_singleton_count_from_status(singleton_status)
-            status_key = singleton_status
-
-        count_state = build_restock_count_state(
-            tracking_mode=item_row["tracking_mode"],
-            raw_count=effective_raw_count,
-            par_value=effective_par.value,
-            status_key=status_key,
-        )
-        status_label = restock_status_meta_for_item(status_key, item_row["tracking_mode"])["text"]
-        last_actor_label = resolve_supply_last_actor_label(
-            tracking_mode=item_row["tracking_mode"],
-            latest_status_meta=latest_status_meta,
-            latest_count_meta=latest_count_meta,
-        )
-        venue_is_stale = (
-            is_supply_update_stale(updated_at, stale_threshold=effective_stale_threshold.value)
-            if effective_raw_count is not None
-            else False
-        )
-
-        item_row["tracked_venue_count"] += 1
-
-        if effective_par.value is not None:
-            item_row["total_par_count"] += effective_par.value
-            item_row["par_venue_count"] += 1
-        if item_row["minimum_stale_threshold_days"] is None:
-            item_row["minimum_stale_threshold_days"] = effective_stale_threshold.value
-        else:
-            item_row["minimum_stale_threshold_days"] = min(
-                item_row["minimum_stale_threshold_days"],
-                effective_stale_threshold.value,
+                if detail["raw_count"] is not None
+                else False
             )
 
-        if effective_raw_count is None:
-            item_row["missing_count_venue_count"] += 1
-        else:
-            item_row["counted_venue_count"] += 1
-            item_row["total_raw_count"] += effective_raw_count
+            if item_row["minimum_stale_threshold_days"] is None:
+                item_row["minimum_stale_threshold_days"] = effective_stale_threshold.value
+            else:
+                item_row["minimum_stale_threshold_days"] = min(
+                    item_row["minimum_stale_threshold_days"],
+                    effective_stale_threshold.value,
+                )
             if venue_is_stale:
                 item_row["stale_update_venue_count"] += 1
-            if is_singleton:
-                if singleton_status == "low":
-                    item_row["singleton_damaged_venue_count"] += 1
-                    item_row["singleton_present_venue_count"] += 1
-                elif singleton_status == "good":
-                    item_row["singleton_present_venue_count"] += 1
-                elif singleton_status == "out":
-                    item_row["singleton_missing_venue_count"] += 1
-            elif effective_raw_count == 0:
-                item_row["zero_count_venue_count"] += 1
-
-            if updated_at and (
-                item_row["last_count_updated_at"] is None
-                or updated_at > item_row["last_count_updated_at"]
-            ):
-                item_row["last_count_updated_at"] = updated_at
-
-        item_row["venue_rows"].append(
-            {
-                "venue_id": row.venue_id,
-                "venue_name": row.venue_name,
-                "raw_count": effective_raw_count,
-                "status_key": singleton_status if is_singleton else None,
-                "raw_count_text": "Not Counted" if effective_raw_count is None else str(effective_raw_count),
-                "is_missing": effective_raw_count is None,
-                "is_stale": venue_is_stale,
-                "par_count": effective_par.value,
-                "par_count_text": "Not Set" if effective_par.value is None else str(effective_par.value),
-                "suggested_order_qty": count_state.get("suggested_order_qty"),
-                "over_par_qty": count_state.get("over_par_qty"),
-                "current_status_label": status_label,
-                "checked_by": last_actor_label,
-                "last_updated_at": updated_at,
-                "par_source": effective_par.source,
-                "stale_threshold_days": effective_stale_threshold.value,
-                "stale_threshold_source": effective_stale_threshold.source,
-                "note_count": item_row["notes_count"],
-                "updated_at_text": (
-                    "No checks yet"
-                    if is_singleton and updated_at is None
-                    else format_supply_timestamp(updated_at)
-                ),
-            }
-        )
+
+            item_row["venue_details"].append(
+                {
+                    **detail,
+                    "venue_name": venue_meta.name,
+                    "is_stale": venue_is_stale,
+                    "stale_threshold": effective_stale_threshold,
+                }
+            )
 
     supply_rows = []
     for item_row in items_by_id.values():
@@ -959,6 +850,73 @@ def build_supply_audit_rows():
     return supply_rows
 
 
+def build_supply_actor_labels(item_rows):
+    """Resolve who checked each venue of `item_rows` in one query."""
+    return build_actor_label_map(
+        detail["checked_by_user_id"]
+        for item_row in item_rows
+        for detail in item_row["venue_details"]
+    )
+
+
+def expand_supply_venue_rows(item_rows):
+    """Attach per-venue display rows to `item_rows`, resolving who checked each venue."""
+    actor_labels = build_supply_actor_labels(item_rows)
+    for item_row in item_rows:
+        item_row["venue_rows"] = [
+            build_supply_venue_row(item_row, detail, actor_labels=actor_labels)
+            for detail in item_row["venue_details"]
+        ]
+    return item_rows
+
+
+def build_supply_venue_row(item_row, detail, *, actor_labels):
+    is_singleton = item_row["tracking_mode"] == "singleton_asset"
+    updated_at = detail["updated_at"]
+    effective_raw_count = detail["raw_count"]
+    status_key = detail["status_key"]
+    stale_threshold = detail["stale_threshold"]
+    effective_par = resolve_effective_par_level(
+        item_default_par_level=item_row["default_par_level"],
+        venue_par_override=detail["par_override"],
+    )
+    count_state = build_restock_count_state(
+        tracking_mode=item_row["tracking_mode"],
+        raw_count=effective_raw_count,
+        par_value=effective_par.value,
+        status_key=status_key,
+    )
+    return {
+        "venue_id": detail["venue_id"],
+        "venue_name": detail["venue_name"],
+        "raw_count": effective_raw_count,
+        "status_key": status_key if is_singleton else None,
+        "raw_count_text": (
+            "Not Counted" if effective_raw_count is None else str(effective_raw_count)
+        ),
+        "is_missing": effective_raw_count is None,
+        "is_stale": detail["is_stale"],
+        "par_count": effective_par.value,
+        "par_count_text": "Not Set" if effective_par.value is None else str(effective_par.value),
+        "suggested_order_qty": count_state.get("suggested_order_qty"),
+        "over_par_qty": count_state.get("over_par_qty"),
+        "current_status_label": restock_status_meta_for_item(
+            status_key, item_row["tracking_mode"]
+        )["text"],
+        "checked_by": actor_labels.get(detail["checked_by_user_id"], ""),
+        "last_updated_at": updated_at,
+        "par_source": effective_par.source,
+        "stale_threshold_days": stale_threshold.value,
+        "stale_threshold_source": stale_threshold.source,
+        "note_count": item_row["notes_count"],
+        "updated_at_text": (
+            "No checks yet"
+            if is_singleton and updated_at is None
+            else format_supply_timestamp(updated_at)
+        ),
+    }
+
+
 def build_supply_summary(rows):
     quantity_rows = [row for row in rows if row["tracking_mode"] != "singleton_asset"]
     singleton_rows = [row for row in rows if row["tracking_mode"] == "singleton_asset"]
@@ -1149,13 +1107,43 @@ def build_supply_display_groups(rows):
     return groups
 
 
-def filter_supply_rows(rows, search_query, item_type, coverage, quick_filters=None):
-    normalized_query = (search_query or "").strip().lower()
+def filter_supply_rows(
+    rows,
+    search_query,
+    item_type,
+    coverage,
+    quick_filters=None,
+    *,
+    search_generation=None,
+):
+    """Filter supply rows; pass `search_generation` read before `rows` were loaded."""
+    normalized_query = normalize_search_query(search_query)
     quick_filters = quick_filters or []
+    if normalized_query:
+        if search_generation is None:
+            search_generation = inventory_search_generation()
+        search_index = get_search_index(
+            "supplies",
+            (search_generation, len(rows)),
+            lambda: [
+                (
+                    " ".join(
+                        filter(
+                            None,
+                            [row["name"], row.get("parent_name"), row.get("tracking_mode_label")],
+                        )
+                    ),
+                )
+                for row in rows
+            ],
+            SUPPLY_SEARCH_FIELDS,
+        )
+        search_ranks = search_index.ranks(normalized_query)
+    else:
+        search_ranks = [0] * len(rows)
     filtered_rows = []
-    for row in rows:
-        haystack = " ".join(filter(None, [row["name"], row.get("parent_name"), row.get("tracking_mode_label")])).lower()
-        if normalized_query and normalized_query not in haystack:
+    for search_rank, row in zip(search_ranks, rows):
+        if search_rank is None:
             continue
         if item_type != "all" and row["item_type"] != item_type:
             continue
@@ -1223,56 +1211,58 @@ def supply_sort_key(row, sort_key):
     )
 
 
-def build_supplies_audit_export_rows(rows):
-    export_rows = []
+def build_supplies_audit_export_rows(rows, *, actor_labels):
+    """Yield one CSV row per item and venue, building each venue row as it is written.
+
+    `actor_labels` comes from `build_supply_actor_labels` and must be resolved
+    before streaming starts, while the request's database session is still open.
+    """
     for item_row in rows:
-        sorted_venue_rows = sorted(
-            item_row.get("venue_rows", []),
-            key=lambda venue_row: (
-                (venue_row.get("venue_name") or "").lower(),
-                int(venue_row.get("venue_id") or 0),
+        sorted_details = sorted(
+            item_row["venue_details"],
+            key=lambda detail: (
+                (detail.get("venue_name") or "").lower(),
+                int(detail.get("venue_id") or 0),
             ),
         )
-        for venue_row in sorted_venue_rows:
-            export_rows.append(
-                {
-                    "Venue Name": sanitize_csv_cell(venue_row.get("venue_name") or ""),
-                    "Item Name": sanitize_csv_cell(item_row.get("name") or ""),
-                    "Setup Group Code": sanitize_csv_cell(item_row.get("setup_group_code") or ""),
-                    "Setup Group Label": sanitize_csv_cell(item_row.get("setup_group_label") or ""),
-                    "Tracking Mode": sanitize_csv_cell(item_row.get("tracking_mode_label") or ""),
-                    "Category": sanitize_csv_cell(item_row.get("item_category") or ""),
-                    "Current Count": (
-                        ""
-                        if venue_row.get("raw_count") is None
-                        else venue_row.get("raw_count")
-                    ),
-                    "Effective Par": (
-                        ""
-                        if venue_row.get("par_count") is None
-                        else venue_row.get("par_count")
-                    ),
-                    "Suggested Order Qty": (
-                        ""
-                        if venue_row.get("suggested_order_qty") is None
-                        else int(venue_row.get("suggested_order_qty") or 0)
-                    ),
-                    "Over Par Qty": (
-                        ""
-                        if venue_row.get("over_par_qty") is None
-                        else int(venue_row.get("over_par_qty") or 0)
-                    ),
-                    "Current Quick Status / Last Saved Status": sanitize_csv_cell(
-                        venue_row.get("current_status_label") or ""
-                    ),
-                    "Last Updated": sanitize_csv_cell(venue_row.get("updated_at_text") or ""),
-                    "Checked By": sanitize_csv_cell(venue_row.get("checked_by") or ""),
-                    "Effective Stale Threshold": venue_row.get("stale_threshold_days") or "",
-                    "Is Stale": "Yes" if venue_row.get("is_stale") else "No",
-                    "Note Count": int(venue_row.get("note_count") or 0),
-                }
-            )
-    return export_rows
+        for detail in sorted_details:
+            venue_row = build_supply_venue_row(item_row, detail, actor_labels=actor_labels)
+            yield {
+                "Venue Name": sanitize_csv_cell(venue_row.get("venue_name") or ""),
+                "Item Name": sanitize_csv_cell(item_row.get("name") or ""),
+                "Setup Group Code": sanitize_csv_cell(item_row.get("setup_group_code") or ""),
+                "Setup Group Label": sanitize_csv_cell(item_row.get("setup_group_label") or ""),
+                "Tracking Mode": sanitize_csv_cell(item_row.get("tracking_mode_label") or ""),
+                "Category": sanitize_csv_cell(item_row.get("item_category") or ""),
+                "Current Count": (
+                    ""
+                    if venue_row.get("raw_count") is None
+                    else venue_row.get("raw_count")
+                ),
+                "Effective Par": (
+                    ""
+                    if venue_row.get("par_count") is None
+                    else venue_row.get("par_count")
+                ),
+                "Suggested Order Qty": (
+                    ""
+                    if venue_row.get("suggested_order_qty") is None
+                    else int(venue_row.get("suggested_order_qty") or 0)
+                ),
+                "Over Par Qty": (
+                    ""
+                    if venue_row.get("over_par_qty") is None
+                    else int(venue_row.get("over_par_qty") or 0)
+                ),
+                "Current Quick Status / Last Saved Status": sanitize_csv_cell(
+                    venue_row.get("current_status_label") or ""
+                ),
+                "Last Updated": sanitize_csv_cell(venue_row.get("updated_at_text") or ""),
+                "Checked By": sanitize_csv_cell(venue_row.get("checked_by") or ""),
+                "Effective Stale Threshold": venue_row.get("stale_threshold_days") or "",
+                "Is Stale": "Yes" if venue_row.get("is_stale") else "No",
+                "Note Count": int(venue_row.get("note_count") or 0),
+            }
 
 
 def build_supplies_export_filename(*, scope):
@@ -1443,8 +1433,10 @@ def note_modal():
 
 @supplies_bp.route("/supplies", methods=["GET", "POST"])
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=10)
 def index():
     filters = build_supply_filter_state(request.values)
+    search_generation = inventory_search_generation() if filters["q"] else None
     all_supply_rows = build_supply_audit_rows()
     all_supply_rows_by_id = {row["id"]: row for row in all_supply_rows}
     valid_note_item_ids = set(all_supply_rows_by_id)
@@ -1568,6 +1560,7 @@ def index():
         filters["item_type"],
         filters["coverage"],
         filters["quick_filters"],
+        search_generation=search_generation,
     )
     filtered_rows = sorted(filtered_rows, key=lambda row: supply_sort_key(row, filters["sort"]))
     supply_groups = build_supply_display_groups(filtered_rows)
@@ -1586,12 +1579,24 @@ def index():
     )
 
 
+@supplies_bp.get("/supplies/<int:item_id>/venue-rows")
+@roles_required("viewer", "staff", "admin")
+@query_budget(6)
+def venue_rows(item_id):
+    layout = "mobile" if request.args.get("layout") == "mobile" else "desktop"
+    rows = build_supply_audit_rows(item_ids=[item_id])
+    if not rows:
+        abort(404)
+    (row,) = expand_supply_venue_rows(rows)
+    return render_template("supplies/_venue_rows.html", row=row, layout=layout)
+
+
 @supplies_bp.get("/supplies/export.csv")
 @roles_required("viewer", "staff", "admin")
+@query_budget(10)
 def export_supplies_audit():
     filters = build_supply_filter_state(request.args)
     scope = normalize_export_scope(request.args.get("scope"), default=EXPORT_SCOPE_FILTERED)
-    all_supply_rows = build_supply_audit_rows()
 
     if scope == EXPORT_SCOPE_FULL:
         export_filters = {
@@ -1603,6 +1608,8 @@ def export_supplies_audit():
         }
     else:
         export_filters = filters
+    search_generation = inventory_search_generation() if export_filters["q"] else None
+    all_supply_rows = build_supply_audit_rows()
 
     export_rows = filter_supply_rows(
         all_supply_rows,
@@ -1610,11 +1617,15 @@ def export_supplies_audit():
         export_filters["item_type"],
         export_filters["coverage"],
         export_filters["quick_filters"],
+        search_generation=search_generation,
     )
     export_rows = sorted(
         export_rows,
         key=lambda row: supply_sort_key(row, export_filters["sort"]),
     )
-    csv_rows = build_supplies_audit_export_rows(export_rows)
+    csv_rows = build_supplies_audit_export_rows(
+        export_rows,
+        actor_labels=build_supply_actor_labels(export_rows),
+    )
     filename = build_supplies_export_filename(scope=scope)
-    return build_csv_response(SUPPLIES_AUDIT_EXPORT_HEADERS, csv_rows, filename)
+    return build_streaming_csv_response(SUPPLIES_AUDIT_EXPORT_HEADERS, csv_rows, filename)
@@ -1,35 +1,50 @@
 from datetime import datetime, timezone
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user
 from sqlalchemy import func
 from sqlalchemy.orm import selectinload
+
 from app import db
 from app.authz import roles_required
-from app.security import normalize_safe_redirect_path
 from app.models import (
-    Venue,
-    Item,
-    VenueItem,
     Check,
-    CheckLine,
     CountSession,
-    CountLine,
-    VenueItemCount,
+    Item,
+    Venue,
+    VenueItem,
     VenueNote,
 )
+from app.security import normalize_safe_redirect_path
+from app.services.inventory_rules import resolve_effective_par_level
 from app.services.inventory_status import (
     build_overall_status_badge as shared_build_overall_status_badge,
+)
+from app.services.inventory_status import (
     derive_singleton_count_from_status as shared_derive_singleton_count,
+)
+from app.services.inventory_status import (
     infer_singleton_status_from_count as shared_infer_singleton_status_from_count,
+)
+from app.services.inventory_status import (
     normalize_singleton_status as shared_normalize_singleton_status,
 )
-from app.services.inventory_rules import resolve_effective_par_level
+from app.services.item_network_rollups import refresh_item_network_rollups
 from app.services.notes import (
     NOTE_BODY_MAX_LENGTH,
     NOTE_TITLE_MAX_LENGTH,
     validate_note_fields,
 )
+from app.services.query_budget import query_budget
+from app.services.quick_check_writes import (
+    insert_check_lines,
+    insert_count_lines,
+    sync_singleton_compat_counts,
+    upsert_venue_item_counts,
+)
+from app.services.signal_loader import get_inventory_signal_loader
+from app.services.venue_item_state import record_check_state, record_count_session_state
+from app.services.venue_rollups import refresh_venue_rollups
 
 venue_items_bp = Blueprint("venue_items", __name__, url_prefix="/venues")
 MAX_DB_INT = 2_147_483_647
@@ -47,29 +62,6 @@ def infer_singleton_status_from_count(raw_count):
     return shared_infer_singleton_status_from_count(raw_count)
 
 
-def sync_singleton_compat_count(existing_counts, venue_id, item_id, status):
-    derived_count = derive_singleton_count(status)
-    current = existing_counts.get(item_id)
-
-    if derived_count is None:
-        if current:
-            db.session.delete(current)
-            existing_counts.pop(item_id, None)
-        return
-
-    if current:
-        current.raw_count = derived_count
-        return
-
-    new_count = VenueItemCount(
-        venue_id=venue_id,
-        item_id=item_id,
-        raw_count=derived_count,
-    )
-    db.session.add(new_count)
-    existing_counts[item_id] = new_count
-
-
 def normalize_next_path(next_candidate, fallback_path):
     return normalize_safe_redirect_path(next_candidate, fallback_path)
 
@@ -429,6 +421,7 @@ def supplies(venue_id):
 
 @venue_items_bp.route("/<int:venue_id>/check", methods=["GET", "POST"])
 @roles_required("viewer", "staff", "admin")
+@query_budget(get=10, post=40)
 def quick_check(venue_id):
     venue = Venue.query.get_or_404(venue_id)
 
@@ -472,10 +465,6 @@ def quick_check(venue_id):
         selected_mode = normalize_quick_check_mode(request.form.get("check_mode"), "status")
 
         if selected_mode == "raw_counts":
-            existing_counts = {
-                row.item_id: row
-                for row in VenueItemCount.query.filter_by(venue_id=venue.id).all()
-            }
             adjusted_inputs = 0
             quantity_items = [it for it in tracked if it.tracking_mode != "singleton_asset"]
             quantity_count_updates = []
@@ -509,48 +498,39 @@ def quick_check(venue_id):
                     )
                 )
 
+            saved_at = datetime.now(timezone.utc)
             if quantity_count_updates:
                 count_session = CountSession(venue_id=venue.id, user_id=current_user.id)
                 db.session.add(count_session)
                 db.session.flush()
 
-                refreshed_at = datetime.now(timezone.utc)
-                for it, raw_count in quantity_count_updates:
-                    db.session.add(
-                        CountLine(
-                            count_session_id=count_session.id,
-                            item_id=it.id,
-                            raw_count=raw_count,
-                        )
-                    )
+                item_counts = [(it.id, raw_count) for it, raw_count in quantity_count_updates]
+                insert_count_lines(count_session.id, item_counts)
+                upsert_venue_item_counts(venue.id, item_counts, updated_at=saved_at)
+                record_count_session_state(count_session, item_counts)
 
-                    current = existing_counts.get(it.id)
-                    if current:
-                        current.raw_count = raw_count
-                        current.updated_at = refreshed_at
-                    else:
-                        current = VenueItemCount(
-                            venue_id=venue.id,
-                            item_id=it.id,
-                            raw_count=raw_count,
-                            updated_at=refreshed_at,
-                        )
-                        db.session.add(current)
-                        existing_counts[it.id] = current
-
-            singleton_status_updates = [
-                (it, status) for it, status in status_updates if it.tracking_mode == "singleton_asset"
-            ]
             if status_updates:
                 chk = Check(venue_id=venue.id, user_id=current_user.id)
                 db.session.add(chk)
                 db.session.flush()
 
-                for it, status in status_updates:
-                    db.session.add(CheckLine(check_id=chk.id, item_id=it.id, status=status))
-                for it, status in singleton_status_updates:
-                    sync_singleton_compat_count(existing_counts, venue.id, it.id, status)
+                item_statuses = [(it.id, status) for it, status in status_updates]
+                insert_check_lines(chk.id, item_statuses)
+                sync_singleton_compat_counts(
+                    venue.id,
+                    [
+                        (it.id, status)
+                        for it, status in status_updates
+                        if it.tracking_mode == "singleton_asset"
+                    ],
+                    updated_at=saved_at,
+                )
+                record_check_state(chk, item_statuses)
 
+            refresh_venue_rollups([venue.id])
+            refresh_item_network_rollups(
+                [it.id for it, _ in quantity_count_updates] + [it.id for it, _ in status_updates]
+            )
             db.session.commit()
             if adjusted_inputs:
                 flash(
@@ -591,25 +571,20 @@ def quick_check(venue_id):
         db.session.add(chk)
         db.session.flush()
 
-        for it, status in selected_status_updates:
-            db.session.add(CheckLine(check_id=chk.id, item_id=it.id, status=status))
-
-        selected_singleton_updates = [
-            (it, status) for it, status in selected_status_updates if it.tracking_mode == "singleton_asset"
-        ]
-        if selected_singleton_updates:
-            existing_counts = {
-                row.item_id: row
-                for row in VenueItemCount.query.filter_by(venue_id=venue.id).all()
-            }
-            for it, status in selected_singleton_updates:
-                sync_singleton_compat_count(
-                    existing_counts,
-                    venue.id,
-                    it.id,
-                    status,
-                )
+        item_statuses = [(it.id, status) for it, status in selected_status_updates]
+        insert_check_lines(chk.id, item_statuses)
+        record_check_state(chk, item_statuses)
+        sync_singleton_compat_counts(
+            venue.id,
+            [
+                (it.id, status)
+                for it, status in selected_status_updates
+                if it.tracking_mode == "singleton_asset"
+            ],
+        )
 
+        refresh_venue_rollups([venue.id])
+        refresh_item_network_rollups([it.id for it, _ in selected_status_updates])
         db.session.commit()
         flash(
             quick_check_save_message(status_update_count=len(selected_status_updates)),
@@ -622,54 +597,25 @@ def quick_check(venue_id):
             request_values=request.values,
         )
 
-    latest_counts = {}
-    for it in tracked:
-        row = (
-            db.session.query(VenueItemCount.raw_count)
-            .filter(VenueItemCount.venue_id == venue.id, VenueItemCount.item_id == it.id)
-            .first()
-        )
-        latest_counts[it.id] = row[0] if row else None
+    signal_loader = get_inventory_signal_loader()
+    tracked_item_ids = [it.id for it in tracked]
+    latest_counts = signal_loader.load_current_counts(venue.id, tracked_item_ids)
 
     # GET: Prefill with most recent status per item (if exists)
+    latest_status_signals = signal_loader.load_latest_status_signals(venue.id, tracked_item_ids)
     latest_status = {}
     for it in tracked:
-        row = (
-            db.session.query(CheckLine.status)
-            .join(Check, Check.id == CheckLine.check_id)
-            .filter(Check.venue_id == venue.id, CheckLine.item_id == it.id)
-            .order_by(Check.created_at.desc())
-            .first()
-        )
-        resolved_status = row[0] if row else "not_checked"
+        status_signal = latest_status_signals.get(it.id)
+        resolved_status = status_signal["status"] if status_signal else "not_checked"
         if it.tracking_mode == "singleton_asset":
-            if row is None:
+            if status_signal is None:
                 resolved_status = infer_singleton_status_from_count(latest_counts.get(it.id))
             else:
                 resolved_status = normalize_singleton_status(resolved_status)
             latest_counts[it.id] = derive_singleton_count(resolved_status)
         latest_status[it.id] = resolved_status
 
-    note_counts_by_item = {}
-    tracked_item_ids = [it.id for it in tracked]
-    if tracked_item_ids:
-        note_counts_by_item = {
-            row.item_id: int(row.note_count or 0)
-            for row in (
-                db.session.query(
-                    VenueNote.item_id.label("item_id"),
-                    func.count(VenueNote.id).label("note_count"),
-                )
-                .filter(
-                    VenueNote.venue_id == venue.id,
-                    VenueNote.item_id.is_not(None),
-                    VenueNote.item_id.in_(tracked_item_ids),
-                )
-                .group_by(VenueNote.item_id)
-                .all()
-            )
-            if row.item_id is not None
-        }
+    note_counts_by_item = signal_loader.load_note_counts(venue.id, tracked_item_ids)
 
     overall_counts = {"good": 0, "ok": 0, "low": 0, "out": 0, "not_checked": 0}
     overall_detail_counts = {
@@ -747,6 +693,7 @@ def quick_check_create_note(venue_id):
             body=body,
         )
     )
+    refresh_venue_rollups([venue.id])
     db.session.commit()
 
     note_count = (
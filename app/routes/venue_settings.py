@@ -4,8 +4,12 @@ from sqlalchemy.orm import selectinload
 
 from app import db
 from app.authz import roles_required
-from app.security import normalize_safe_redirect_path
 from app.models import Item, Venue
+from app.security import normalize_safe_redirect_path
+from app.services.inventory_activity import (
+    delete_inventory_activity_events,
+    sync_venue_activity_name,
+)
 from app.services.inventory_rules import (
     InventoryRuleError,
     copy_venue_tracking_setup,
@@ -17,6 +21,9 @@ from app.services.inventory_rules import (
     resolve_effective_stale_threshold_days,
     sync_venue_tracked_items,
 )
+from app.services.item_network_rollups import refresh_venue_item_network_rollups
+from app.services.venue_item_state import delete_venue_item_state
+from app.services.venue_rollups import delete_venue_rollups, refresh_venue_rollups
 
 venue_settings_bp = Blueprint("venue_settings", __name__, url_prefix="/venues")
 
@@ -285,6 +292,12 @@ def settings(venue_id):
             )
 
         if details_changed or tracking_changed:
+            if "name" in changed_fields:
+                sync_venue_activity_name(venue)
+            if tracking_changed:
+                refresh_venue_rollups([venue.id])
+            if tracking_changed or "visibility" in changed_fields:
+                refresh_venue_item_network_rollups([venue.id])
             db.session.commit()
             if details_changed and tracking_changed:
                 flash("Venue settings and tracked items saved.", "success")
@@ -345,6 +358,10 @@ def settings(venue_id):
                                 subject_label=venue.name,
                                 details={"changed_fields": changed_fields},
                             )
+                        if "name" in changed_fields:
+                            sync_venue_activity_name(venue)
+                        if "visibility" in changed_fields:
+                            refresh_venue_item_network_rollups([venue.id])
                         db.session.commit()
                         flash("Venue settings saved.", "success")
                         return redirect(settings_self_url())
@@ -375,6 +392,8 @@ def settings(venue_id):
                         subject_label=venue.name,
                         details=summary,
                     )
+                    refresh_venue_rollups([venue.id])
+                    refresh_venue_item_network_rollups([venue.id])
                     db.session.commit()
                     flash("Tracked items saved.", "success")
                 else:
@@ -404,6 +423,8 @@ def settings(venue_id):
                         subject_label=venue.name,
                         details=summary,
                     )
+                    refresh_venue_rollups([venue.id])
+                    refresh_venue_item_network_rollups([venue.id])
                     db.session.commit()
                     flash(f"Tracked setup copied from {source_venue.name}.", "success")
                     return redirect(settings_self_url())
@@ -413,6 +434,9 @@ def settings(venue_id):
                 flash("Primary venues cannot be deleted. Deactivate instead.", "error")
                 return redirect(settings_self_url())
 
+            delete_venue_rollups([venue.id])
+            delete_venue_item_state([venue.id])
+            delete_inventory_activity_events(venue_ids=[venue.id])
             db.session.delete(venue)
             db.session.commit()
             flash("Venue deleted.", "success")
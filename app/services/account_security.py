@@ -21,6 +21,7 @@ from app.models import (
     normalize_role,
 )
 from app.security import build_external_url
+from app.services.inventory_activity import sync_actor_activity_name
 from app.services.inventory_status import ensure_utc
 
 PASSWORD_SETUP_PURPOSE = "password_setup"
@@ -309,7 +310,8 @@ def create_managed_user(*, actor, email, display_name, role):
             user=user,
             purpose=PASSWORD_SETUP_PURPOSE,
         )
-        db.session.commit()
+        # Not committed here: the caller commits once the setup email is queued,
+        # so the token and its outbox row are written together.
         return user, issued_link
     except Exception:
         db.session.rollback()
@@ -334,6 +336,7 @@ def update_managed_user(*, actor, user_id, display_name, role):
         changed_fields = []
         if user.display_name != normalized_display_name:
             user.display_name = normalized_display_name
+            sync_actor_activity_name(user)
             changed_fields.append("display name")
 
         previous_role = user.role
@@ -433,7 +436,7 @@ def issue_admin_password_link(*, actor, user_id):
 
         purpose = PASSWORD_SETUP_PURPOSE if user.force_password_change else PASSWORD_RESET_PURPOSE
         issued_link = _issue_password_link(actor=actor, user=user, purpose=purpose)
-        db.session.commit()
+        # The caller commits once the link email is queued.
         return user, issued_link
     except Exception:
         db.session.rollback()
@@ -449,7 +452,7 @@ def request_password_link_for_email(email):
 
         purpose = PASSWORD_SETUP_PURPOSE if user.force_password_change else PASSWORD_RESET_PURPOSE
         issued_link = _issue_password_link(actor=None, user=user, purpose=purpose)
-        db.session.commit()
+        # The caller commits once the link email is queued.
         return user, issued_link
     except AccountManagementError:
         db.session.rollback()
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import Integer, String, and_, cast, func, literal, or_, select, union_all
+from flask import current_app
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import aliased
 
 from app import db
@@ -15,15 +17,35 @@ from app.models import (
     InventoryAdminEvent,
     Item,
     PasswordActionToken,
+    RequestPerformanceSample,
     TrustedDevice,
     User,
     Venue,
     VenueNote,
 )
 from app.services.account_security import describe_account_event
+from app.services.allocation_profiling import (
+    ALL_ENDPOINTS,
+    ALLOCATION_HEADER,
+    MAX_WINDOW_MINUTES,
+    list_allocation_captures,
+    load_allocation_mode,
+)
 from app.services.feedback import build_feedback_summary_counts
+from app.services.inventory_activity import build_recent_activity_event_rows
 from app.services.inventory_rules import describe_inventory_admin_event
 from app.services.inventory_status import ensure_utc, normalize_status
+from app.services.request_performance import SAMPLE_REASON_SLOW, summarize_durations
+from app.services.request_profiling import (
+    DEFAULT_PROFILE_SORT,
+    PROFILE_HEADER,
+    PROFILE_QUERY_ARG,
+    PROFILE_SORT_OPTIONS,
+    build_profile_rows,
+    issue_profile_token,
+    list_request_profiles,
+    load_sampling_rule,
+)
 
 USER_ACTIVITY_WINDOW_DAYS = 30
 RECENT_ACTIVITY_LIMIT = 8
@@ -32,6 +54,12 @@ FEED_PREVIEW_LIMIT = 2
 RANKING_PREVIEW_LIMIT = 3
 ATTENTION_PREVIEW_LIMIT = 2
 GROUP_PREVIEW_LIMIT = 1
+PERFORMANCE_WINDOW_OPTIONS = (1, 7, 30)
+PERFORMANCE_DEFAULT_WINDOW_DAYS = 7
+PERFORMANCE_ENDPOINT_LIMIT = 25
+PERFORMANCE_COMBINATION_LIMIT = 20
+PERFORMANCE_SLOWEST_SAMPLE_LIMIT = 15
+ALLOCATION_ENDPOINT_SITE_LIMIT = 5
 
 USER_ROLE_META = {
     "admin": {"label": "Admin", "tone": "danger", "icon_class": "bi-shield-lock"},
@@ -256,6 +284,228 @@ def build_admin_history_view_model():
     }
 
 
+def normalize_performance_window_days(value):
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return PERFORMANCE_DEFAULT_WINDOW_DAYS
+    return days if days in PERFORMANCE_WINDOW_OPTIONS else PERFORMANCE_DEFAULT_WINDOW_DAYS
+
+
+def build_admin_performance_view_model(days=None, endpoint=None):
+    window_days = normalize_performance_window_days(days)
+    window_start = utcnow_naive() - timedelta(days=window_days)
+    rows = (
+        db.session.query(
+            RequestPerformanceSample.endpoint,
+            RequestPerformanceSample.reason,
+            RequestPerformanceSample.total_ms,
+            RequestPerformanceSample.db_ms,
+            RequestPerformanceSample.statement_count,
+            RequestPerformanceSample.weight,
+        )
+        .filter(RequestPerformanceSample.recorded_at >= window_start)
+        .all()
+    )
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.endpoint, []).append(row)
+    endpoint_rows = sorted(
+        (_summarize_performance_rows(samples, endpoint=name) for name, samples in grouped.items()),
+        key=lambda row: (-row["p95"], row["endpoint"]),
+    )
+
+    selected_endpoint = (endpoint or "").strip() or None
+    if selected_endpoint not in grouped:
+        selected_endpoint = None
+    return {
+        "window_days": window_days,
+        "window_options": PERFORMANCE_WINDOW_OPTIONS,
+        "sample_count": len(rows),
+        "slow_count": sum(1 for row in rows if row.reason == SAMPLE_REASON_SLOW),
+        "endpoint_rows": endpoint_rows[:PERFORMANCE_ENDPOINT_LIMIT],
+        "selected_endpoint": selected_endpoint,
+        "drilldown": (
+            _build_performance_drilldown(selected_endpoint, window_start)
+            if selected_endpoint
+            else None
+        ),
+    }
+
+
+def _summarize_performance_rows(samples, **extra):
+    """Percentiles and averages count each row as `weight` requests, not as one sample."""
+    weights = [sample.weight for sample in samples]
+    durations = summarize_durations([sample.total_ms for sample in samples], weights)
+    requests = durations["estimated_requests"]
+    return {
+        **extra,
+        **durations,
+        "slow_count": sum(1 for sample in samples if sample.reason == SAMPLE_REASON_SLOW),
+        "avg_db_ms": sum(sample.db_ms * sample.weight for sample in samples) / requests,
+        "avg_statements": (
+            sum(sample.statement_count * sample.weight for sample in samples) / requests
+        ),
+    }
+
+
+def _build_performance_drilldown(endpoint, window_start):
+    samples = (
+        RequestPerformanceSample.query.filter(
+            RequestPerformanceSample.endpoint == endpoint,
+            RequestPerformanceSample.recorded_at >= window_start,
+        )
+        .order_by(RequestPerformanceSample.total_ms.desc(), RequestPerformanceSample.id.desc())
+        .all()
+    )
+    by_fingerprint = {}
+    for sample in samples:
+        by_fingerprint.setdefault(sample.args_fingerprint, []).append(sample)
+    combination_rows = sorted(
+        (
+            _summarize_performance_rows(
+                group,
+                args_fingerprint=fingerprint,
+                args_summary=group[0].args_summary or "(no arguments)",
+            )
+            for fingerprint, group in by_fingerprint.items()
+        ),
+        key=lambda row: (-row["p95"], row["args_summary"]),
+    )
+    return {
+        "combination_rows": combination_rows[:PERFORMANCE_COMBINATION_LIMIT],
+        "slowest_samples": [
+            _serialize_performance_sample(sample)
+            for sample in samples[:PERFORMANCE_SLOWEST_SAMPLE_LIMIT]
+        ],
+    }
+
+
+def _serialize_performance_sample(sample):
+    try:
+        top_statements = json.loads(sample.top_statements_json or "[]")
+    except ValueError:
+        top_statements = []
+    return {
+        "id": sample.id,
+        "recorded_at_text": format_admin_timestamp(sample.recorded_at),
+        "method": sample.method,
+        "args_summary": sample.args_summary or "(no arguments)",
+        "user_role": sample.user_role,
+        "status_code": sample.status_code,
+        "total_ms": sample.total_ms,
+        "db_ms": sample.db_ms,
+        "statement_count": sample.statement_count,
+        "response_bytes": sample.response_bytes,
+        "reason": sample.reason,
+        "top_statements": [
+            {"statement": statement, "count": count} for statement, count in top_statements
+        ],
+    }
+
+
+def build_admin_profiles_view_model(actor):
+    rows = []
+    for summary in list_request_profiles():
+        recorded_at = datetime.fromisoformat(summary["recorded_at"])
+        rows.append({**summary, "recorded_at_text": format_admin_timestamp(recorded_at)})
+    sampled_endpoints = sorted(
+        endpoint
+        for endpoint in current_app.view_functions
+        if endpoint not in {"static", "metrics"}
+    )
+    return {
+        "rows": rows,
+        "sampling_rule": load_sampling_rule(),
+        "sampled_endpoints": sampled_endpoints,
+        "profile_header": PROFILE_HEADER,
+        "profile_query_arg": PROFILE_QUERY_ARG,
+        "profile_token": issue_profile_token(actor.id),
+    }
+
+
+def build_admin_profile_detail_view_model(request_id, sort=None, search=None):
+    """Raises RequestProfileError for unknown or malformed ids."""
+    sort = sort if sort in PROFILE_SORT_OPTIONS else DEFAULT_PROFILE_SORT
+    search = (search or "").strip()
+    total_calls, total_seconds, rows = build_profile_rows(request_id, sort=sort, search=search)
+    summary = next(
+        (row for row in list_request_profiles() if row["request_id"] == request_id),
+        {"request_id": request_id},
+    )
+    return {
+        "summary": summary,
+        "sort": sort,
+        "search": search,
+        "sort_options": PROFILE_SORT_OPTIONS,
+        "total_calls": total_calls,
+        "total_ms": total_seconds * 1000,
+        "rows": rows,
+    }
+
+def build_admin_allocations_view_model():
+    captures = list_allocation_captures()
+    by_endpoint = {}
+    for capture in captures:
+        by_endpoint.setdefault(capture["endpoint"], []).append(capture)
+
+    endpoint_rows = []
+    for endpoint, group in by_endpoint.items():
+        site_sizes = {}
+        for capture in group:
+            for site in capture["app_sites"]:
+                site_sizes[site["location"]] = site_sizes.get(site["location"], 0) + site["size"]
+        top_sites = sorted(site_sizes.items(), key=lambda pair: -pair[1])
+        endpoint_rows.append(
+            {
+                "endpoint": endpoint,
+                "count": len(group),
+                "max_peak_kib": max(capture["peak_bytes"] for capture in group) / 1024,
+                "avg_peak_kib": sum(capture["peak_bytes"] for capture in group) / len(group) / 1024,
+                "avg_retained_kib": (
+                    sum(capture["retained_bytes"] for capture in group) / len(group) / 1024
+                ),
+                "top_sites": [
+                    {"location": location, "avg_kib": size / len(group) / 1024}
+                    for location, size in top_sites[:ALLOCATION_ENDPOINT_SITE_LIMIT]
+                ],
+            }
+        )
+    endpoint_rows.sort(key=lambda row: (-row["max_peak_kib"], row["endpoint"]))
+
+    mode = load_allocation_mode()
+    if mode:
+        mode = {
+            **mode,
+            "until_text": format_admin_timestamp(
+                datetime.fromtimestamp(mode["until"], tz=timezone.utc)
+            ),
+        }
+    return {
+        "endpoint_rows": endpoint_rows,
+        "captures": [
+            {
+                **capture,
+                "recorded_at_text": format_admin_timestamp(
+                    datetime.fromisoformat(capture["recorded_at"])
+                ),
+                "peak_kib": capture["peak_bytes"] / 1024,
+                "retained_kib": capture["retained_bytes"] / 1024,
+            }
+            for capture in captures
+        ],
+        "mode": mode,
+        "all_endpoints": ALL_ENDPOINTS,
+        "traced_endpoints": sorted(
+            endpoint
+            for endpoint in current_app.view_functions
+            if endpoint not in {"static", "metrics"}
+        ),
+        "max_window_minutes": MAX_WINDOW_MINUTES,
+        "allocation_header": ALLOCATION_HEADER,
+    }
+
+
 def build_user_summary_counts():
     now = utcnow_naive()
     locked_filter = and_(User.locked_until.is_not(None), User.locked_until > now)
@@ -928,88 +1178,10 @@ def _build_recent_creation_groups(limit=5):
 
 
 def _build_inventory_change_rows(limit=RECENT_HISTORY_LIMIT):
-    status_actor_name = _activity_actor_name_expr(User.display_name, User.email)
-    previous_status = func.lag(CheckLine.status).over(
-        partition_by=(Check.venue_id, CheckLine.item_id),
-        order_by=(Check.created_at.asc(), Check.id.asc()),
-    )
-    status_inner = (
-        select(
-            literal("status").label("type_key"),
-            Check.id.label("event_id"),
-            Check.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            status_actor_name.label("actor_name"),
-            previous_status.label("old_status_key"),
-            CheckLine.status.label("new_status_key"),
-            cast(literal(None), Integer).label("old_raw_count"),
-            cast(literal(None), Integer).label("new_raw_count"),
-        )
-        .select_from(Check)
-        .join(Venue, Venue.id == Check.venue_id)
-        .join(CheckLine, CheckLine.check_id == Check.id)
-        .join(Item, Item.id == CheckLine.item_id)
-        .outerjoin(User, User.id == Check.user_id)
-        .subquery()
-    )
-    status_events = select(status_inner).where(
-        or_(
-            and_(
-                status_inner.c.old_status_key.is_(None),
-                status_inner.c.new_status_key != "not_checked",
-            ),
-            status_inner.c.old_status_key != status_inner.c.new_status_key,
-        )
-    )
-
-    count_actor_name = _activity_actor_name_expr(User.display_name, User.email)
-    previous_raw_count = func.lag(CountLine.raw_count).over(
-        partition_by=(CountSession.venue_id, CountLine.item_id),
-        order_by=(CountSession.created_at.asc(), CountSession.id.asc()),
-    )
-    count_inner = (
-        select(
-            literal("raw_count").label("type_key"),
-            CountSession.id.label("event_id"),
-            CountSession.created_at.label("changed_at"),
-            Venue.name.label("venue_name"),
-            Item.name.label("item_name"),
-            count_actor_name.label("actor_name"),
-            cast(literal(None), String).label("old_status_key"),
-            cast(literal(None), String).label("new_status_key"),
-            previous_raw_count.label("old_raw_count"),
-            CountLine.raw_count.label("new_raw_count"),
-        )
-        .select_from(CountSession)
-        .join(Venue, Venue.id == CountSession.venue_id)
-        .join(CountLine, CountLine.count_session_id == CountSession.id)
-        .join(Item, Item.id == CountLine.item_id)
-        .outerjoin(User, User.id == CountSession.user_id)
-        .subquery()
-    )
-    count_events = select(count_inner).where(
-        or_(
-            count_inner.c.old_raw_count.is_(None),
-            count_inner.c.old_raw_count != count_inner.c.new_raw_count,
-        )
-    )
-
-    activity_events = union_all(status_events, count_events).subquery()
-    rows = db.session.execute(
-        select(activity_events)
-        .order_by(activity_events.c.changed_at.desc(), activity_events.c.event_id.desc())
-        .limit(limit)
-    ).mappings()
+    rows = build_recent_activity_event_rows(limit=limit)
     return [_serialize_inventory_change_row(row) for row in rows]
 
 
-def _activity_actor_name_expr(display_name_col, email_col):
-    trimmed_display_name = func.nullif(func.trim(display_name_col), "")
-    trimmed_email = func.nullif(func.trim(email_col), "")
-    return func.coalesce(trimmed_display_name, func.lower(trimmed_email), literal("Unknown user"))
-
-
 def _serialize_inventory_change_row(row):
     type_key = row["type_key"]
     changed_at = row["changed_at"]
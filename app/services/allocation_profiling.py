@@ -0,0 +1,238 @@
+"""tracemalloc allocation captures of single requests.
+
+An admin sends `X-Allocation-Profile: 1`, or turns on an allocation window for
+one endpoint (or all of them) from Admin > Allocations. Tracing starts when the
+request begins and stops once the response is built, or once a streamed body
+(such as a CSV export) has been sent, so a capture records the peak traced
+memory of the request and the memory still held at that point. Allocation
+sites are attributed to the innermost frame in this app, so library allocations
+land on the builder that caused them. tracemalloc is process-wide, so one
+request per worker is traced at a time and allocations from other threads in
+that window are included.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+
+from flask import current_app, g, request
+from flask_login import current_user
+
+from app.services.request_performance import (
+    build_args_fingerprint,
+    finish_after_body,
+    streams_body,
+)
+from app.services.request_profiling import (
+    profile_dir,
+    read_shared_json,
+    short_source_path,
+    write_json_atomic,
+)
+
+ALLOCATION_HEADER = "X-Allocation-Profile"
+ALLOCATION_ID_HEADER = "X-Allocation-Profile-Id"
+ALLOCATION_MODE_FILENAME = "allocation_mode.json"
+ALLOCATION_FILE_PREFIX = "alloc-"
+ALLOCATION_TRIGGER_ADMIN = "admin"
+ALLOCATION_TRIGGER_WINDOW = "window"
+ALL_ENDPOINTS = "*"
+MAX_WINDOW_MINUTES = 60
+TRACE_FRAMES = 25
+TOP_SITE_LIMIT = 15
+
+_STATE_ATTR = "allocation_trace"
+_UNTRACED_ENDPOINTS = {None, "static", "metrics"}
+_trace_lock = Lock()
+
+
+class AllocationProfileError(ValueError):
+    pass
+
+
+def load_allocation_mode(directory=None, *, now=None):
+    """Return the active `{"endpoint", "until"}` window, or None once it has expired."""
+    mode = read_shared_json((directory or profile_dir()) / ALLOCATION_MODE_FILENAME)
+    if not isinstance(mode, dict) or float(mode.get("until") or 0) <= (now or time.time()):
+        return None
+    return mode
+
+
+def start_allocation_window(endpoint, minutes, directory=None):
+    endpoint = (endpoint or "").strip() or ALL_ENDPOINTS
+    if endpoint != ALL_ENDPOINTS and (
+        endpoint not in current_app.view_functions or endpoint in _UNTRACED_ENDPOINTS
+    ):
+        raise AllocationProfileError("Choose an existing endpoint to trace.")
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        raise AllocationProfileError("Window length must be a whole number of minutes.") from None
+    if not 1 <= minutes <= MAX_WINDOW_MINUTES:
+        raise AllocationProfileError(
+            f"Window length must be between 1 and {MAX_WINDOW_MINUTES} minutes."
+        )
+    mode = {"endpoint": endpoint, "until": time.time() + minutes * 60}
+    write_json_atomic((directory or profile_dir()) / ALLOCATION_MODE_FILENAME, mode)
+    return mode
+
+
+def stop_allocation_window(directory=None):
+    ((directory or profile_dir()) / ALLOCATION_MODE_FILENAME).unlink(missing_ok=True)
+
+
+def _allocation_trigger():
+    if (
+        getattr(current_user, "is_authenticated", False)
+        and current_user.has_role("admin")
+        and request.headers.get(ALLOCATION_HEADER, "").strip() == "1"
+    ):
+        return ALLOCATION_TRIGGER_ADMIN
+    mode = load_allocation_mode()
+    if mode and mode.get("endpoint") in (ALL_ENDPOINTS, request.endpoint):
+        return ALLOCATION_TRIGGER_WINDOW
+    return None
+
+
+def _start_allocation_trace():
+    if request.endpoint in _UNTRACED_ENDPOINTS:
+        return
+    trigger = _allocation_trigger()
+    # Someone else (another request, or a developer) already owns tracemalloc.
+    if trigger is None or tracemalloc.is_tracing() or not _trace_lock.acquire(blocking=False):
+        return
+    tracemalloc.start(TRACE_FRAMES)
+    setattr(g, _STATE_ATTR, (trigger, time.perf_counter()))
+
+
+def _source_roots():
+    app_root = Path(current_app.root_path)
+    return (str(app_root), str(Path(app_root, current_app.template_folder).resolve()))
+
+
+def _app_frame(traceback, roots):
+    for frame in reversed(traceback):
+        if frame.filename.startswith(roots):
+            return frame
+    return None
+
+
+def summarize_allocation_snapshot(snapshot, roots, *, limit=TOP_SITE_LIMIT):
+    """Group live allocations by the innermost app frame and by raw allocation line."""
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )
+    )
+    app_sites = {}
+    retained = 0
+    for stat in snapshot.statistics("traceback"):
+        retained += stat.size
+        frame = _app_frame(stat.traceback, roots)
+        key = f"{short_source_path(frame.filename)}:{frame.lineno}" if frame else "(outside app)"
+        site = app_sites.setdefault(key, {"location": key, "size": 0, "count": 0})
+        site["size"] += stat.size
+        site["count"] += stat.count
+    raw_sites = [
+        {
+            "location": (
+                f"{short_source_path(stat.traceback[-1].filename)}:{stat.traceback[-1].lineno}"
+            ),
+            "size": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+    return {
+        "retained_bytes": retained,
+        "app_sites": sorted(app_sites.values(), key=lambda row: -row["size"])[:limit],
+        "raw_sites": raw_sites,
+    }
+
+
+def _finish_allocation_trace(response):
+    state = g.pop(_STATE_ATTR, None)
+    if state is None:
+        return response
+    trigger, started_at = state
+    _, args_summary = build_args_fingerprint(request.view_args, request.args.items(multi=True))
+    capture = {
+        "capture_id": secrets.token_hex(8),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "args_summary": args_summary,
+        "user_role": getattr(current_user, "role", None) or "anonymous",
+        "status_code": response.status_code,
+        "trigger": trigger,
+    }
+    if streams_body(response):
+        finish_after_body(
+            response, lambda _body_bytes: _store_allocation_capture(capture, started_at)
+        )
+    elif not _store_allocation_capture(capture, started_at):
+        return response
+    response.headers[ALLOCATION_ID_HEADER] = capture["capture_id"]
+    return response
+
+
+def _store_allocation_capture(capture, started_at):
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        _trace_lock.release()
+    capture.update(
+        total_ms=round((time.perf_counter() - started_at) * 1000, 2),
+        peak_bytes=peak,
+        **summarize_allocation_snapshot(snapshot, _source_roots()),
+    )
+    try:
+        save_allocation_capture(capture)
+    except OSError:
+        current_app.logger.warning("Could not store allocation capture", exc_info=True)
+        return False
+    return True
+
+
+def _abandon_allocation_trace(exc):
+    # after_request does not run when the view raises; never leave tracing on.
+    if g.pop(_STATE_ATTR, None) is not None:
+        tracemalloc.stop()
+        _trace_lock.release()
+
+
+def save_allocation_capture(capture, directory=None):
+    directory = directory or profile_dir()
+    write_json_atomic(directory / f"{ALLOCATION_FILE_PREFIX}{capture['capture_id']}.json", capture)
+    for stale in list_allocation_captures(directory)[current_app.config["REQUEST_PROFILE_KEEP"]:]:
+        (directory / f"{ALLOCATION_FILE_PREFIX}{stale['capture_id']}.json").unlink(missing_ok=True)
+
+
+def list_allocation_captures(directory=None):
+    """Return stored captures, newest first."""
+    directory = directory or profile_dir()
+    captures = []
+    for path in directory.glob(f"{ALLOCATION_FILE_PREFIX}*.json"):
+        try:
+            captures.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return sorted(captures, key=lambda row: (row["recorded_at"], row["capture_id"]), reverse=True)
+
+
+def init_allocation_profiling(app):
+    """Register the tracemalloc hooks; see the module docstring for how requests opt in."""
+    if not app.config.get("REQUEST_PROFILING_ENABLED", True):
+        return
+    app.before_request(_start_allocation_trace)
+    app.after_request(_finish_allocation_trace)
+    app.teardown_request(_abandon_allocation_trace)
@@ -7,10 +7,13 @@ from datetime import datetime
 
 from flask import Response
 
+from app.services.metrics import current_endpoint_label, export_size
+
 EXPORT_SCOPE_FILTERED = "filtered"
 EXPORT_SCOPE_FULL = "full"
 VALID_EXPORT_SCOPES = {EXPORT_SCOPE_FILTERED, EXPORT_SCOPE_FULL}
 CSV_FORMULA_PREFIX_CHARACTERS = ("=", "+", "-", "@")
+CSV_STREAM_CHUNK_CHARS = 64 * 1024
 
 
 def normalize_export_scope(raw_value, *, default=EXPORT_SCOPE_FILTERED):
@@ -28,29 +31,41 @@ def sanitize_csv_cell(value):
     return value
 
 
-def sanitize_csv_rows(rows):
-    sanitized_rows = []
-    for row in rows:
-        sanitized_rows.append(
-            {
-                key: sanitize_csv_cell(value)
-                for key, value in row.items()
-            }
-        )
-    return sanitized_rows
-
-
-def build_csv_response(fieldnames, rows, filename):
-    output = io.StringIO(newline="")
-    writer = csv.DictWriter(output, fieldnames=list(fieldnames))
+def iter_csv_chunks(fieldnames, rows, *, chunk_chars=CSV_STREAM_CHUNK_CHARS):
+    """Yield the CSV for `rows` as UTF-8 bytes (BOM first) in chunks of about `chunk_chars`.
+
+    Rows are written as given; their builders pass text cells through `sanitize_csv_cell`.
+    """
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=list(fieldnames))
+    buffer.write("\ufeff")
     writer.writeheader()
-    for row in sanitize_csv_rows(rows):
+    for row in rows:
         writer.writerow(row)
-
-    response = Response(
-        output.getvalue().encode("utf-8-sig"),
-        mimetype="text/csv; charset=utf-8",
-    )
+        if buffer.tell() >= chunk_chars:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def build_streaming_csv_response(fieldnames, rows, filename):
+    """Stream `rows` (any iterable of dicts) as a CSV download without buffering the file.
+
+    Rows are pulled while the response is sent, after the request and its database
+    session have ended, so lazy row builders must read ORM objects up front.
+    """
+    endpoint = current_endpoint_label()
+
+    def generate():
+        total_bytes = 0
+        for chunk in iter_csv_chunks(fieldnames, rows):
+            total_bytes += len(chunk)
+            yield chunk
+        export_size.observe(total_bytes, endpoint=endpoint)
+
+    response = Response(generate(), mimetype="text/csv; charset=utf-8")
     response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
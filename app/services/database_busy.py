@@ -0,0 +1,51 @@
+"""Retryable 503 responses for database lock and timeout errors.
+
+SQLite writer contention, Postgres lock/statement timeouts and connection pool
+timeouts all reach Flask as exceptions that would otherwise become a bare 500.
+They are transient, so clients get `503` with `Retry-After` and
+`X-Database-Busy: 1` instead, which is also how `scripts/loadtest.py` tells
+them apart from real failures. Every other OperationalError is re-raised
+untouched. Set DATABASE_BUSY_RESPONSES_ENABLED=0 to keep plain 500s.
+"""
+
+from __future__ import annotations
+
+from flask import current_app, request
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import db
+
+DATABASE_BUSY_HEADER = "X-Database-Busy"
+DATABASE_BUSY_MARKERS = (
+    "database is locked",
+    "database table is locked",
+    "lock timeout",
+    "statement timeout",
+    "canceling statement due to",
+)
+
+
+def is_database_busy_error(error):
+    if isinstance(error, PoolTimeoutError):
+        return True
+    message = str(getattr(error, "orig", None) or error).lower()
+    return any(marker in message for marker in DATABASE_BUSY_MARKERS)
+
+
+def _database_busy_response(error):
+    if not is_database_busy_error(error):
+        raise error
+    db.session.rollback()
+    current_app.logger.warning("Database busy on %s %s: %s", request.method, request.path, error)
+    response = current_app.make_response(("The database is busy. Please try again.", 503))
+    response.headers["Retry-After"] = "1"
+    response.headers[DATABASE_BUSY_HEADER] = "1"
+    return response
+
+
+def init_database_busy_responses(app):
+    if not app.config.get("DATABASE_BUSY_RESPONSES_ENABLED", True):
+        return
+    app.register_error_handler(OperationalError, _database_busy_response)
+    app.register_error_handler(PoolTimeoutError, _database_busy_response)
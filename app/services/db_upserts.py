@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import db
+
+# Rows per statement; keeps wide tables well under SQLite's bound-parameter limit.
+UPSERT_CHUNK_SIZE = 500
+
+
+def build_upsert(table, rows, *, conflict_columns, update_columns, where=None):
+    """Multi-row INSERT ... ON CONFLICT DO UPDATE for Postgres and SQLite.
+
+    `update_columns` take the incoming (excluded) values on conflict. `where`,
+    if given, is called with the excluded row and limits which conflicts update.
+    """
+    dialect = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=list(conflict_columns),
+        set_={column: statement.excluded[column] for column in update_columns},
+        where=where(statement.excluded) if where is not None else None,
+    )
+
+
+def upsert_rows(
+    table, rows, *, conflict_columns, update_columns, where=None, chunk_size=UPSERT_CHUNK_SIZE
+):
+    """Execute `build_upsert` over `rows` in chunks; returns the number of rows sent.
+
+    Rows must not repeat a conflict key: Postgres refuses to update one row twice
+    in a single statement.
+    """
+    rows = list(rows)
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(
+            build_upsert(
+                table,
+                rows[start : start + chunk_size],
+                conflict_columns=conflict_columns,
+                update_columns=update_columns,
+                where=where,
+            )
+        )
+    return len(rows)
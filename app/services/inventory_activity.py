@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import (
+    Integer,
+    String,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+    update,
+)
+
+from app import db
+from app.models import (
+    ACTIVITY_SEARCH_FTS_TABLE,
+    Check,
+    CheckLine,
+    CountLine,
+    CountSession,
+    InventoryActivityEvent,
+    Item,
+    User,
+    Venue,
+    activity_search_document_sql,
+    activity_search_tsvector_sql,
+)
+
+UNKNOWN_ACTOR_NAME = "Unknown user"
+
+EVENT_COLUMNS = (
+    "event_type",
+    "source_id",
+    "venue_id",
+    "item_id",
+    "actor_user_id",
+    "old_status",
+    "new_status",
+    "old_raw_count",
+    "new_raw_count",
+    "changed_at",
+    "venue_name",
+    "item_name",
+    "actor_name",
+)
+
+
+def resolve_activity_actor_name(user):
+    if user is None:
+        return UNKNOWN_ACTOR_NAME
+    display_name = (user.display_name or "").strip()
+    if display_name:
+        return display_name
+    email = (user.email or "").strip().lower()
+    return email or UNKNOWN_ACTOR_NAME
+
+
+def activity_actor_name_expr(display_name_col, email_col):
+    trimmed_display_name = func.nullif(func.trim(display_name_col), "")
+    trimmed_email = func.nullif(func.trim(email_col), "")
+    return func.coalesce(
+        trimmed_display_name, func.lower(trimmed_email), literal(UNKNOWN_ACTOR_NAME)
+    )
+
+
+def is_status_change(old_status, new_status):
+    if old_status is None:
+        return new_status != "not_checked"
+    return old_status != new_status
+
+
+def is_count_change(old_raw_count, new_raw_count):
+    return old_raw_count is None or old_raw_count != new_raw_count
+
+
+def _load_event_labels(venue_id, user_id, item_ids):
+    venue = db.session.get(Venue, venue_id)
+    actor = db.session.get(User, user_id) if user_id else None
+    item_names = dict(db.session.query(Item.id, Item.name).filter(Item.id.in_(item_ids)).all())
+    return venue.name, resolve_activity_actor_name(actor), item_names
+
+
+def record_status_activity_events(check, transitions):
+    """Append an event for each `(item_id, old_status, new_status)` that actually changed.
+
+    All events go out in one multi-row INSERT rather than one statement per item.
+    """
+    changes = [
+        (item_id, old_status, new_status)
+        for item_id, old_status, new_status in transitions
+        if is_status_change(old_status, new_status)
+    ]
+    if not changes:
+        return 0
+    venue_name, actor_name, item_names = _load_event_labels(
+        check.venue_id,
+        check.user_id,
+        [item_id for item_id, _, _ in changes],
+    )
+    rows = [
+        {
+            "event_type": "status",
+            "source_id": check.id,
+            "venue_id": check.venue_id,
+            "item_id": item_id,
+            "actor_user_id": check.user_id,
+            "old_status": old_status,
+            "new_status": new_status,
+            "old_raw_count": None,
+            "new_raw_count": None,
+            "changed_at": check.created_at,
+            "venue_name": venue_name,
+            "item_name": item_names.get(item_id, ""),
+            "actor_name": actor_name,
+        }
+        for item_id, old_status, new_status in changes
+    ]
+    db.session.execute(insert(InventoryActivityEvent).values(rows))
+    return len(changes)
+
+
+def record_count_activity_events(count_session, transitions):
+    """Append an event for each `(item_id, old_raw_count, new_raw_count)` that actually changed."""
+    changes = [
+        (item_id, old_raw_count, new_raw_count)
+        for item_id, old_raw_count, new_raw_count in transitions
+        if is_count_change(old_raw_count, new_raw_count)
+    ]
+    if not changes:
+        return 0
+    venue_name, actor_name, item_names = _load_event_labels(
+        count_session.venue_id,
+        count_session.user_id,
+        [item_id for item_id, _, _ in changes],
+    )
+    rows = [
+        {
+            "event_type": "raw_count",
+            "source_id": count_session.id,
+            "venue_id": count_session.venue_id,
+            "item_id": item_id,
+            "actor_user_id": count_session.user_id,
+            "old_status": None,
+            "new_status": None,
+            "old_raw_count": old_raw_count,
+            "new_raw_count": new_raw_count,
+            "changed_at": count_session.created_at,
+            "venue_name": venue_name,
+            "item_name": item_names.get(item_id, ""),
+            "actor_name": actor_name,
+        }
+        for item_id, old_raw_count, new_raw_count in changes
+    ]
+    db.session.execute(insert(InventoryActivityEvent).values(rows))
+    return len(changes)
+
+
+def tokenize_activity_search(value):
+    return re.findall(r"[^\W_]+", (value or "").lower())
+
+
+def build_activity_search_clause(search):
+    """Prefix-match every search token against the activity search index.
+
+    SQLite uses the FTS5 table kept current by triggers; Postgres uses the GIN
+    index on the same document. Other databases fall back to a LIKE scan.
+    """
+    tokens = tokenize_activity_search(search)
+    if not tokens:
+        return None
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        matching_rows = (
+            text(
+                f"SELECT rowid FROM {ACTIVITY_SEARCH_FTS_TABLE} "
+                f"WHERE {ACTIVITY_SEARCH_FTS_TABLE} MATCH :activity_search"
+            )
+            .bindparams(activity_search=" ".join(f'"{token}"*' for token in tokens))
+            .columns(column("rowid", Integer))
+        )
+        return InventoryActivityEvent.id.in_(matching_rows)
+    table_prefix = f"{InventoryActivityEvent.__tablename__}."
+    if dialect_name == "postgresql":
+        search_tsvector = activity_search_tsvector_sql(table_prefix)
+        return text(
+            f"{search_tsvector} @@ to_tsquery('simple', :activity_search)"
+        ).bindparams(activity_search=" & ".join(f"{token}:*" for token in tokens))
+    document = func.lower(literal_column(activity_search_document_sql(table_prefix)))
+    return and_(*[document.contains(token) for token in tokens])
+
+
+def select_activity_events(*, venue_id=None, actor_user_id=None, search=""):
+    """Select stored events using the row keys the activity serializers expect."""
+    query = select(
+        InventoryActivityEvent.event_type.label("type_key"),
+        InventoryActivityEvent.source_id.label("event_id"),
+        InventoryActivityEvent.changed_at.label("changed_at"),
+        InventoryActivityEvent.venue_name.label("venue_name"),
+        InventoryActivityEvent.item_name.label("item_name"),
+        InventoryActivityEvent.actor_user_id.label("actor_user_id"),
+        InventoryActivityEvent.actor_name.label("actor_name"),
+        InventoryActivityEvent.old_status.label("old_status_key"),
+        InventoryActivityEvent.new_status.label("new_status_key"),
+        InventoryActivityEvent.old_raw_count.label("old_raw_count"),
+        InventoryActivityEvent.new_raw_count.label("new_raw_count"),
+    )
+    if venue_id is not None:
+        query = query.where(InventoryActivityEvent.venue_id == venue_id)
+    if actor_user_id is not None:
+        query = query.where(InventoryActivityEvent.actor_user_id == actor_user_id)
+    search_clause = build_activity_search_clause(search)
+    if search_clause is not None:
+        query = query.where(search_clause)
+    return query
+
+
+def build_recent_activity_event_rows(*, venue_id=None, limit=20):
+    query = select_activity_events(venue_id=venue_id).order_by(
+        InventoryActivityEvent.changed_at.desc(),
+        InventoryActivityEvent.source_id.desc(),
+    )
+    return db.session.execute(query.limit(max(int(limit or 0), 1))).mappings().all()
+
+
+def sync_venue_activity_name(venue):
+    db.session.execute(
+        update(InventoryActivityEvent)
+        .where(InventoryActivityEvent.venue_id == venue.id)
+        .values(venue_name=venue.name)
+    )
+
+
+def sync_item_activity_name(item):
+    db.session.execute(
+        update(InventoryActivityEvent)
+        .where(InventoryActivityEvent.item_id == item.id)
+        .values(item_name=item.name)
+    )
+
+
+def sync_actor_activity_name(user):
+    db.session.execute(
+        update(InventoryActivityEvent)
+        .where(InventoryActivityEvent.actor_user_id == user.id)
+        .values(actor_name=resolve_activity_actor_name(user))
+    )
+
+
+def delete_inventory_activity_events(*, venue_ids=None, item_ids=None):
+    conditions = []
+    if venue_ids:
+        venue_ids = [int(venue_id) for venue_id in venue_ids]
+        conditions.append(InventoryActivityEvent.venue_id.in_(venue_ids))
+    if item_ids:
+        item_ids = [int(item_id) for item_id in item_ids]
+        conditions.append(InventoryActivityEvent.item_id.in_(item_ids))
+    if not conditions:
+        return 0
+    return db.session.execute(delete(InventoryActivityEvent).where(or_(*conditions))).rowcount
+
+
+def _status_history_events():
+    previous_status = func.lag(CheckLine.status).over(
+        partition_by=(Check.venue_id, CheckLine.item_id),
+        order_by=(Check.created_at.asc(), Check.id.asc()),
+    )
+    inner = (
+        select(
+            literal("status").label("event_type"),
+            Check.id.label("source_id"),
+            Check.venue_id.label("venue_id"),
+            CheckLine.item_id.label("item_id"),
+            Check.user_id.label("actor_user_id"),
+            previous_status.label("old_status"),
+            CheckLine.status.label("new_status"),
+            cast(literal(None), Integer).label("old_raw_count"),
+            cast(literal(None), Integer).label("new_raw_count"),
+            Check.created_at.label("changed_at"),
+            Venue.name.label("venue_name"),
+            Item.name.label("item_name"),
+            activity_actor_name_expr(User.display_name, User.email).label("actor_name"),
+        )
+        .select_from(Check)
+        .join(Venue, Venue.id == Check.venue_id)
+        .join(CheckLine, CheckLine.check_id == Check.id)
+        .join(Item, Item.id == CheckLine.item_id)
+        .outerjoin(User, User.id == Check.user_id)
+        .subquery()
+    )
+    return select(*[inner.c[column] for column in EVENT_COLUMNS]).where(
+        or_(
+            and_(inner.c.old_status.is_(None), inner.c.new_status != "not_checked"),
+            inner.c.old_status != inner.c.new_status,
+        )
+    )
+
+
+def _count_history_events():
+    previous_raw_count = func.lag(CountLine.raw_count).over(
+        partition_by=(CountSession.venue_id, CountLine.item_id),
+        order_by=(CountSession.created_at.asc(), CountSession.id.asc()),
+    )
+    inner = (
+        select(
+            literal("raw_count").label("event_type"),
+            CountSession.id.label("source_id"),
+            CountSession.venue_id.label("venue_id"),
+            CountLine.item_id.label("item_id"),
+            CountSession.user_id.label("actor_user_id"),
+            cast(literal(None), String).label("old_status"),
+            cast(literal(None), String).label("new_status"),
+            previous_raw_count.label("old_raw_count"),
+            CountLine.raw_count.label("new_raw_count"),
+            CountSession.created_at.label("changed_at"),
+            Venue.name.label("venue_name"),
+            Item.name.label("item_name"),
+            activity_actor_name_expr(User.display_name, User.email).label("actor_name"),
+        )
+        .select_from(CountSession)
+        .join(Venue, Venue.id == CountSession.venue_id)
+        .join(CountLine, CountLine.count_session_id == CountSession.id)
+        .join(Item, Item.id == CountLine.item_id)
+        .outerjoin(User, User.id == CountSession.user_id)
+        .subquery()
+    )
+    return select(*[inner.c[column] for column in EVENT_COLUMNS]).where(
+        or_(
+            inner.c.old_raw_count.is_(None),
+            inner.c.old_raw_count != inner.c.new_raw_count,
+        )
+    )
+
+
+def rebuild_inventory_activity_events():
+    """Replace the event log with changes derived from full check and count history.
+
+    Runs as two INSERT ... SELECT statements so history never loads into Python.
+    The caller owns the transaction; nothing is committed here.
+    """
+    db.session.execute(delete(InventoryActivityEvent))
+    status_result = db.session.execute(
+        insert(InventoryActivityEvent).from_select(EVENT_COLUMNS, _status_history_events())
+    )
+    count_result = db.session.execute(
+        insert(InventoryActivityEvent).from_select(EVENT_COLUMNS, _count_history_events())
+    )
+    return {
+        "status_events": max(status_result.rowcount or 0, 0),
+        "count_events": max(count_result.rowcount or 0, 0),
+    }
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from app import db
-from app.models import Check, CheckLine, CountLine, CountSession, User
+from app.models import User, VenueItemState
 from app.services.inventory_status import ensure_utc
 
 
@@ -15,89 +15,84 @@ def format_signal_actor_label(display_name=None, email=None):
     return ""
 
 
-def build_latest_status_signal_map(*, venue_ids=None, item_ids=None):
+def build_actor_label_map(user_ids):
+    """Return the current display label for each of `user_ids`, skipping unknown users."""
+    user_ids = sorted({int(user_id) for user_id in user_ids or [] if user_id is not None})
+    if not user_ids:
+        return {}
+    rows = (
+        db.session.query(User.id, User.display_name, User.email)
+        .filter(User.id.in_(user_ids))
+        .all()
+    )
+    return {row.id: format_signal_actor_label(row.display_name, row.email) for row in rows}
+
+
+def _build_state_query(value_column, updated_at_column, user_id_column, *, venue_ids, item_ids):
     query = (
         db.session.query(
-            Check.venue_id.label("venue_id"),
-            CheckLine.item_id.label("item_id"),
-            CheckLine.status.label("status"),
-            Check.created_at.label("updated_at"),
+            VenueItemState.venue_id.label("venue_id"),
+            VenueItemState.item_id.label("item_id"),
+            value_column.label("value"),
+            updated_at_column.label("updated_at"),
+            user_id_column.label("actor_user_id"),
             User.display_name.label("actor_display_name"),
             User.email.label("actor_email"),
         )
-        .select_from(Check)
-        .join(CheckLine, CheckLine.check_id == Check.id)
-        .outerjoin(User, User.id == Check.user_id)
+        .select_from(VenueItemState)
+        .outerjoin(User, User.id == user_id_column)
+        .filter(value_column.is_not(None))
     )
     if venue_ids is not None:
-        if not venue_ids:
-            return {}
-        query = query.filter(Check.venue_id.in_(venue_ids))
+        query = query.filter(VenueItemState.venue_id.in_(venue_ids))
     if item_ids is not None:
-        if not item_ids:
-            return {}
-        query = query.filter(CheckLine.item_id.in_(item_ids))
+        query = query.filter(VenueItemState.item_id.in_(item_ids))
+    return query
 
-    latest_by_key = {}
-    for row in query.order_by(
-        Check.venue_id.asc(),
-        CheckLine.item_id.asc(),
-        Check.created_at.desc(),
-        Check.id.desc(),
-    ).all():
-        key = (row.venue_id, row.item_id)
-        if key in latest_by_key:
-            continue
-        latest_by_key[key] = {
-            "status": row.status,
+
+def build_latest_status_signal_map(*, venue_ids=None, item_ids=None):
+    if (venue_ids is not None and not venue_ids) or (item_ids is not None and not item_ids):
+        return {}
+    query = _build_state_query(
+        VenueItemState.status,
+        VenueItemState.status_updated_at,
+        VenueItemState.status_user_id,
+        venue_ids=venue_ids,
+        item_ids=item_ids,
+    )
+    return {
+        (row.venue_id, row.item_id): {
+            "status": row.value,
             "updated_at": ensure_utc(row.updated_at),
+            "actor_user_id": row.actor_user_id,
             "actor_label": format_signal_actor_label(
                 row.actor_display_name,
                 row.actor_email,
             ),
         }
-    return latest_by_key
+        for row in query.all()
+    }
 
 
 def build_latest_count_signal_map(*, venue_ids=None, item_ids=None):
-    query = (
-        db.session.query(
-            CountSession.venue_id.label("venue_id"),
-            CountLine.item_id.label("item_id"),
-            CountLine.raw_count.label("raw_count"),
-            CountSession.created_at.label("updated_at"),
-            User.display_name.label("actor_display_name"),
-            User.email.label("actor_email"),
-        )
-        .select_from(CountSession)
-        .join(CountLine, CountLine.count_session_id == CountSession.id)
-        .outerjoin(User, User.id == CountSession.user_id)
+    if (venue_ids is not None and not venue_ids) or (item_ids is not None and not item_ids):
+        return {}
+    query = _build_state_query(
+        VenueItemState.raw_count,
+        VenueItemState.count_updated_at,
+        VenueItemState.count_user_id,
+        venue_ids=venue_ids,
+        item_ids=item_ids,
     )
-    if venue_ids is not None:
-        if not venue_ids:
-            return {}
-        query = query.filter(CountSession.venue_id.in_(venue_ids))
-    if item_ids is not None:
-        if not item_ids:
-            return {}
-        query = query.filter(CountLine.item_id.in_(item_ids))
-
-    latest_by_key = {}
-    for row in query.order_by(
-        CountSession.venue_id.asc(),
-        CountLine.item_id.asc(),
-        CountSession.created_at.desc(),
-        CountSession.id.desc(),
-    ).all():
-        key = (row.venue_id, row.item_id)
-        if key in latest_by_key:
-            continue
-        latest_by_key[key] = {
-            "raw_count": row.raw_count,
+    return {
+        (row.venue_id, row.item_id): {
+            "raw_count": row.value,
             "updated_at": ensure_utc(row.updated_at),
+            "actor_user_id": row.actor_user_id,
             "actor_label": format_signal_actor_label(
                 row.actor_display_name,
                 row.actor_email,
             ),
         }
-    return latest_by_key
+        for row in query.all()
+    }
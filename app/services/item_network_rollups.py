@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import and_
+
+from app import db
+from app.models import Item, ItemNetworkRollup, Venue, VenueItem, VenueItemCount
+from app.services.db_upserts import upsert_rows
+from app.services.inventory_rules import resolve_effective_par_level
+from app.services.inventory_signals import (
+    build_latest_count_signal_map,
+    build_latest_status_signal_map,
+)
+from app.services.inventory_status import (
+    derive_singleton_count_from_status,
+    ensure_utc,
+    infer_singleton_status_from_count,
+    normalize_singleton_status,
+    normalize_status,
+)
+
+NETWORK_COUNT_FIELDS = (
+    "tracked_venue_count",
+    "counted_venue_count",
+    "missing_count_venue_count",
+    "zero_count_venue_count",
+    "total_raw_count",
+    "singleton_present_venue_count",
+    "singleton_missing_venue_count",
+    "singleton_damaged_venue_count",
+    "total_par_count",
+    "par_venue_count",
+    "signal_count_total",
+    "signal_counted_venue_count",
+    "singleton_checked_venue_count",
+    "singleton_issue_venue_count",
+)
+
+
+def build_empty_network_values():
+    values = {field: 0 for field in NETWORK_COUNT_FIELDS}
+    values["last_count_updated_at"] = None
+    values["venue_details"] = []
+    return values
+
+
+def resolve_supply_last_actor_id(*, tracking_mode, latest_status_meta, latest_count_meta):
+    """Return the user id behind the latest signal; labels are resolved when rows are read."""
+    status_updated_at = ensure_utc((latest_status_meta or {}).get("updated_at"))
+    count_updated_at = ensure_utc((latest_count_meta or {}).get("updated_at"))
+    status_actor_id = (latest_status_meta or {}).get("actor_user_id")
+    count_actor_id = (latest_count_meta or {}).get("actor_user_id")
+
+    if tracking_mode == "singleton_asset":
+        return status_actor_id or count_actor_id
+    if count_updated_at and (not status_updated_at or count_updated_at >= status_updated_at):
+        return count_actor_id or status_actor_id
+    if status_updated_at:
+        return status_actor_id or count_actor_id
+    return count_actor_id or status_actor_id
+
+
+def _serialize_timestamp(value):
+    normalized = ensure_utc(value)
+    return normalized.isoformat() if normalized else None
+
+
+def _parse_timestamp(value):
+    if not value:
+        return None
+    return ensure_utc(datetime.fromisoformat(value))
+
+
+def compute_item_network_values(item_ids):
+    """Aggregate cross-venue totals for `item_ids` from tracking, count and latest-state rows.
+
+    Each value dict also carries `venue_details`: one compact entry per active
+    venue assignment, which callers expand into display rows when needed.
+    """
+    item_ids = sorted({int(item_id) for item_id in item_ids or []})
+    if not item_ids:
+        return {}
+    values_by_item = {item_id: build_empty_network_values() for item_id in item_ids}
+
+    assignment_rows = (
+        db.session.query(
+            VenueItem.item_id.label("item_id"),
+            VenueItem.venue_id.label("venue_id"),
+            VenueItem.expected_qty.label("par_override"),
+            Item.tracking_mode.label("tracking_mode"),
+            Item.default_par_level.label("default_par_level"),
+            VenueItemCount.raw_count.label("raw_count"),
+            VenueItemCount.updated_at.label("updated_at"),
+        )
+        .select_from(VenueItem)
+        .join(Item, Item.id == VenueItem.item_id)
+        .join(Venue, Venue.id == VenueItem.venue_id)
+        .outerjoin(
+            VenueItemCount,
+            and_(
+                VenueItemCount.venue_id == VenueItem.venue_id,
+                VenueItemCount.item_id == VenueItem.item_id,
+            ),
+        )
+        .filter(
+            VenueItem.item_id.in_(item_ids),
+            VenueItem.active == True,
+            Item.active == True,
+            Item.is_group_parent == False,
+            Venue.active == True,
+        )
+        .all()
+    )
+    if not assignment_rows:
+        return values_by_item
+
+    venue_ids = sorted({row.venue_id for row in assignment_rows})
+    latest_status_by_pair = build_latest_status_signal_map(venue_ids=venue_ids, item_ids=item_ids)
+    latest_count_by_pair = build_latest_count_signal_map(venue_ids=venue_ids, item_ids=item_ids)
+
+    for row in assignment_rows:
+        values = values_by_item[row.item_id]
+        tracking_mode = row.tracking_mode or "quantity"
+        is_singleton = tracking_mode == "singleton_asset"
+        latest_status_meta = latest_status_by_pair.get((row.venue_id, row.item_id))
+        latest_count_meta = latest_count_by_pair.get((row.venue_id, row.item_id))
+        updated_at = ensure_utc(row.updated_at)
+        effective_raw_count = row.raw_count
+        status_key = normalize_status((latest_status_meta or {}).get("status"))
+
+        if latest_count_meta and latest_count_meta.get("updated_at"):
+            updated_at = latest_count_meta["updated_at"]
+
+        if is_singleton:
+            if latest_status_meta:
+                status_key = normalize_singleton_status(latest_status_meta["status"])
+                updated_at = latest_status_meta["updated_at"] or updated_at
+            else:
+                status_key = normalize_singleton_status(
+                    "good"
+                    if row.raw_count and row.raw_count > 0
+                    else ("out" if row.raw_count == 0 else "not_checked")
+                )
+            effective_raw_count = derive_singleton_count_from_status(status_key)
+
+        effective_par = resolve_effective_par_level(
+            item_default_par_level=row.default_par_level,
+            venue_par_override=row.par_override,
+        )
+
+        values["tracked_venue_count"] += 1
+        if effective_par.value is not None:
+            values["total_par_count"] += int(effective_par.value)
+            values["par_venue_count"] += 1
+
+        if effective_raw_count is None:
+            values["missing_count_venue_count"] += 1
+        else:
+            values["counted_venue_count"] += 1
+            values["total_raw_count"] += int(effective_raw_count)
+            if is_singleton:
+                if status_key == "low":
+                    values["singleton_damaged_venue_count"] += 1
+                    values["singleton_present_venue_count"] += 1
+                elif status_key == "good":
+                    values["singleton_present_venue_count"] += 1
+                elif status_key == "out":
+                    values["singleton_missing_venue_count"] += 1
+            elif effective_raw_count == 0:
+                values["zero_count_venue_count"] += 1
+            if updated_at and (
+                values["last_count_updated_at"] is None
+                or updated_at > values["last_count_updated_at"]
+            ):
+                values["last_count_updated_at"] = updated_at
+
+        signal_raw_count = latest_count_meta["raw_count"] if latest_count_meta else None
+        if is_singleton:
+            signal_status = (
+                normalize_singleton_status(latest_status_meta["status"])
+                if latest_status_meta
+                else infer_singleton_status_from_count(signal_raw_count)
+            )
+            if signal_status != "not_checked":
+                values["singleton_checked_venue_count"] += 1
+            if signal_status in {"low", "out"}:
+                values["singleton_issue_venue_count"] += 1
+        elif signal_raw_count is not None:
+            values["signal_count_total"] += int(signal_raw_count)
+            values["signal_counted_venue_count"] += 1
+
+        values["venue_details"].append(
+            {
+                "venue_id": row.venue_id,
+                "raw_count": effective_raw_count,
+                "status_key": status_key,
+                "updated_at": updated_at,
+                "par_override": row.par_override,
+                "checked_by_user_id": resolve_supply_last_actor_id(
+                    tracking_mode=tracking_mode,
+                    latest_status_meta=latest_status_meta,
+                    latest_count_meta=latest_count_meta,
+                ),
+            }
+        )
+
+    return values_by_item
+
+
+def refresh_item_network_rollups(item_ids):
+    """Recompute and store network rollups for `item_ids` in one upsert; the caller commits."""
+    values_by_item = compute_item_network_values(item_ids)
+    if not values_by_item:
+        return 0
+    refreshed_at = datetime.now(timezone.utc)
+    rows = [
+        {
+            "item_id": item_id,
+            **{field: values[field] for field in NETWORK_COUNT_FIELDS},
+            "last_count_updated_at": values["last_count_updated_at"],
+            "venue_details_json": json.dumps(
+                [
+                    {**detail, "updated_at": _serialize_timestamp(detail["updated_at"])}
+                    for detail in values["venue_details"]
+                ],
+                separators=(",", ":"),
+            ),
+            "refreshed_at": refreshed_at,
+        }
+        for item_id, values in values_by_item.items()
+    ]
+    upsert_rows(
+        ItemNetworkRollup.__table__,
+        rows,
+        conflict_columns=("item_id",),
+        update_columns=[column for column in rows[0] if column != "item_id"],
+    )
+    return len(values_by_item)
+
+
+def refresh_venue_item_network_rollups(venue_ids):
+    """Refresh every item that has (or had) a tracking link at one of `venue_ids`."""
+    venue_ids = sorted({int(venue_id) for venue_id in venue_ids or []})
+    if not venue_ids:
+        return 0
+    item_ids = [
+        row.item_id
+        for row in db.session.query(VenueItem.item_id)
+        .filter(VenueItem.venue_id.in_(venue_ids))
+        .distinct()
+        .all()
+    ]
+    return refresh_item_network_rollups(item_ids)
+
+
+def delete_item_network_rollups(item_ids):
+    item_ids = [int(item_id) for item_id in item_ids or []]
+    if not item_ids:
+        return 0
+    return ItemNetworkRollup.query.filter(ItemNetworkRollup.item_id.in_(item_ids)).delete(
+        synchronize_session=False
+    )
+
+
+def rebuild_item_network_rollups():
+    """Recompute network rollups for every item; the caller commits."""
+    item_ids = [row.id for row in db.session.query(Item.id).all()]
+    db.session.query(ItemNetworkRollup).delete(synchronize_session=False)
+    return refresh_item_network_rollups(item_ids)
+
+
+def build_item_network_rollup_map(item_ids):
+    """Return network values per item, computing (without storing) any that are missing."""
+    item_ids = [int(item_id) for item_id in item_ids or []]
+    if not item_ids:
+        return {}
+    rollup_map = {}
+    for rollup in ItemNetworkRollup.query.filter(ItemNetworkRollup.item_id.in_(item_ids)).all():
+        values = {field: int(getattr(rollup, field) or 0) for field in NETWORK_COUNT_FIELDS}
+        values["last_count_updated_at"] = ensure_utc(rollup.last_count_updated_at)
+        details = json.loads(rollup.venue_details_json or "[]")
+        for detail in details:
+            detail["updated_at"] = _parse_timestamp(detail.get("updated_at"))
+        values["venue_details"] = details
+        rollup_map[rollup.item_id] = values
+    missing_item_ids = [item_id for item_id in item_ids if item_id not in rollup_map]
+    if missing_item_ids:
+        rollup_map.update(compute_item_network_values(missing_item_ids))
+    return rollup_map
@@ -0,0 +1,309 @@
+"""Background delivery of queued transactional email.
+
+`send_transactional_email` adds an `outbox_messages` row to the request's
+transaction instead of talking to SMTP. A dispatcher then claims due rows,
+sends them and records the outcome:
+
+- `thread` (MAIL_OUTBOX_DISPATCHER default): a daemon thread in each worker,
+  woken at the end of any request that queued mail and otherwise polling every
+  MAIL_OUTBOX_POLL_SECONDS.
+- `worker`: no threads; run `flask mail-worker` as its own process.
+
+Claiming is a single conditional UPDATE, so any number of dispatchers can run
+against one database without sending a message twice. Failed sends are retried
+with exponential backoff and dead-lettered after MAIL_OUTBOX_MAX_ATTEMPTS or
+once the message's `expires_at` has passed. A claim older than
+MAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS (a dispatcher that died mid-send) is retried.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import time
+from datetime import timedelta
+from threading import Event, Thread
+
+from flask import current_app, g
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import OutboxMessage
+from app.services.mail_service import (
+    MAIL_STATUS_QUEUED,
+    MAIL_STATUS_SENT,
+    OUTBOX_QUEUED_FLAG,
+    deliver_transactional_emails,
+)
+from app.services.metrics import mail_sends
+from app.services.request_performance import utcnow_naive
+
+OUTBOX_STATUS_QUEUED = MAIL_STATUS_QUEUED
+OUTBOX_STATUS_SENDING = "sending"
+OUTBOX_STATUS_SENT = MAIL_STATUS_SENT
+OUTBOX_STATUS_DEAD = "dead"
+OUTBOX_STATUSES = (
+    OUTBOX_STATUS_QUEUED,
+    OUTBOX_STATUS_SENDING,
+    OUTBOX_STATUS_SENT,
+    OUTBOX_STATUS_DEAD,
+)
+OUTBOX_DISPATCHERS = {"thread", "worker"}
+_OUTCOME_COUNTS = {
+    OUTBOX_STATUS_SENT: "sent",
+    OUTBOX_STATUS_QUEUED: "retried",
+    OUTBOX_STATUS_DEAD: "dead",
+}
+MAX_RETRY_DELAY_SECONDS = 60 * 60
+ERROR_CHARS = 255
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+_wake_dispatcher = Event()
+_dispatcher_pid = None
+_last_purge_at = None
+
+
+def outbox_retry_delay(attempts, *, base_seconds):
+    """Seconds to wait after the `attempts`-th failure: base, 2x base, 4x base, ... capped."""
+    return min(MAX_RETRY_DELAY_SECONDS, base_seconds * 2 ** max(0, attempts - 1))
+
+
+def _due_condition(now, *, claim_timeout_seconds):
+    return or_(
+        and_(
+            OutboxMessage.status == OUTBOX_STATUS_QUEUED,
+            OutboxMessage.next_attempt_at <= now,
+        ),
+        and_(
+            OutboxMessage.status == OUTBOX_STATUS_SENDING,
+            OutboxMessage.claimed_at < now - timedelta(seconds=claim_timeout_seconds),
+        ),
+    )
+
+
+def claim_outbox_messages(*, limit, claim_timeout_seconds, now=None):
+    """Mark up to `limit` due messages as sending under a fresh claim token and return them.
+
+    The UPDATE re-checks the due condition, so when two dispatchers pick the same
+    ids only the first one to commit gets them.
+    """
+    now = now or utcnow_naive()
+    due = _due_condition(now, claim_timeout_seconds=claim_timeout_seconds)
+    candidate_ids = (
+        select(OutboxMessage.id)
+        .where(due)
+        .order_by(OutboxMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claim_token = secrets.token_hex(16)
+    db.session.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(candidate_ids.scalar_subquery()), due)
+        .values(status=OUTBOX_STATUS_SENDING, claim_token=claim_token, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return (
+        OutboxMessage.query.filter_by(claim_token=claim_token, status=OUTBOX_STATUS_SENDING)
+        .order_by(OutboxMessage.id)
+        .all()
+    )
+
+
+def _finish_message(message, result, *, now, max_attempts, retry_base_seconds):
+    message.attempts += 1
+    message.claim_token = None
+    if result.sent:
+        message.status = OUTBOX_STATUS_SENT
+        message.sent_at = now
+        message.last_error = None
+        message.body_text = None
+        message.body_html = None
+        return OUTBOX_STATUS_SENT
+    message.last_error = (result.message or result.status)[:ERROR_CHARS]
+    if not result.failed or message.attempts >= max_attempts:
+        # Disabled or suppressed mail will not start working by itself.
+        message.status = OUTBOX_STATUS_DEAD
+        return OUTBOX_STATUS_DEAD
+    message.status = OUTBOX_STATUS_QUEUED
+    message.next_attempt_at = now + timedelta(
+        seconds=outbox_retry_delay(message.attempts, base_seconds=retry_base_seconds)
+    )
+    return OUTBOX_STATUS_QUEUED
+
+
+def dispatch_outbox_batch(*, now=None):
+    """Claim and send one batch; return counts of messages sent, requeued and dead-lettered."""
+    config = current_app.config
+    now = now or utcnow_naive()
+    messages = claim_outbox_messages(
+        limit=config["MAIL_OUTBOX_BATCH_SIZE"],
+        claim_timeout_seconds=config["MAIL_OUTBOX_CLAIM_TIMEOUT_SECONDS"],
+        now=now,
+    )
+    counts = {"claimed": len(messages), "sent": 0, "retried": 0, "dead": 0}
+    deliverable = []
+    for message in messages:
+        if message.expires_at is not None and message.expires_at <= now:
+            message.status = OUTBOX_STATUS_DEAD
+            message.claim_token = None
+            message.last_error = "Expired before it could be delivered."
+            counts["dead"] += 1
+        else:
+            deliverable.append(message)
+    db.session.commit()
+
+    # One batch shares pooled SMTP sessions. Delivery is at-least-once: a crash before
+    # the commit below resends the batch once its claim goes stale.
+    results = deliver_transactional_emails(
+        [
+            {
+                "to_address": message.to_address,
+                "subject": message.subject,
+                "body_text": message.body_text or "",
+                "body_html": message.body_html,
+            }
+            for message in deliverable
+        ]
+    )
+    finished_at = utcnow_naive()
+    for message, result in zip(deliverable, results):
+        mail_sends.inc(status=result.status)
+        outcome = _finish_message(
+            message,
+            result,
+            now=finished_at,
+            max_attempts=config["MAIL_OUTBOX_MAX_ATTEMPTS"],
+            retry_base_seconds=config["MAIL_OUTBOX_RETRY_SECONDS"],
+        )
+        counts[_OUTCOME_COUNTS[outcome]] += 1
+        if outcome == OUTBOX_STATUS_DEAD:
+            current_app.logger.error(
+                "Mail outbox message id=%s dead-lettered after %s attempts: %s",
+                message.id,
+                message.attempts,
+                message.last_error,
+            )
+    db.session.commit()
+    _maybe_purge_sent_messages(retention_days=config["MAIL_OUTBOX_RETENTION_DAYS"])
+    return counts
+
+
+def drain_outbox(*, max_batches=None):
+    """Dispatch batches until nothing is due (or `max_batches` ran); return summed counts."""
+    totals = {"claimed": 0, "sent": 0, "retried": 0, "dead": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        counts = dispatch_outbox_batch()
+        batches += 1
+        for key, value in counts.items():
+            totals[key] += value
+        if counts["claimed"] < current_app.config["MAIL_OUTBOX_BATCH_SIZE"]:
+            break
+    return totals
+
+
+def purge_sent_outbox_messages(*, retention_days, now=None):
+    cutoff = (now or utcnow_naive()) - timedelta(days=retention_days)
+    result = db.session.execute(
+        delete(OutboxMessage).where(
+            OutboxMessage.status == OUTBOX_STATUS_SENT,
+            OutboxMessage.sent_at < cutoff,
+        )
+    )
+    db.session.commit()
+    return result.rowcount or 0
+
+
+def _maybe_purge_sent_messages(*, retention_days):
+    global _last_purge_at
+    now = time.monotonic()
+    if _last_purge_at is not None and now - _last_purge_at < PURGE_INTERVAL_SECONDS:
+        return
+    purge_sent_outbox_messages(retention_days=retention_days)
+    _last_purge_at = now
+
+
+def summarize_outbox():
+    """Return message counts by status and the age in seconds of the oldest due message."""
+    counts = dict.fromkeys(OUTBOX_STATUSES, 0)
+    rows = db.session.execute(
+        select(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status)
+    )
+    for status, count in rows:
+        counts[status] = count
+    oldest = db.session.execute(
+        select(func.min(OutboxMessage.created_at)).where(
+            OutboxMessage.status == OUTBOX_STATUS_QUEUED
+        )
+    ).scalar()
+    oldest_age = (utcnow_naive() - oldest).total_seconds() if oldest else None
+    return {"counts": counts, "oldest_queued_seconds": oldest_age}
+
+
+def run_outbox_worker(app, *, once=False, echo=print):
+    """Body of `flask mail-worker`: drain the outbox, then keep polling unless `once`."""
+    poll_seconds = app.config["MAIL_OUTBOX_POLL_SECONDS"]
+    while True:
+        with app.app_context():
+            try:
+                totals = drain_outbox()
+            except SQLAlchemyError:
+                db.session.rollback()
+                app.logger.exception("Mail outbox dispatch failed")
+                totals = None
+            finally:
+                db.session.remove()
+        if totals and totals["claimed"]:
+            echo(
+                f"Sent {totals['sent']}, retrying {totals['retried']}, "
+                f"dead-lettered {totals['dead']}."
+            )
+        if once:
+            return totals
+        time.sleep(poll_seconds)
+
+
+def _dispatch_loop(app):
+    poll_seconds = app.config["MAIL_OUTBOX_POLL_SECONDS"]
+    while True:
+        _wake_dispatcher.wait(timeout=poll_seconds)
+        _wake_dispatcher.clear()
+        with app.app_context():
+            try:
+                drain_outbox()
+            except Exception:  # noqa: BLE001 - the thread must survive any one bad batch.
+                db.session.rollback()
+                app.logger.exception("Mail outbox dispatch failed")
+            finally:
+                db.session.remove()
+
+
+def _ensure_dispatcher_thread():
+    global _dispatcher_pid
+    app = current_app._get_current_object()
+    # Tests drive dispatch_outbox_batch directly; a thread would share their connection.
+    if app.testing or _dispatcher_pid == os.getpid():
+        return
+    _dispatcher_pid = os.getpid()
+    Thread(target=_dispatch_loop, args=(app,), name="mail-outbox", daemon=True).start()
+
+
+def _wake_after_request(exc):
+    if g.pop(OUTBOX_QUEUED_FLAG, False) and exc is None:
+        _wake_dispatcher.set()
+
+
+def resolve_outbox_dispatcher(app):
+    dispatcher = (app.config.get("MAIL_OUTBOX_DISPATCHER") or "thread").strip().lower()
+    return dispatcher if dispatcher in OUTBOX_DISPATCHERS else "thread"
+
+
+def init_mail_outbox(app):
+    """Start the per-worker dispatcher thread unless MAIL_OUTBOX_DISPATCHER is `worker`."""
+    if not app.config.get("MAIL_OUTBOX_ENABLED") or resolve_outbox_dispatcher(app) != "thread":
+        return
+    app.before_request(_ensure_dispatcher_thread)
+    app.teardown_request(_wake_after_request)
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
-import smtplib
-import ssl
 from dataclasses import dataclass
 from email.message import EmailMessage
 
-from flask import current_app, render_template
+from flask import current_app, g, has_request_context, render_template
 
+from app import db
+from app.models import OutboxMessage
 from app.services.account_security import PASSWORD_RESET_PURPOSE, PASSWORD_SETUP_PURPOSE
 from app.services.inventory_status import ensure_utc
+from app.services.metrics import mail_sends
+from app.services.request_performance import utcnow_naive
+from app.services.smtp_transport import SmtpSettings, smtp_pool
 
 MAIL_STATUS_DISABLED = "disabled"
 MAIL_STATUS_FAILED = "failed"
+MAIL_STATUS_QUEUED = "queued"
 MAIL_STATUS_SENT = "sent"
 MAIL_STATUS_SUPPRESSED = "suppressed"
+OUTBOX_QUEUED_FLAG = "mail_outbox_queued"
 
 
 @dataclass(frozen=True)
@@ -26,6 +31,15 @@ class MailDeliveryResult:
     def sent(self):
         return self.status == MAIL_STATUS_SENT
 
+    @property
+    def queued(self):
+        return self.status == MAIL_STATUS_QUEUED
+
+    @property
+    def accepted(self):
+        """Sent now, or queued in the outbox for the dispatcher to send."""
+        return self.status in (MAIL_STATUS_SENT, MAIL_STATUS_QUEUED)
+
     @property
     def failed(self):
         return self.status == MAIL_STATUS_FAILED
@@ -89,12 +103,70 @@ def send_login_verification_email(*, user, verification_code, expires_at):
         subject=subject,
         body_text=body_text,
         body_html=body_html,
+        expires_at=normalized_expiration,
     )
 
 
-def send_transactional_email(*, to_address, subject, body_text, body_html=None):
-    config = current_app.config
+def send_transactional_email(*, to_address, subject, body_text, body_html=None, expires_at=None):
+    """Send one email, or queue it when MAIL_OUTBOX_ENABLED is on.
+
+    A queued message is added to the current session, so it is written by the
+    caller's next commit together with the token or challenge it carries, and is
+    discarded by a rollback. `expires_at` stops retries once the content is useless.
+    """
+    if current_app.config.get("MAIL_OUTBOX_ENABLED"):
+        result = _queue_transactional_email(
+            to_address=to_address,
+            subject=subject,
+            body_text=body_text,
+            body_html=body_html,
+            expires_at=expires_at,
+        )
+    else:
+        result = deliver_transactional_email(
+            to_address=to_address,
+            subject=subject,
+            body_text=body_text,
+            body_html=body_html,
+        )
+    mail_sends.inc(status=result.status)
+    return result
+
+
+def _queue_transactional_email(*, to_address, subject, body_text, body_html=None, expires_at=None):
     recipient = (to_address or "").strip()
+    # Configuration problems are reported now rather than retried later.
+    problem = _check_mail_configuration(recipient)
+    if problem is not None:
+        return problem
+
+    now = utcnow_naive()
+    db.session.add(
+        OutboxMessage(
+            created_at=now,
+            status=MAIL_STATUS_QUEUED,
+            to_address=recipient,
+            subject=subject,
+            body_text=body_text,
+            body_html=body_html,
+            attempts=0,
+            next_attempt_at=now,
+            expires_at=ensure_utc(expires_at).replace(tzinfo=None) if expires_at else None,
+        )
+    )
+    if has_request_context():
+        setattr(g, OUTBOX_QUEUED_FLAG, True)
+    current_app.logger.info("Mail queued for recipient=%s", recipient)
+    return MailDeliveryResult(
+        status=MAIL_STATUS_QUEUED,
+        message="Mail queued.",
+        recipient=recipient,
+    )
+
+
+def _check_mail_configuration(recipient):
+    """Return a failed, disabled or suppressed result, or None when mail can be sent."""
+    config = current_app.config
 
     if not config.get("MAIL_ENABLED"):
         return MailDeliveryResult(
@@ -139,61 +211,80 @@ def send_transactional_email(*, to_address, subject, body_text, body_html=None):
             message="Recipient address is required.",
             recipient=recipient,
         )
-
-    message = EmailMessage()
-    message["From"] = sender
-    message["To"] = recipient
-    message["Subject"] = subject
-    message.set_content(body_text)
-    if body_html:
-        message.add_alternative(body_html, subtype="html")
-
-    try:
-        _send_smtp_message(message)
-    except Exception as exc:  # noqa: BLE001 - SMTP libraries raise several transport errors.
-        current_app.logger.error(
-            "Mail delivery failed for recipient=%s via backend=smtp: %s",
-            recipient,
-            exc.__class__.__name__,
-        )
-        return MailDeliveryResult(
-            status=MAIL_STATUS_FAILED,
-            message="Mail delivery failed.",
-            recipient=recipient,
-        )
-
-    current_app.logger.info("Mail delivered to recipient=%s via backend=smtp", recipient)
-    return MailDeliveryResult(
-        status=MAIL_STATUS_SENT,
-        message="Mail sent.",
-        recipient=recipient,
+    return None
+
+
+def deliver_transactional_email(*, to_address, subject, body_text, body_html=None):
+    """Send one email over SMTP now, in this thread; the outbox dispatcher uses this too."""
+    (result,) = deliver_transactional_emails(
+        [
+            {
+                "to_address": to_address,
+                "subject": subject,
+                "body_text": body_text,
+                "body_html": body_html,
+            }
+        ]
     )
+    return result
 
 
-def _send_smtp_message(message):
-    config = current_app.config
-    server = config["MAIL_SERVER"]
-    port = int(config["MAIL_PORT"])
-    username = (config.get("MAIL_USERNAME") or "").strip()
-    password = config.get("MAIL_PASSWORD") or ""
-    timeout = int(config["MAIL_TIMEOUT_SECONDS"])
-
-    if config.get("MAIL_USE_SSL"):
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(server, port, timeout=timeout, context=context) as smtp:
-            _authenticate_and_send(smtp, username, password, message)
-        return
+def deliver_transactional_emails(emails):
+    """Send several emails over SMTP now, sharing pooled sessions; return a result for each.
 
-    with smtplib.SMTP(server, port, timeout=timeout) as smtp:
-        if config.get("MAIL_USE_TLS"):
-            smtp.starttls(context=ssl.create_default_context())
-        _authenticate_and_send(smtp, username, password, message)
+    Each item holds the keyword arguments of `deliver_transactional_email`.
+    """
+    config = current_app.config
+    sender = (config.get("MAIL_DEFAULT_SENDER") or "").strip()
+    results = []
+    pending = []
+    for email in emails:
+        recipient = (email.get("to_address") or "").strip()
+        problem = _check_mail_configuration(recipient)
+        results.append(problem)
+        if problem is not None:
+            continue
+        message = EmailMessage()
+        message["From"] = sender
+        message["To"] = recipient
+        message["Subject"] = email["subject"]
+        message.set_content(email["body_text"])
+        if email.get("body_html"):
+            message.add_alternative(email["body_html"], subtype="html")
+        pending.append((len(results) - 1, recipient, message))
+
+    errors = _send_smtp_messages([message for _, _, message in pending]) if pending else []
+    for (index, recipient, _), error in zip(pending, errors):
+        if error is not None:
+            current_app.logger.error(
+                "Mail delivery failed for recipient=%s via backend=smtp: %s",
+                recipient,
+                error.__class__.__name__,
+            )
+            results[index] = MailDeliveryResult(
+                status=MAIL_STATUS_FAILED,
+                message="Mail delivery failed.",
+                recipient=recipient,
+            )
+            continue
+        current_app.logger.info("Mail delivered to recipient=%s via backend=smtp", recipient)
+        results[index] = MailDeliveryResult(
+            status=MAIL_STATUS_SENT,
+            message="Mail sent.",
+            recipient=recipient,
+        )
+    return results
 
 
-def _authenticate_and_send(smtp, username, password, message):
-    if username:
-        smtp.login(username, password)
-    smtp.send_message(message)
+def _send_smtp_messages(messages):
+    """Return an exception or None per message; see app.services.smtp_transport."""
+    config = current_app.config
+    return smtp_pool.send_messages(
+        SmtpSettings.from_config(config),
+        messages,
+        idle_seconds=config["MAIL_SMTP_IDLE_SECONDS"],
+        max_messages=config["MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION"],
+    )
 
 
 def _render_subject(template_name, **context):
@@ -219,6 +310,7 @@ def _send_password_link_email(*, user, purpose, action_url, expires_at):
         subject=subject,
         body_text=body_text,
         body_html=body_html,
+        expires_at=normalized_expiration,
     )
 
 
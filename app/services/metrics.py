@@ -0,0 +1,457 @@
+"""In-process Prometheus metrics with an optional file-backed multiprocess store.
+
+Each process keeps its own counters and histograms. When METRICS_MULTIPROC_DIR is
+set, every process periodically writes a JSON snapshot of its values there
+(`metrics-<pid>-<started>.json`) and `/metrics` sums all snapshots, so one scrape
+sees every gunicorn worker. Files of exited workers are kept so counters never
+go backwards; clear the directory before starting a fresh server. Gauges are
+summed over live processes only.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hmac
+import json
+import math
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+from threading import Lock, Thread
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SNAPSHOT_PREFIX = "metrics-"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        self.registry._update_counter(self.name, self._key(labels), amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.registry._update_gauge(self.name, self._key(labels), value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        self.registry._update_histogram(self, self._key(labels), value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._metrics = {}
+        self._reset_values()
+        self.multiproc_dir = None
+        self.flush_interval = 1.0
+        self._flusher_pid = None
+
+    def _reset_values(self):
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._pid = os.getpid()
+        self._started = time.time_ns()
+        self._dirty = False
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_DURATION_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _update_counter(self, name, key, amount):
+        with self._lock:
+            values = self._counters.setdefault(name, {})
+            values[key] = values.get(key, 0.0) + amount
+            self._dirty = True
+
+    def _update_gauge(self, name, key, value):
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+            self._dirty = True
+
+    def _update_histogram(self, metric, key, value):
+        with self._lock:
+            values = self._histograms.setdefault(metric.name, {})
+            state = values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then the +Inf bucket, sum and count.
+                state = values[key] = [0] * (len(metric.buckets) + 1) + [0.0, 0]
+            state[bisect_left(metric.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            self._dirty = False
+            return {
+                "counters": {
+                    name: [[list(key), value] for key, value in values.items()]
+                    for name, values in self._counters.items()
+                },
+                "gauges": {
+                    name: [[list(key), value] for key, value in values.items()]
+                    for name, values in self._gauges.items()
+                },
+                "histograms": {
+                    name: [[list(key), list(state)] for key, state in values.items()]
+                    for name, values in self._histograms.items()
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self._reset_values()
+
+    def configure(self, *, multiproc_dir=None, flush_interval=1.0):
+        self.multiproc_dir = Path(multiproc_dir) if multiproc_dir else None
+        self.flush_interval = max(float(flush_interval), 0.1)
+        if self.multiproc_dir is not None:
+            self.multiproc_dir.mkdir(parents=True, exist_ok=True)
+
+    def snapshot_path(self):
+        return self.multiproc_dir / f"{SNAPSHOT_PREFIX}{self._pid}-{self._started}.json"
+
+    def flush(self):
+        """Write this process's snapshot atomically; a no-op without a multiprocess dir."""
+        if self.multiproc_dir is None:
+            return
+        payload = json.dumps(self.snapshot(), separators=(",", ":"))
+        target = self.snapshot_path()
+        handle, temp_path = tempfile.mkstemp(dir=self.multiproc_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+                temp_file.write(payload)
+            os.replace(temp_path, target)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def start_flusher(self):
+        """Flush this process's changes every `flush_interval` seconds from a daemon thread.
+
+        Idle workers still publish their last requests, and a busy worker writes
+        at most once per interval. Safe to call on every request.
+        """
+        if self.multiproc_dir is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        Thread(target=self._flush_loop, name="metrics-flusher", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    continue
+
+    def collect(self):
+        """Return merged counters, gauges and histograms for every process."""
+        if self.multiproc_dir is None:
+            snapshots = [(True, self.snapshot())]
+        else:
+            self.flush()
+            snapshots = []
+            for path in sorted(self.multiproc_dir.glob(f"{SNAPSHOT_PREFIX}*.json")):
+                try:
+                    snapshot = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                snapshots.append((_snapshot_process_alive(path), snapshot))
+        counters = {}
+        gauges = {}
+        histograms = {}
+        for alive, snapshot in snapshots:
+            for name, rows in snapshot.get("counters", {}).items():
+                merged = counters.setdefault(name, {})
+                for key, value in rows:
+                    merged[tuple(key)] = merged.get(tuple(key), 0.0) + value
+            for name, rows in snapshot.get("gauges", {}).items() if alive else ():
+                merged = gauges.setdefault(name, {})
+                for key, value in rows:
+                    merged[tuple(key)] = merged.get(tuple(key), 0.0) + value
+            for name, rows in snapshot.get("histograms", {}).items():
+                merged = histograms.setdefault(name, {})
+                for key, state in rows:
+                    current = merged.get(tuple(key))
+                    if current is None or len(current) != len(state):
+                        merged[tuple(key)] = list(state)
+                    else:
+                        merged[tuple(key)] = [a + b for a, b in zip(current, state)]
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        collected = self.collect()
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind in ("counter", "gauge"):
+                values = collected[f"{metric.kind}s"].get(name, {})
+                for key, value in sorted(values.items()):
+                    lines.append(f"{name}{_labels(metric.labelnames, key)} {_number(value)}")
+                continue
+            for key, state in sorted(collected["histograms"].get(name, {}).items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*metric.buckets, math.inf), state[:-2]):
+                    cumulative += bucket_count
+                    bucket_labels = _labels((*metric.labelnames, "le"), (*key, _number(bound)))
+                    lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric.labelnames, key)} {_number(state[-2])}")
+                lines.append(f"{name}_count{_labels(metric.labelnames, key)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _snapshot_process_alive(path):
+    pid = path.name[len(SNAPSHOT_PREFIX):].split("-", 1)[0]
+    try:
+        os.kill(int(pid), 0)
+    except ValueError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _escape_help(text):
+    return text.replace("\\", r"\\").replace("\n", r"\n")
+
+
+def _escape_label(value):
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "aolrc_http_request_duration_seconds",
+    "Request latency by blueprint, endpoint, method and status.",
+    ("blueprint", "endpoint", "method", "status"),
+)
+db_statement_duration = registry.histogram(
+    "aolrc_db_statement_duration_seconds",
+    "SQL statement execution time; _count is the statement count.",
+    ("endpoint",),
+    buckets=DB_DURATION_BUCKETS,
+)
+db_pool_checkout_duration = registry.histogram(
+    "aolrc_db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting and connecting.",
+    buckets=DB_DURATION_BUCKETS,
+)
+mail_sends = registry.counter(
+    "aolrc_mail_send_total",
+    "Transactional email send attempts by outcome.",
+    ("status",),
+)
+rate_limit_decisions = registry.counter(
+    "aolrc_rate_limit_decisions_total",
+    "Rate limiter checks by bucket, operation and decision.",
+    ("bucket", "operation", "decision"),
+)
+export_size = registry.histogram(
+    "aolrc_export_bytes",
+    "Size of generated CSV exports by endpoint.",
+    ("endpoint",),
+    buckets=SIZE_BUCKETS,
+)
+rate_limit_keys = registry.gauge(
+    "aolrc_rate_limit_keys",
+    "Keys held by the in-process rate limiter, as of its last sweep.",
+)
+rate_limit_memory = registry.gauge(
+    "aolrc_rate_limit_memory_bytes",
+    "Approximate memory held by the in-process rate limiter, as of its last sweep.",
+)
+rate_limit_evictions = registry.counter(
+    "aolrc_rate_limit_evictions_total",
+    "Rate limiter keys dropped because they were idle or the key cap was reached.",
+    ("reason",),
+)
+cache_lookups = registry.counter(
+    "aolrc_cache_lookups_total",
+    "Cache lookups by cache and result; hit ratio is hit / (hit + miss).",
+    ("cache", "result"),
+)
+
+
+def record_cache_lookups(cache, *, hits=0, misses=0):
+    if hits:
+        cache_lookups.inc(hits, cache=cache, result="hit")
+    if misses:
+        cache_lookups.inc(misses, cache=cache, result="miss")
+
+
+def _flush_at_exit():
+    # Only processes that served requests publish; CLI commands stay out of the totals.
+    if registry.multiproc_dir is not None and registry._flusher_pid == os.getpid():
+        registry.flush()
+
+
+# A forked worker starts from zero; whatever the parent counted stays in the parent's snapshot.
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(_flush_at_exit)
+
+_STATEMENT_STARTED_ATTR = "_metrics_statement_started_at"
+_REQUEST_STARTED_ATTR = "metrics_request_started_at"
+_UNINSTRUMENTED_ENDPOINTS = {None, "static", "metrics"}
+
+
+def current_endpoint_label():
+    if not has_request_context():
+        return "-"
+    return request.endpoint or "none"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        setattr(context, _STATEMENT_STARTED_ATTR, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, _STATEMENT_STARTED_ATTR, None)
+    if started_at is not None:
+        db_statement_duration.observe(
+            time.perf_counter() - started_at,
+            endpoint=current_endpoint_label(),
+        )
+
+
+def _time_pool_checkouts(engine):
+    if getattr(engine, "_metrics_checkout_timed", False):
+        return
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started_at = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - started_at)
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_checkout_timed = True
+
+
+def _start_request_timer():
+    setattr(g, _REQUEST_STARTED_ATTR, time.perf_counter())
+
+
+def _observe_request(response):
+    started_at = g.get(_REQUEST_STARTED_ATTR)
+    if started_at is not None and request.endpoint not in _UNINSTRUMENTED_ENDPOINTS:
+        http_request_duration.observe(
+            time.perf_counter() - started_at,
+            blueprint=request.blueprint or "app",
+            endpoint=request.endpoint,
+            method=request.method,
+            status=str(response.status_code),
+        )
+    registry.start_flusher()
+    return response
+
+
+def _metrics_request_authorized():
+    token = current_app.config.get("METRICS_TOKEN") or ""
+    header = request.headers.get("Authorization") or ""
+    if token and header.startswith("Bearer "):
+        return hmac.compare_digest(header[len("Bearer "):].strip(), token)
+    return bool(
+        getattr(current_user, "is_authenticated", False) and current_user.has_role("admin")
+    )
+
+
+def metrics_view():
+    if not _metrics_request_authorized():
+        abort(403 if getattr(current_user, "is_authenticated", False) else 401)
+    return Response(registry.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """Register request, SQL and pool instrumentation plus the `/metrics` endpoint."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    registry.configure(
+        multiproc_dir=app.config.get("METRICS_MULTIPROC_DIR"),
+        flush_interval=app.config.get("METRICS_FLUSH_SECONDS", 1),
+    )
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    extension = app.extensions["sqlalchemy"]
+    with app.app_context():
+        for engine in extension.engines.values():
+            _time_pool_checkouts(engine)
+    app.before_request(_start_request_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -252,38 +252,20 @@ def validate_order_scope_setup_group(raw_value, *, valid_setup_group_values):
     return value
 
 
-def is_actionable_restock_row(row):
-    count_state = row.get("count_state") or {}
-    if not count_state.get("is_comparable"):
-        return False
-    suggested_order_qty = int(count_state.get("suggested_order_qty") or 0)
-    over_par_qty = int(count_state.get("over_par_qty") or 0)
-    return suggested_order_qty > 0 or over_par_qty > 0
-
-
-def _row_matches_setup_group_scope(row, scope_setup_group):
-    if scope_setup_group is None:
-        return True
-    row_code = row.get("setup_group_code")
-    if scope_setup_group == ORDER_SCOPE_UNASSIGNED_VALUE:
-        return not row_code
-    return row_code == scope_setup_group
-
-
 def build_order_seed_rows(*, scope_venue_id=None, scope_setup_group=None):
     venue_ids = [scope_venue_id] if scope_venue_id is not None else None
-    live_rows = build_restock_rows(
+    return build_restock_rows(
         venue_ids=venue_ids,
         mode="counts",
         sort="status_priority",
         limit=None,
         offset=0,
+        setup_group_code=(
+            scope_setup_group if scope_setup_group != ORDER_SCOPE_UNASSIGNED_VALUE else None
+        ),
+        unassigned_setup_group=scope_setup_group == ORDER_SCOPE_UNASSIGNED_VALUE,
+        actionable_only=True,
     )["rows"]
-    return [
-        row
-        for row in live_rows
-        if _row_matches_setup_group_scope(row, scope_setup_group) and is_actionable_restock_row(row)
-    ]
 
 
 def create_order_batch(
@@ -637,67 +619,72 @@ def format_order_export_timestamp(value):
 
 
 def build_order_line_csv_rows(batch, line_rows):
-    batch_created_at = format_order_export_timestamp(batch.created_at)
-    batch_type_label = format_order_batch_type_label(batch.batch_type)
-    batch_created_by = format_user_label(batch.created_by)
-    rows = []
-    for line in line_rows:
-        rows.append(
-            {
-                "Batch Name": sanitize_csv_cell(batch.name),
-                "Batch Type": sanitize_csv_cell(batch_type_label),
-                "Batch Created Date": batch_created_at,
-                "Batch Created By": sanitize_csv_cell(batch_created_by),
-                "Item Name": sanitize_csv_cell(line.get("item_name") or ""),
-                "Venue Name": sanitize_csv_cell(line.get("venue_name") or ""),
-                "Setup Group Code": sanitize_csv_cell(line.get("setup_group_code") or ""),
-                "Setup Group Label": sanitize_csv_cell(line.get("setup_group_label") or ""),
-                "Count Snapshot": (
-                    "" if line.get("count_snapshot") is None else line.get("count_snapshot")
-                ),
-                "Par Snapshot": (
-                    "" if line.get("par_snapshot") is None else line.get("par_snapshot")
-                ),
-                "Suggested Order Qty": int(line.get("suggested_order_qty_snapshot") or 0),
-                "Over Par Qty": int(line.get("over_par_qty_snapshot") or 0),
-                "Actual Ordered Qty": (
-                    ""
-                    if line.get("actual_ordered_qty") is None
-                    else int(line.get("actual_ordered_qty") or 0)
-                ),
-                "Status": (
-                    sanitize_csv_cell(line.get("status_label"))
-                    or sanitize_csv_cell(format_order_line_status_label(line.get("status")))
-                ),
-                "Line Notes": sanitize_csv_cell(line.get("notes") or ""),
-            }
-        )
-    return rows
+    # The batch and its creator are read now; lines are formatted as the CSV streams,
+    # after the request's session is gone.
+    batch_columns = {
+        "Batch Name": sanitize_csv_cell(batch.name),
+        "Batch Type": sanitize_csv_cell(format_order_batch_type_label(batch.batch_type)),
+        "Batch Created Date": format_order_export_timestamp(batch.created_at),
+        "Batch Created By": sanitize_csv_cell(format_user_label(batch.created_by)),
+    }
+    return (_build_order_line_csv_row(batch_columns, line) for line in line_rows)
+
+
+def _build_order_line_csv_row(batch_columns, line):
+    return {
+        **batch_columns,
+        "Item Name": sanitize_csv_cell(line.get("item_name") or ""),
+        "Venue Name": sanitize_csv_cell(line.get("venue_name") or ""),
+        "Setup Group Code": sanitize_csv_cell(line.get("setup_group_code") or ""),
+        "Setup Group Label": sanitize_csv_cell(line.get("setup_group_label") or ""),
+        "Count Snapshot": (
+            "" if line.get("count_snapshot") is None else line.get("count_snapshot")
+        ),
+        "Par Snapshot": (
+            "" if line.get("par_snapshot") is None else line.get("par_snapshot")
+        ),
+        "Suggested Order Qty": int(line.get("suggested_order_qty_snapshot") or 0),
+        "Over Par Qty": int(line.get("over_par_qty_snapshot") or 0),
+        "Actual Ordered Qty": (
+            ""
+            if line.get("actual_ordered_qty") is None
+            else int(line.get("actual_ordered_qty") or 0)
+        ),
+        "Status": (
+            sanitize_csv_cell(line.get("status_label"))
+            or sanitize_csv_cell(format_order_line_status_label(line.get("status")))
+        ),
+        "Line Notes": sanitize_csv_cell(line.get("notes") or ""),
+    }
 
 
 def build_purchase_summary_csv_rows(batch, purchase_summary_rows):
-    batch_type_label = format_order_batch_type_label(batch.batch_type)
-    rows = []
-    for summary in purchase_summary_rows:
-        rows.append(
-            {
-                "Batch Name": sanitize_csv_cell(batch.name),
-                "Batch Type": sanitize_csv_cell(batch_type_label),
-                "Item Name": sanitize_csv_cell(summary.get("item_name") or ""),
-                "Setup Group Code": sanitize_csv_cell(summary.get("setup_group_code") or ""),
-                "Setup Group Label": sanitize_csv_cell(summary.get("setup_group_label") or ""),
-                "Contributing Venue Count": int(summary.get("venue_count") or 0),
-                "Contributing Line Count": int(summary.get("line_count") or 0),
-                "Total Count": int(summary.get("total_count_snapshot") or 0),
-                "Total Par": int(summary.get("total_par_snapshot") or 0),
-                "Total Suggested Order": int(summary.get("total_suggested_order_qty") or 0),
-                "Total Actual Ordered": int(summary.get("total_actual_ordered_qty") or 0),
-                "Total Over Par": int(summary.get("total_over_par_qty") or 0),
-                "Status Summary": sanitize_csv_cell(summary.get("status_breakdown_text") or ""),
-                "Note Count": int(summary.get("note_count") or 0),
-            }
-        )
-    return rows
+    batch_columns = {
+        "Batch Name": sanitize_csv_cell(batch.name),
+        "Batch Type": sanitize_csv_cell(format_order_batch_type_label(batch.batch_type)),
+    }
+    return (
+        _build_purchase_summary_csv_row(batch_columns, summary)
+        for summary in purchase_summary_rows
+    )
+
+
+def _build_purchase_summary_csv_row(batch_columns, summary):
+    return {
+        **batch_columns,
+        "Item Name": sanitize_csv_cell(summary.get("item_name") or ""),
+        "Setup Group Code": sanitize_csv_cell(summary.get("setup_group_code") or ""),
+        "Setup Group Label": sanitize_csv_cell(summary.get("setup_group_label") or ""),
+        "Contributing Venue Count": int(summary.get("venue_count") or 0),
+        "Contributing Line Count": int(summary.get("line_count") or 0),
+        "Total Count": int(summary.get("total_count_snapshot") or 0),
+        "Total Par": int(summary.get("total_par_snapshot") or 0),
+        "Total Suggested Order": int(summary.get("total_suggested_order_qty") or 0),
+        "Total Actual Ordered": int(summary.get("total_actual_ordered_qty") or 0),
+        "Total Over Par": int(summary.get("total_over_par_qty") or 0),
+        "Status Summary": sanitize_csv_cell(summary.get("status_breakdown_text") or ""),
+        "Note Count": int(summary.get("note_count") or 0),
+    }
 
 
 def build_order_line_export_filename(batch, *, scope):
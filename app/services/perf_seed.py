@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import mimetypes
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import (
+    DEFAULT_THEME_PREFERENCE,
+    Check,
+    CheckLine,
+    CountLine,
+    CountSession,
+    Item,
+    OrderBatch,
+    OrderLine,
+    SupplyNote,
+    User,
+    Venue,
+    VenueFile,
+    VenueItem,
+    VenueItemCount,
+    VenueNote,
+)
+from app.services.inventory_activity import rebuild_inventory_activity_events
+from app.services.inventory_status import (
+    derive_singleton_count_from_status,
+    suggest_status_from_count,
+)
+from app.services.item_network_rollups import rebuild_item_network_rollups
+from app.services.spreadsheet_compat import BUILTIN_SETUP_GROUPS
+from app.services.venue_files import classify_extension
+from app.services.venue_item_state import rebuild_venue_item_state
+from app.services.venue_rollups import rebuild_venue_rollups
+
+PERF_NAME_PREFIX = "Perf"
+PERF_EMAIL_DOMAIN = "perf.example.com"
+PERF_PASSWORD = "perf-seed-password"
+INSERT_BATCH_ROWS = 5000
+PROGRESS_EVERY_ROWS = 250_000
+
+QUANTITY_CATEGORIES = ("consumable", "beverage", "cleaning", "office")
+FILE_EXTENSIONS = ("pdf", "jpg", "xlsx", "docx", "csv")
+NOTE_TITLES = (
+    "Restock request",
+    "Setup change",
+    "Damaged item",
+    "Storage moved",
+    "Count discrepancy",
+)
+ORDER_LINE_STATUS_WEIGHTS = (("received", 6), ("ordered", 2), ("planned", 1), ("skipped", 1))
+# Order matters: rollups read venue_item_state.
+DERIVED_REBUILD_STEPS = (
+    ("venue item state", rebuild_venue_item_state),
+    ("venue rollups", rebuild_venue_rollups),
+    ("item network rollups", rebuild_item_network_rollups),
+    ("inventory activity", rebuild_inventory_activity_events),
+)
+# Tables given explicit ids here; Postgres sequences are moved past them afterwards.
+EXPLICIT_ID_TABLES = ("users", "venues", "items", "checks", "count_sessions", "order_batches")
+
+
+class PerfSeedError(ValueError):
+    pass
+
+
+class _BulkWriter:
+    """Buffer rows for one table and send them with Core executemany in fixed-size batches.
+
+    A writer with a `parent` flushes the parent first, so foreign keys always
+    point at rows that are already inserted (Postgres checks them per statement).
+    """
+
+    def __init__(self, model, label, progress, *, parent=None):
+        self.table = model.__table__
+        self.label = label
+        self.progress = progress
+        self.parent = parent
+        self.rows = []
+        self.total = 0
+        self.started = time.perf_counter()
+        self._next_report = PROGRESS_EVERY_ROWS
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= INSERT_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.parent is not None:
+            self.parent.flush()
+        db.session.execute(insert(self.table), self.rows)
+        self.total += len(self.rows)
+        self.rows = []
+        if self.progress is not None and self.total >= self._next_report:
+            self.progress(self.label, self.total, time.perf_counter() - self.started, False)
+            self._next_report += PROGRESS_EVERY_ROWS
+
+    def close(self):
+        self.flush()
+        if self.progress is not None:
+            self.progress(self.label, self.total, time.perf_counter() - self.started, True)
+        return self.total
+
+
+def _next_id(model):
+    return int(db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _reset_postgres_sequences():
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    for table_name in EXPLICIT_ID_TABLES:
+        db.session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table_name}))"
+            )
+        )
+
+
+def _weighted_choice(rng, options):
+    values = [value for value, _ in options]
+    weights = [weight for _, weight in options]
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def _next_singleton_status(rng, status):
+    roll = rng.random()
+    if status == "good":
+        if roll < 0.01:
+            return "out"
+        if roll < 0.03:
+            return "low"
+        return "good"
+    return "good" if roll < 0.3 else status
+
+
+def _seed_users(count, now, progress):
+    if User.query.filter(User.email.like(f"%@{PERF_EMAIL_DOMAIN}")).first() is not None:
+        raise PerfSeedError(
+            f"A perf dataset is already present (users @{PERF_EMAIL_DOMAIN}); "
+            "seed into an empty database."
+        )
+    password_hash = generate_password_hash(PERF_PASSWORD)
+    first_id = _next_id(User)
+    writer = _BulkWriter(User, "users", progress)
+    user_ids = []
+    for index in range(count):
+        user_id = first_id + index
+        user_ids.append(user_id)
+        writer.add(
+            {
+                "id": user_id,
+                "email": f"perf-user-{index + 1:04d}@{PERF_EMAIL_DOMAIN}",
+                "display_name": f"{PERF_NAME_PREFIX} User {index + 1}",
+                "theme_preference": DEFAULT_THEME_PREFERENCE,
+                "password_hash": password_hash,
+                "role": "admin" if index == 0 else "staff",
+                "active": True,
+                "password_changed_at": now,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    writer.close()
+    return user_ids
+
+
+def _seed_items(rng, count, now, progress):
+    """Insert family parents, singleton assets and quantity items; return trackable item specs."""
+    first_id = _next_id(Item)
+    parent_count = max(1, count // 20)
+    writer = _BulkWriter(Item, "items", progress)
+    parent_ids = []
+    trackable = []
+    for index in range(count):
+        item_id = first_id + index
+        setup_group_code = rng.choice(BUILTIN_SETUP_GROUPS)[0] if rng.random() < 0.7 else None
+        row = {
+            "id": item_id,
+            "name": f"{PERF_NAME_PREFIX} Item {index + 1:05d}",
+            "unit": "each",
+            "sort_order": index,
+            "active": True,
+            "created_at": now,
+            "parent_item_id": None,
+            "is_group_parent": False,
+            "default_par_level": None,
+            "stale_threshold_days": None,
+            "setup_group_code": setup_group_code,
+            "setup_group_label": None,
+        }
+        if index < parent_count:
+            row.update(
+                name=f"{PERF_NAME_PREFIX} Family {index + 1:03d}",
+                item_type="durable",
+                tracking_mode="quantity",
+                item_category="durable",
+                is_group_parent=True,
+            )
+            parent_ids.append(item_id)
+        elif rng.random() < 0.2:
+            row.update(
+                item_type="durable", tracking_mode="singleton_asset", item_category="durable"
+            )
+            trackable.append({"id": item_id, "tracking_mode": "singleton_asset", "par": None})
+        else:
+            par = rng.randint(4, 40)
+            row.update(
+                item_type="consumable",
+                tracking_mode="quantity",
+                item_category=rng.choice(QUANTITY_CATEGORIES),
+                default_par_level=par,
+            )
+            trackable.append({"id": item_id, "tracking_mode": "quantity", "par": par})
+        if not row["is_group_parent"] and rng.random() < 0.4:
+            row["parent_item_id"] = rng.choice(parent_ids)
+        writer.add(row)
+    writer.close()
+    return trackable
+
+
+def _seed_venues(rng, count, trackable, now, progress):
+    """Insert venues and their tracking links; return `{venue_id: [tracked item spec, ...]}`."""
+    first_id = _next_id(Venue)
+    venue_writer = _BulkWriter(Venue, "venues", progress)
+    link_writer = _BulkWriter(VenueItem, "venue_items", progress, parent=venue_writer)
+    tracked_by_venue = {}
+    for index in range(count):
+        venue_id = first_id + index
+        venue_writer.add(
+            {
+                "id": venue_id,
+                "name": f"{PERF_NAME_PREFIX} Venue {index + 1:03d}",
+                "is_core": False,
+                "active": True,
+                "stale_threshold_days": rng.choice((None, None, None, 1, 3, 7)),
+                "created_at": now,
+            }
+        )
+        sample_size = max(1, int(len(trackable) * rng.uniform(0.4, 0.8)))
+        tracked = []
+        sampled = rng.sample(trackable, k=min(sample_size, len(trackable)))
+        for spec in sorted(sampled, key=lambda spec: spec["id"]):
+            override = None
+            if spec["tracking_mode"] == "quantity" and rng.random() < 0.15:
+                override = max(1, spec["par"] + rng.randint(-3, 10))
+            active = rng.random() >= 0.03
+            link_writer.add(
+                {
+                    "venue_id": venue_id,
+                    "item_id": spec["id"],
+                    "expected_qty": override,
+                    "reorder_threshold": None,
+                    "active": active,
+                    "created_at": now,
+                }
+            )
+            if active:
+                tracked.append({**spec, "par": override if override is not None else spec["par"]})
+        tracked_by_venue[venue_id] = tracked
+    venue_writer.close()
+    link_writer.close()
+    return tracked_by_venue
+
+
+def _seed_history(rng, tracked_by_venue, user_ids, *, start, days, checks_per_day, progress):
+    """Walk every venue through `days` of visits; return final raw counts by (venue, item)."""
+    check_writer = _BulkWriter(Check, "checks", progress)
+    check_line_writer = _BulkWriter(CheckLine, "check_lines", progress, parent=check_writer)
+    session_writer = _BulkWriter(CountSession, "count_sessions", progress)
+    count_line_writer = _BulkWriter(CountLine, "count_lines", progress, parent=session_writer)
+    next_check_id = _next_id(Check)
+    next_session_id = _next_id(CountSession)
+    slot_minutes = max(1, (10 * 60) // checks_per_day)
+
+    state = {}
+    for venue_id, tracked in tracked_by_venue.items():
+        for spec in tracked:
+            if spec["tracking_mode"] == "quantity":
+                state[(venue_id, spec["id"])] = spec["par"]
+            else:
+                state[(venue_id, spec["id"])] = "good"
+
+    for day in range(days):
+        day_start = start + timedelta(days=day, hours=8)
+        for slot in range(checks_per_day):
+            for venue_id, tracked in tracked_by_venue.items():
+                minute = slot * slot_minutes + rng.randrange(slot_minutes)
+                created_at = day_start + timedelta(minutes=minute)
+                user_id = rng.choice(user_ids)
+                check_id = next_check_id
+                session_id = next_session_id
+                next_check_id += 1
+                next_session_id += 1
+                header = {"venue_id": venue_id, "user_id": user_id, "created_at": created_at}
+                check_writer.add({"id": check_id, **header})
+                session_writer.add({"id": session_id, **header})
+                for spec in tracked:
+                    if rng.random() < 0.1:
+                        continue
+                    key = (venue_id, spec["id"])
+                    if spec["tracking_mode"] == "quantity":
+                        par = spec["par"]
+                        raw_count = state[key] - rng.randint(0, max(1, par // 5))
+                        if raw_count <= 0 or rng.random() < 0.08:
+                            raw_count = par + rng.randint(0, max(1, par // 4))
+                        state[key] = raw_count
+                        status = suggest_status_from_count(raw_count, par, "quantity")
+                        count_line_writer.add(
+                            {
+                                "count_session_id": session_id,
+                                "item_id": spec["id"],
+                                "raw_count": raw_count,
+                            }
+                        )
+                    else:
+                        status = _next_singleton_status(rng, state[key])
+                        state[key] = status
+                    check_line_writer.add(
+                        {"check_id": check_id, "item_id": spec["id"], "status": status}
+                    )
+
+    for writer in (check_writer, session_writer, check_line_writer, count_line_writer):
+        writer.close()
+
+    return {
+        key: value if isinstance(value, int) else derive_singleton_count_from_status(value)
+        for key, value in state.items()
+    }
+
+
+def _seed_current_counts(current_counts, now, progress):
+    writer = _BulkWriter(VenueItemCount, "venue_item_counts", progress)
+    for (venue_id, item_id), raw_count in sorted(current_counts.items()):
+        if raw_count is not None:
+            writer.add(
+                {
+                    "venue_id": venue_id,
+                    "item_id": item_id,
+                    "raw_count": raw_count,
+                    "updated_at": now,
+                }
+            )
+    writer.close()
+
+
+def _random_moment(rng, start, days):
+    return start + timedelta(seconds=rng.randrange(max(1, days) * 24 * 60 * 60))
+
+
+def _seed_notes(rng, tracked_by_venue, trackable, user_ids, *, start, days, progress):
+    venue_writer = _BulkWriter(VenueNote, "venue_notes", progress)
+    for venue_id, tracked in tracked_by_venue.items():
+        for _ in range(max(1, days // 14)):
+            created_at = _random_moment(rng, start, days)
+            spec = rng.choice(tracked) if tracked and rng.random() < 0.5 else None
+            venue_writer.add(
+                {
+                    "venue_id": venue_id,
+                    "author_user_id": rng.choice(user_ids),
+                    "item_id": spec["id"] if spec else None,
+                    "title": rng.choice(NOTE_TITLES),
+                    "body": f"Seeded note for performance testing ({created_at:%Y-%m-%d}).",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+    venue_writer.close()
+
+    supply_writer = _BulkWriter(SupplyNote, "supply_notes", progress)
+    for spec in trackable:
+        if rng.random() >= 0.3:
+            continue
+        for _ in range(rng.randint(1, 3)):
+            created_at = _random_moment(rng, start, days)
+            supply_writer.add(
+                {
+                    "item_id": spec["id"],
+                    "author_user_id": rng.choice(user_ids),
+                    "title": rng.choice(NOTE_TITLES),
+                    "body": "Seeded supply note for performance testing.",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+    supply_writer.close()
+
+
+def _seed_orders(rng, tracked_by_venue, user_ids, *, start, days, progress):
+    batch_writer = _BulkWriter(OrderBatch, "order_batches", progress)
+    line_writer = _BulkWriter(OrderLine, "order_lines", progress, parent=batch_writer)
+    next_batch_id = _next_id(OrderBatch)
+    for month_offset in range(0, max(1, days), 30):
+        created_at = start + timedelta(days=month_offset, hours=9)
+        batch_id = next_batch_id
+        next_batch_id += 1
+        batch_writer.add(
+            {
+                "id": batch_id,
+                "name": f"{PERF_NAME_PREFIX} {created_at:%B %Y} restock",
+                "batch_type": "monthly",
+                "notes": None,
+                "created_by_user_id": user_ids[0],
+                "created_at": created_at,
+            }
+        )
+        for venue_id, tracked in tracked_by_venue.items():
+            for spec in tracked:
+                if spec["tracking_mode"] != "quantity" or rng.random() >= 0.15:
+                    continue
+                count = rng.randint(0, spec["par"])
+                suggested = spec["par"] - count
+                status = _weighted_choice(rng, ORDER_LINE_STATUS_WEIGHTS)
+                line_writer.add(
+                    {
+                        "order_batch_id": batch_id,
+                        "item_id": spec["id"],
+                        "venue_id": venue_id,
+                        "item_name_snapshot": f"{PERF_NAME_PREFIX} Item {spec['id']}",
+                        "venue_name_snapshot": f"{PERF_NAME_PREFIX} Venue {venue_id}",
+                        "count_snapshot": count,
+                        "par_snapshot": spec["par"],
+                        "suggested_order_qty_snapshot": suggested,
+                        "over_par_qty_snapshot": 0,
+                        "actual_ordered_qty": (
+                            suggested if status in {"ordered", "received"} else None
+                        ),
+                        "status": status,
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    }
+                )
+    batch_writer.close()
+    line_writer.close()
+
+
+def _seed_venue_files(rng, venue_ids, user_ids, *, start, days, progress):
+    """Insert file metadata only; no bytes are written to the upload folder."""
+    writer = _BulkWriter(VenueFile, "venue_files", progress)
+    for venue_id in venue_ids:
+        for index in range(rng.randint(0, 4)):
+            extension = rng.choice(FILE_EXTENSIONS)
+            classification = classify_extension(extension)
+            writer.add(
+                {
+                    "venue_id": venue_id,
+                    "uploaded_by_user_id": rng.choice(user_ids),
+                    "original_filename": (
+                        f"{PERF_NAME_PREFIX} venue {venue_id} file {index + 1}.{extension}"
+                    ),
+                    "stored_filename": f"perf-{venue_id}-{index + 1}.{extension}",
+                    "mime_type": (
+                        mimetypes.guess_type(f"file.{extension}")[0] or "application/octet-stream"
+                    ),
+                    "extension": extension,
+                    "size_bytes": rng.randint(10_000, 5_000_000),
+                    "category": classification["category"],
+                    "preview_type": classification["preview_type"],
+                    "description": None,
+                    "created_at": _random_moment(rng, start, days),
+                }
+            )
+    writer.close()
+
+
+def seed_perf_dataset(*, venues, items, days, checks_per_day, seed, now=None, progress=None):
+    """Bulk-insert a deterministic, production-shaped dataset; the caller commits.
+
+    The same arguments always produce the same rows. `progress`, if given, is
+    called as `progress(label, rows, elapsed_seconds, done)` while each table is
+    written. Derived tables are not rebuilt here.
+    """
+    if min(venues, items, days, checks_per_day) < 1:
+        raise PerfSeedError("Venues, items, days and checks per day must all be at least 1.")
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc).replace(microsecond=0)
+    start = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0)
+
+    user_ids = _seed_users(max(4, venues // 2), now, progress)
+    trackable = _seed_items(rng, items, now, progress)
+    tracked_by_venue = _seed_venues(rng, venues, trackable, now, progress)
+    current_counts = _seed_history(
+        rng,
+        tracked_by_venue,
+        user_ids,
+        start=start,
+        days=days,
+        checks_per_day=checks_per_day,
+        progress=progress,
+    )
+    _seed_current_counts(current_counts, now, progress)
+    window = {"start": start, "days": days, "progress": progress}
+    _seed_notes(rng, tracked_by_venue, trackable, user_ids, **window)
+    _seed_orders(rng, tracked_by_venue, user_ids, **window)
+    _seed_venue_files(rng, list(tracked_by_venue), user_ids, **window)
+    _reset_postgres_sequences()
+    db.session.flush()
+    return {
+        "users": len(user_ids),
+        "venues": len(tracked_by_venue),
+        "items": items,
+        "tracked_pairs": sum(len(tracked) for tracked in tracked_by_venue.values()),
+    }
+
+
+def rebuild_derived_tables(report=None):
+    """Rebuild every derived table from the seeded history; the caller commits.
+
+    `report`, if given, is called as `report(label, elapsed_seconds)` after each step.
+    """
+    for label, rebuild in DERIVED_REBUILD_STEPS:
+        started = time.perf_counter()
+        rebuild()
+        if report is not None:
+            report(label, time.perf_counter() - started)
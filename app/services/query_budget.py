@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from blinker import Namespace
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import is_development_environment
+
+QUERY_BUDGET_MODES = {"off", "log", "raise"}
+SUMMARY_STATEMENT_LIMIT = 5
+SUMMARY_STATEMENT_CHARS = 160
+
+_STATS_ATTR = "request_query_stats"
+_STARTED_ATTR = "_query_budget_started_at"
+_signals = Namespace()
+query_stats_recorded = _signals.signal("query-stats-recorded")
+
+# Bind placeholders in every paramstyle SQLAlchemy emits: ?, :name, %s, %(name)s, $1.
+_PLACEHOLDER = r"(?:\?|:\w+|%s|%\(\w+\)s|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def normalize_statement(statement):
+    """Collapse whitespace and expanded IN / VALUES lists so repeats of one query match."""
+    normalized = _WHITESPACE.sub(" ", statement or "").strip()
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    return _VALUES_ROWS.sub(r"\1", normalized)
+
+
+@dataclass
+class RequestQueryStats:
+    statements: int = 0
+    db_time: float = 0.0
+    by_statement: dict = field(default_factory=dict)
+
+    def record(self, statement, elapsed):
+        self.statements += 1
+        self.db_time += elapsed
+        key = normalize_statement(statement)
+        self.by_statement[key] = self.by_statement.get(key, 0) + 1
+
+    def top_statements(self, *, min_count=1, limit=SUMMARY_STATEMENT_LIMIT):
+        rows = [pair for pair in self.by_statement.items() if pair[1] >= min_count]
+        return sorted(rows, key=lambda pair: (-pair[1], pair[0]))[:limit]
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    max_queries: int | None = None
+    max_repeats: int | None = None
+    method_limits: dict = field(default_factory=dict)
+
+    def limit_for(self, method):
+        return self.method_limits.get((method or "").lower(), self.max_queries)
+
+
+def query_budget(max_queries=None, *, max_repeats=None, **method_limits):
+    """Declare how many SQL statements one request to this view may run.
+
+    `max_queries` applies to every method unless overridden per method, e.g.
+    `@query_budget(10, post=40)`. `max_repeats` caps how often one normalized
+    statement may run (N+1 detection); it defaults to QUERY_BUDGET_MAX_REPEATS.
+    The budget is checked after the view returns; see `init_query_budget`.
+    """
+    budget = QueryBudget(
+        max_queries=max_queries,
+        max_repeats=max_repeats,
+        method_limits={method.lower(): limit for method, limit in method_limits.items()},
+    )
+
+    def decorator(view_func):
+        # functools.wraps copies __dict__, so outer decorators such as roles_required keep this.
+        view_func.query_budget = budget
+        return view_func
+
+    return decorator
+
+
+def get_request_query_stats():
+    if not has_request_context():
+        return None
+    return g.get(_STATS_ATTR)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_request_context() and g.get(_STATS_ATTR) is not None:
+        setattr(context, _STARTED_ATTR, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = getattr(context, _STARTED_ATTR, None)
+    if started_at is None:
+        return
+    stats = get_request_query_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+def _install_engine_listeners():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def resolve_query_budget_mode(app):
+    mode = (app.config.get("QUERY_BUDGET_MODE") or "").strip().lower()
+    if mode in QUERY_BUDGET_MODES:
+        return mode
+    if app.testing:
+        return "raise"
+    return "log" if is_development_environment() else "off"
+
+
+def format_query_summary(stats, statements):
+    lines = [f"{stats.statements} statements, {stats.db_time * 1000:.1f} ms in the database"]
+    for statement, count in statements:
+        if len(statement) > SUMMARY_STATEMENT_CHARS:
+            statement = statement[: SUMMARY_STATEMENT_CHARS - 3] + "..."
+        lines.append(f"  {count}x {statement}")
+    return "\n".join(lines)
+
+
+def check_query_budget(stats, budget, *, method, default_max_repeats):
+    """Return `(problems, offending_statements)`; `problems` is empty within budget."""
+    problems = []
+    limit = budget.limit_for(method) if budget else None
+    if limit is not None and stats.statements > limit:
+        problems.append(f"ran {stats.statements} SQL statements (budget {limit})")
+    max_repeats = default_max_repeats
+    if budget is not None and budget.max_repeats is not None:
+        max_repeats = budget.max_repeats
+    repeated = stats.top_statements(min_count=max_repeats + 1)
+    if repeated:
+        problems.append(f"ran a statement more than {max_repeats} times (possible N+1)")
+    return problems, repeated or stats.top_statements()
+
+
+def _start_request_stats():
+    setattr(g, _STATS_ATTR, RequestQueryStats())
+
+
+def _finish_request_stats(response):
+    stats = get_request_query_stats()
+    if stats is None or request.endpoint in (None, "static"):
+        return response
+    app = current_app._get_current_object()
+    query_stats_recorded.send(app, endpoint=request.endpoint, stats=stats)
+
+    mode = resolve_query_budget_mode(app)
+    if mode == "off":
+        return response
+    view_func = app.view_functions.get(request.endpoint)
+    budget = getattr(view_func, "query_budget", None)
+    problems, offending = check_query_budget(
+        stats,
+        budget,
+        method=request.method,
+        default_max_repeats=app.config["QUERY_BUDGET_MAX_REPEATS"],
+    )
+    if not problems:
+        return response
+
+    message = (
+        f"{request.method} {request.path} ({request.endpoint}) {'; '.join(problems)}\n"
+        f"{format_query_summary(stats, offending)}"
+    )
+    # Undeclared views only ever log; declared budgets fail loudly in tests.
+    if mode == "raise" and budget is not None:
+        raise QueryBudgetExceeded(message)
+    app.logger.warning("Query budget exceeded: %s", message)
+    return response
+
+
+def init_query_budget(app):
+    _install_engine_listeners()
+    app.before_request(_start_request_stats)
+    app.after_request(_finish_request_stats)
+
+
+@contextmanager
+def capture_query_stats(app):
+    """Collect `(endpoint, RequestQueryStats)` for every request handled inside the block."""
+    captured = []
+
+    def receiver(sender, endpoint, stats):
+        captured.append((endpoint, stats))
+
+    with query_stats_recorded.connected_to(receiver, sender=app):
+        yield captured
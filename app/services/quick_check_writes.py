@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert
+
+from app import db
+from app.models import CheckLine, CountLine, VenueItemCount
+from app.services.db_upserts import upsert_rows
+from app.services.inventory_status import derive_singleton_count_from_status
+
+
+def insert_check_lines(check_id, item_statuses):
+    """Insert every `(item_id, status)` line for a flushed check in one statement."""
+    rows = [
+        {"check_id": check_id, "item_id": int(item_id), "status": status}
+        for item_id, status in item_statuses
+    ]
+    if rows:
+        db.session.execute(insert(CheckLine).values(rows))
+    return len(rows)
+
+
+def insert_count_lines(count_session_id, item_counts):
+    """Insert every `(item_id, raw_count)` line for a flushed count session in one statement."""
+    rows = [
+        {"count_session_id": count_session_id, "item_id": int(item_id), "raw_count": int(raw_count)}
+        for item_id, raw_count in item_counts
+    ]
+    if rows:
+        db.session.execute(insert(CountLine).values(rows))
+    return len(rows)
+
+
+def upsert_venue_item_counts(venue_id, item_counts, *, updated_at=None):
+    """Set the current raw count for each `(item_id, raw_count)` with one ON CONFLICT upsert.
+
+    Concurrent saves for the same venue/item resolve in the database instead of
+    racing on `uq_venue_item_count`; the last writer wins.
+    """
+    updated_at = updated_at or datetime.now(timezone.utc)
+    rows = [
+        {
+            "venue_id": venue_id,
+            "item_id": int(item_id),
+            "raw_count": int(raw_count),
+            "updated_at": updated_at,
+        }
+        for item_id, raw_count in dict(item_counts).items()
+    ]
+    if not rows:
+        return 0
+    upsert_rows(
+        VenueItemCount.__table__,
+        rows,
+        conflict_columns=("venue_id", "item_id"),
+        update_columns=("raw_count", "updated_at"),
+    )
+    return len(rows)
+
+
+def delete_venue_item_counts(venue_id, item_ids):
+    item_ids = [int(item_id) for item_id in item_ids or []]
+    if not item_ids:
+        return 0
+    return db.session.execute(
+        delete(VenueItemCount).where(
+            VenueItemCount.venue_id == venue_id,
+            VenueItemCount.item_id.in_(item_ids),
+        )
+    ).rowcount
+
+
+def sync_singleton_compat_counts(venue_id, item_statuses, *, updated_at=None):
+    """Mirror singleton statuses into `venue_item_counts` (present 1, missing 0, unchecked none)."""
+    derived_counts = {}
+    cleared_item_ids = []
+    for item_id, status in item_statuses:
+        derived_count = derive_singleton_count_from_status(status)
+        if derived_count is None:
+            cleared_item_ids.append(item_id)
+        else:
+            derived_counts[item_id] = derived_count
+    upsert_venue_item_counts(venue_id, derived_counts, updated_at=updated_at)
+    delete_venue_item_counts(venue_id, cleared_item_ids)
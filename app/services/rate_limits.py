@@ -1,9 +1,65 @@
+"""Throttles for login, password and feedback attempts.
+
+`rate_limiter` is the one object the routes use. Its backend is chosen by
+RATE_LIMIT_BACKEND:
+
+- `memory` (default): exact per-event sliding windows in this process. Each
+  gunicorn worker and each restart starts with its own empty counts.
+- `counter`: sliding-window counters in this process; a fixed few bytes per key,
+  sharded locks and a background sweep that caps the number of keys.
+- `database`: fixed sub-window counters in the app database's
+  `rate_limit_counters` table, shared by every worker and host. PostgreSQL
+  only: on SQLite the counter write would queue behind the request's own
+  write lock, so SQLite deployments use `file`.
+- `file`: the same counters in a separate SQLite file (RATE_LIMIT_FILE), shared
+  by the workers on one host through SQLite's file locks.
+
+The shared backends split each window into RATE_LIMIT_SUBWINDOWS buckets and
+count an attempt until its whole bucket has left the window, so a client can be
+held back up to one bucket (a tenth of the window by default) longer than with
+the memory backend, never less.
+
+The `counter` backend keeps, per key, the attempt counts of the current and the
+previous fixed window and estimates the sliding count as
+`previous * (1 - elapsed / window) + current`. This assumes the previous
+window's attempts were spread evenly: for evenly spaced attempts it is within
+one attempt of the exact count, a burst late in the previous window is
+forgotten early (by at most the previous count times the elapsed fraction), and
+a burst early in it is remembered that much longer.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import math
+import os
+import sys
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from dataclasses import dataclass
-from threading import Lock
+from threading import Lock, Thread
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, create_engine, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import RateLimitCounter
+from app.services.metrics import (
+    rate_limit_decisions,
+    rate_limit_evictions,
+    rate_limit_keys,
+    rate_limit_memory,
+)
+
+RATE_LIMIT_BACKENDS = {"memory", "counter", "database", "file"}
+DEFAULT_SUBWINDOWS = 10
+DEFAULT_MAX_KEYS = 100_000
+DEFAULT_SWEEP_SECONDS = 60
+COUNTER_SHARDS = 16
+PURGE_INTERVAL_SECONDS = 5 * 60
+STORED_KEY_CHARS = 255
 
 
 @dataclass(frozen=True)
@@ -14,7 +70,26 @@ class RateLimitDecision:
     retry_after_seconds: int
 
 
+def _count_decision(bucket, operation, decision):
+    rate_limit_decisions.inc(
+        bucket=bucket,
+        operation=operation,
+        decision="limited" if decision.limited else "allowed",
+    )
+
+
+def _decision(count, limit, *, retry_after):
+    return RateLimitDecision(
+        limited=count >= limit,
+        count=count,
+        limit=limit,
+        retry_after_seconds=max(1, int(retry_after)) if count >= limit else 0,
+    )
+
+
 class SlidingWindowRateLimiter:
+    """Exact sliding windows kept in this process's memory."""
+
     def __init__(self):
         self._events = defaultdict(deque)
         self._lock = Lock()
@@ -30,29 +105,15 @@ class SlidingWindowRateLimiter:
         with self._lock:
             queue = self._events.get(composite_key)
             if queue is None:
-                return RateLimitDecision(
-                    limited=False,
-                    count=0,
-                    limit=limit,
-                    retry_after_seconds=0,
-                )
+                return _decision(0, limit, retry_after=0)
 
             self._prune(queue, now=timestamp, window_seconds=window_seconds)
             if not queue:
                 self._events.pop(composite_key, None)
-                return RateLimitDecision(
-                    limited=False,
-                    count=0,
-                    limit=limit,
-                    retry_after_seconds=0,
-                )
+                return _decision(0, limit, retry_after=0)
 
-            retry_after = max(1, int(window_seconds - (timestamp - queue[0])))
-            return RateLimitDecision(
-                limited=len(queue) >= limit,
-                count=len(queue),
-                limit=limit,
-                retry_after_seconds=retry_after if len(queue) >= limit else 0,
+            return _decision(
+                len(queue), limit, retry_after=window_seconds - (timestamp - queue[0])
             )
 
     def record(self, bucket, key, *, limit, window_seconds, now=None):
@@ -62,12 +123,8 @@ class SlidingWindowRateLimiter:
             queue = self._events[composite_key]
             self._prune(queue, now=timestamp, window_seconds=window_seconds)
             queue.append(timestamp)
-            retry_after = max(1, int(window_seconds - (timestamp - queue[0])))
-            return RateLimitDecision(
-                limited=len(queue) >= limit,
-                count=len(queue),
-                limit=limit,
-                retry_after_seconds=retry_after if len(queue) >= limit else 0,
+            return _decision(
+                len(queue), limit, retry_after=window_seconds - (timestamp - queue[0])
             )
 
     def clear(self, bucket, key):
@@ -80,4 +137,360 @@ class SlidingWindowRateLimiter:
             self._events.clear()
 
 
-rate_limiter = SlidingWindowRateLimiter()
+class SlidingWindowCounterRateLimiter:
+    """Two counters per key, sharded locks, LRU capped at `max_keys`.
+
+    Each shard is an OrderedDict in least-recently-used order. A key's state is
+    `[window_start, window_seconds, previous_count, current_count]`. Inserting
+    past the shard's share of `max_keys` drops its least recently used key, and
+    `sweep()` drops keys whose windows have both expired. `start_sweeper()` runs
+    the sweep every `sweep_seconds` from a daemon thread in each process.
+    """
+
+    def __init__(self, *, max_keys=DEFAULT_MAX_KEYS, sweep_seconds=DEFAULT_SWEEP_SECONDS):
+        self.max_keys = max(COUNTER_SHARDS, int(max_keys))
+        self.sweep_seconds = max(1, int(sweep_seconds))
+        self._shard_capacity = math.ceil(self.max_keys / COUNTER_SHARDS)
+        self._shards = [OrderedDict() for _ in range(COUNTER_SHARDS)]
+        self._locks = [Lock() for _ in range(COUNTER_SHARDS)]
+        self._sweeper_pid = None
+
+    def _shard(self, composite_key):
+        index = hash(composite_key) % COUNTER_SHARDS
+        return self._shards[index], self._locks[index]
+
+    @staticmethod
+    def _roll(state, *, now, window_seconds):
+        window_start = now // window_seconds * window_seconds
+        if state[1] != window_seconds:
+            # The bucket's window length changed; start over rather than mix lengths.
+            state[:] = [window_start, window_seconds, 0, 0]
+        elif window_start > state[0]:
+            previous = state[3] if window_start - state[0] == window_seconds else 0
+            state[:] = [window_start, window_seconds, previous, 0]
+
+    @staticmethod
+    def _decide(state, *, limit, now):
+        window_start, window_seconds, previous, current = state
+        elapsed = max(0.0, min(1.0, (now - window_start) / window_seconds))
+        estimate = previous * (1 - elapsed) + current
+        count = int(estimate + 1e-9)
+        if count < limit:
+            return _decision(count, limit, retry_after=0)
+        if current >= limit:
+            # Wait for this window to end and then for the carried-over share to drop.
+            retry_after = window_start + window_seconds - now + window_seconds * (
+                1 - limit / current
+            )
+        else:
+            retry_after = window_start + window_seconds * (1 - (limit - current) / previous) - now
+        return _decision(count, limit, retry_after=retry_after)
+
+    def peek(self, bucket, key, *, limit, window_seconds, now=None):
+        timestamp = now if now is not None else time.time()
+        composite_key = f"{bucket}:{key}"
+        shard, lock = self._shard(composite_key)
+        with lock:
+            state = shard.get(composite_key)
+            if state is None:
+                return _decision(0, limit, retry_after=0)
+            self._roll(state, now=timestamp, window_seconds=window_seconds)
+            return self._decide(state, limit=limit, now=timestamp)
+
+    def record(self, bucket, key, *, limit, window_seconds, now=None):
+        self.start_sweeper()
+        timestamp = now if now is not None else time.time()
+        composite_key = f"{bucket}:{key}"
+        shard, lock = self._shard(composite_key)
+        evicted = 0
+        with lock:
+            state = shard.get(composite_key)
+            if state is None:
+                state = shard[composite_key] = [0, window_seconds, 0, 0]
+                while len(shard) > self._shard_capacity:
+                    shard.popitem(last=False)
+                    evicted += 1
+            else:
+                shard.move_to_end(composite_key)
+            self._roll(state, now=timestamp, window_seconds=window_seconds)
+            state[3] += 1
+            decision = self._decide(state, limit=limit, now=timestamp)
+        if evicted:
+            rate_limit_evictions.inc(evicted, reason="capacity")
+        return decision
+
+    def clear(self, bucket, key):
+        composite_key = f"{bucket}:{key}"
+        shard, lock = self._shard(composite_key)
+        with lock:
+            shard.pop(composite_key, None)
+
+    def reset_all(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def sweep(self, now=None):
+        """Drop keys whose previous and current windows have both ended; return the count."""
+        timestamp = now if now is not None else time.time()
+        evicted = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                idle = [
+                    composite_key
+                    for composite_key, (window_start, window_seconds, _, _) in shard.items()
+                    if window_start + 2 * window_seconds <= timestamp
+                ]
+                for composite_key in idle:
+                    del shard[composite_key]
+            evicted += len(idle)
+        if evicted:
+            rate_limit_evictions.inc(evicted, reason="idle")
+        stats = self.stats()
+        rate_limit_keys.set(stats["keys"])
+        rate_limit_memory.set(stats["approx_bytes"])
+        return evicted
+
+    def stats(self):
+        """Return `{"keys": ..., "approx_bytes": ...}`; walks every key, so call it sparingly."""
+        keys = 0
+        approx_bytes = sys.getsizeof(self._shards)
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                keys += len(shard)
+                approx_bytes += sys.getsizeof(shard)
+                for composite_key, state in shard.items():
+                    approx_bytes += sys.getsizeof(composite_key) + sys.getsizeof(state)
+                    approx_bytes += sum(sys.getsizeof(value) for value in state)
+        return {"keys": keys, "approx_bytes": approx_bytes}
+
+    def start_sweeper(self):
+        """Sweep every `sweep_seconds` from a daemon thread; safe to call on every record."""
+        if self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+        Thread(target=self._sweep_loop, name="rate-limit-sweeper", daemon=True).start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_seconds)
+            self.sweep()
+
+
+def _stored_key(key):
+    key = str(key)
+    if len(key) <= STORED_KEY_CHARS:
+        return key
+    return "sha256:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class CounterTableRateLimiter:
+    """Sub-window counters in `rate_limit_counters`, updated with atomic upserts.
+
+    `peek` is one SELECT. `record` is one statement on PostgreSQL, an upsert CTE
+    returning the bumped row next to the sum of the other sub-windows. SQLite
+    cannot run an upsert inside a CTE, so there it is the upsert and the same
+    SELECT in one transaction. Either way a purge of expired rows runs every
+    few minutes per process.
+    """
+
+    def __init__(self, engine, *, subwindows=DEFAULT_SUBWINDOWS):
+        dialect = engine.dialect.name
+        if dialect not in {"sqlite", "postgresql"}:
+            raise ValueError(f"The shared rate limiter does not support {dialect} databases.")
+        self.engine = engine
+        self.subwindows = max(1, int(subwindows))
+        self._table = RateLimitCounter.__table__
+        self.dialect = dialect
+        self._insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        self._last_purge_at = None
+
+    def _slice_seconds(self, window_seconds):
+        return max(1, int(window_seconds) // self.subwindows)
+
+    def _count_query(self, bucket, key, *, now, window_seconds):
+        table = self._table
+        totals = select(
+            func.coalesce(func.sum(table.c.count), 0).label("total"),
+            func.min(table.c.window_start).label("oldest_start"),
+        )
+        return totals.where(
+            and_(
+                table.c.bucket == bucket,
+                table.c.key == key,
+                table.c.window_start > now - window_seconds - self._slice_seconds(window_seconds),
+            )
+        )
+
+    def _decide(self, row, *, limit, now, window_seconds):
+        count, oldest_start = int(row[0] or 0), row[1]
+        if not count:
+            return _decision(0, limit, retry_after=0)
+        oldest_end = oldest_start + self._slice_seconds(window_seconds)
+        return _decision(count, limit, retry_after=oldest_end + window_seconds - now)
+
+    def peek(self, bucket, key, *, limit, window_seconds, now=None):
+        timestamp = now if now is not None else time.time()
+        query = self._count_query(
+            bucket, _stored_key(key), now=timestamp, window_seconds=window_seconds
+        )
+        with self.engine.connect() as connection:
+            row = connection.execute(query).one()
+        return self._decide(row, limit=limit, now=timestamp, window_seconds=window_seconds)
+
+    def _record_statements(self, bucket, key, *, now, window_seconds):
+        """Return the statements `record` runs; the last returns `(count, oldest start)`."""
+        table = self._table
+        slice_seconds = self._slice_seconds(window_seconds)
+        window_start = int(now // slice_seconds) * slice_seconds
+        upsert = self._insert(table).values(
+            bucket=bucket,
+            key=key,
+            window_start=window_start,
+            count=1,
+            expires_at=window_start + slice_seconds + int(window_seconds),
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=["bucket", "key", "window_start"],
+            set_={"count": table.c.count + 1},
+        )
+        totals = self._count_query(bucket, key, now=now, window_seconds=window_seconds)
+        if self.dialect == "sqlite":
+            return (upsert, totals)
+        # The CTE's snapshot does not see its own upsert, so the bumped row comes from
+        # RETURNING and the SELECT sums only the other sub-windows.
+        recorded = upsert.returning(table.c.count, table.c.window_start).cte("recorded")
+        others = totals.where(table.c.window_start != window_start).subquery("others")
+        return (
+            select(
+                others.c.total + recorded.c.count,
+                func.least(others.c.oldest_start, recorded.c.window_start),
+            ).select_from(recorded, others),
+        )
+
+    def record(self, bucket, key, *, limit, window_seconds, now=None):
+        timestamp = now if now is not None else time.time()
+        statements = self._record_statements(
+            bucket, _stored_key(key), now=timestamp, window_seconds=window_seconds
+        )
+        with self.engine.begin() as connection:
+            for statement in statements:
+                result = connection.execute(statement)
+            row = result.one()
+            self._maybe_purge(connection, now=timestamp)
+        return self._decide(row, limit=limit, now=timestamp, window_seconds=window_seconds)
+
+    def _maybe_purge(self, connection, *, now):
+        monotonic_now = time.monotonic()
+        if self._last_purge_at is not None and (
+            monotonic_now - self._last_purge_at < PURGE_INTERVAL_SECONDS
+        ):
+            return
+        connection.execute(delete(self._table).where(self._table.c.expires_at <= now))
+        self._last_purge_at = monotonic_now
+
+    def clear(self, bucket, key):
+        with self.engine.begin() as connection:
+            connection.execute(
+                delete(self._table).where(
+                    and_(self._table.c.bucket == bucket, self._table.c.key == _stored_key(key))
+                )
+            )
+
+    def reset_all(self):
+        with self.engine.begin() as connection:
+            connection.execute(delete(self._table))
+
+
+def create_counter_file_engine(path):
+    """Return an engine for a standalone SQLite counter file, creating the table if needed."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    engine = create_engine(f"sqlite:///{os.path.abspath(path)}", connect_args={"timeout": 5})
+    with engine.begin() as connection:
+        connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    RateLimitCounter.__table__.create(engine, checkfirst=True)
+    return engine
+
+
+class RateLimiter:
+    """What the routes call; forwards to the configured backend and counts decisions.
+
+    A shared backend that cannot be reached allows the attempt and logs a warning,
+    so a database hiccup never locks everyone out.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or SlidingWindowRateLimiter()
+
+    def _fail_open(self, bucket, operation, limit):
+        if has_app_context():
+            current_app.logger.warning(
+                "Rate limiter %s failed for bucket %s", operation, bucket, exc_info=True
+            )
+        return _decision(0, limit, retry_after=0)
+
+    def peek(self, bucket, key, *, limit, window_seconds, now=None):
+        try:
+            decision = self.backend.peek(
+                bucket, key, limit=limit, window_seconds=window_seconds, now=now
+            )
+        except SQLAlchemyError:
+            decision = self._fail_open(bucket, "peek", limit)
+        _count_decision(bucket, "peek", decision)
+        return decision
+
+    def record(self, bucket, key, *, limit, window_seconds, now=None):
+        try:
+            decision = self.backend.record(
+                bucket, key, limit=limit, window_seconds=window_seconds, now=now
+            )
+        except SQLAlchemyError:
+            decision = self._fail_open(bucket, "record", limit)
+        _count_decision(bucket, "record", decision)
+        return decision
+
+    def clear(self, bucket, key):
+        try:
+            self.backend.clear(bucket, key)
+        except SQLAlchemyError:
+            self._fail_open(bucket, "clear", 1)
+
+    def reset_all(self):
+        self.backend.reset_all()
+
+
+rate_limiter = RateLimiter()
+
+
+def resolve_rate_limit_backend(app):
+    backend = (app.config.get("RATE_LIMIT_BACKEND") or "memory").strip().lower()
+    if backend not in RATE_LIMIT_BACKENDS:
+        raise RuntimeError(
+            f"RATE_LIMIT_BACKEND must be one of {', '.join(sorted(RATE_LIMIT_BACKENDS))}."
+        )
+    return backend
+
+
+def init_rate_limits(app):
+    """Point `rate_limiter` at the backend named by RATE_LIMIT_BACKEND."""
+    backend = resolve_rate_limit_backend(app)
+    subwindows = app.config.get("RATE_LIMIT_SUBWINDOWS", DEFAULT_SUBWINDOWS)
+    if backend == "database":
+        with app.app_context():
+            engine = db.engine
+        if engine.dialect.name == "sqlite":
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=database needs PostgreSQL. On SQLite use "
+                "RATE_LIMIT_BACKEND=file, which keeps the counters in their own file."
+            )
+        rate_limiter.backend = CounterTableRateLimiter(engine, subwindows=subwindows)
+    elif backend == "file":
+        engine = create_counter_file_engine(app.config["RATE_LIMIT_FILE"])
+        rate_limiter.backend = CounterTableRateLimiter(engine, subwindows=subwindows)
+    elif backend == "counter":
+        rate_limiter.backend = SlidingWindowCounterRateLimiter(
+            max_keys=app.config.get("RATE_LIMIT_MAX_KEYS", DEFAULT_MAX_KEYS),
+            sweep_seconds=app.config.get("RATE_LIMIT_SWEEP_SECONDS", DEFAULT_SWEEP_SECONDS),
+        )
+    elif not isinstance(rate_limiter.backend, SlidingWindowRateLimiter):
+        rate_limiter.backend = SlidingWindowRateLimiter()
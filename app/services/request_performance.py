@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, g, request
+from flask_login import current_user
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import RequestPerformanceSample
+from app.services.query_budget import SUMMARY_STATEMENT_CHARS, get_request_query_stats
+
+SAMPLE_REASON_SLOW = "slow"
+SAMPLE_REASON_SAMPLED = "sampled"
+TOP_STATEMENT_LIMIT = 5
+ARGS_SUMMARY_CHARS = 255
+PURGE_INTERVAL_SECONDS = 60 * 60
+REDACTED_ARG_VALUE = "***"
+
+_STARTED_ATTR = "perf_sample_started_at"
+_PENDING_ATTR = "perf_sample_pending"
+_UNSAMPLED_ENDPOINTS = {None, "static", "metrics"}
+_SENSITIVE_ARG_MARKERS = ("token", "password", "secret")
+_last_purge_at = None
+
+
+def utcnow_naive():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `(value, weight)` pairs sorted by value.
+
+    A pair of weight w counts as w requests, so sampled rows are scaled back up
+    next to slow rows that were all kept.
+    """
+    if not samples:
+        return None
+    target = pct * sum(weight for _, weight in samples) / 100
+    seen = 0.0
+    for value, weight in samples:
+        seen += weight
+        if seen >= target:
+            return value
+    return samples[-1][0]
+
+
+def summarize_durations(values, weights=None):
+    ordered = sorted(zip(values, weights or [1.0] * len(values)))
+    return {
+        "count": len(ordered),
+        "estimated_requests": sum(weight for _, weight in ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1][0] if ordered else None,
+    }
+
+
+def _is_sensitive_arg(name):
+    lowered = name.lower()
+    return any(marker in lowered for marker in _SENSITIVE_ARG_MARKERS)
+
+
+def build_args_fingerprint(view_args, query_args):
+    """Return `(fingerprint, summary)` for a request's URL and query arguments.
+
+    Argument order does not matter, and token-like values are redacted before
+    hashing so reset links never reach the journal.
+    """
+    pairs = sorted((str(key), str(value)) for key, value in (view_args or {}).items())
+    pairs += sorted((str(key), str(value)) for key, value in query_args)
+    pairs = [
+        (key, REDACTED_ARG_VALUE if _is_sensitive_arg(key) else value) for key, value in pairs
+    ]
+    summary = "&".join(f"{key}={value}" for key, value in pairs)
+    fingerprint = hashlib.sha1(summary.encode("utf-8")).hexdigest()[:16]
+    if len(summary) > ARGS_SUMMARY_CHARS:
+        summary = summary[: ARGS_SUMMARY_CHARS - 3] + "..."
+    return fingerprint, summary
+
+
+def choose_sample_reason(total_ms, *, slow_ms, rate_percent, rng=random.random):
+    if total_ms >= slow_ms:
+        return SAMPLE_REASON_SLOW
+    if rate_percent > 0 and rng() * 100 < rate_percent:
+        return SAMPLE_REASON_SAMPLED
+    return None
+
+
+def sample_weight(reason, *, rate_percent):
+    """Number of requests one journaled row stands for."""
+    if reason == SAMPLE_REASON_SAMPLED and rate_percent > 0:
+        return 100 / rate_percent
+    return 1.0
+
+
+def _top_statements(stats):
+    rows = []
+    for statement, count in stats.top_statements(limit=TOP_STATEMENT_LIMIT):
+        if len(statement) > SUMMARY_STATEMENT_CHARS:
+            statement = statement[: SUMMARY_STATEMENT_CHARS - 3] + "..."
+        rows.append([statement, count])
+    return rows
+
+
+def _current_role():
+    if getattr(current_user, "is_authenticated", False):
+        return current_user.role
+    return "anonymous"
+
+
+def _response_bytes(response):
+    length = response.calculate_content_length()
+    return length if length is not None else response.content_length
+
+
+def streams_body(response):
+    """True when the body is generated after the after_request hooks have run."""
+    return response.is_streamed and not response.direct_passthrough
+
+
+def finish_after_body(response, finish):
+    """Wrap a streamed body so `finish(body_bytes)` runs once the server closes it.
+
+    Hooks that time, profile or trace a request call this from after_request, so
+    a streamed export's rows are measured too. `finish` runs in a fresh app
+    context because the request context is gone by then.
+    """
+    app = current_app._get_current_object()
+    body = response.response
+    sent = {"bytes": 0}
+
+    def counted_body():
+        try:
+            for chunk in body:
+                sent["bytes"] += len(chunk)
+                yield chunk
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
+
+    def run_finish():
+        with app.app_context():
+            finish(sent["bytes"])
+
+    response.response = counted_body()
+    response.call_on_close(run_finish)
+
+
+def _start_request_sample():
+    setattr(g, _STARTED_ATTR, time.perf_counter())
+
+
+def _request_sample_values(response):
+    stats = get_request_query_stats()
+    fingerprint, summary = build_args_fingerprint(request.view_args, request.args.items(multi=True))
+    return {
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "args_fingerprint": fingerprint,
+        "args_summary": summary,
+        "user_role": _current_role(),
+        "status_code": response.status_code,
+        "db_ms": round(stats.db_time * 1000, 2) if stats is not None else 0.0,
+        "statement_count": stats.statements if stats is not None else 0,
+        "top_statements_json": json.dumps(_top_statements(stats) if stats is not None else []),
+    }
+
+
+def _timed_sample_values(started_at, *, response_bytes):
+    """Return the timing fields of a sample, or None when the request is not journaled."""
+    total_ms = (time.perf_counter() - started_at) * 1000
+    rate_percent = current_app.config["PERF_SAMPLE_RATE_PERCENT"]
+    reason = choose_sample_reason(
+        total_ms, slow_ms=current_app.config["PERF_SAMPLE_SLOW_MS"], rate_percent=rate_percent
+    )
+    if reason is None:
+        return None
+    return {
+        "recorded_at": utcnow_naive(),
+        "total_ms": round(total_ms, 2),
+        "response_bytes": response_bytes,
+        "reason": reason,
+        "weight": sample_weight(reason, rate_percent=rate_percent),
+    }
+
+
+def _capture_request_sample(response):
+    started_at = g.get(_STARTED_ATTR)
+    if started_at is None or request.endpoint in _UNSAMPLED_ENDPOINTS:
+        return response
+    if streams_body(response):
+        # Time the whole download and count its bytes; the rows are built as it streams.
+        request_values = _request_sample_values(response)
+
+        def finish(body_bytes):
+            timed_values = _timed_sample_values(started_at, response_bytes=body_bytes)
+            if timed_values is not None:
+                _record_request_sample_safely({**request_values, **timed_values})
+
+        finish_after_body(response, finish)
+        return response
+
+    timed_values = _timed_sample_values(started_at, response_bytes=_response_bytes(response))
+    if timed_values is not None:
+        setattr(g, _PENDING_ATTR, {**_request_sample_values(response), **timed_values})
+    return response
+
+
+def _write_request_sample(exc):
+    values = g.pop(_PENDING_ATTR, None)
+    if values is not None:
+        _record_request_sample_safely(values)
+
+
+def _record_request_sample_safely(values):
+    try:
+        record_request_sample(
+            values, retention_days=current_app.config["PERF_SAMPLE_RETENTION_DAYS"]
+        )
+    except SQLAlchemyError:
+        # The journal is best effort; a locked database must not turn into a failed request.
+        current_app.logger.warning(
+            "Could not record performance sample for %s", values["endpoint"], exc_info=True
+        )
+
+
+def purge_request_performance_samples(connection, *, retention_days, now=None):
+    cutoff = (now or utcnow_naive()) - timedelta(days=retention_days)
+    result = connection.execute(
+        delete(RequestPerformanceSample).where(RequestPerformanceSample.recorded_at < cutoff)
+    )
+    return result.rowcount or 0
+
+
+def record_request_sample(values, *, retention_days):
+    """Insert one sample on its own connection and purge expired rows at most hourly.
+
+    Runs after the response is built, so the request's own session and query
+    budget are untouched.
+    """
+    global _last_purge_at
+    now = time.monotonic()
+    with db.engine.begin() as connection:
+        connection.execute(insert(RequestPerformanceSample).values(**values))
+        if _last_purge_at is None or now - _last_purge_at >= PURGE_INTERVAL_SECONDS:
+            purge_request_performance_samples(connection, retention_days=retention_days)
+            _last_purge_at = now
+
+
+def init_request_performance(app):
+    """Journal slow and sampled requests into `request_performance_samples`."""
+    if not app.config.get("PERF_SAMPLES_ENABLED", True):
+        return
+    app.before_request(_start_request_sample)
+    app.after_request(_capture_request_sample)
+    app.teardown_request(_write_request_sample)
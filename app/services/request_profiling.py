@@ -0,0 +1,306 @@
+"""On-demand cProfile capture of single requests.
+
+An admin profiles a request by sending `X-Profile-Request: 1` or by adding the
+signed `_profile=<token>` flag from Admin > Profiles to any URL. A sampling rule
+can also profile a percentage of all requests to one endpoint. Each profile is
+stored as `<request_id>.prof` (pstats/marshal format) next to a JSON summary in
+REQUEST_PROFILE_DIR, which every worker on the host shares. A streamed body,
+such as a CSV export, is profiled until it has been sent.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import secrets
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import current_app, g, request
+from flask_login import current_user
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app.services.request_performance import (
+    build_args_fingerprint,
+    finish_after_body,
+    streams_body,
+)
+
+PROFILE_HEADER = "X-Profile-Request"
+PROFILE_QUERY_ARG = "_profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_TOKEN_MAX_AGE_SECONDS = 15 * 60
+PROFILE_TRIGGER_ADMIN = "admin"
+PROFILE_TRIGGER_SAMPLED = "sampled"
+PROFILE_SORT_OPTIONS = {
+    "cumulative": "Cumulative time",
+    "tottime": "Own time",
+    "ncalls": "Calls",
+}
+DEFAULT_PROFILE_SORT = "cumulative"
+SAMPLING_RULE_FILENAME = "sampling.json"
+
+_PROFILER_ATTR = "request_profiler"
+_REQUEST_ID = re.compile(r"^[0-9a-f]{16}$")
+_TOKEN_SALT = "request-profile"
+_UNPROFILED_ENDPOINTS = {None, "static", "metrics"}
+_shared_json_cache = {}
+
+
+class RequestProfileError(ValueError):
+    pass
+
+
+def profile_dir():
+    return Path(current_app.config["REQUEST_PROFILE_DIR"])
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=_TOKEN_SALT)
+
+
+def issue_profile_token(user_id):
+    """Return the signed `_profile` value for one admin; it expires after 15 minutes."""
+    return _serializer().dumps({"user_id": int(user_id)})
+
+
+def _profile_token_matches_user(token, user_id):
+    try:
+        payload = _serializer().loads(token, max_age=PROFILE_TOKEN_MAX_AGE_SECONDS)
+    except BadSignature:
+        return False
+    return isinstance(payload, dict) and payload.get("user_id") == int(user_id)
+
+
+def _admin_requested_profile():
+    if not (getattr(current_user, "is_authenticated", False) and current_user.has_role("admin")):
+        return False
+    if request.headers.get(PROFILE_HEADER, "").strip() == "1":
+        return True
+    token = request.args.get(PROFILE_QUERY_ARG)
+    return bool(token) and _profile_token_matches_user(token, current_user.id)
+
+
+def write_json_atomic(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+            json.dump(payload, temp_file)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def read_shared_json(path):
+    """Return the JSON in a small settings file, or None; re-read only when its mtime changes.
+
+    Every request checks these files, so the common case is a single stat call.
+    """
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _shared_json_cache.get(path)
+    if cached is None or cached[0] != mtime:
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            payload = None
+        cached = _shared_json_cache[path] = (mtime, payload)
+    return cached[1]
+
+
+def load_sampling_rule(directory=None):
+    """Return `{"endpoint": ..., "percent": ...}` or None."""
+    return read_shared_json((directory or profile_dir()) / SAMPLING_RULE_FILENAME)
+
+
+def save_sampling_rule(endpoint, percent, directory=None):
+    endpoint = (endpoint or "").strip()
+    if endpoint not in current_app.view_functions or endpoint in _UNPROFILED_ENDPOINTS:
+        raise RequestProfileError("Choose an existing endpoint to sample.")
+    try:
+        percent = float(percent)
+    except (TypeError, ValueError):
+        raise RequestProfileError("Sampling percentage must be a number.") from None
+    if not 0 < percent <= 100:
+        raise RequestProfileError("Sampling percentage must be between 0 and 100.")
+    rule = {"endpoint": endpoint, "percent": percent}
+    write_json_atomic((directory or profile_dir()) / SAMPLING_RULE_FILENAME, rule)
+    return rule
+
+
+def clear_sampling_rule(directory=None):
+    path = (directory or profile_dir()) / SAMPLING_RULE_FILENAME
+    if path.exists():
+        path.unlink()
+
+
+def _sampling_selects_request():
+    rule = load_sampling_rule()
+    return bool(
+        rule
+        and rule.get("endpoint") == request.endpoint
+        and random.random() * 100 < float(rule.get("percent") or 0)
+    )
+
+
+def _start_request_profile():
+    if request.endpoint in _UNPROFILED_ENDPOINTS:
+        return
+    if _admin_requested_profile():
+        trigger = PROFILE_TRIGGER_ADMIN
+    elif _sampling_selects_request():
+        trigger = PROFILE_TRIGGER_SAMPLED
+    else:
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler already owns this thread (for example a debugger).
+        return
+    setattr(g, _PROFILER_ATTR, (profiler, trigger, time.perf_counter()))
+
+
+def _finish_request_profile(response):
+    state = g.pop(_PROFILER_ATTR, None)
+    if state is None:
+        return response
+    profiler, trigger, started_at = state
+    _, args_summary = build_args_fingerprint(
+        request.view_args,
+        [(key, value) for key, value in request.args.items(multi=True) if key != PROFILE_QUERY_ARG],
+    )
+    summary = {
+        "request_id": secrets.token_hex(8),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.path,
+        "args_summary": args_summary,
+        "user_role": getattr(current_user, "role", None) or "anonymous",
+        "status_code": response.status_code,
+        "trigger": trigger,
+    }
+    if streams_body(response):
+        # Keep profiling while the body streams; headers go out first, so the id does too.
+        finish_after_body(
+            response, lambda _body_bytes: _store_request_profile(profiler, summary, started_at)
+        )
+    elif not _store_request_profile(profiler, summary, started_at):
+        return response
+    response.headers[PROFILE_ID_HEADER] = summary["request_id"]
+    return response
+
+
+def _store_request_profile(profiler, summary, started_at):
+    profiler.disable()
+    summary["total_ms"] = round((time.perf_counter() - started_at) * 1000, 2)
+    try:
+        save_request_profile(profiler, summary)
+    except OSError:
+        current_app.logger.warning("Could not store request profile", exc_info=True)
+        return False
+    return True
+
+
+def save_request_profile(profiler, summary, directory=None):
+    directory = directory or profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    request_id = summary["request_id"]
+    profiler.dump_stats(directory / f"{request_id}.prof")
+    write_json_atomic(directory / f"{request_id}.json", summary)
+    prune_request_profiles(directory, keep=current_app.config["REQUEST_PROFILE_KEEP"])
+
+
+def list_request_profiles(directory=None):
+    """Return stored profile summaries, newest first."""
+    directory = directory or profile_dir()
+    summaries = []
+    for path in directory.glob("*.json"):
+        if not _REQUEST_ID.match(path.stem):
+            continue
+        try:
+            summaries.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return sorted(summaries, key=lambda row: (row["recorded_at"], row["request_id"]), reverse=True)
+
+
+def prune_request_profiles(directory, *, keep):
+    for summary in list_request_profiles(directory)[keep:]:
+        for suffix in (".prof", ".json"):
+            (directory / f"{summary['request_id']}{suffix}").unlink(missing_ok=True)
+
+
+def request_profile_path(request_id, directory=None):
+    if not _REQUEST_ID.match(request_id or ""):
+        raise RequestProfileError("Unknown profile.")
+    path = (directory or profile_dir()) / f"{request_id}.prof"
+    if not path.exists():
+        raise RequestProfileError("Unknown profile.")
+    return path
+
+
+def short_source_path(filename):
+    root = str(Path(current_app.root_path).parent) + os.sep
+    if filename.startswith(root):
+        return filename[len(root):]
+    for marker in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        index = filename.find(marker)
+        if index >= 0:
+            return filename[index:]
+    return filename
+
+
+def build_profile_rows(
+    request_id, *, sort=DEFAULT_PROFILE_SORT, search=None, limit=60, directory=None
+):
+    """Return `(total_calls, total_seconds, rows)` for one stored profile, sorted by `sort`.
+
+    `search` keeps functions whose name or location contains it (case-insensitive).
+    """
+    stats = pstats.Stats(str(request_profile_path(request_id, directory)))
+    sort = sort if sort in PROFILE_SORT_OPTIONS else DEFAULT_PROFILE_SORT
+    needle = (search or "").strip().lower()
+    rows = []
+    for (filename, line, function), (primitive, calls, own, cumulative, _) in stats.stats.items():
+        location = function if filename == "~" else f"{short_source_path(filename)}:{line}"
+        if needle and needle not in function.lower() and needle not in location.lower():
+            continue
+        rows.append(
+            {
+                "function": function,
+                "location": location,
+                "calls": calls,
+                "primitive_calls": primitive,
+                "tottime_ms": own * 1000,
+                "cumulative_ms": cumulative * 1000,
+                "percall_ms": cumulative * 1000 / calls if calls else 0.0,
+            }
+        )
+    sort_key = {
+        "cumulative": lambda row: row["cumulative_ms"],
+        "tottime": lambda row: row["tottime_ms"],
+        "ncalls": lambda row: row["calls"],
+    }[sort]
+    rows.sort(key=sort_key, reverse=True)
+    return stats.total_calls, stats.total_tt, rows[:limit]
+
+
+def init_request_profiling(app):
+    """Register the cProfile hooks; see the module docstring for how requests opt in."""
+    if not app.config.get("REQUEST_PROFILING_ENABLED", True):
+        return
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
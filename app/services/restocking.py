@@ -1,16 +1,20 @@
-import re
-
-from sqlalchemy import and_, func
+from sqlalchemy import and_, case, func, literal, or_
 from sqlalchemy.orm import aliased
 
 from app import db
 from app.models import Check, CheckLine, Item, Venue, VenueItem, VenueItemCount
-from app.services.inventory_rules import resolve_effective_par_level
 from app.services.inventory_status import (
     STATUS_META,
-    normalize_status,
     restock_status_meta_for_item,
 )
+from app.services.search_index import (
+    CONTAINS_MATCH,
+    PREFIX_MATCH,
+    SearchField,
+    get_search_index,
+    inventory_search_generation,
+)
+from app.services.server_timing import timing_span
 from app.services.spreadsheet_compat import build_reorder_decision, format_setup_group_display
 
 RESTOCK_STATUS_META = {key: value.copy() for key, value in STATUS_META.items()}
@@ -20,6 +24,17 @@ RESTOCK_COUNT_BUCKET_RANK = {
     "no_par": 2,
     "singleton": 3,
 }
+RESTOCK_SEVERITY_RANK = {"out": 0, "low": 1, "ok": 2, "good": 3}
+RESTOCK_STATUS_PRIORITY_RANK = {"out": 0, "low": 1, "ok": 2, "not_checked": 3, "good": 4}
+# Ranks 0-2 item, 3-5 family, 6-8 venue, 9 tracking, 10-11 status, 12-13 count text.
+RESTOCK_SEARCH_FIELDS = (
+    SearchField("item_name"),
+    SearchField("family_name"),
+    SearchField("venue_name"),
+    SearchField("tracking_mode", CONTAINS_MATCH),
+    SearchField("status", PREFIX_MATCH),
+    SearchField("count_state", PREFIX_MATCH),
+)
 RESTOCK_COUNT_TONE_BY_KEY = {
     "good": "success",
     "ok": "secondary",
@@ -105,14 +120,13 @@ def build_restock_count_state(*, tracking_mode, raw_count, par_value, status_key
         }
 
     severity_key = reorder_decision.severity_key or "good"
-    severity_rank = {"out": 0, "low": 1, "ok": 2, "good": 3}
     return {
         "key": severity_key,
         "text": f"{raw_count} / {par_value}",
         "icon_class": RESTOCK_STATUS_META[severity_key]["icon_class"],
         "tone": RESTOCK_COUNT_TONE_BY_KEY[severity_key],
         "bucket": "comparable",
-        "priority_rank": severity_rank[severity_key],
+        "priority_rank": RESTOCK_SEVERITY_RANK[severity_key],
         "suggested_order_qty": reorder_decision.suggested_order_qty,
         "over_par_qty": reorder_decision.over_par_qty,
         "raw_count": raw_count,
@@ -121,82 +135,16 @@ def build_restock_count_state(*, tracking_mode, raw_count, par_value, status_key
     }
 
 
-def _word_boundary_match(text, query):
-    return bool(re.search(rf"(^|\W){re.escape(query)}", text))
-
-
-def restock_search_rank(row, search_query):
-    if not search_query:
-        return 0
-
-    item_text = (row.get("item_name") or "").lower()
-    family_text = (row.get("parent_name") or "").lower()
-    venue_text = (row.get("venue_name") or "").lower()
-    status_text = (row.get("status", {}).get("text") or "").lower()
-    count_text = (row.get("count_state", {}).get("text") or "").lower()
-    tracking_text = "asset" if row.get("tracking_mode") == "singleton_asset" else "quantity"
-
-    if item_text.startswith(search_query):
-        return 0
-    if _word_boundary_match(item_text, search_query):
-        return 1
-    if search_query in item_text:
-        return 2
-    if family_text.startswith(search_query):
-        return 3
-    if _word_boundary_match(family_text, search_query):
-        return 4
-    if search_query in family_text:
-        return 5
-    if venue_text.startswith(search_query):
-        return 6
-    if _word_boundary_match(venue_text, search_query):
-        return 7
-    if search_query in venue_text:
-        return 8
-    if tracking_text.startswith(search_query) or search_query in tracking_text:
-        return 9
-    if status_text.startswith(search_query):
-        return 10
-    if search_query in status_text:
-        return 11
-    if count_text.startswith(search_query):
-        return 12
-    if search_query in count_text:
-        return 13
-    return None
-
-
-def build_restock_rows(
-    statuses=None,
-    item_ids=None,
-    venue_ids=None,
-    search="",
-    sort="status_priority",
-    mode="status",
-    limit=None,
-    offset=0,
-):
-    if statuses is None:
-        selected_statuses = list(RESTOCK_STATUS_META.keys())
-    else:
-        selected_statuses = [status for status in statuses if status in RESTOCK_STATUS_META]
-    if not selected_statuses:
-        return {"rows": [], "total_count": 0, "has_more": False}
-    selected_statuses_set = set(selected_statuses)
-    search_query = (search or "").strip().lower()
-    sort_mode = normalize_restock_sort(sort)
-    restock_mode = normalize_restock_mode(mode, "status")
-
-    latest_check_sq = (
-        db.session.query(
-            Check.venue_id.label("venue_id"),
-            func.max(Check.id).label("latest_check_id"),
-        )
-        .group_by(Check.venue_id)
-        .subquery()
+def _restock_base_subquery(*, item_ids=None, venue_ids=None):
+    latest_check_query = db.session.query(
+        Check.venue_id.label("venue_id"),
+        func.max(Check.id).label("latest_check_id"),
     )
+    if venue_ids is not None:
+        latest_check_query = latest_check_query.filter(Check.venue_id.in_(venue_ids))
+    latest_check_sq = latest_check_query.group_by(Check.venue_id).subquery()
     parent_item = aliased(Item)
+    line_status = func.lower(func.trim(CheckLine.status))
 
     query = (
         db.session.query(
@@ -204,16 +152,18 @@ def build_restock_rows(
             Venue.name.label("venue_name"),
             Item.id.label("item_id"),
             Item.name.label("item_name"),
-            Item.tracking_mode.label("tracking_mode"),
+            func.coalesce(func.nullif(Item.tracking_mode, ""), "quantity").label("tracking_mode"),
             Item.item_category.label("item_category"),
             Item.setup_group_code.label("setup_group_code"),
             Item.setup_group_label.label("setup_group_label"),
-            Item.default_par_level.label("default_par_level"),
             parent_item.name.label("parent_name"),
-            VenueItem.expected_qty.label("venue_par_override"),
+            func.coalesce(VenueItem.expected_qty, Item.default_par_level).label("par_value"),
             VenueItemCount.raw_count.label("raw_count"),
             Check.created_at.label("latest_check_at"),
-            CheckLine.status.label("line_status"),
+            case(
+                (line_status.in_(list(RESTOCK_STATUS_META)), line_status),
+                else_=literal("not_checked"),
+            ).label("status_key"),
         )
         .select_from(VenueItem)
         .join(Venue, Venue.id == VenueItem.venue_id)
@@ -242,125 +192,242 @@ def build_restock_rows(
             Item.is_group_parent.is_(False),
         )
     )
-
     if item_ids is not None:
-        if not item_ids:
-            return {"rows": [], "total_count": 0, "has_more": False}
         query = query.filter(VenueItem.item_id.in_(item_ids))
     if venue_ids is not None:
-        if not venue_ids:
-            return {"rows": [], "total_count": 0, "has_more": False}
         query = query.filter(VenueItem.venue_id.in_(venue_ids))
+    return query.subquery("restock_base")
+
+
+def _restock_count_bucket_expr(base):
+    """SQL mirror of `build_reorder_decision` states."""
+    return case(
+        (base.c.tracking_mode == "singleton_asset", literal("singleton")),
+        (base.c.raw_count.is_(None), literal("no_count")),
+        (or_(base.c.par_value.is_(None), base.c.par_value <= 0), literal("no_par")),
+        else_=literal("comparable"),
+    )
+
+
+def _restock_severity_key_expr(base):
+    """SQL mirror of `suggest_status_from_count` using integer ratios (count/par <= 1/4, 3/4)."""
+    return case(
+        (base.c.raw_count <= 0, literal("out")),
+        (base.c.raw_count * 4 <= base.c.par_value, literal("low")),
+        (base.c.raw_count * 4 <= base.c.par_value * 3, literal("ok")),
+        else_=literal("good"),
+    )
+
+
+def _restock_order_by(base, *, sort_mode, restock_mode):
+    venue_name = func.lower(base.c.venue_name)
+    item_name = func.lower(base.c.item_name)
+    family_name = func.lower(func.coalesce(func.nullif(base.c.parent_name, ""), base.c.item_name))
+    tiebreakers = (base.c.item_name, base.c.venue_name, base.c.item_id, base.c.venue_id)
 
-    rows = []
-    for row in query.order_by(Item.name.asc(), Venue.name.asc()).all():
-        status_key = normalize_status(row.line_status)
-        if status_key not in selected_statuses_set:
-            continue
-
-        tracking_mode = row.tracking_mode or "quantity"
-        meta = restock_status_meta_for_item(status_key, tracking_mode)
-        effective_par = resolve_effective_par_level(
-            item_default_par_level=row.default_par_level,
-            venue_par_override=row.venue_par_override,
+    if sort_mode == "venue":
+        return (venue_name, family_name, item_name, *tiebreakers)
+    if sort_mode == "status_priority":
+        if restock_mode == "counts":
+            count_bucket = _restock_count_bucket_expr(base)
+            is_comparable = count_bucket == "comparable"
+            return (
+                case(RESTOCK_COUNT_BUCKET_RANK, value=count_bucket, else_=99),
+                case(
+                    (
+                        is_comparable,
+                        case(
+                            RESTOCK_SEVERITY_RANK,
+                            value=_restock_severity_key_expr(base),
+                            else_=99,
+                        ),
+                    ),
+                    else_=0,
+                ),
+                # Largest suggested order qty (par - count, floored at 0) first.
+                case(
+                    (
+                        and_(is_comparable, base.c.par_value > base.c.raw_count),
+                        base.c.raw_count - base.c.par_value,
+                    ),
+                    else_=0,
+                ),
+                venue_name,
+                family_name,
+                item_name,
+                *tiebreakers,
+            )
+        return (
+            case(RESTOCK_STATUS_PRIORITY_RANK, value=base.c.status_key, else_=99),
+            venue_name,
+            family_name,
+            item_name,
+            *tiebreakers,
+        )
+    if sort_mode == "last_checked":
+        return (
+            case((base.c.latest_check_at.is_(None), 1), else_=0),
+            base.c.latest_check_at.desc(),
+            family_name,
+            item_name,
+            venue_name,
+            *tiebreakers,
         )
-        count_state = build_restock_count_state(
+    return (family_name, item_name, venue_name, *tiebreakers)
+
+
+def _build_restock_row(row, restock_mode):
+    status_key = row.status_key
+    tracking_mode = row.tracking_mode
+    meta = restock_status_meta_for_item(status_key, tracking_mode)
+    return {
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "item_id": row.item_id,
+        "item_name": row.item_name,
+        "parent_name": row.parent_name,
+        "tracking_mode": tracking_mode,
+        "item_category": row.item_category,
+        "setup_group_code": row.setup_group_code,
+        "setup_group_label": row.setup_group_label,
+        "setup_group_display": format_setup_group_display(
+            row.setup_group_code,
+            row.setup_group_label,
+        ),
+        "latest_check_at": row.latest_check_at,
+        "raw_count": row.raw_count,
+        "par_value": row.par_value,
+        "status": {
+            "key": status_key,
+            "text": meta["text"],
+            "icon_class": meta["icon_class"],
+        },
+        "count_state": build_restock_count_state(
             tracking_mode=tracking_mode,
             raw_count=row.raw_count,
-            par_value=effective_par.value,
+            par_value=row.par_value,
             status_key=status_key,
-        )
-        rows.append(
-            {
-                "venue_id": row.venue_id,
-                "venue_name": row.venue_name,
-                "item_id": row.item_id,
-                "item_name": row.item_name,
-                "parent_name": row.parent_name,
-                "tracking_mode": tracking_mode,
-                "item_category": row.item_category,
-                "setup_group_code": row.setup_group_code,
-                "setup_group_label": row.setup_group_label,
-                "setup_group_display": format_setup_group_display(
-                    row.setup_group_code,
-                    row.setup_group_label,
-                ),
-                "latest_check_at": row.latest_check_at,
-                "raw_count": row.raw_count,
-                "par_value": effective_par.value,
-                "status": {
-                    "key": status_key,
-                    "text": meta["text"],
-                    "icon_class": meta["icon_class"],
-                },
-                "count_state": count_state,
-                "quick_check_mode": (
-                    "raw_counts"
-                    if restock_mode == "counts" and tracking_mode != "singleton_asset"
-                    else "status"
-                ),
-            }
-        )
+        ),
+        "quick_check_mode": (
+            "raw_counts"
+            if restock_mode == "counts" and tracking_mode != "singleton_asset"
+            else "status"
+        ),
+    }
 
-    status_rank = {"out": 0, "low": 1, "ok": 2, "not_checked": 3, "good": 4}
-
-    def base_sort_key(row):
-        family_name = (row.get("parent_name") or row["item_name"]).lower()
-        if sort_mode == "venue":
-            return (row["venue_name"].lower(), family_name, row["item_name"].lower())
-        if sort_mode == "status_priority":
-            if restock_mode == "counts":
-                count_state = row["count_state"]
-                bucket_rank = RESTOCK_COUNT_BUCKET_RANK.get(count_state["bucket"], 99)
-                if count_state["bucket"] == "comparable":
-                    return (
-                        bucket_rank,
-                        count_state["priority_rank"],
-                        -(count_state["suggested_order_qty"] or 0),
-                        row["venue_name"].lower(),
-                        family_name,
-                        row["item_name"].lower(),
-                    )
-                return (
-                    bucket_rank,
-                    row["venue_name"].lower(),
-                    family_name,
-                    row["item_name"].lower(),
-                )
-            return (
-                status_rank.get(row["status"]["key"], 99),
-                row["venue_name"].lower(),
-                family_name,
-                row["item_name"].lower(),
-            )
-        if sort_mode == "last_checked":
-            return (
-                1 if row["latest_check_at"] is None else 0,
-                -(row["latest_check_at"].timestamp()) if row["latest_check_at"] else 0,
-                family_name,
-                row["item_name"].lower(),
-                row["venue_name"].lower(),
-            )
-        return (family_name, row["item_name"].lower(), row["venue_name"].lower())
 
-    if search_query:
-        ranked_rows = []
-        for row in rows:
-            rank = restock_search_rank(row, search_query)
-            if rank is None:
-                continue
-            ranked_rows.append((rank, row))
-        ranked_rows.sort(key=lambda pair: (pair[0], base_sort_key(pair[1])))
-        rows = [pair[1] for pair in ranked_rows]
+def _restock_search_values(row):
+    """Searchable text for one candidate, aligned with `RESTOCK_SEARCH_FIELDS`."""
+    status_text = restock_status_meta_for_item(row.status_key, row.tracking_mode)["text"]
+    count_state = build_restock_count_state(
+        tracking_mode=row.tracking_mode,
+        raw_count=row.raw_count,
+        par_value=row.par_value,
+        status_key=row.status_key,
+    )
+    return (
+        row.item_name,
+        row.parent_name,
+        row.venue_name,
+        "asset" if row.tracking_mode == "singleton_asset" else "quantity",
+        status_text,
+        count_state["text"],
+    )
+
+
+@timing_span("restock_rows")
+def build_restock_rows(
+    statuses=None,
+    item_ids=None,
+    venue_ids=None,
+    search="",
+    sort="status_priority",
+    mode="status",
+    limit=None,
+    offset=0,
+    *,
+    setup_group_code=None,
+    unassigned_setup_group=False,
+    actionable_only=False,
+):
+    """Return one sorted page of restocking rows plus the total match count.
+
+    Status, par, count bucket and severity are SQL expressions, so filters, sort
+    and LIMIT/OFFSET run in the database and only the returned page is built
+    into row dicts. A search query ranks the already-sorted candidates through
+    the shared search index.
+    """
+    if statuses is None:
+        selected_statuses = list(RESTOCK_STATUS_META.keys())
     else:
-        rows.sort(key=base_sort_key)
+        selected_statuses = [status for status in statuses if status in RESTOCK_STATUS_META]
+    if not selected_statuses:
+        return {"rows": [], "total_count": 0, "has_more": False}
+    if item_ids is not None and not item_ids:
+        return {"rows": [], "total_count": 0, "has_more": False}
+    if venue_ids is not None and not venue_ids:
+        return {"rows": [], "total_count": 0, "has_more": False}
+    search_query = (search or "").strip().lower()
+    sort_mode = normalize_restock_sort(sort)
+    restock_mode = normalize_restock_mode(mode, "status")
+
+    base = _restock_base_subquery(item_ids=item_ids, venue_ids=venue_ids)
+    query = db.session.query(base)
+    if len(selected_statuses) < len(RESTOCK_STATUS_META):
+        query = query.filter(base.c.status_key.in_(selected_statuses))
+    if unassigned_setup_group:
+        query = query.filter(or_(base.c.setup_group_code.is_(None), base.c.setup_group_code == ""))
+    elif setup_group_code is not None:
+        query = query.filter(base.c.setup_group_code == setup_group_code)
+    if actionable_only:
+        query = query.filter(
+            _restock_count_bucket_expr(base) == "comparable",
+            base.c.raw_count != base.c.par_value,
+        )
+    query = query.order_by(*_restock_order_by(base, sort_mode=sort_mode, restock_mode=restock_mode))
 
-    total_count = len(rows)
     normalized_offset = max(int(offset or 0), 0)
-    if limit is None:
-        paged_rows = rows[normalized_offset:]
+    normalized_limit = None if limit is None else max(int(limit), 0)
+
+    if search_query:
+        # Read the generation before the rows so a concurrent write can only
+        # cause a rebuild, never stale documents cached under a newer token.
+        generation = inventory_search_generation()
+        candidates = query.all()
+        search_index = get_search_index(
+            "restock",
+            (
+                generation,
+                tuple(selected_statuses),
+                None if item_ids is None else tuple(sorted(item_ids)),
+                None if venue_ids is None else tuple(sorted(venue_ids)),
+                setup_group_code,
+                unassigned_setup_group,
+                actionable_only,
+                sort_mode,
+                restock_mode,
+                len(candidates),
+            ),
+            lambda: [_restock_search_values(row) for row in candidates],
+            RESTOCK_SEARCH_FIELDS,
+        )
+        ranked_rows = [
+            (rank, row)
+            for rank, row in zip(search_index.ranks(search_query), candidates)
+            if rank is not None
+        ]
+        # Stable sort keeps the SQL order within each rank.
+        ranked_rows.sort(key=lambda pair: pair[0])
+        total_count = len(ranked_rows)
+        end = None if normalized_limit is None else normalized_offset + normalized_limit
+        page_rows = [row for _, row in ranked_rows[normalized_offset:end]]
     else:
-        normalized_limit = max(int(limit), 0)
-        paged_rows = rows[normalized_offset : normalized_offset + normalized_limit]
-    has_more = (normalized_offset + len(paged_rows)) < total_count
-    return {"rows": paged_rows, "total_count": total_count, "has_more": has_more}
+        total_count = query.order_by(None).count()
+        page_query = query.offset(normalized_offset)
+        if normalized_limit is not None:
+            page_query = page_query.limit(normalized_limit)
+        page_rows = page_query.all() if normalized_limit != 0 else []
+
+    rows = [_build_restock_row(row, restock_mode) for row in page_rows]
+    has_more = (normalized_offset + len(rows)) < total_count
+    return {"rows": rows, "total_count": total_count, "has_more": has_more}
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Check, Item, Venue, VenueItem, VenueItemCount, VenueItemState
+from app.services.metrics import record_cache_lookups
+
+WORD_MATCH = "word"
+PREFIX_MATCH = "prefix"
+CONTAINS_MATCH = "contains"
+
+# Rank tiers each match mode contributes, best first:
+# word -> starts with, word-boundary prefix, substring; prefix -> starts with, substring.
+MATCH_TIER_COUNTS = {
+    WORD_MATCH: 3,
+    PREFIX_MATCH: 2,
+    CONTAINS_MATCH: 1,
+}
+QUERY_CACHE_SIZE = 64
+INDEX_CACHE_SIZE = 64
+# (table, change column) pairs behind every searchable inventory value.
+_SEARCH_GENERATION_COLUMNS = (
+    (Item, Item.updated_at),
+    (Venue, Venue.updated_at),
+    (VenueItem, VenueItem.updated_at),
+    (VenueItemState, VenueItemState.updated_at),
+    (VenueItemCount, VenueItemCount.updated_at),
+    (Check, Check.id),
+)
+
+_index_cache = OrderedDict()
+_index_cache_lock = Lock()
+
+
+@dataclass(frozen=True)
+class SearchField:
+    name: str
+    match: str = WORD_MATCH
+
+
+def normalize_search_query(value):
+    return (value or "").strip().lower()
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+def _word_start_positions(text):
+    """Positions matched by `(^|\\W)` before a query: the start and after any non-word char."""
+    return [
+        position
+        for position in range(len(text))
+        if position == 0 or not _is_word_char(text[position - 1])
+    ]
+
+
+class SearchIndex:
+    """Ranked substring search over a fixed list of documents.
+
+    Each document is a tuple of raw field values aligned with `fields`. Fields are
+    lowercased once and word-start suffixes are kept in a sorted table, so the
+    "starts with" and word-boundary tiers are bisect lookups instead of per-row
+    regex scans. Ranks number the tiers field by field: a word field followed by
+    a contains field ranks 0-2 then 3.
+    """
+
+    def __init__(self, documents, fields):
+        self.fields = tuple(fields)
+        self.documents = tuple(tuple(values) for values in documents)
+        self._texts = []
+        self._prefix_tables = []
+        for field_index, field in enumerate(self.fields):
+            texts = [(values[field_index] or "").lower() for values in self.documents]
+            self._texts.append(texts)
+            table = []
+            if field.match == WORD_MATCH:
+                for document_index, text in enumerate(texts):
+                    for position in _word_start_positions(text):
+                        table.append((text[position:], document_index, position == 0))
+            elif field.match == PREFIX_MATCH:
+                table = [
+                    (text, document_index, True)
+                    for document_index, text in enumerate(texts)
+                    if text
+                ]
+            table.sort()
+            self._prefix_tables.append(table)
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = Lock()
+
+    def __len__(self):
+        return len(self.documents)
+
+    def ranks(self, query):
+        """Return one rank per document (lower is better), or None where nothing matched.
+
+        An empty query matches every document at rank 0.
+        """
+        normalized_query = normalize_search_query(query)
+        if not normalized_query:
+            return [0] * len(self.documents)
+        with self._query_cache_lock:
+            cached = self._query_cache.get(normalized_query)
+            if cached is not None:
+                self._query_cache.move_to_end(normalized_query)
+                record_cache_lookups("search_query", hits=1)
+                return list(cached)
+        record_cache_lookups("search_query", misses=1)
+        ranks = self._compute_ranks(normalized_query)
+        with self._query_cache_lock:
+            self._query_cache[normalized_query] = tuple(ranks)
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return ranks
+
+    def _compute_ranks(self, query):
+        ranks = [None] * len(self.documents)
+        base_rank = 0
+        for field, texts, table in zip(self.fields, self._texts, self._prefix_tables):
+            start = bisect_left(table, (query,))
+            for index in range(start, len(table)):
+                suffix, document_index, is_start = table[index]
+                if not suffix.startswith(query):
+                    break
+                rank = base_rank if is_start else base_rank + 1
+                current = ranks[document_index]
+                if current is None or rank < current:
+                    ranks[document_index] = rank
+            tier_count = MATCH_TIER_COUNTS[field.match]
+            contains_rank = base_rank + tier_count - 1
+            for document_index, text in enumerate(texts):
+                if ranks[document_index] is None and query in text:
+                    ranks[document_index] = contains_rank
+            base_rank += tier_count
+        return ranks
+
+
+def inventory_search_generation():
+    """Return a cheap token that changes whenever searchable inventory values may change.
+
+    One aggregate read: row counts catch inserts and deletes, and the newest
+    `updated_at` catches edits to items, venues, venue links and status/count
+    state. Checks are append-only, so their newest id is enough. Every worker
+    reads the same token, so a write in one process invalidates the indexes
+    cached in the others.
+    """
+    columns = []
+    for model, column in _SEARCH_GENERATION_COLUMNS:
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+        columns.append(select(func.max(column)).scalar_subquery())
+    return tuple(db.session.execute(select(*columns)).one())
+
+
+def get_search_index(name, generation, build_documents, fields):
+    """Return the cached index for `name` at `generation`, building it only on a miss.
+
+    `generation` must change whenever the documents would: callers combine
+    `inventory_search_generation()` with whatever scopes their rows (filters,
+    venue, row count). `build_documents` is only called on a miss.
+    """
+    key = (name, generation)
+    fields = tuple(fields)
+    with _index_cache_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached.fields == fields:
+            _index_cache.move_to_end(key)
+            record_cache_lookups("search_index", hits=1)
+            return cached
+    record_cache_lookups("search_index", misses=1)
+    index = SearchIndex(build_documents(), fields)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def clear_search_index_cache():
+    with _index_cache_lock:
+        _index_cache.clear()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import re
+import time
+from contextlib import ContextDecorator
+
+from flask import before_render_template, current_app, g, has_request_context, template_rendered
+from flask_login import current_user
+
+from app.services.query_budget import get_request_query_stats
+
+SERVER_TIMING_MODES = {"off", "admins", "all"}
+SERVER_TIMING_HEADER = "Server-Timing"
+
+_STATE_ATTR = "server_timing"
+_METRIC_NAME_INVALID = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class _RequestTiming:
+    __slots__ = ("started_at", "template_time", "template_stack", "spans")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.template_time = 0.0
+        self.template_stack = []
+        self.spans = {}
+
+    def add_span(self, name, elapsed):
+        total, count = self.spans.get(name, (0.0, 0))
+        self.spans[name] = (total + elapsed, count + 1)
+
+
+def _request_timing():
+    if not has_request_context():
+        return None
+    return g.get(_STATE_ATTR)
+
+
+def _db_time():
+    stats = get_request_query_stats()
+    return stats.db_time if stats is not None else 0.0
+
+
+class timing_span(ContextDecorator):
+    """Time a named block into the current request's Server-Timing header.
+
+    Use as `with timing_span("restock_rows"):` or as a decorator. Outside a
+    request, or when Server-Timing is off, it does nothing. Repeated spans with
+    the same name are summed.
+    """
+
+    def __init__(self, name):
+        self.name = _METRIC_NAME_INVALID.sub("_", name)
+        self._started_at = None
+
+    def _recreate_cm(self):
+        # A fresh instance per call keeps nested and concurrent uses of one decorator apart.
+        return type(self)(self.name)
+
+    def __enter__(self):
+        if _request_timing() is not None:
+            self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        timing = _request_timing()
+        if timing is not None and self._started_at is not None:
+            timing.add_span(self.name, time.perf_counter() - self._started_at)
+        return False
+
+
+def _before_render(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is not None:
+        timing.template_stack.append((time.perf_counter(), _db_time()))
+
+
+def _after_render(sender, template, context, **extra):
+    timing = _request_timing()
+    if timing is None or not timing.template_stack:
+        return
+    started_at, db_time_before = timing.template_stack.pop()
+    if timing.template_stack:
+        # Nested renders are already inside the outer render's window.
+        return
+    # Lazy loads fired from templates count as db time, not template time.
+    elapsed = time.perf_counter() - started_at
+    timing.template_time += elapsed - (_db_time() - db_time_before)
+
+
+def resolve_server_timing_mode(app):
+    mode = (app.config.get("SERVER_TIMING_MODE") or "off").strip().lower()
+    return mode if mode in SERVER_TIMING_MODES else "off"
+
+
+def _should_emit(mode):
+    if mode == "all":
+        return True
+    return bool(
+        getattr(current_user, "is_authenticated", False) and current_user.has_role("admin")
+    )
+
+
+def _metric(name, elapsed, description=None):
+    value = f"{name};dur={elapsed * 1000:.1f}"
+    if description:
+        value += f';desc="{description}"'
+    return value
+
+
+def build_server_timing_value(timing, *, now=None):
+    """Return the header value: app total, db, tpl and view (the rest), then spans."""
+    total = (now if now is not None else time.perf_counter()) - timing.started_at
+    stats = get_request_query_stats()
+    db_time = stats.db_time if stats is not None else 0.0
+    statements = stats.statements if stats is not None else 0
+    template_time = max(timing.template_time, 0.0)
+    view_time = max(total - db_time - template_time, 0.0)
+    metrics = [
+        _metric("app", total, "Total"),
+        _metric("db", db_time, f"SQL ({statements} queries)"),
+        _metric("tpl", template_time, "Templates"),
+        _metric("view", view_time, "Python"),
+    ]
+    for name, (elapsed, count) in sorted(timing.spans.items()):
+        metrics.append(_metric(f"span.{name}", elapsed, f"{count}x" if count > 1 else None))
+    return ", ".join(metrics)
+
+
+def _start_request_timing():
+    if resolve_server_timing_mode(current_app) != "off":
+        setattr(g, _STATE_ATTR, _RequestTiming())
+
+
+def _emit_server_timing(response):
+    timing = _request_timing()
+    if timing is None:
+        return response
+    if _should_emit(resolve_server_timing_mode(current_app)):
+        response.headers[SERVER_TIMING_HEADER] = build_server_timing_value(timing)
+    return response
+
+
+def init_server_timing(app):
+    """Register the Server-Timing hooks; SERVER_TIMING_MODE decides who sees the header."""
+    app.before_request(_start_request_timing)
+    app.after_request(_emit_server_timing)
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_after_render, app, weak=False)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from flask import g, has_request_context
+from sqlalchemy import event, func, tuple_
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import SupplyNote, VenueItemCount, VenueNote
+from app.services.inventory_signals import (
+    build_latest_count_signal_map,
+    build_latest_status_signal_map,
+)
+from app.services.item_network_rollups import build_item_network_rollup_map
+from app.services.metrics import record_cache_lookups
+
+_LOADER_ATTR = "inventory_signal_loader"
+
+
+def _pair_filter(venue_column, item_column, pairs):
+    venue_ids = {venue_id for venue_id, _ in pairs}
+    if len(venue_ids) == 1:
+        item_ids = [item_id for _, item_id in pairs]
+        return [venue_column == next(iter(venue_ids)), item_column.in_(item_ids)]
+    return [tuple_(venue_column, item_column).in_(pairs)]
+
+
+def _pair_signal_scope(pairs):
+    return {
+        "venue_ids": sorted({venue_id for venue_id, _ in pairs}),
+        "item_ids": sorted({item_id for _, item_id in pairs}),
+    }
+
+
+def _fetch_status_signals(pairs):
+    return build_latest_status_signal_map(**_pair_signal_scope(pairs))
+
+
+def _fetch_count_signals(pairs):
+    return build_latest_count_signal_map(**_pair_signal_scope(pairs))
+
+
+def _fetch_current_counts(pairs):
+    rows = (
+        db.session.query(VenueItemCount.venue_id, VenueItemCount.item_id, VenueItemCount.raw_count)
+        .filter(*_pair_filter(VenueItemCount.venue_id, VenueItemCount.item_id, pairs))
+        .all()
+    )
+    return {(row.venue_id, row.item_id): row.raw_count for row in rows}
+
+
+def _fetch_venue_note_counts(pairs):
+    rows = (
+        db.session.query(
+            VenueNote.venue_id.label("venue_id"),
+            VenueNote.item_id.label("item_id"),
+            func.count(VenueNote.id).label("note_count"),
+        )
+        .filter(*_pair_filter(VenueNote.venue_id, VenueNote.item_id, pairs))
+        .group_by(VenueNote.venue_id, VenueNote.item_id)
+        .all()
+    )
+    return {(row.venue_id, row.item_id): int(row.note_count or 0) for row in rows}
+
+
+def _fetch_supply_note_counts(item_ids):
+    rows = (
+        db.session.query(SupplyNote.item_id, func.count(SupplyNote.id).label("note_count"))
+        .filter(SupplyNote.item_id.in_(item_ids))
+        .group_by(SupplyNote.item_id)
+        .all()
+    )
+    return {row.item_id: int(row.note_count or 0) for row in rows}
+
+
+class InventorySignalLoader:
+    """Batch and memoize the per-item lookups view-model builders share in one request.
+
+    Each `load_*` call fetches every key it has not seen yet in a single query
+    and remembers misses too, so repeated or overlapping calls cost nothing.
+    Pair lookups are keyed by `(venue_id, item_id)`.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def _load(self, kind, keys, fetch):
+        cache = self._values.setdefault(kind, {})
+        keys = list(dict.fromkeys(keys))
+        missing = [key for key in keys if key not in cache]
+        record_cache_lookups("signal_loader", hits=len(keys) - len(missing), misses=len(missing))
+        if missing:
+            fetched = fetch(missing)
+            for key in missing:
+                cache[key] = fetched.get(key)
+        return {key: cache[key] for key in keys}
+
+    def _load_venue(self, kind, venue_id, item_ids, fetch):
+        values = self._load(kind, [(venue_id, int(item_id)) for item_id in item_ids], fetch)
+        return {item_id: value for (_, item_id), value in values.items()}
+
+    def load_latest_status_signals(self, venue_id, item_ids):
+        values = self._load_venue("status_signal", venue_id, item_ids, _fetch_status_signals)
+        return {item_id: value for item_id, value in values.items() if value is not None}
+
+    def load_latest_count_signals(self, venue_id, item_ids):
+        values = self._load_venue("count_signal", venue_id, item_ids, _fetch_count_signals)
+        return {item_id: value for item_id, value in values.items() if value is not None}
+
+    def load_current_counts(self, venue_id, item_ids):
+        """Raw counts from `venue_item_counts`; None where nothing is stored."""
+        return self._load_venue("current_count", venue_id, item_ids, _fetch_current_counts)
+
+    def load_note_counts(self, venue_id, item_ids):
+        values = self._load_venue("venue_note_count", venue_id, item_ids, _fetch_venue_note_counts)
+        return {item_id: value for item_id, value in values.items() if value}
+
+    def load_item_network_rollups(self, item_ids):
+        values = self._load(
+            "item_network", [int(item_id) for item_id in item_ids], build_item_network_rollup_map
+        )
+        return {item_id: value for item_id, value in values.items() if value is not None}
+
+    def load_supply_note_counts(self, item_ids):
+        values = self._load(
+            "supply_note_count", [int(item_id) for item_id in item_ids], _fetch_supply_note_counts
+        )
+        return {item_id: value for item_id, value in values.items() if value}
+
+
+def get_inventory_signal_loader():
+    """Return the loader for the current request; outside a request each call gets a fresh one."""
+    if not has_request_context():
+        return InventorySignalLoader()
+    loader = g.get(_LOADER_ATTR)
+    if loader is None:
+        loader = InventorySignalLoader()
+        setattr(g, _LOADER_ATTR, loader)
+    return loader
+
+
+def reset_inventory_signal_loader():
+    if has_request_context():
+        g.pop(_LOADER_ATTR, None)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_soft_rollback")
+def _reset_loader_after_transaction(session, *args):
+    # Anything memoized before a commit or rollback may no longer match the database.
+    reset_inventory_signal_loader()
@@ -0,0 +1,200 @@
+"""Reusable SMTP sessions for transactional mail.
+
+Opening a session costs a TCP connect, often a TLS handshake and an AUTH
+round-trip, and providers rate-limit new connections. The pool keeps each
+authenticated session open for MAIL_SMTP_IDLE_SECONDS after its last message
+and sends up to MAIL_SMTP_MAX_MESSAGES_PER_CONNECTION messages through it. A
+session the server has dropped in the meantime is replaced and the message
+retried once. Sessions are never shared between threads, and a forked worker
+does not reuse its parent's sockets.
+"""
+
+from __future__ import annotations
+
+import os
+import smtplib
+import ssl
+import time
+from dataclasses import dataclass
+from threading import Lock
+
+MAX_IDLE_SESSIONS = 4
+# Errors after which the server has answered the message and the session is still usable.
+_SESSION_SAFE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+_DROPPED_SESSION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+@dataclass(frozen=True)
+class SmtpSettings:
+    server: str
+    port: int
+    username: str = ""
+    password: str = ""
+    use_tls: bool = False
+    use_ssl: bool = False
+    timeout: int = 10
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            server=config["MAIL_SERVER"],
+            port=int(config["MAIL_PORT"]),
+            username=(config.get("MAIL_USERNAME") or "").strip(),
+            password=config.get("MAIL_PASSWORD") or "",
+            use_tls=bool(config.get("MAIL_USE_TLS")),
+            use_ssl=bool(config.get("MAIL_USE_SSL")),
+            timeout=int(config["MAIL_TIMEOUT_SECONDS"]),
+        )
+
+
+def open_smtp_session(settings):
+    """Connect, upgrade to TLS when configured and log in; return the ready session."""
+    if settings.use_ssl:
+        smtp = smtplib.SMTP_SSL(
+            settings.server,
+            settings.port,
+            timeout=settings.timeout,
+            context=ssl.create_default_context(),
+        )
+    else:
+        smtp = smtplib.SMTP(settings.server, settings.port, timeout=settings.timeout)
+    try:
+        if settings.use_tls and not settings.use_ssl:
+            smtp.starttls(context=ssl.create_default_context())
+        if settings.username:
+            smtp.login(settings.username, settings.password)
+    except BaseException:
+        _close_session(smtp)
+        raise
+    return smtp
+
+
+def _close_session(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+class _Session:
+    __slots__ = ("smtp", "sent", "reused", "last_used")
+
+    def __init__(self, smtp, now):
+        self.smtp = smtp
+        self.sent = 0
+        self.reused = False
+        self.last_used = now
+
+
+class SmtpConnectionPool:
+    def __init__(self, *, connect=open_smtp_session, clock=time.monotonic):
+        self._connect = connect
+        self._clock = clock
+        self._lock = Lock()
+        self._idle = {}
+        self._pid = os.getpid()
+
+    def send_messages(self, settings, messages, *, idle_seconds, max_messages):
+        """Send `messages` in order through pooled sessions; return an exception or None for each.
+
+        With `idle_seconds` of 0 no session outlives the call.
+        """
+        errors = []
+        session = self._checkout(settings, idle_seconds=idle_seconds)
+        try:
+            for index, message in enumerate(messages):
+                if session is not None and session.sent >= max_messages:
+                    _close_session(session.smtp)
+                    session = None
+                if session is None:
+                    try:
+                        session = _Session(self._connect(settings), self._clock())
+                    except Exception as exc:  # noqa: BLE001 - reported per message.
+                        # Without a session the rest of the batch fails the same way.
+                        errors.extend([exc] * (len(messages) - index))
+                        break
+                session, error = self._send(settings, session, message)
+                errors.append(error)
+        finally:
+            if session is not None:
+                self._checkin(settings, session, idle_seconds=idle_seconds)
+        return errors
+
+    def _send(self, settings, session, message):
+        """Return `(session, error)`; the session is None once it can no longer be used."""
+        try:
+            session.smtp.send_message(message)
+        except _DROPPED_SESSION_ERRORS as exc:
+            session.smtp.close()
+            if not session.reused:
+                return None, exc
+            # The server closed a kept-alive session; a fresh one gets one retry.
+            try:
+                fresh = _Session(self._connect(settings), self._clock())
+            except Exception as connect_exc:  # noqa: BLE001 - reported per message.
+                return None, connect_exc
+            return self._send(settings, fresh, message)
+        except _SESSION_SAFE_ERRORS as exc:
+            try:
+                session.smtp.rset()
+            except (smtplib.SMTPException, OSError):
+                session.smtp.close()
+                return None, exc
+            return session, exc
+        except Exception as exc:  # noqa: BLE001 - reported per message.
+            _close_session(session.smtp)
+            return None, exc
+        session.sent += 1
+        session.reused = True
+        session.last_used = self._clock()
+        return session, None
+
+    def _checkout(self, settings, *, idle_seconds):
+        now = self._clock()
+        with self._lock:
+            self._forget_inherited_sessions()
+            sessions = self._idle.get(settings, [])
+            fresh = [session for session in sessions if now - session.last_used < idle_seconds]
+            expired = [session for session in sessions if session not in fresh]
+            session = fresh.pop() if fresh else None
+            self._idle[settings] = fresh
+        for stale in expired:
+            _close_session(stale.smtp)
+        if session is not None:
+            session.reused = True
+        return session
+
+    def _checkin(self, settings, session, *, idle_seconds):
+        if idle_seconds > 0:
+            with self._lock:
+                sessions = self._idle.setdefault(settings, [])
+                if os.getpid() == self._pid and len(sessions) < MAX_IDLE_SESSIONS:
+                    sessions.append(session)
+                    return
+        _close_session(session.smtp)
+
+    def _forget_inherited_sessions(self):
+        # After a fork the parent owns these sockets too; a QUIT from here would end
+        # its sessions, so they are dropped without a word.
+        if os.getpid() != self._pid:
+            self._idle = {}
+            self._pid = os.getpid()
+
+    def close_all(self):
+        with self._lock:
+            self._forget_inherited_sessions()
+            sessions = [session for pool in self._idle.values() for session in pool]
+            self._idle = {}
+        for session in sessions:
+            _close_session(session.smtp)
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(sessions) for sessions in self._idle.values())
+
+
+smtp_pool = SmtpConnectionPool()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from app.models import Check, CheckLine, CountLine, CountSession, VenueItemState
+from app.services.db_upserts import upsert_rows
+from app.services.inventory_activity import (
+    record_count_activity_events,
+    record_status_activity_events,
+)
+from app.services.inventory_status import ensure_utc
+
+
+def _signal_sort_key(recorded_at, source_id):
+    return (ensure_utc(recorded_at), source_id or 0)
+
+
+def _is_newer_signal(recorded_at, source_id, current_at, current_source_id):
+    if current_at is None:
+        return True
+    return _signal_sort_key(recorded_at, source_id) >= _signal_sort_key(
+        current_at, current_source_id
+    )
+
+
+def _load_state_signals(venue_id, item_ids, value_column, updated_at_column, source_column):
+    if not item_ids:
+        return {}
+    rows = (
+        db.session.query(VenueItemState.item_id, value_column, updated_at_column, source_column)
+        .filter(
+            VenueItemState.venue_id == venue_id,
+            VenueItemState.item_id.in_(item_ids),
+        )
+        .all()
+    )
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+
+def _newer_signal_guard(updated_at_column, source_column):
+    """ON CONFLICT filter mirroring `_is_newer_signal` against the stored row.
+
+    Evaluated by the database, so a concurrent save that landed a newer signal
+    between our read and our write is never overwritten.
+    """
+
+    def guard(excluded):
+        return or_(
+            updated_at_column.is_(None),
+            updated_at_column < excluded[updated_at_column.key],
+            and_(
+                updated_at_column == excluded[updated_at_column.key],
+                func.coalesce(source_column, 0) <= excluded[source_column.key],
+            ),
+        )
+
+    return guard
+
+
+def _upsert_state_signals(rows, *, value_column, updated_at_column, user_column, source_column):
+    upsert_rows(
+        VenueItemState.__table__,
+        rows,
+        conflict_columns=("venue_id", "item_id"),
+        update_columns=(
+            value_column.key,
+            updated_at_column.key,
+            user_column.key,
+            source_column.key,
+            "updated_at",
+        ),
+        where=_newer_signal_guard(updated_at_column, source_column),
+    )
+
+
+def record_check_state(check, item_statuses):
+    """Fold a flushed check's statuses into the latest-state table.
+
+    `item_statuses` is an iterable of `(item_id, status)` pairs. Older checks
+    never overwrite a newer stored status, so backdated writes stay correct;
+    only signals that advance the stored state are appended to the activity log.
+    Every advancing row is written with one upsert.
+    """
+    statuses = {int(item_id): status for item_id, status in item_statuses}
+    current = _load_state_signals(
+        check.venue_id,
+        list(statuses),
+        VenueItemState.status,
+        VenueItemState.status_updated_at,
+        VenueItemState.status_check_id,
+    )
+    now = datetime.now(timezone.utc)
+    transitions = []
+    rows = []
+    for item_id, status in statuses.items():
+        current_status, current_at, current_check_id = current.get(item_id, (None, None, None))
+        if not _is_newer_signal(check.created_at, check.id, current_at, current_check_id):
+            continue
+        transitions.append((item_id, current_status, status))
+        rows.append(
+            {
+                "venue_id": check.venue_id,
+                "item_id": item_id,
+                "status": status,
+                "status_updated_at": check.created_at,
+                "status_user_id": check.user_id,
+                "status_check_id": check.id,
+                "updated_at": now,
+            }
+        )
+    _upsert_state_signals(
+        rows,
+        value_column=VenueItemState.status,
+        updated_at_column=VenueItemState.status_updated_at,
+        user_column=VenueItemState.status_user_id,
+        source_column=VenueItemState.status_check_id,
+    )
+    record_status_activity_events(check, transitions)
+
+
+def record_count_session_state(count_session, item_counts):
+    """Fold a flushed count session's raw counts into the latest-state table."""
+    raw_counts = {int(item_id): raw_count for item_id, raw_count in item_counts}
+    current = _load_state_signals(
+        count_session.venue_id,
+        list(raw_counts),
+        VenueItemState.raw_count,
+        VenueItemState.count_updated_at,
+        VenueItemState.count_session_id,
+    )
+    now = datetime.now(timezone.utc)
+    transitions = []
+    rows = []
+    for item_id, raw_count in raw_counts.items():
+        current_count, current_at, current_session_id = current.get(item_id, (None, None, None))
+        if not _is_newer_signal(
+            count_session.created_at, count_session.id, current_at, current_session_id
+        ):
+            continue
+        transitions.append((item_id, current_count, raw_count))
+        rows.append(
+            {
+                "venue_id": count_session.venue_id,
+                "item_id": item_id,
+                "raw_count": raw_count,
+                "count_updated_at": count_session.created_at,
+                "count_user_id": count_session.user_id,
+                "count_session_id": count_session.id,
+                "updated_at": now,
+            }
+        )
+    _upsert_state_signals(
+        rows,
+        value_column=VenueItemState.raw_count,
+        updated_at_column=VenueItemState.count_updated_at,
+        user_column=VenueItemState.count_user_id,
+        source_column=VenueItemState.count_session_id,
+    )
+    record_count_activity_events(count_session, transitions)
+
+
+def _latest_status_rows():
+    rank = func.row_number().over(
+        partition_by=(Check.venue_id, CheckLine.item_id),
+        order_by=(Check.created_at.desc(), Check.id.desc()),
+    )
+    ranked = (
+        select(
+            Check.venue_id.label("venue_id"),
+            CheckLine.item_id.label("item_id"),
+            CheckLine.status.label("status"),
+            Check.created_at.label("updated_at"),
+            Check.user_id.label("user_id"),
+            Check.id.label("source_id"),
+            rank.label("signal_rank"),
+        )
+        .select_from(Check)
+        .join(CheckLine, CheckLine.check_id == Check.id)
+        .subquery()
+    )
+    return db.session.execute(select(ranked).where(ranked.c.signal_rank == 1)).all()
+
+
+def _latest_count_rows():
+    rank = func.row_number().over(
+        partition_by=(CountSession.venue_id, CountLine.item_id),
+        order_by=(CountSession.created_at.desc(), CountSession.id.desc()),
+    )
+    ranked = (
+        select(
+            CountSession.venue_id.label("venue_id"),
+            CountLine.item_id.label("item_id"),
+            CountLine.raw_count.label("raw_count"),
+            CountSession.created_at.label("updated_at"),
+            CountSession.user_id.label("user_id"),
+            CountSession.id.label("source_id"),
+            rank.label("signal_rank"),
+        )
+        .select_from(CountSession)
+        .join(CountLine, CountLine.count_session_id == CountSession.id)
+        .subquery()
+    )
+    return db.session.execute(select(ranked).where(ranked.c.signal_rank == 1)).all()
+
+
+def rebuild_venue_item_state():
+    """Recompute every latest-state row from check and count history.
+
+    The caller owns the transaction; nothing is committed here.
+    """
+    db.session.query(VenueItemState).delete(synchronize_session=False)
+
+    state_by_key = {}
+
+    def state_for(venue_id, item_id):
+        key = (venue_id, item_id)
+        state = state_by_key.get(key)
+        if state is None:
+            state = VenueItemState(venue_id=venue_id, item_id=item_id)
+            state_by_key[key] = state
+        return state
+
+    status_rows = _latest_status_rows()
+    for row in status_rows:
+        state = state_for(row.venue_id, row.item_id)
+        state.status = row.status
+        state.status_updated_at = row.updated_at
+        state.status_user_id = row.user_id
+        state.status_check_id = row.source_id
+
+    count_rows = _latest_count_rows()
+    for row in count_rows:
+        state = state_for(row.venue_id, row.item_id)
+        state.raw_count = row.raw_count
+        state.count_updated_at = row.updated_at
+        state.count_user_id = row.user_id
+        state.count_session_id = row.source_id
+
+    db.session.add_all(state_by_key.values())
+    db.session.flush()
+    return {
+        "state_rows": len(state_by_key),
+        "status_rows": len(status_rows),
+        "count_rows": len(count_rows),
+    }
+
+
+def delete_venue_item_state(venue_ids):
+    venue_ids = [int(venue_id) for venue_id in venue_ids or []]
+    if not venue_ids:
+        return 0
+    return VenueItemState.query.filter(VenueItemState.venue_id.in_(venue_ids)).delete(
+        synchronize_session=False
+    )
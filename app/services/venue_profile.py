@@ -8,7 +8,6 @@ from app.models import (
     Item,
     Venue,
     VenueItem,
-    VenueNote,
 )
 from app.services.csv_exports import build_dated_csv_filename, sanitize_csv_cell
 from app.services.inventory_rules import (
@@ -16,10 +15,6 @@ from app.services.inventory_rules import (
     resolve_effective_par_level,
     resolve_effective_stale_threshold_days,
 )
-from app.services.inventory_signals import (
-    build_latest_count_signal_map,
-    build_latest_status_signal_map,
-)
 from app.services.inventory_status import (
     build_consistency_signal,
     build_overall_status_badge,
@@ -35,6 +30,15 @@ from app.services.inventory_status import (
     status_sort_value,
 )
 from app.services.restocking import build_restock_count_state
+from app.services.search_index import (
+    CONTAINS_MATCH,
+    SearchField,
+    get_search_index,
+    inventory_search_generation,
+    normalize_search_query,
+)
+from app.services.server_timing import timing_span
+from app.services.signal_loader import get_inventory_signal_loader
 from app.services.spreadsheet_compat import format_setup_group_display
 
 VENUE_INVENTORY_SEGMENTS = {"all", "needs_action", "review", "assets"}
@@ -54,6 +58,12 @@ VENUE_INVENTORY_SORTS = {
     "lowest_count_coverage",
     "recent",
 }
+# Ranks 0-2 item name, 3-5 family name, 6 anywhere in name/family/setup group/status.
+VENUE_INVENTORY_SEARCH_FIELDS = (
+    SearchField("name"),
+    SearchField("family_name"),
+    SearchField("search_text", CONTAINS_MATCH),
+)
 VENUE_INVENTORY_EXPORT_HEADERS = (
     "Venue Name",
     "Item Name",
@@ -106,6 +116,7 @@ def normalize_venue_inventory_filters(source):
     }
 
 
+@timing_span("venue_profile")
 def build_venue_profile_view_model(venue_id):
     venue = Venue.query.get_or_404(venue_id)
     global_stale_threshold_days = get_default_stale_threshold_days()
@@ -131,13 +142,22 @@ def build_venue_profile_view_model(venue_id):
 
     tracked_rows = sorted(tracked_rows, key=lambda row: operational_item_sort_key(row[0]))
     item_ids = [item.id for item, _ in tracked_rows]
-    latest_status_by_item = _build_latest_status_map(venue_id, item_ids)
-    latest_count_by_item = _build_latest_count_map(venue_id, item_ids)
-    note_counts_by_item = _build_note_count_map(venue_id, item_ids)
+    signal_loader = get_inventory_signal_loader()
+    latest_status_by_item = signal_loader.load_latest_status_signals(venue_id, item_ids)
+    latest_count_by_item = signal_loader.load_latest_count_signals(venue_id, item_ids)
+    note_counts_by_item = signal_loader.load_note_counts(venue_id, item_ids)
     network_detail_by_item = _build_network_detail_map(
         item_ids=item_ids,
         tracked_items=[item for item, _ in tracked_rows],
+        signal_loader=signal_loader,
     )
+    effective_pars_by_item = {
+        item.id: resolve_effective_par_level(
+            item_default_par_level=item.default_par_level,
+            venue_par_override=venue_par_override,
+        )
+        for item, venue_par_override in tracked_rows
+    }
     latest_status_check_at = (
         db.session.query(func.max(Check.created_at))
         .filter(Check.venue_id == venue_id)
@@ -154,11 +174,8 @@ def build_venue_profile_view_model(venue_id):
     overall_counts = {"good": 0, "ok": 0, "low": 0, "out": 0, "not_checked": 0}
     overall_detail_counts = build_status_detail_counts()
 
-    for item, venue_par_override in tracked_rows:
-        effective_par = resolve_effective_par_level(
-            item_default_par_level=item.default_par_level,
-            venue_par_override=venue_par_override,
-        )
+    for item, _ in tracked_rows:
+        effective_par = effective_pars_by_item[item.id]
         effective_stale_threshold = resolve_effective_stale_threshold_days(
             item_stale_threshold_days=item.stale_threshold_days,
             venue_stale_threshold_days=venue.stale_threshold_days,
@@ -233,55 +250,7 @@ def _build_empty_view_model(venue):
     }
 
 
-def _build_latest_status_map(venue_id, item_ids):
-    latest_by_pair = build_latest_status_signal_map(
-        venue_ids=[venue_id],
-        item_ids=item_ids,
-    )
-    return {
-        item_id: value
-        for (resolved_venue_id, item_id), value in latest_by_pair.items()
-        if resolved_venue_id == venue_id
-    }
-
-
-def _build_latest_count_map(venue_id, item_ids):
-    latest_by_pair = build_latest_count_signal_map(
-        venue_ids=[venue_id],
-        item_ids=item_ids,
-    )
-    return {
-        item_id: value
-        for (resolved_venue_id, item_id), value in latest_by_pair.items()
-        if resolved_venue_id == venue_id
-    }
-
-
-def _build_note_count_map(venue_id, item_ids):
-    if not item_ids:
-        return {}
-
-    rows = (
-        db.session.query(
-            VenueNote.item_id.label("item_id"),
-            func.count(VenueNote.id).label("note_count"),
-        )
-        .filter(
-            VenueNote.venue_id == venue_id,
-            VenueNote.item_id.is_not(None),
-            VenueNote.item_id.in_(item_ids),
-        )
-        .group_by(VenueNote.item_id)
-        .all()
-    )
-    return {
-        row.item_id: int(row.note_count or 0)
-        for row in rows
-        if row.item_id is not None
-    }
-
-
-def _build_network_detail_map(*, item_ids, tracked_items):
+def _build_network_detail_map(*, item_ids, tracked_items, signal_loader):
     if not item_ids:
         return {}
 
@@ -293,127 +262,39 @@ def _build_network_detail_map(*, item_ids, tracked_items):
     if not tracked_by_id:
         return {}
 
-    assignment_rows = (
-        db.session.query(
-            VenueItem.item_id.label("item_id"),
-            VenueItem.venue_id.label("venue_id"),
-            VenueItem.expected_qty.label("venue_par_override"),
-        )
-        .join(Venue, Venue.id == VenueItem.venue_id)
-        .filter(
-            VenueItem.item_id.in_(item_ids),
-            VenueItem.active == True,
-            Venue.active == True,
-        )
-        .all()
-    )
-    if not assignment_rows:
-        return {}
-
-    active_venue_ids = sorted({int(row.venue_id) for row in assignment_rows if row.venue_id is not None})
-    if not active_venue_ids:
-        return {}
-
-    latest_status_by_pair = build_latest_status_signal_map(
-        venue_ids=active_venue_ids,
-        item_ids=item_ids,
-    )
-    latest_count_by_pair = build_latest_count_signal_map(
-        venue_ids=active_venue_ids,
-        item_ids=item_ids,
-    )
-
-    rows_by_item = {}
-    for assignment in assignment_rows:
-        rows_by_item.setdefault(int(assignment.item_id), []).append(assignment)
-
+    network_by_item = signal_loader.load_item_network_rollups(list(tracked_by_id))
     network = {}
     for item_id, item in tracked_by_id.items():
-        assignments = rows_by_item.get(item_id, [])
-        venue_count = len(assignments)
+        values = network_by_item.get(item_id)
+        venue_count = int((values or {}).get("tracked_venue_count") or 0)
         if venue_count <= 0:
             continue
+        venue_label = f'{venue_count} venue{"s" if venue_count != 1 else ""}'
 
         tracking_mode = item.tracking_mode or "quantity"
         if tracking_mode == "singleton_asset":
-            issue_count = 0
-            checked_count = 0
-            for assignment in assignments:
-                pair = (int(assignment.venue_id), item_id)
-                latest_status = latest_status_by_pair.get(pair)
-                latest_count = latest_count_by_pair.get(pair)
-                raw_count = latest_count["raw_count"] if latest_count else None
-                status_key = (
-                    normalize_singleton_status(latest_status["status"])
-                    if latest_status
-                    else infer_singleton_status_from_count(raw_count)
-                )
-                if status_key != "not_checked":
-                    checked_count += 1
-                if status_key in {"low", "out"}:
-                    issue_count += 1
-
+            issue_count = values["singleton_issue_venue_count"]
+            checked_count = values["singleton_checked_venue_count"]
             if issue_count:
-                summary_text = (
-                    f'{issue_count} issue{"s" if issue_count != 1 else ""} across '
-                    f'{venue_count} venue{"s" if venue_count != 1 else ""}'
-                )
+                issue_label = f'{issue_count} issue{"s" if issue_count != 1 else ""}'
+                summary_text = f"{issue_label} across {venue_label}"
             elif checked_count:
-                summary_text = (
-                    f'{checked_count} checked across '
-                    f'{venue_count} venue{"s" if venue_count != 1 else ""}'
-                )
+                summary_text = f"{checked_count} checked across {venue_label}"
             else:
-                summary_text = (
-                    f'No checks across {venue_count} venue{"s" if venue_count != 1 else ""}'
-                )
-
-            network[item_id] = {
-                "network_tracked_venues_count": venue_count,
-                "network_summary_text": summary_text,
-            }
-            continue
-
-        total_raw_count = 0
-        counted_venues = 0
-        total_par_count = 0
-        par_venues = 0
-        for assignment in assignments:
-            pair = (int(assignment.venue_id), item_id)
-            latest_count = latest_count_by_pair.get(pair)
-            raw_count = latest_count["raw_count"] if latest_count else None
-            if raw_count is not None:
-                total_raw_count += int(raw_count)
-                counted_venues += 1
-
-            effective_par = resolve_effective_par_level(
-                item_default_par_level=item.default_par_level,
-                venue_par_override=assignment.venue_par_override,
-            )
-            if effective_par.value is not None:
-                total_par_count += int(effective_par.value)
-                par_venues += 1
-
-        if par_venues > 0:
-            if counted_venues > 0:
-                summary_text = (
-                    f"{total_raw_count} / {total_par_count} across "
-                    f'{venue_count} venue{"s" if venue_count != 1 else ""}'
-                )
-            else:
-                summary_text = (
-                    f"No counts / {total_par_count} par across "
-                    f'{venue_count} venue{"s" if venue_count != 1 else ""}'
-                )
-        elif counted_venues > 0:
-            summary_text = (
-                f"{total_raw_count} counted across "
-                f'{venue_count} venue{"s" if venue_count != 1 else ""}'
-            )
+                summary_text = f"No checks across {venue_label}"
         else:
-            summary_text = (
-                f'No counts across {venue_count} venue{"s" if venue_count != 1 else ""}'
-            )
+            total_raw_count = values["signal_count_total"]
+            counted_venues = values["signal_counted_venue_count"]
+            total_par_count = values["total_par_count"]
+            if values["par_venue_count"] > 0:
+                if counted_venues > 0:
+                    summary_text = f"{total_raw_count} / {total_par_count} across {venue_label}"
+                else:
+                    summary_text = f"No counts / {total_par_count} par across {venue_label}"
+            elif counted_venues > 0:
+                summary_text = f"{total_raw_count} counted across {venue_label}"
+            else:
+                summary_text = f"No counts across {venue_label}"
 
         network[item_id] = {
             "network_tracked_venues_count": venue_count,
@@ -667,43 +548,39 @@ def _resolve_last_actor_label(
     return count_actor_label or status_actor_label or ""
 
 
-def _word_boundary_prefix(text, query):
-    if not query:
-        return False
-    import re
-
-    return bool(re.search(rf"(^|\W){re.escape(query)}", text))
-
+def _venue_inventory_search_values(row):
+    item_text = row.get("name") or ""
+    family_text = row.get("family_name") or ""
+    return (
+        item_text,
+        family_text,
+        " ".join(
+            [
+                item_text,
+                family_text,
+                row.get("setup_group_display") or "",
+                row.get("current_status_label") or "",
+            ]
+        ),
+    )
 
-def _venue_inventory_search_rank(row, search_query):
-    if not search_query:
-        return 0
 
-    item_text = (row.get("name") or "").lower()
-    family_text = (row.get("family_name") or "").lower()
-    search_text = " ".join(
-        [
-            item_text,
-            family_text,
-            (row.get("setup_group_display") or "").lower(),
-            (row.get("current_status_label") or "").lower(),
-        ]
+def _venue_inventory_search_ranks(
+    item_rows,
+    search_query,
+    *,
+    venue_id=None,
+    search_generation=None,
+):
+    if search_generation is None:
+        search_generation = inventory_search_generation()
+    search_index = get_search_index(
+        f"venue_inventory:{venue_id}",
+        (search_generation, len(item_rows)),
+        lambda: [_venue_inventory_search_values(row) for row in item_rows],
+        VENUE_INVENTORY_SEARCH_FIELDS,
     )
-    if item_text.startswith(search_query):
-        return 0
-    if _word_boundary_prefix(item_text, search_query):
-        return 1
-    if search_query in item_text:
-        return 2
-    if family_text.startswith(search_query):
-        return 3
-    if _word_boundary_prefix(family_text, search_query):
-        return 4
-    if search_query in family_text:
-        return 5
-    if search_query in search_text:
-        return 6
-    return None
+    return search_index.ranks(search_query)
 
 
 def _venue_inventory_attention_rank(row):
@@ -742,11 +619,10 @@ def _venue_inventory_matches_filter(row, filter_value):
     return True
 
 
-def _sort_venue_inventory_rows(rows, *, search_query, sort_key):
-    def sort_key_for_row(row):
+def _sort_venue_inventory_rows(ranked_rows, *, sort_key):
+    def sort_key_for_row(ranked_row):
+        normalized_search_rank, row = ranked_row
         name_key = (row.get("name") or "").lower()
-        search_rank = _venue_inventory_search_rank(row, search_query)
-        normalized_search_rank = search_rank if search_rank is not None else 999
 
         if sort_key == "alphabetical":
             return (normalized_search_rank, name_key, row.get("id") or 0)
@@ -798,61 +674,72 @@ def _sort_venue_inventory_rows(rows, *, search_query, sort_key):
             row.get("id") or 0,
         )
 
-    return sorted(rows, key=sort_key_for_row)
+    return [row for _, row in sorted(ranked_rows, key=sort_key_for_row)]
 
 
-def filter_venue_inventory_rows(item_rows, filters):
-    search_query = (filters.get("q") or "").strip().lower()
-    filtered_rows = []
-    for row in item_rows:
-        if search_query and _venue_inventory_search_rank(row, search_query) is None:
+def filter_venue_inventory_rows(item_rows, filters, *, venue_id=None, search_generation=None):
+    """Filter and sort venue inventory rows.
+
+    Pass `search_generation` read before `item_rows` were loaded so a write in
+    between can never leave these rows cached under the newer generation.
+    """
+    search_query = normalize_search_query(filters.get("q"))
+    if search_query:
+        search_ranks = _venue_inventory_search_ranks(
+            item_rows,
+            search_query,
+            venue_id=venue_id,
+            search_generation=search_generation,
+        )
+    else:
+        search_ranks = [0] * len(item_rows)
+    ranked_rows = []
+    for search_rank, row in zip(search_ranks, item_rows):
+        if search_rank is None:
             continue
         if not _venue_inventory_matches_segment(row, filters.get("segment", "all")):
             continue
         if not _venue_inventory_matches_filter(row, filters.get("filter", "all")):
             continue
-        filtered_rows.append(row)
+        ranked_rows.append((search_rank, row))
     return _sort_venue_inventory_rows(
-        filtered_rows,
-        search_query=search_query,
+        ranked_rows,
         sort_key=filters.get("sort", "needs_action"),
     )
 
 
 def build_venue_inventory_csv_rows(venue, item_rows):
-    rows = []
     for row in item_rows:
-        rows.append(
-            {
-                "Venue Name": sanitize_csv_cell(venue.name),
-                "Item Name": sanitize_csv_cell(row.get("name") or ""),
-                "Setup Group Code": sanitize_csv_cell(row.get("setup_group_code") or ""),
-                "Setup Group Label": sanitize_csv_cell(row.get("setup_group_label") or ""),
-                "Tracking Mode": sanitize_csv_cell("Singleton Asset" if row.get("tracking_mode") == "singleton_asset" else "Quantity"),
-                "Category": sanitize_csv_cell(row.get("item_category") or ""),
-                "Current Count": "" if row.get("raw_count") is None else row.get("raw_count"),
-                "Effective Par": "" if row.get("par_value") is None else row.get("par_value"),
-                "Suggested Order Qty": (
-                    ""
-                    if row.get("suggested_order_qty") is None
-                    else int(row.get("suggested_order_qty") or 0)
-                ),
-                "Over Par Qty": (
-                    ""
-                    if row.get("over_par_qty") is None
-                    else int(row.get("over_par_qty") or 0)
-                ),
-                "Current Quick Status / Last Saved Status": sanitize_csv_cell(
-                    row.get("current_status_label") or ""
-                ),
-                "Last Updated": sanitize_csv_cell(row.get("last_updated_text") or ""),
-                "Checked By": sanitize_csv_cell(row.get("last_actor_label") or ""),
-                "Effective Stale Threshold": row.get("effective_stale_threshold_days") or "",
-                "Is Stale": "Yes" if row.get("is_stale") else "No",
-                "Note Count": int(row.get("notes_count") or 0),
-            }
-        )
-    return rows
+        yield {
+            "Venue Name": sanitize_csv_cell(venue.name),
+            "Item Name": sanitize_csv_cell(row.get("name") or ""),
+            "Setup Group Code": sanitize_csv_cell(row.get("setup_group_code") or ""),
+            "Setup Group Label": sanitize_csv_cell(row.get("setup_group_label") or ""),
+            "Tracking Mode": (
+                "Singleton Asset" if row.get("tracking_mode") == "singleton_asset" else "Quantity"
+            ),
+            "Category": sanitize_csv_cell(row.get("item_category") or ""),
+            "Current Count": "" if row.get("raw_count") is None else row.get("raw_count"),
+            "Effective Par": "" if row.get("par_value") is None else row.get("par_value"),
+            "Suggested Order Qty": (
+                ""
+                if row.get("suggested_order_qty") is None
+                else int(row.get("suggested_order_qty") or 0)
+            ),
+            "Over Par Qty": (
+                ""
+                if row.get("over_par_qty") is None
+                else int(row.get("over_par_qty") or 0)
+            ),
+            "Current Quick Status / Last Saved Status": sanitize_csv_cell(
+                row.get("current_status_label") or ""
+            ),
+            "Last Updated": sanitize_csv_cell(row.get("last_updated_text") or ""),
+            "Checked By": sanitize_csv_cell(row.get("last_actor_label") or ""),
+            "Effective Stale Threshold": row.get("effective_stale_threshold_days") or "",
+            "Is Stale": "Yes" if row.get("is_stale") else "No",
+            "Note Count": int(row.get("notes_count") or 0),
+        }
 
 
 def build_venue_inventory_export_filename(venue, *, scope):
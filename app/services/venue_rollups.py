@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Item, Venue, VenueItem, VenueItemState, VenueNote, VenueRollup
+from app.services.inventory_status import ensure_utc, normalize_singleton_status, normalize_status
+
+ROLLUP_COUNT_FIELDS = (
+    "total_tracked",
+    "good_count",
+    "ok_count",
+    "low_count",
+    "out_count",
+    "not_checked_count",
+    "low_quantity_count",
+    "low_singleton_count",
+    "out_quantity_count",
+    "out_singleton_count",
+    "quantity_count_total",
+    "singleton_current_total",
+    "total_par",
+    "par_item_count",
+    "notes_count",
+)
+
+
+def build_empty_rollup_values():
+    values = {field: 0 for field in ROLLUP_COUNT_FIELDS}
+    values["last_updated_at"] = None
+    return values
+
+
+def _latest_timestamp(*values):
+    resolved = [ensure_utc(value) for value in values if value is not None]
+    return max(resolved) if resolved else None
+
+
+def compute_venue_rollup_values(venue_ids):
+    """Aggregate dashboard totals for `venue_ids` from tracking and latest-state rows."""
+    venue_ids = sorted({int(venue_id) for venue_id in venue_ids or []})
+    if not venue_ids:
+        return {}
+    values_by_venue = {venue_id: build_empty_rollup_values() for venue_id in venue_ids}
+
+    tracked_rows = (
+        db.session.query(
+            VenueItem.venue_id.label("venue_id"),
+            VenueItem.item_id.label("item_id"),
+            Item.tracking_mode.label("tracking_mode"),
+            func.coalesce(VenueItem.expected_qty, Item.default_par_level).label("par_value"),
+        )
+        .join(Item, Item.id == VenueItem.item_id)
+        .filter(
+            VenueItem.venue_id.in_(venue_ids),
+            VenueItem.active == True,
+            Item.active == True,
+            Item.is_group_parent == False,
+        )
+        .all()
+    )
+    state_by_pair = {
+        (row.venue_id, row.item_id): row
+        for row in VenueItemState.query.filter(VenueItemState.venue_id.in_(venue_ids)).all()
+    }
+
+    for row in tracked_rows:
+        values = values_by_venue[row.venue_id]
+        values["total_tracked"] += 1
+        if row.par_value is not None:
+            values["total_par"] += int(row.par_value)
+            values["par_item_count"] += 1
+
+        state = state_by_pair.get((row.venue_id, row.item_id))
+        is_singleton = row.tracking_mode == "singleton_asset"
+        if state is None or state.status is None:
+            normalized_status = "not_checked"
+        elif is_singleton:
+            normalized_status = normalize_singleton_status(state.status)
+        else:
+            normalized_status = normalize_status(state.status)
+        values[f"{normalized_status}_count"] += 1
+
+        if normalized_status in {"low", "out"}:
+            suffix = "singleton" if is_singleton else "quantity"
+            values[f"{normalized_status}_{suffix}_count"] += 1
+
+        if is_singleton:
+            if normalized_status in {"good", "low"}:
+                values["singleton_current_total"] += 1
+        elif state is not None and state.raw_count is not None:
+            values["quantity_count_total"] += int(state.raw_count or 0)
+
+    for state in state_by_pair.values():
+        values = values_by_venue[state.venue_id]
+        values["last_updated_at"] = _latest_timestamp(
+            values["last_updated_at"],
+            state.status_updated_at,
+            state.count_updated_at,
+        )
+
+    for row in (
+        db.session.query(
+            VenueNote.venue_id.label("venue_id"),
+            func.count(VenueNote.id).label("notes_count"),
+        )
+        .filter(VenueNote.venue_id.in_(venue_ids))
+        .group_by(VenueNote.venue_id)
+        .all()
+    ):
+        values_by_venue[row.venue_id]["notes_count"] = int(row.notes_count or 0)
+
+    return values_by_venue
+
+
+def refresh_venue_rollups(venue_ids):
+    """Recompute and store rollups for `venue_ids`; the caller commits."""
+    values_by_venue = compute_venue_rollup_values(venue_ids)
+    if not values_by_venue:
+        return 0
+    existing = {
+        row.venue_id: row
+        for row in VenueRollup.query.filter(VenueRollup.venue_id.in_(values_by_venue)).all()
+    }
+    for venue_id, values in values_by_venue.items():
+        rollup = existing.get(venue_id)
+        if rollup is None:
+            rollup = VenueRollup(venue_id=venue_id)
+            db.session.add(rollup)
+        for field, value in values.items():
+            setattr(rollup, field, value)
+    db.session.flush()
+    return len(values_by_venue)
+
+
+def refresh_item_venue_rollups(item_ids):
+    """Refresh every venue that has (or had) a tracking link to one of `item_ids`."""
+    item_ids = sorted({int(item_id) for item_id in item_ids or []})
+    if not item_ids:
+        return 0
+    venue_ids = [
+        row.venue_id
+        for row in db.session.query(VenueItem.venue_id)
+        .filter(VenueItem.item_id.in_(item_ids))
+        .distinct()
+        .all()
+    ]
+    return refresh_venue_rollups(venue_ids)
+
+
+def delete_venue_rollups(venue_ids):
+    venue_ids = [int(venue_id) for venue_id in venue_ids or []]
+    if not venue_ids:
+        return 0
+    return VenueRollup.query.filter(VenueRollup.venue_id.in_(venue_ids)).delete(
+        synchronize_session=False
+    )
+
+
+def rebuild_venue_rollups():
+    """Recompute rollups for every venue; the caller commits."""
+    venue_ids = [row.id for row in db.session.query(Venue.id).all()]
+    db.session.query(VenueRollup).delete(synchronize_session=False)
+    return refresh_venue_rollups(venue_ids)
+
+
+def build_venue_rollup_map(venue_ids):
+    """Return rollup values per venue, computing (without storing) any that are missing."""
+    venue_ids = [int(venue_id) for venue_id in venue_ids or []]
+    if not venue_ids:
+        return {}
+    rollup_map = {}
+    for rollup in VenueRollup.query.filter(VenueRollup.venue_id.in_(venue_ids)).all():
+        values = {field: int(getattr(rollup, field) or 0) for field in ROLLUP_COUNT_FIELDS}
+        values["last_updated_at"] = ensure_utc(rollup.last_updated_at)
+        rollup_map[rollup.venue_id] = values
+    missing_venue_ids = [venue_id for venue_id in venue_ids if venue_id not in rollup_map]
+    if missing_venue_ids:
+        rollup_map.update(compute_venue_rollup_values(missing_venue_ids))
+    return rollup_map
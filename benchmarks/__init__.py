@@ -0,0 +1,9 @@
+"""Service-level micro-benchmarks for the inventory hot paths.
+
+Run `python -m benchmarks run` from the repo root; see `python -m benchmarks --help`.
+"""
+
+import os
+
+os.environ.setdefault("FLASK_ENV", "development")
+os.environ.setdefault("SECRET_KEY", "local-benchmark-secret")
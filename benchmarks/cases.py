@@ -0,0 +1,156 @@
+"""Benchmark cases: one callable per hot service path and parameter combination."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Item, OrderBatch, OrderLine, VenueItem
+from app.routes.main import (
+    ACTIVITY_SORT_OPTIONS,
+    RESTOCK_PAGE_SIZE,
+    build_activity_page,
+    build_venue_rows,
+)
+from app.routes.orders import build_order_line_rows, normalize_order_line_filters
+from app.routes.supplies import build_supply_audit_rows
+from app.services.orders import build_order_seed_rows, build_purchase_summary_rows
+from app.services.restocking import build_restock_rows
+from app.services.venue_profile import build_venue_profile_view_model
+
+RESTOCK_MODES = ("status", "counts")
+RESTOCK_SORTS = ("status_priority", "item", "venue", "last_checked")
+ACTIVITY_SEARCH = "item 001"
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    run: Callable
+    # Cases that drive the app through the test client manage their own request context.
+    uses_client: bool = False
+
+
+@dataclass
+class FixtureContext:
+    """Ids and prepared inputs the cases share for one fixture database."""
+
+    app: object
+    venue_id: int
+    quick_check_form: dict
+    order_line_rows: list
+    client: object = None
+
+
+def _busiest_venue_id():
+    return (
+        db.session.query(VenueItem.venue_id)
+        .filter(VenueItem.active.is_(True))
+        .group_by(VenueItem.venue_id)
+        .order_by(func.count(VenueItem.id).desc(), VenueItem.venue_id)
+        .limit(1)
+        .scalar()
+    )
+
+
+def _quick_check_form(venue_id):
+    rows = (
+        db.session.query(Item.id, Item.tracking_mode, Item.default_par_level)
+        .join(VenueItem, VenueItem.item_id == Item.id)
+        .filter(VenueItem.venue_id == venue_id, VenueItem.active.is_(True))
+        .all()
+    )
+    form = {"check_mode": "raw_counts"}
+    for row in rows:
+        if row.tracking_mode == "singleton_asset":
+            form[f"status_{row.id}"] = "good"
+        else:
+            form[f"count_{row.id}"] = str(max(0, (row.default_par_level or 4) // 2))
+    return form
+
+
+def _largest_order_line_rows():
+    batch_id = (
+        db.session.query(OrderLine.order_batch_id)
+        .group_by(OrderLine.order_batch_id)
+        .order_by(func.count(OrderLine.id).desc(), OrderLine.order_batch_id)
+        .limit(1)
+        .scalar()
+    )
+    if batch_id is None:
+        return []
+    batch = db.session.get(OrderBatch, batch_id)
+    return build_order_line_rows(batch, filters=normalize_order_line_filters({}))
+
+
+def prepare_fixture_context(app):
+    with app.test_request_context("/"):
+        venue_id = _busiest_venue_id()
+        context = FixtureContext(
+            app=app,
+            venue_id=venue_id,
+            quick_check_form=_quick_check_form(venue_id),
+            order_line_rows=_largest_order_line_rows(),
+        )
+    client = app.test_client()
+    client.post("/login", data={"quick_login_role": "staff"})
+    context.client = client
+    return context
+
+
+def _save_quick_check(context):
+    response = context.client.post(
+        f"/venues/{context.venue_id}/check",
+        data=context.quick_check_form,
+    )
+    if response.status_code != 302:
+        raise RuntimeError(f"Quick-check save returned {response.status_code}")
+
+
+def build_cases():
+    cases = [
+        BenchmarkCase("venue_rows", lambda context: build_venue_rows()),
+    ]
+    for mode in RESTOCK_MODES:
+        for sort in RESTOCK_SORTS:
+            cases.append(
+                BenchmarkCase(
+                    f"restock_rows[{mode},{sort}]",
+                    lambda context, mode=mode, sort=sort: build_restock_rows(
+                        mode=mode,
+                        sort=sort,
+                        limit=RESTOCK_PAGE_SIZE,
+                    ),
+                )
+            )
+    for sort in sorted(ACTIVITY_SORT_OPTIONS):
+        for search in ("", ACTIVITY_SEARCH):
+            label = "search" if search else "all"
+            cases.append(
+                BenchmarkCase(
+                    f"activity_page[{sort},{label}]",
+                    lambda context, sort=sort, search=search: build_activity_page(
+                        search=search,
+                        sort=sort,
+                    ),
+                )
+            )
+    cases.extend(
+        [
+            BenchmarkCase("supply_audit_rows", lambda context: build_supply_audit_rows()),
+            BenchmarkCase(
+                "venue_profile_view_model",
+                lambda context: build_venue_profile_view_model(context.venue_id),
+            ),
+            BenchmarkCase("order_seed_rows", lambda context: build_order_seed_rows()),
+            BenchmarkCase(
+                "purchase_summary_rows",
+                lambda context: build_purchase_summary_rows(context.order_line_rows),
+            ),
+            BenchmarkCase("quick_check_save", _save_quick_check, uses_client=True),
+        ]
+    )
+    return cases
@@ -0,0 +1,135 @@
+"""Command line entry point: `python -m benchmarks run|compare`."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks.fixtures import DEFAULT_SCALES, SCALES
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+DEFAULT_DB_DIR = BENCHMARKS_DIR / "fixtures_db"
+DEFAULT_OUTPUT = BENCHMARKS_DIR / "results" / "latest.json"
+DEFAULT_SEED = 20261018
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the inventory service hot paths against seeded fixture databases.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the cases and write JSON results.")
+    run_parser.add_argument(
+        "--scale",
+        action="append",
+        choices=sorted(SCALES),
+        help=f"Scale factor to run; repeatable (default: {', '.join(DEFAULT_SCALES)}).",
+    )
+    run_parser.add_argument("--iterations", type=int, default=5, help="Timed calls per case.")
+    run_parser.add_argument(
+        "--case",
+        action="append",
+        default=[],
+        help="Only run cases whose name contains this text; repeatable.",
+    )
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    run_parser.add_argument("--db-dir", type=Path, default=DEFAULT_DB_DIR)
+    run_parser.add_argument(
+        "--rebuild-fixtures",
+        action="store_true",
+        help="Reseed the fixture databases even if they already exist.",
+    )
+    run_parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+
+    compare_parser = subparsers.add_parser(
+        "compare",
+        help="Compare two result files and exit non-zero on regressions.",
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=None)
+    compare_parser.add_argument("--min-delta-ms", type=float, default=None)
+    return parser
+
+
+def _run(args):
+    from benchmarks.cases import build_cases, prepare_fixture_context
+    from benchmarks.fixtures import build_fixture_app
+    from benchmarks.harness import build_report, measure_case, write_report
+
+    if args.iterations < 1:
+        print("--iterations must be at least 1.", file=sys.stderr)
+        return 2
+    scale_names = args.scale or list(DEFAULT_SCALES)
+    cases = [
+        case
+        for case in build_cases()
+        if not args.case or any(fragment in case.name for fragment in args.case)
+    ]
+    if not cases:
+        print("No benchmark cases match the --case filter.", file=sys.stderr)
+        return 2
+
+    results = []
+    print(f"{'scale':<8} {'case':<40} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KiB':>10}")
+    for scale_name in scale_names:
+        scale = SCALES[scale_name]
+        app = build_fixture_app(
+            scale,
+            db_dir=args.db_dir,
+            seed=args.seed,
+            rebuild=args.rebuild_fixtures,
+        )
+        context = prepare_fixture_context(app)
+        for case in cases:
+            result = measure_case(case, context, iterations=args.iterations)
+            results.append({"scale": scale_name, **result})
+            print(
+                f"{scale_name:<8} {case.name:<40} {result['p50_ms']:>9.1f} "
+                f"{result['p95_ms']:>9.1f} {result['queries']:>8} {result['peak_kib']:>10.0f}"
+            )
+
+    write_report(build_report(results, scales=scale_names, seed=args.seed), args.output)
+    print(f"Wrote {len(results)} results to {args.output}.")
+    return 0
+
+
+def _compare(args):
+    from benchmarks.harness import (
+        DEFAULT_MIN_DELTA_MS,
+        DEFAULT_THRESHOLD,
+        compare_reports,
+        load_report,
+    )
+
+    rows = compare_reports(
+        load_report(args.baseline),
+        load_report(args.current),
+        threshold=DEFAULT_THRESHOLD if args.threshold is None else args.threshold,
+        min_delta_ms=DEFAULT_MIN_DELTA_MS if args.min_delta_ms is None else args.min_delta_ms,
+    )
+    if not rows:
+        print("No cases in common between the two result files.", file=sys.stderr)
+        return 2
+
+    regressions = 0
+    for row in rows:
+        change = "n/a" if row["change"] is None else f"{row['change']:+.0%}"
+        flag = "REGRESSION " + "; ".join(row["regressions"]) if row["regressions"] else "ok"
+        regressions += bool(row["regressions"])
+        print(
+            f"{row['scale']:<8} {row['case']:<40} {row['baseline_p50_ms']:>9.1f} "
+            f"{row['p50_ms']:>9.1f} {change:>6}  {flag}"
+        )
+    print(f"{regressions} regression(s) across {len(rows)} case(s).")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    args = _build_parser().parse_args(argv)
+    if args.command == "run":
+        return _run(args)
+    return _compare(args)
@@ -0,0 +1,78 @@
+"""Seeded SQLite fixture databases, one per scale factor."""
+
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+from app import create_app, db
+from app.services.perf_seed import rebuild_derived_tables, seed_perf_dataset
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    venues: int
+    items: int
+    days: int
+    checks_per_day: int = 1
+
+
+SCALES = {
+    scale.name: scale
+    for scale in (
+        Scale("small", venues=5, items=60, days=60),
+        Scale("medium", venues=20, items=150, days=180),
+        Scale("large", venues=40, items=300, days=365),
+    )
+}
+DEFAULT_SCALES = ("small", "medium")
+
+
+def fixture_path(db_dir, scale, seed):
+    return Path(db_dir) / f"bench-{scale.name}-{seed}.sqlite3"
+
+
+def run_copy_path(db_dir, scale, seed):
+    return Path(db_dir) / f"bench-{scale.name}-{seed}.run.sqlite3"
+
+
+def _create_fixture_app(path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{path.resolve().as_posix()}"
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, LOGIN_EMAIL_2FA_ENABLED=False)
+    return app
+
+
+def build_fixture_app(scale, *, db_dir, seed, rebuild=False):
+    """Return an app bound to a fresh copy of the seeded database for `scale`.
+
+    The seeded file is built on first use and reused across runs; pass
+    `rebuild=True` after schema or seeding changes so old files do not skew
+    comparisons. Cases run against a copy that is replaced on every run, so
+    writes such as the quick-check save never reach the seeded file.
+    """
+    path = fixture_path(db_dir, scale, seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if rebuild and path.exists():
+        path.unlink()
+    if not path.exists():
+        seed_app = _create_fixture_app(path)
+        with seed_app.app_context():
+            db.create_all()
+            seed_perf_dataset(
+                venues=scale.venues,
+                items=scale.items,
+                days=scale.days,
+                checks_per_day=scale.checks_per_day,
+                seed=seed,
+            )
+            rebuild_derived_tables()
+            db.session.commit()
+            db.engine.dispose()
+
+    run_path = run_copy_path(db_dir, scale, seed)
+    shutil.copyfile(path, run_path)
+    return _create_fixture_app(run_path)
@@ -0,0 +1,166 @@
+"""Timing, query counting, peak-memory sampling and baseline comparison."""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import event
+
+from app import db
+
+# A case regresses when it is this much slower, or peaks this much higher, than the baseline.
+DEFAULT_THRESHOLD = 0.20
+# Ignore timing differences smaller than this; sub-millisecond cases are mostly noise.
+DEFAULT_MIN_DELTA_MS = 1.0
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of `values`."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextmanager
+def count_queries(engine):
+    counter = {"queries": 0}
+
+    def before_cursor_execute(*args):
+        counter["queries"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _call_case(case, context):
+    if case.uses_client:
+        case.run(context)
+        return
+    # A fresh request per call, so request-scoped caches and the session start cold.
+    with context.app.test_request_context("/"):
+        case.run(context)
+
+
+def measure_case(case, context, *, iterations, warmup=1):
+    """Run `case` and return p50/p95 wall time, queries per call and peak traced memory."""
+    with context.app.app_context():
+        engine = db.engine
+
+    for _ in range(warmup):
+        _call_case(case, context)
+
+    durations_ms = []
+    with count_queries(engine) as counter:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            _call_case(case, context)
+            durations_ms.append((time.perf_counter() - started) * 1000)
+
+    # tracemalloc slows every allocation down, so memory gets its own untimed call.
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _call_case(case, context)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "case": case.name,
+        "iterations": iterations,
+        "p50_ms": round(percentile(durations_ms, 0.50), 3),
+        "p95_ms": round(percentile(durations_ms, 0.95), 3),
+        "mean_ms": round(statistics.fmean(durations_ms), 3),
+        "queries": counter["queries"] // iterations,
+        "peak_kib": round(peak_bytes / 1024, 1),
+    }
+
+
+def _git_commit():
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return (completed.stdout or "").strip() or None
+
+
+def build_report(results, *, scales, seed):
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "seed": seed,
+        "scales": scales,
+        "results": results,
+    }
+
+
+def write_report(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+def load_report(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare_reports(
+    baseline,
+    current,
+    *,
+    threshold=DEFAULT_THRESHOLD,
+    min_delta_ms=DEFAULT_MIN_DELTA_MS,
+):
+    """Return one row per case present in both reports, flagging regressions.
+
+    A case regresses when its p50 grows by more than `threshold` (and by at
+    least `min_delta_ms`), when it issues more queries, or when its peak memory
+    grows by more than `threshold`.
+    """
+    baseline_by_key = {(row["scale"], row["case"]): row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        before = baseline_by_key.get((row["scale"], row["case"]))
+        if before is None:
+            continue
+        reasons = []
+        delta_ms = row["p50_ms"] - before["p50_ms"]
+        if delta_ms > min_delta_ms and row["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            reasons.append(f"p50 {before['p50_ms']:.1f}ms -> {row['p50_ms']:.1f}ms")
+        if row["queries"] > before["queries"]:
+            reasons.append(f"queries {before['queries']} -> {row['queries']}")
+        if row["peak_kib"] > before["peak_kib"] * (1 + threshold):
+            reasons.append(f"peak {before['peak_kib']:.0f}KiB -> {row['peak_kib']:.0f}KiB")
+        rows.append(
+            {
+                "scale": row["scale"],
+                "case": row["case"],
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": row["p50_ms"],
+                "change": (row["p50_ms"] / before["p50_ms"] - 1) if before["p50_ms"] else None,
+                "regressions": reasons,
+            }
+        )
+    return rows
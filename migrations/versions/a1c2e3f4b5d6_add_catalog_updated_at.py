@@ -0,0 +1,34 @@
+"""add updated_at to items, venues and venue items
+
+Revision ID: a1c2e3f4b5d6
+Revises: f0a1b2c3d4e5
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a1c2e3f4b5d6"
+down_revision = "f0a1b2c3d4e5"
+branch_labels = None
+depends_on = None
+
+TABLES = ("items", "venues", "venue_items")
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column("updated_at", existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column("updated_at")
@@ -0,0 +1,96 @@
+"""add inventory activity events
+
+Revision ID: a5b6c7d8e9f0
+Revises: f4a5b6c7d8e9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a5b6c7d8e9f0"
+down_revision = "f4a5b6c7d8e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "inventory_activity_events" not in tables:
+        op.create_table(
+            "inventory_activity_events",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("event_type", sa.String(length=20), nullable=False),
+            sa.Column("source_id", sa.Integer(), nullable=False),
+            sa.Column("venue_id", sa.Integer(), nullable=False),
+            sa.Column("item_id", sa.Integer(), nullable=False),
+            sa.Column("actor_user_id", sa.Integer(), nullable=True),
+            sa.Column("old_status", sa.String(length=20), nullable=True),
+            sa.Column("new_status", sa.String(length=20), nullable=True),
+            sa.Column("old_raw_count", sa.Integer(), nullable=True),
+            sa.Column("new_raw_count", sa.Integer(), nullable=True),
+            sa.Column("changed_at", sa.DateTime(), nullable=False),
+            sa.Column("venue_name", sa.String(length=120), nullable=False),
+            sa.Column("item_name", sa.String(length=120), nullable=False),
+            sa.Column("actor_name", sa.String(length=255), nullable=False),
+            sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+            sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+            sa.ForeignKeyConstraint(["actor_user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint(
+                "event_type",
+                "source_id",
+                "item_id",
+                name="uq_inventory_activity_event_source",
+            ),
+        )
+        op.create_index(
+            op.f("ix_inventory_activity_events_changed_at"),
+            "inventory_activity_events",
+            ["changed_at"],
+            unique=False,
+        )
+        op.create_index(
+            op.f("ix_inventory_activity_events_item_id"),
+            "inventory_activity_events",
+            ["item_id"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_inventory_activity_events_venue_changed",
+            "inventory_activity_events",
+            ["venue_id", "changed_at"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_inventory_activity_events_actor_changed",
+            "inventory_activity_events",
+            ["actor_user_id", "changed_at"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_inventory_activity_events_type_changed",
+            "inventory_activity_events",
+            ["event_type", "changed_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "inventory_activity_events" in tables:
+        op.drop_index("ix_inventory_activity_events_type_changed", table_name="inventory_activity_events")
+        op.drop_index("ix_inventory_activity_events_actor_changed", table_name="inventory_activity_events")
+        op.drop_index("ix_inventory_activity_events_venue_changed", table_name="inventory_activity_events")
+        op.drop_index(op.f("ix_inventory_activity_events_item_id"), table_name="inventory_activity_events")
+        op.drop_index(op.f("ix_inventory_activity_events_changed_at"), table_name="inventory_activity_events")
+        op.drop_table("inventory_activity_events")
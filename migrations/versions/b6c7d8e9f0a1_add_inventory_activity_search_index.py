@@ -0,0 +1,76 @@
+"""add inventory activity search index
+
+Revision ID: b6c7d8e9f0a1
+Revises: a5b6c7d8e9f0
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b6c7d8e9f0a1"
+down_revision = "a5b6c7d8e9f0"
+branch_labels = None
+depends_on = None
+
+FTS_TABLE = "inventory_activity_events_fts"
+GIN_INDEX = "ix_inventory_activity_events_search"
+
+
+def _document_sql(prefix=""):
+    return (
+        f"{prefix}venue_name || ' ' || {prefix}item_name || ' ' || {prefix}actor_name || ' ' || "
+        f"CASE WHEN {prefix}event_type = 'status' THEN "
+        f"'status ' || replace(coalesce({prefix}old_status, 'not checked'), '_', ' ') || ' ' || "
+        f"replace(coalesce({prefix}new_status, ''), '_', ' ') "
+        f"ELSE 'raw count ' || coalesce(CAST({prefix}old_raw_count AS TEXT), 'no prior count') || ' ' || "
+        f"coalesce(CAST({prefix}new_raw_count AS TEXT), '') END"
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    if "inventory_activity_events" not in tables:
+        return
+
+    if bind.dialect.name == "sqlite":
+        if FTS_TABLE in tables:
+            return
+        new_document = _document_sql("new.")
+        old_document = _document_sql("old.")
+        op.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, content='')")
+        op.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON inventory_activity_events BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, {new_document}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON inventory_activity_events BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, {old_document}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON inventory_activity_events BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, {old_document}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, {new_document}); END"
+        )
+        op.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, document) SELECT id, {_document_sql()} FROM inventory_activity_events"
+        )
+    elif bind.dialect.name == "postgresql":
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON inventory_activity_events USING gin "
+            f"(to_tsvector('simple', regexp_replace({_document_sql()}, '[^[:alnum:]]+', ' ', 'g')))"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif bind.dialect.name == "postgresql":
+        op.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
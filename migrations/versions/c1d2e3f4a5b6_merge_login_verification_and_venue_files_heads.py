@@ -0,0 +1,24 @@
+"""merge login verification and venue files heads
+
+Revision ID: c1d2e3f4a5b6
+Revises: a9b8c7d6e5f4, b7e2c9d4a6f1
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c1d2e3f4a5b6'
+down_revision = ('a9b8c7d6e5f4', 'b7e2c9d4a6f1')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
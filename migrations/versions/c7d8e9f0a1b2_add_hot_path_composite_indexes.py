@@ -0,0 +1,52 @@
+"""add composite indexes for latest-signal and tracking lookups
+
+Revision ID: c7d8e9f0a1b2
+Revises: b6c7d8e9f0a1
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d8e9f0a1b2"
+down_revision = "b6c7d8e9f0a1"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("checks", "ix_checks_venue_created", ["venue_id", "created_at", "id"]),
+    ("check_lines", "ix_check_lines_item_check", ["item_id", "check_id"]),
+    ("count_sessions", "ix_count_sessions_venue_created", ["venue_id", "created_at", "id"]),
+    ("count_lines", "ix_count_lines_item_session", ["item_id", "count_session_id"]),
+    ("venue_items", "ix_venue_items_venue_active", ["venue_id", "active"]),
+    ("venue_items", "ix_venue_items_item_active", ["item_id", "active"]),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table_name, index_name, columns in INDEXES:
+        if table_name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        if index_name not in existing:
+            op.create_index(index_name, table_name, columns, unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for table_name, index_name, _ in reversed(INDEXES):
+        if table_name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        if index_name in existing:
+            op.drop_index(index_name, table_name=table_name)
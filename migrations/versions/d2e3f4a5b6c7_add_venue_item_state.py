@@ -0,0 +1,61 @@
+"""add venue item state
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d2e3f4a5b6c7"
+down_revision = "c1d2e3f4a5b6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "venue_item_state" not in tables:
+        op.create_table(
+            "venue_item_state",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("venue_id", sa.Integer(), nullable=False),
+            sa.Column("item_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("status_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("status_user_id", sa.Integer(), nullable=True),
+            sa.Column("status_check_id", sa.Integer(), nullable=True),
+            sa.Column("raw_count", sa.Integer(), nullable=True),
+            sa.Column("count_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("count_user_id", sa.Integer(), nullable=True),
+            sa.Column("count_session_id", sa.Integer(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+            sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+            sa.ForeignKeyConstraint(["status_user_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["status_check_id"], ["checks.id"]),
+            sa.ForeignKeyConstraint(["count_user_id"], ["users.id"]),
+            sa.ForeignKeyConstraint(["count_session_id"], ["count_sessions.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("venue_id", "item_id", name="uq_venue_item_state"),
+        )
+        op.create_index(op.f("ix_venue_item_state_venue_id"), "venue_item_state", ["venue_id"], unique=False)
+        op.create_index(op.f("ix_venue_item_state_item_id"), "venue_item_state", ["item_id"], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "venue_item_state" in tables:
+        op.drop_index(op.f("ix_venue_item_state_item_id"), table_name="venue_item_state")
+        op.drop_index(op.f("ix_venue_item_state_venue_id"), table_name="venue_item_state")
+        op.drop_table("venue_item_state")
@@ -0,0 +1,73 @@
+"""add request performance samples
+
+Revision ID: d8e9f0a1b2c3
+Revises: c7d8e9f0a1b2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d8e9f0a1b2c3"
+down_revision = "c7d8e9f0a1b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "request_performance_samples" not in tables:
+        op.create_table(
+            "request_performance_samples",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("recorded_at", sa.DateTime(), nullable=False),
+            sa.Column("endpoint", sa.String(length=120), nullable=False),
+            sa.Column("method", sa.String(length=10), nullable=False),
+            sa.Column("args_fingerprint", sa.String(length=16), nullable=False),
+            sa.Column("args_summary", sa.String(length=255), nullable=False, server_default=""),
+            sa.Column("user_role", sa.String(length=20), nullable=False),
+            sa.Column("status_code", sa.Integer(), nullable=False),
+            sa.Column("total_ms", sa.Float(), nullable=False),
+            sa.Column("db_ms", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("statement_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("response_bytes", sa.Integer(), nullable=True),
+            sa.Column("reason", sa.String(length=10), nullable=False),
+            sa.Column("weight", sa.Float(), nullable=False, server_default="1"),
+            sa.Column("top_statements_json", sa.Text(), nullable=False, server_default="[]"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_request_performance_samples_recorded_at",
+            "request_performance_samples",
+            ["recorded_at"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_request_performance_samples_endpoint_recorded",
+            "request_performance_samples",
+            ["endpoint", "recorded_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "request_performance_samples" in tables:
+        op.drop_index(
+            "ix_request_performance_samples_endpoint_recorded",
+            table_name="request_performance_samples",
+        )
+        op.drop_index(
+            "ix_request_performance_samples_recorded_at",
+            table_name="request_performance_samples",
+        )
+        op.drop_table("request_performance_samples")
@@ -0,0 +1,66 @@
+"""add venue rollups
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e3f4a5b6c7d8"
+down_revision = "d2e3f4a5b6c7"
+branch_labels = None
+depends_on = None
+
+COUNT_COLUMNS = (
+    "total_tracked",
+    "good_count",
+    "ok_count",
+    "low_count",
+    "out_count",
+    "not_checked_count",
+    "low_quantity_count",
+    "low_singleton_count",
+    "out_quantity_count",
+    "out_singleton_count",
+    "quantity_count_total",
+    "singleton_current_total",
+    "total_par",
+    "par_item_count",
+    "notes_count",
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "venue_rollups" not in tables:
+        op.create_table(
+            "venue_rollups",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("venue_id", sa.Integer(), nullable=False),
+            *[
+                sa.Column(column_name, sa.Integer(), nullable=False, server_default="0")
+                for column_name in COUNT_COLUMNS
+            ],
+            sa.Column("last_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["venue_id"], ["venues.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("venue_id"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "venue_rollups" in tables:
+        op.drop_table("venue_rollups")
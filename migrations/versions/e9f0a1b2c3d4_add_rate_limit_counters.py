@@ -0,0 +1,50 @@
+"""add rate limit counters
+
+Revision ID: e9f0a1b2c3d4
+Revises: d8e9f0a1b2c3
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e9f0a1b2c3d4"
+down_revision = "d8e9f0a1b2c3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "rate_limit_counters" not in tables:
+        op.create_table(
+            "rate_limit_counters",
+            sa.Column("bucket", sa.String(length=64), nullable=False),
+            sa.Column("key", sa.String(length=255), nullable=False),
+            sa.Column("window_start", sa.BigInteger(), autoincrement=False, nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("expires_at", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("bucket", "key", "window_start"),
+        )
+        op.create_index(
+            "ix_rate_limit_counters_expires_at",
+            "rate_limit_counters",
+            ["expires_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "rate_limit_counters" in tables:
+        op.drop_index("ix_rate_limit_counters_expires_at", table_name="rate_limit_counters")
+        op.drop_table("rate_limit_counters")
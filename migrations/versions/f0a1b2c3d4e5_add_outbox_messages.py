@@ -0,0 +1,66 @@
+"""add outbox messages
+
+Revision ID: f0a1b2c3d4e5
+Revises: e9f0a1b2c3d4
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f0a1b2c3d4e5"
+down_revision = "e9f0a1b2c3d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "outbox_messages" not in tables:
+        op.create_table(
+            "outbox_messages",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("to_address", sa.String(length=255), nullable=False),
+            sa.Column("subject", sa.String(length=255), nullable=False),
+            sa.Column("body_text", sa.Text(), nullable=True),
+            sa.Column("body_html", sa.Text(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=True),
+            sa.Column("claim_token", sa.String(length=32), nullable=True),
+            sa.Column("claimed_at", sa.DateTime(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_outbox_messages_claim_token",
+            "outbox_messages",
+            ["claim_token"],
+            unique=False,
+        )
+        op.create_index(
+            "ix_outbox_messages_status_next_attempt",
+            "outbox_messages",
+            ["status", "next_attempt_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "outbox_messages" in tables:
+        op.drop_index("ix_outbox_messages_status_next_attempt", table_name="outbox_messages")
+        op.drop_index("ix_outbox_messages_claim_token", table_name="outbox_messages")
+        op.drop_table("outbox_messages")
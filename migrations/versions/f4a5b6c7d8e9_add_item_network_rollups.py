@@ -0,0 +1,66 @@
+"""add item network rollups
+
+Revision ID: f4a5b6c7d8e9
+Revises: e3f4a5b6c7d8
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f4a5b6c7d8e9"
+down_revision = "e3f4a5b6c7d8"
+branch_labels = None
+depends_on = None
+
+COUNT_COLUMNS = (
+    "tracked_venue_count",
+    "counted_venue_count",
+    "missing_count_venue_count",
+    "zero_count_venue_count",
+    "total_raw_count",
+    "singleton_present_venue_count",
+    "singleton_missing_venue_count",
+    "singleton_damaged_venue_count",
+    "total_par_count",
+    "par_venue_count",
+    "signal_count_total",
+    "signal_counted_venue_count",
+    "singleton_checked_venue_count",
+    "singleton_issue_venue_count",
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "item_network_rollups" not in tables:
+        op.create_table(
+            "item_network_rollups",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("item_id", sa.Integer(), nullable=False),
+            *[
+                sa.Column(column_name, sa.Integer(), nullable=False, server_default="0")
+                for column_name in COUNT_COLUMNS
+            ],
+            sa.Column("last_count_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("venue_details_json", sa.Text(), nullable=False, server_default="[]"),
+            sa.Column("refreshed_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["item_id"], ["items.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("item_id"),
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "item_network_rollups" in tables:
+        op.drop_table("item_network_rollups")
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""Concurrent HTTP load test against a locally running server.
+
+Signs in staff and viewer accounts through the real login form, then replays a
+weighted mix of dashboard, restocking scroll, supplies, venue, quick-check and
+CSV export traffic from parallel virtual users. Reports throughput, latency
+percentiles per endpoint, error rates and database busy (lock/timeout) errors.
+
+Standard library only, so it runs from any machine that can reach the server.
+The server must have LOGIN_EMAIL_2FA_ENABLED=0. Quick-check saves write real
+rows, so point it at a throwaway or perf-seeded database.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.cookiejar
+import json
+import math
+import random
+import re
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+
+DEFAULT_PASSWORD = "local-test-password"
+DATABASE_BUSY_HEADER = "X-Database-Busy"
+DEFAULT_MIX = {
+    "dashboard_venues": 3,
+    "dashboard_restocking": 2,
+    "dashboard_activity": 2,
+    "restocking_scroll": 3,
+    "supplies": 2,
+    "venue_detail": 3,
+    "quick_check_get": 2,
+    "quick_check_post": 2,
+    "export_supplies_csv": 1,
+    "export_venue_csv": 1,
+}
+# Scenarios that write; viewer sessions skip them.
+WRITE_SCENARIOS = {"quick_check_post"}
+
+CSRF_TOKEN_PATTERN = re.compile(r'name="csrf_token"\s+value="([^"]+)"')
+VENUE_LINK_PATTERN = re.compile(r'href="/venues/(\d+)(?:\?[^"]*)?"')
+COUNT_INPUT_PATTERN = re.compile(r'name="count_(\d+)"')
+STATUS_INPUT_PATTERN = re.compile(r'name="status_(\d+)"')
+
+
+class LoadTestError(RuntimeError):
+    pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+@dataclass
+class Response:
+    status: int
+    body: bytes
+    headers: dict
+
+
+@dataclass
+class EndpointStats:
+    durations_ms: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency and error collection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint, elapsed_ms, error_kind=None):
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.durations_ms.append(elapsed_ms)
+            if error_kind:
+                stats.errors[error_kind] = stats.errors.get(error_kind, 0) + 1
+
+
+def classify_response(response, expected_status):
+    if response.status == expected_status:
+        return None
+    if response.status == 503 and response.headers.get(DATABASE_BUSY_HEADER):
+        return "db_busy"
+    if response.status in (301, 302, 303) and "/login" in response.headers.get("Location", ""):
+        return "signed_out"
+    return f"http_{response.status}"
+
+
+class Session:
+    """One signed-in browser: its own cookie jar, no automatic redirects."""
+
+    def __init__(self, base_url, *, timeout, recorder):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect(),
+        )
+
+    def fetch(self, path, *, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as handle:
+                return Response(handle.status, handle.read(), dict(handle.headers))
+        except urllib.error.HTTPError as error:
+            return Response(error.code, error.read(), dict(error.headers))
+
+    def call(self, endpoint, path, *, data=None, expected_status=200):
+        """Fetch `path`, record it under `endpoint`, and return the response or None."""
+        started = time.perf_counter()
+        try:
+            response = self.fetch(path, data=data)
+        except (socket.timeout, TimeoutError):
+            self.recorder.record(endpoint, (time.perf_counter() - started) * 1000, "timeout")
+            return None
+        except (urllib.error.URLError, ConnectionError) as error:
+            kind = "timeout" if isinstance(getattr(error, "reason", None), socket.timeout) else None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.recorder.record(endpoint, elapsed_ms, kind or "connection")
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        error_kind = classify_response(response, expected_status)
+        self.recorder.record(endpoint, elapsed_ms, error_kind)
+        return None if error_kind else response
+
+    def login(self, email, password):
+        page = self.fetch("/login")
+        form = {"email": email, "password": password}
+        token = _csrf_token(page.body)
+        if token:
+            form["csrf_token"] = token
+        response = self.call("login", "/login", data=form, expected_status=302)
+        location = response.headers.get("Location", "") if response else ""
+        if response is None or "/login" in location:
+            raise LoadTestError(f"Could not sign in as {email}; check the password.")
+        if "verify-login" in location:
+            raise LoadTestError(
+                f"Sign-in for {email} asked for an email code; "
+                "start the server with LOGIN_EMAIL_2FA_ENABLED=0."
+            )
+
+
+def _csrf_token(body):
+    match = CSRF_TOKEN_PATTERN.search(body.decode("utf-8", "replace"))
+    return match.group(1) if match else None
+
+
+def discover_venue_ids(session):
+    response = session.fetch("/dashboard?tab=venues")
+    venue_ids = sorted({int(value) for value in VENUE_LINK_PATTERN.findall(response.body.decode())})
+    if not venue_ids:
+        raise LoadTestError("No venues found on the dashboard; seed data before load testing.")
+    return venue_ids
+
+
+@dataclass
+class VirtualUser:
+    session: Session
+    role: str
+    venue_ids: list
+    rng: random.Random
+    scroll_pages: int
+
+
+def scenario_dashboard_venues(user):
+    user.session.call("dashboard_venues", "/dashboard?tab=venues")
+
+
+def scenario_dashboard_restocking(user):
+    user.session.call("dashboard_restocking", "/dashboard?tab=restocking")
+
+
+def scenario_dashboard_activity(user):
+    user.session.call("dashboard_activity", "/dashboard?tab=activity")
+
+
+def scenario_restocking_scroll(user):
+    mode = user.rng.choice(("status", "counts"))
+    offset = 0
+    for _ in range(user.scroll_pages):
+        response = user.session.call(
+            "restocking_rows",
+            f"/dashboard/restocking_rows?restock_mode={mode}&offset={offset}",
+        )
+        if response is None:
+            return
+        page = json.loads(response.body)
+        if not page.get("has_more"):
+            return
+        offset += page.get("limit") or len(page.get("rows") or [])
+
+
+def scenario_supplies(user):
+    user.session.call("supplies", "/supplies")
+
+
+def scenario_venue_detail(user):
+    user.session.call("venue_detail", f"/venues/{user.rng.choice(user.venue_ids)}")
+
+
+def scenario_quick_check_get(user):
+    venue_id = user.rng.choice(user.venue_ids)
+    page = user.session.call("quick_check_get", f"/venues/{venue_id}/check?mode=raw_counts")
+    return venue_id, page
+
+
+def scenario_quick_check_post(user):
+    venue_id, page = scenario_quick_check_get(user)
+    if page is None:
+        return
+    html = page.body.decode("utf-8", "replace")
+    form = {"check_mode": "raw_counts"}
+    count_ids = set(COUNT_INPUT_PATTERN.findall(html))
+    for item_id in count_ids:
+        form[f"count_{item_id}"] = str(user.rng.randint(0, 12))
+    for item_id in set(STATUS_INPUT_PATTERN.findall(html)) - count_ids:
+        form[f"status_{item_id}"] = user.rng.choice(("good", "low", "out"))
+    token = _csrf_token(page.body)
+    if token:
+        form["csrf_token"] = token
+    user.session.call(
+        "quick_check_post",
+        f"/venues/{venue_id}/check",
+        data=form,
+        expected_status=302,
+    )
+
+
+def scenario_export_supplies_csv(user):
+    user.session.call("export_supplies_csv", "/supplies/export.csv?scope=all")
+
+
+def scenario_export_venue_csv(user):
+    venue_id = user.rng.choice(user.venue_ids)
+    user.session.call("export_venue_csv", f"/venues/{venue_id}/inventory/export.csv?scope=all")
+
+
+SCENARIOS = {
+    "dashboard_venues": scenario_dashboard_venues,
+    "dashboard_restocking": scenario_dashboard_restocking,
+    "dashboard_activity": scenario_dashboard_activity,
+    "restocking_scroll": scenario_restocking_scroll,
+    "supplies": scenario_supplies,
+    "venue_detail": scenario_venue_detail,
+    "quick_check_get": scenario_quick_check_get,
+    "quick_check_post": scenario_quick_check_post,
+    "export_supplies_csv": scenario_export_supplies_csv,
+    "export_venue_csv": scenario_export_venue_csv,
+}
+
+
+def parse_mix(raw_value):
+    """Parse `name=weight,...` overrides on top of DEFAULT_MIX; weight 0 drops a scenario."""
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, (raw_value or "").split(",")):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise LoadTestError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}.")
+        try:
+            mix[name] = max(0, int(weight))
+        except ValueError as error:
+            raise LoadTestError(f"Scenario weight for {name!r} must be a whole number.") from error
+    return {name: weight for name, weight in mix.items() if weight}
+
+
+@dataclass
+class LoadTestConfig:
+    base_url: str
+    accounts: list  # (email, role) pairs; virtual users cycle through them
+    password: str = DEFAULT_PASSWORD
+    users: int = 8
+    duration: float = 30.0
+    ramp_up: float = 0.0
+    think_time: float = 0.0
+    timeout: float = 30.0
+    scroll_pages: int = 3
+    mix: dict = field(default_factory=lambda: dict(DEFAULT_MIX))
+    seed: int = 0
+
+
+def _run_virtual_user(config, index, venue_ids, recorder, started_at, errors):
+    email, role = config.accounts[index % len(config.accounts)]
+    rng = random.Random(config.seed + index)
+    if config.ramp_up:
+        time.sleep(config.ramp_up * index / config.users)
+    session = Session(config.base_url, timeout=config.timeout, recorder=recorder)
+    try:
+        session.login(email, config.password)
+    except LoadTestError as error:
+        errors.append(str(error))
+        return
+    mix = {
+        name: weight
+        for name, weight in config.mix.items()
+        if role != "viewer" or name not in WRITE_SCENARIOS
+    }
+    names, weights = list(mix), list(mix.values())
+    user = VirtualUser(session, role, venue_ids, rng, config.scroll_pages)
+    deadline = started_at + config.ramp_up + config.duration
+    while names and time.perf_counter() < deadline:
+        SCENARIOS[rng.choices(names, weights)[0]](user)
+        if config.think_time:
+            time.sleep(rng.uniform(0, config.think_time))
+
+
+def run_load_test(config):
+    """Run the configured load and return the summary produced by `summarize`."""
+    recorder = Recorder()
+    probe = Session(config.base_url, timeout=config.timeout, recorder=Recorder())
+    probe.login(config.accounts[0][0], config.password)
+    venue_ids = discover_venue_ids(probe)
+
+    login_errors = []
+    started_at = time.perf_counter()
+    threads = [
+        threading.Thread(
+            target=_run_virtual_user,
+            args=(config, index, venue_ids, recorder, started_at, login_errors),
+            daemon=True,
+        )
+        for index in range(config.users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if login_errors:
+        raise LoadTestError(login_errors[0])
+    return summarize(recorder, time.perf_counter() - started_at)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+
+def summarize(recorder, elapsed_seconds):
+    endpoints = {}
+    total_requests = 0
+    error_totals = {}
+    for name, stats in sorted(recorder.endpoints.items()):
+        count = len(stats.durations_ms)
+        error_count = sum(stats.errors.values())
+        total_requests += count
+        for kind, value in stats.errors.items():
+            error_totals[kind] = error_totals.get(kind, 0) + value
+        endpoints[name] = {
+            "requests": count,
+            "errors": error_count,
+            "error_rate": round(error_count / count, 4) if count else 0.0,
+            "error_kinds": dict(sorted(stats.errors.items())),
+            "p50_ms": round(percentile(stats.durations_ms, 0.50), 1),
+            "p95_ms": round(percentile(stats.durations_ms, 0.95), 1),
+            "p99_ms": round(percentile(stats.durations_ms, 0.99), 1),
+            "max_ms": round(max(stats.durations_ms), 1),
+        }
+    total_errors = sum(error_totals.values())
+    return {
+        "elapsed_seconds": round(elapsed_seconds, 2),
+        "requests": total_requests,
+        "throughput_rps": round(total_requests / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+        "errors": total_errors,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "error_kinds": dict(sorted(error_totals.items())),
+        "db_busy_errors": error_totals.get("db_busy", 0),
+        "timeouts": error_totals.get("timeout", 0),
+        "endpoints": endpoints,
+    }
+
+
+def format_summary(summary):
+    lines = [
+        f"{'endpoint':<22} {'reqs':>7} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'max ms':>9}"
+    ]
+    for name, row in summary["endpoints"].items():
+        lines.append(
+            f"{name:<22} {row['requests']:>7} {row['error_rate']:>7.1%} {row['p50_ms']:>9.1f} "
+            f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f}"
+        )
+    lines.append(
+        f"{summary['requests']} requests in {summary['elapsed_seconds']:.1f}s "
+        f"({summary['throughput_rps']:.1f} req/s), {summary['errors']} errors "
+        f"({summary['error_rate']:.1%}); database busy: {summary['db_busy_errors']}, "
+        f"timeouts: {summary['timeouts']}"
+    )
+    if summary["error_kinds"]:
+        kinds = ", ".join(f"{kind}={count}" for kind, count in summary["error_kinds"].items())
+        lines.append(f"Errors by kind: {kinds}")
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--staff-user",
+        action="append",
+        default=[],
+        help="Staff account email; repeatable (default: staff@example.com).",
+    )
+    parser.add_argument(
+        "--viewer-user",
+        action="append",
+        default=[],
+        help="Viewer account email; repeatable. Viewers skip quick-check saves.",
+    )
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password for every account.")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of steady load.")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds to start all users.")
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Maximum random pause between scenarios, in seconds.",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout.")
+    parser.add_argument("--scroll-pages", type=int, default=3)
+    parser.add_argument(
+        "--mix",
+        default="",
+        help="Scenario weight overrides, e.g. quick_check_post=0,supplies=5.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this file.")
+    parser.add_argument(
+        "--max-error-rate",
+        type=float,
+        default=None,
+        help="Exit 1 when the overall error rate is above this fraction.",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    accounts = [(email, "staff") for email in args.staff_user]
+    accounts += [(email, "viewer") for email in args.viewer_user]
+    if not args.staff_user and not args.viewer_user:
+        accounts = [("staff@example.com", "staff")]
+    try:
+        config = LoadTestConfig(
+            base_url=args.base_url,
+            accounts=accounts,
+            password=args.password,
+            users=max(1, args.users),
+            duration=args.duration,
+            ramp_up=args.ramp_up,
+            think_time=args.think_time,
+            timeout=args.timeout,
+            scroll_pages=max(1, args.scroll_pages),
+            mix=parse_mix(args.mix),
+            seed=args.seed,
+        )
+        summary = run_load_test(config)
+    except LoadTestError as error:
+        print(f"[FAIL] {error}", file=sys.stderr)
+        return 2
+
+    print(format_summary(summary))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(summary, handle, indent=2)
+            handle.write("\n")
+    if args.max_error_rate is not None and summary["error_rate"] > args.max_error_rate:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -18,6 +18,10 @@ from app.models import (
     VenueItem,
     VenueItemCount,
 )
+from app.services.inventory_activity import rebuild_inventory_activity_events
+from app.services.item_network_rollups import rebuild_item_network_rollups
+from app.services.venue_item_state import rebuild_venue_item_state
+from app.services.venue_rollups import rebuild_venue_rollups
 
 
 FALLBACK_VENUES = [
@@ -351,6 +355,10 @@ def seed_activity_history(days, events_per_day, count_ratio, seed, commit_every)
             if session_counter % max(commit_every, 1) == 0:
                 db.session.commit()
 
+    rebuild_venue_item_state()
+    rebuild_venue_rollups()
+    rebuild_item_network_rollups()
+    rebuild_inventory_activity_events()
     db.session.commit()
 
     estimated_activity_rows = total_check_lines + total_count_lines
@@ -4,6 +4,7 @@ from collections import Counter, defaultdict
 
 from app import create_app, db
 from app.models import Item, Venue, VenueItem, VenueItemCount
+from app.services.item_network_rollups import rebuild_item_network_rollups
 
 
 SCENARIO_ORDER = ("complete", "partial", "no_counts")
@@ -261,6 +262,7 @@ def seed_supplies_counts(args):
             existing.raw_count = raw_count
             updated += 1
 
+    rebuild_item_network_rollups()
     db.session.commit()
 
     item_coverage = Counter()
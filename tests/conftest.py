@@ -5,6 +5,9 @@ import pytest
 os.environ.setdefault("FLASK_ENV", "development")
 os.environ.setdefault("SECRET_KEY", "test-secret-key")
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+# Statement-counting tests must not see the request journal's writes; its own tests opt in.
+os.environ.setdefault("PERF_SAMPLE_RATE_PERCENT", "0")
+os.environ.setdefault("PERF_SAMPLE_SLOW_MS", "60000")
 
 from app import create_app, db  # noqa: E402
 from app.services.rate_limits import rate_limiter  # noqa: E402
@@ -145,7 +145,7 @@ def test_mail_service_suppression_skips_smtp(app, monkeypatch):
     def fail_if_smtp_is_used(*_args, **_kwargs):
         raise AssertionError("SMTP should not be used when mail is suppressed.")
 
-    monkeypatch.setattr("app.services.mail_service.smtplib.SMTP", fail_if_smtp_is_used)
+    monkeypatch.setattr("app.services.smtp_transport.smtplib.SMTP", fail_if_smtp_is_used)
     app.config.update(
         MAIL_ENABLED=True,
         MAIL_SUPPRESS_SEND=True,
@@ -64,6 +64,9 @@ def test_admin_hub_routes_accessible_for_admin(client):
         "/admin/audit/users",
         "/admin/feedback",
         "/admin/history",
+        "/admin/performance",
+        "/admin/profiles",
+        "/admin/allocations",
     ):
         response = client.get(path)
         assert response.status_code == 200
@@ -88,6 +91,9 @@ def test_admin_hub_routes_redirect_unauthenticated(client):
         "/admin/audit/users",
         "/admin/feedback",
         "/admin/history",
+        "/admin/performance",
+        "/admin/profiles",
+        "/admin/allocations",
     ):
         response = client.get(path, follow_redirects=False)
         assert response.status_code == 302
@@ -105,6 +111,9 @@ def test_admin_hub_routes_block_non_admin_users(client):
             "/admin/audit/users",
             "/admin/feedback",
             "/admin/history",
+            "/admin/performance",
+            "/admin/profiles",
+            "/admin/allocations",
             "/admin/items",
         ):
             response = client.get(path, follow_redirects=False)
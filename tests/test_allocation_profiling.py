@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+
+import pytest
+
+from app.services.allocation_profiling import (
+    ALLOCATION_HEADER,
+    ALLOCATION_ID_HEADER,
+    AllocationProfileError,
+    list_allocation_captures,
+    load_allocation_mode,
+    start_allocation_window,
+)
+
+
+def quick_login(client, role):
+    return client.post("/login", data={"quick_login_role": role}, follow_redirects=False)
+
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    app.config["REQUEST_PROFILE_DIR"] = str(tmp_path)
+    return tmp_path
+
+
+def test_admin_header_captures_peak_memory_and_app_sites(app, client, profile_dir):
+    quick_login(client, "admin")
+
+    response = client.get("/supplies/export.csv?scope=all", headers={ALLOCATION_HEADER: "1"})
+
+    assert response.status_code == 200
+    capture_id = response.headers[ALLOCATION_ID_HEADER]
+    # The export streams, so tracing covers its rows and stops once the body is closed.
+    assert response.data and tracemalloc.is_tracing()
+    response.close()
+    assert not tracemalloc.is_tracing()
+    with app.app_context():
+        (capture,) = list_allocation_captures()
+    assert capture["capture_id"] == capture_id
+    assert capture["endpoint"] == "supplies.export_supplies_audit"
+    assert capture["trigger"] == "admin"
+    assert capture["args_summary"] == "scope=all"
+    assert capture["peak_bytes"] >= capture["retained_bytes"] > 0
+    assert any(site["location"].startswith("app/") for site in capture["app_sites"])
+    assert capture["raw_sites"]
+
+    page = client.get("/admin/allocations")
+    assert page.status_code == 200
+    assert b"supplies.export_supplies_audit" in page.data
+
+
+def test_allocation_header_is_ignored_for_staff(app, client, profile_dir):
+    quick_login(client, "staff")
+
+    response = client.get("/supplies", headers={ALLOCATION_HEADER: "1"})
+
+    assert ALLOCATION_ID_HEADER not in response.headers
+    assert not tracemalloc.is_tracing()
+    with app.app_context():
+        assert list_allocation_captures() == []
+
+
+def test_window_traces_one_endpoint_until_stopped(app, client, profile_dir):
+    with app.test_request_context():
+        with pytest.raises(AllocationProfileError):
+            start_allocation_window("missing.endpoint", 5)
+        with pytest.raises(AllocationProfileError):
+            start_allocation_window("supplies.index", 0)
+        with pytest.raises(AllocationProfileError):
+            start_allocation_window("supplies.index", "soon")
+
+    quick_login(client, "admin")
+    response = client.post(
+        "/admin/allocations/window",
+        data={"endpoint": "supplies.index", "minutes": "5", "action": "start"},
+    )
+    assert response.status_code == 302
+
+    staff_client = app.test_client()
+    quick_login(staff_client, "staff")
+    assert ALLOCATION_ID_HEADER in staff_client.get("/supplies").headers
+    assert ALLOCATION_ID_HEADER not in staff_client.get("/dashboard").headers
+    with app.app_context():
+        (capture,) = list_allocation_captures()
+    assert (capture["trigger"], capture["user_role"]) == ("window", "staff")
+
+    client.post("/admin/allocations/window", data={"action": "stop"})
+    assert ALLOCATION_ID_HEADER not in staff_client.get("/supplies").headers
+
+
+def test_expired_window_is_ignored_and_captures_are_pruned(app, client, profile_dir):
+    with app.test_request_context():
+        mode = start_allocation_window("", 1)
+        assert mode["endpoint"] == "*"
+        assert load_allocation_mode() == mode
+        assert load_allocation_mode(now=time.time() + 120) is None
+
+    app.config["REQUEST_PROFILE_KEEP"] = 2
+    quick_login(client, "admin")
+    for _ in range(3):
+        client.get("/supplies", headers={ALLOCATION_HEADER: "1"})
+
+    assert len(list(profile_dir.glob("alloc-*.json"))) == 2
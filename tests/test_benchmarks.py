@@ -0,0 +1,110 @@
+import json
+import sqlite3
+
+from app import db
+from app.services.perf_seed import rebuild_derived_tables, seed_perf_dataset
+from benchmarks.cases import build_cases, prepare_fixture_context
+from benchmarks.cli import main
+from benchmarks.fixtures import Scale, build_fixture_app, fixture_path, run_copy_path
+from benchmarks.harness import compare_reports, measure_case, percentile
+
+
+def bench_report(**overrides):
+    row = {
+        "scale": "small",
+        "case": "venue_rows",
+        "p50_ms": 10.0,
+        "p95_ms": 12.0,
+        "mean_ms": 10.5,
+        "iterations": 5,
+        "queries": 4,
+        "peak_kib": 100.0,
+    }
+    row.update(overrides)
+    return {"results": [row]}
+
+
+def test_percentile_uses_nearest_rank():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+
+    assert percentile(values, 0.50) == 3.0
+    assert percentile(values, 0.95) == 5.0
+    assert percentile([], 0.50) is None
+
+
+def test_compare_reports_flags_regressions_and_ignores_noise():
+    baseline = bench_report()
+
+    assert compare_reports(baseline, bench_report(p50_ms=10.9))[0]["regressions"] == []
+    assert compare_reports(bench_report(p50_ms=0.2), bench_report(p50_ms=0.9))[0][
+        "regressions"
+    ] == []
+
+    slower = compare_reports(baseline, bench_report(p50_ms=13.0))[0]
+    assert slower["regressions"] == ["p50 10.0ms -> 13.0ms"]
+
+    more_queries = compare_reports(baseline, bench_report(queries=5))[0]
+    assert more_queries["regressions"] == ["queries 4 -> 5"]
+
+    more_memory = compare_reports(baseline, bench_report(peak_kib=200.0))[0]
+    assert more_memory["regressions"] == ["peak 100KiB -> 200KiB"]
+
+    other_scale = compare_reports(baseline, bench_report(scale="medium", p50_ms=99.0))
+    assert other_scale == []
+
+
+def test_compare_command_exits_non_zero_on_regression(tmp_path, capsys):
+    baseline_path = tmp_path / "baseline.json"
+    current_path = tmp_path / "current.json"
+    baseline_path.write_text(json.dumps(bench_report()), encoding="utf-8")
+    current_path.write_text(json.dumps(bench_report(queries=9)), encoding="utf-8")
+
+    assert main(["compare", str(baseline_path), str(baseline_path)]) == 0
+    assert main(["compare", str(baseline_path), str(current_path)]) == 1
+    assert "REGRESSION queries 4 -> 9" in capsys.readouterr().out
+
+
+def test_every_case_runs_against_a_seeded_database(app):
+    with app.app_context():
+        seed_perf_dataset(venues=2, items=12, days=3, checks_per_day=1, seed=7)
+        rebuild_derived_tables()
+        db.session.commit()
+
+    context = prepare_fixture_context(app)
+    results = [measure_case(case, context, iterations=1) for case in build_cases()]
+
+    assert {result["case"] for result in results} >= {
+        "venue_rows",
+        "restock_rows[counts,last_checked]",
+        "activity_page[newest,search]",
+        "quick_check_save",
+    }
+    assert all(result["p50_ms"] >= 0 and result["peak_kib"] > 0 for result in results)
+    assert next(r for r in results if r["case"] == "quick_check_save")["queries"] > 0
+
+
+def test_runs_leave_the_seeded_fixture_untouched(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///:memory:")
+    scale = Scale("tiny", venues=2, items=8, days=2)
+    (save_case,) = [case for case in build_cases() if case.name == "quick_check_save"]
+
+    def row_counts(path):
+        with sqlite3.connect(path) as connection:
+            return [
+                connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("checks", "count_sessions", "inventory_activity_events")
+            ]
+
+    def run_save_case():
+        app = build_fixture_app(scale, db_dir=tmp_path, seed=7)
+        measure_case(save_case, prepare_fixture_context(app), iterations=2)
+        with app.app_context():
+            db.engine.dispose()
+        return row_counts(run_copy_path(tmp_path, scale, 7))
+
+    first_run = run_save_case()
+    seeded = row_counts(fixture_path(tmp_path, scale, 7))
+
+    assert sum(first_run) > sum(seeded)
+    assert run_save_case() == first_run
+    assert row_counts(fixture_path(tmp_path, scale, 7)) == seeded
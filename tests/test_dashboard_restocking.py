@@ -12,6 +12,8 @@ from app.models import (
     VenueItemCount,
 )
 from app.routes.main import build_restock_rows
+from app.services.query_budget import capture_query_stats
+from app.services.venue_item_state import record_check_state, record_count_session_state
 
 
 def quick_login(client, role="staff"):
@@ -71,6 +73,7 @@ def add_status_check(venue, item_status_pairs, *, created_at):
     for item, status in item_status_pairs:
         db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
     db.session.flush()
+    record_check_state(check, [(item.id, status) for item, status in item_status_pairs])
     return check
 
 
@@ -100,6 +103,10 @@ def add_count_session(venue, item_count_pairs, *, created_at):
                 )
             )
     db.session.flush()
+    record_count_session_state(
+        session,
+        [(item.id, raw_count) for item, raw_count in item_count_pairs],
+    )
     return session
 
 
@@ -410,6 +417,72 @@ def test_build_restock_rows_counts_mode_uses_suggested_order_and_over_par_values
     ]
 
 
+def test_build_restock_rows_pages_in_sql_match_unpaged_order(app, monkeypatch):
+    import app.services.restocking as restocking
+
+    with app.app_context():
+        now = datetime.now(timezone.utc)
+        for venue_index, venue_name in enumerate(("Alder Hall", "Beech Hall")):
+            venue = Venue(name=venue_name, active=True)
+            db.session.add(venue)
+            db.session.flush()
+            items = [
+                create_tracked_item(venue, f"{venue_name} Cups", default_par_level=8),
+                create_tracked_item(venue, f"{venue_name} Forks", default_par_level=4),
+                create_tracked_item(venue, f"{venue_name} Plates"),
+                create_tracked_item(
+                    venue,
+                    f"{venue_name} Easel",
+                    tracking_mode="singleton_asset",
+                    item_type="durable",
+                ),
+            ]
+            add_status_check(
+                venue,
+                list(zip(items, ("out", "low", "good", "ok"))),
+                created_at=now - timedelta(days=venue_index + 1),
+            )
+            add_count_session(
+                venue,
+                [(items[0], 1 + venue_index), (items[1], 3), (items[2], 2)],
+                created_at=now - timedelta(hours=venue_index + 1),
+            )
+        db.session.commit()
+
+        for mode in ("status", "counts"):
+            for sort in ("status_priority", "item", "venue", "last_checked"):
+                full = build_restock_rows(sort=sort, mode=mode)
+                paged_rows = []
+                offset = 0
+                while True:
+                    page = build_restock_rows(sort=sort, mode=mode, limit=3, offset=offset)
+                    paged_rows.extend(page["rows"])
+                    assert page["total_count"] == 8
+                    if not page["has_more"]:
+                        break
+                    offset += 3
+                assert [(row["venue_id"], row["item_id"]) for row in paged_rows] == [
+                    (row["venue_id"], row["item_id"]) for row in full["rows"]
+                ]
+
+        low_or_out = build_restock_rows(statuses=["low", "out"], limit=1)
+
+        built_rows = []
+        original_build_row = restocking._build_restock_row
+
+        def counting_build_row(row, restock_mode):
+            built_rows.append(row)
+            return original_build_row(row, restock_mode)
+
+        monkeypatch.setattr(restocking, "_build_restock_row", counting_build_row)
+        build_restock_rows(sort="venue", limit=2, offset=4)
+
+    assert low_or_out["total_count"] == 4
+    assert low_or_out["has_more"] is True
+    assert low_or_out["rows"][0]["status"]["key"] == "out"
+    assert len(built_rows) == 2
+
+
 def test_dashboard_restocking_rows_api_preserves_mode_and_links(client, app):
     quick_login(client, "staff")
 
@@ -455,3 +528,48 @@ def test_dashboard_restocking_rows_api_preserves_mode_and_links(client, app):
     assert "mode=raw_counts" in rows_by_name["Napkins"]["quick_check_url"]
     assert rows_by_name["Speaker"]["quick_check_mode"] == "status"
     assert "mode=status" in rows_by_name["Speaker"]["quick_check_url"]
+
+
+def test_dashboard_restocking_query_count_does_not_grow_with_rows(client, app):
+    quick_login(client, "staff")
+
+    def add_venue(name, item_count):
+        venue = Venue(name=name, active=True)
+        db.session.add(venue)
+        db.session.flush()
+        items = [
+            create_tracked_item(venue, f"{name} Item {index}", default_par_level=8)
+            for index in range(item_count)
+        ]
+        add_status_check(
+            venue,
+            [(item, "low") for item in items],
+            created_at=datetime.now(timezone.utc) - timedelta(hours=3),
+        )
+        add_count_session(
+            venue,
+            [(item, 2) for item in items],
+            created_at=datetime.now(timezone.utc) - timedelta(hours=1),
+        )
+        db.session.commit()
+
+    paths = (
+        "/dashboard?tab=restocking",
+        "/dashboard?tab=restocking&restock_mode=counts",
+        "/dashboard/restocking_rows?restock_mode=counts&offset=0&limit=50",
+    )
+
+    def statement_counts():
+        with capture_query_stats(app) as captured:
+            for path in paths:
+                assert client.get(path).status_code == 200
+        return [stats.statements for _, stats in captured]
+
+    with app.app_context():
+        add_venue("Birch Cabin", 2)
+    small = statement_counts()
+    with app.app_context():
+        add_venue("Cedar Cabin", 14)
+    large = statement_counts()
+
+    assert small == large
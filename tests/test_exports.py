@@ -14,6 +14,8 @@ from app.models import (
     VenueItemCount,
     VenueNote,
 )
+from app.services.csv_exports import iter_csv_chunks
+from app.services.venue_item_state import record_check_state, record_count_session_state
 
 
 def quick_login(client, role="admin"):
@@ -80,6 +82,7 @@ def add_status_check(venue, item_status_pairs, *, created_at):
     for item, status in item_status_pairs:
         db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
     db.session.flush()
+    record_check_state(check, [(item.id, status) for item, status in item_status_pairs])
     return check
 
 
@@ -109,6 +112,10 @@ def add_count_session(venue, item_count_pairs, *, created_at):
                 )
             )
     db.session.flush()
+    record_count_session_state(
+        session,
+        [(item.id, raw_count) for item, raw_count in item_count_pairs],
+    )
     return session
 
 
@@ -263,6 +270,7 @@ def test_viewer_can_export_filtered_and_full_supplies_audit(client, app):
 
     filtered_response = client.get("/supplies/export.csv?q=tea")
     full_response = client.get("/supplies/export.csv?q=tea&scope=full")
+    assert full_response.is_streamed
 
     filtered_rows = parse_csv_response(filtered_response)
     full_rows = parse_csv_response(full_response)
@@ -279,6 +287,39 @@ def test_viewer_can_export_filtered_and_full_supplies_audit(client, app):
     assert {row["Item Name"] for row in full_rows} == {"Tea Lights", "Blankets"}
 
 
+def test_supplies_audit_export_builds_venue_rows_while_streaming(app, monkeypatch):
+    from app.routes import supplies
+
+    with app.app_context():
+        venues = [Venue(name=f"Hall {index}", active=True) for index in range(3)]
+        db.session.add_all(venues)
+        db.session.flush()
+        candles = create_tracked_item(venues[0], "Candles", default_par_level=5)
+        for venue in venues[1:]:
+            db.session.add(VenueItem(venue_id=venue.id, item_id=candles.id, active=True))
+        db.session.commit()
+
+        built = []
+        build_venue_row = supplies.build_supply_venue_row
+
+        def counting_build_venue_row(item_row, detail, *, actor_labels):
+            built.append(detail["venue_name"])
+            return build_venue_row(item_row, detail, actor_labels=actor_labels)
+
+        monkeypatch.setattr(supplies, "build_supply_venue_row", counting_build_venue_row)
+        item_rows = supplies.build_supply_audit_rows()
+        csv_rows = supplies.build_supplies_audit_export_rows(
+            item_rows,
+            actor_labels=supplies.build_supply_actor_labels(item_rows),
+        )
+
+        assert built == []
+        first = next(csv_rows)
+        assert (first["Venue Name"], built) == ("Hall 0", ["Hall 0"])
+        assert [row["Venue Name"] for row in csv_rows] == ["Hall 1", "Hall 2"]
+        assert "venue_rows" not in item_rows[0]
+
+
 def test_item_catalog_export_supports_filtered_and_full_views(client, app):
     quick_login(client, "admin")
 
@@ -342,3 +383,23 @@ def test_item_catalog_export_is_admin_only(client):
 
     assert response.status_code == 302
     assert response.headers["Location"].endswith("/dashboard")
+
+
+def test_csv_chunks_pull_rows_lazily_and_write_one_bom():
+    pulled = []
+
+    def rows():
+        for index in range(500):
+            pulled.append(index)
+            yield {"Name": f"Item {index}", "Count": index}
+
+    chunks = iter_csv_chunks(["Name", "Count"], rows(), chunk_chars=1024)
+    first = next(chunks)
+
+    assert first.startswith(b"\xef\xbb\xbfName,Count\r\n")
+    assert 0 < len(pulled) < 500
+    body = first + b"".join(chunks)
+    assert body.count(b"\xef\xbb\xbf") == 1
+    parsed = list(csv.DictReader(io.StringIO(body.decode("utf-8-sig"))))
+    assert len(parsed) == 500
+    assert parsed[499] == {"Name": "Item 499", "Count": "499"}
@@ -0,0 +1,468 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import (
+    Check,
+    CheckLine,
+    CountLine,
+    CountSession,
+    InventoryActivityEvent,
+    Item,
+    User,
+    Venue,
+    VenueItem,
+)
+from app.routes.main import (
+    build_activity_page,
+    build_recent_venue_activity_rows,
+    decode_activity_cursor,
+)
+
+
+def quick_login(client, role="staff"):
+    return client.post(
+        "/login",
+        data={"quick_login_role": role},
+        follow_redirects=False,
+    )
+
+
+def create_tracked_item(venue, name, *, sort_order=0):
+    item = Item(
+        name=name,
+        item_type="consumable",
+        tracking_mode="quantity",
+        item_category="consumable",
+        active=True,
+        sort_order=sort_order,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.session.add(item)
+    db.session.flush()
+    db.session.add(VenueItem(venue_id=venue.id, item_id=item.id, active=True))
+    db.session.flush()
+    return item
+
+
+def list_events(venue_id):
+    return (
+        InventoryActivityEvent.query.filter_by(venue_id=venue_id)
+        .order_by(InventoryActivityEvent.changed_at.asc(), InventoryActivityEvent.id.asc())
+        .all()
+    )
+
+
+def test_quick_check_appends_only_changed_values_to_activity_log(client, app):
+    quick_login(client, "staff")
+
+    with app.app_context():
+        venue = Venue(name="Cedar Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        cups = create_tracked_item(venue, "Cups", sort_order=1)
+        napkins = create_tracked_item(venue, "Napkins", sort_order=2)
+        db.session.commit()
+        venue_id = venue.id
+        cups_id = cups.id
+        napkins_id = napkins.id
+
+    for cups_count, napkins_count in ((5, 2), (5, 3)):
+        response = client.post(
+            f"/venues/{venue_id}/check",
+            data={
+                "check_mode": "raw_counts",
+                f"count_{cups_id}": str(cups_count),
+                f"count_{napkins_id}": str(napkins_count),
+            },
+            follow_redirects=False,
+        )
+        assert response.status_code == 302
+
+    for status in ("low", "low"):
+        response = client.post(
+            f"/venues/{venue_id}/check",
+            data={"check_mode": "status", f"status_{cups_id}": status},
+            follow_redirects=False,
+        )
+        assert response.status_code == 302
+
+    with app.app_context():
+        events = list_events(venue_id)
+        staff_user = User.query.filter_by(email="staff@example.com").one()
+        staff_user_id = staff_user.id
+
+    assert [(event.event_type, event.item_name) for event in events] == [
+        ("raw_count", "Cups"),
+        ("raw_count", "Napkins"),
+        ("raw_count", "Napkins"),
+        ("status", "Cups"),
+    ]
+    assert (events[2].old_raw_count, events[2].new_raw_count) == (2, 3)
+    assert (events[3].old_status, events[3].new_status) == (None, "low")
+    assert {event.venue_name for event in events} == {"Cedar Hall"}
+    assert {event.actor_user_id for event in events} == {staff_user_id}
+
+
+def test_activity_readers_serve_rows_from_event_log(app):
+    with app.app_context():
+        venue = Venue(name="Birch Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        towels = create_tracked_item(venue, "Towels")
+        now = datetime.now(timezone.utc)
+        db.session.add_all(
+            [
+                InventoryActivityEvent(
+                    event_type="status",
+                    source_id=11,
+                    venue_id=venue.id,
+                    item_id=towels.id,
+                    actor_user_id=None,
+                    old_status="good",
+                    new_status="out",
+                    changed_at=now - timedelta(hours=1),
+                    venue_name="Birch Hall",
+                    item_name="Towels",
+                    actor_name="Unknown user",
+                ),
+                InventoryActivityEvent(
+                    event_type="raw_count",
+                    source_id=12,
+                    venue_id=venue.id,
+                    item_id=towels.id,
+                    actor_user_id=None,
+                    old_raw_count=None,
+                    new_raw_count=8,
+                    changed_at=now,
+                    venue_name="Birch Hall",
+                    item_name="Towels",
+                    actor_name="Unknown user",
+                ),
+            ]
+        )
+        db.session.commit()
+
+        page = build_activity_page(activity_type="status")
+        recent_rows = build_recent_venue_activity_rows(venue.id)
+
+    assert page["total_count"] == 1
+    assert page["rows"][0]["detail_text"] == "Status changed from Good to Out"
+    assert [row["type_key"] for row in recent_rows] == ["raw_count", "status"]
+    assert recent_rows[0]["detail_text"] == "Initial count recorded as 8"
+
+
+def test_rebuild_inventory_activity_cli_backfills_changes_from_history(app):
+    with app.app_context():
+        venue = Venue(name="Maple Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        soap = create_tracked_item(venue, "Soap")
+        user = User(
+            email="Counter@Example.com",
+            display_name="  ",
+            password_hash="unused",
+            role="staff",
+        )
+        db.session.add(user)
+        db.session.flush()
+
+        now = datetime.now(timezone.utc)
+        for offset, status in enumerate(("not_checked", "good", "good", "low")):
+            check = Check(
+                venue_id=venue.id,
+                user_id=user.id,
+                created_at=now + timedelta(minutes=offset),
+            )
+            db.session.add(check)
+            db.session.flush()
+            db.session.add(CheckLine(check_id=check.id, item_id=soap.id, status=status))
+        for offset, raw_count in enumerate((4, 4, 1)):
+            session = CountSession(
+                venue_id=venue.id,
+                user_id=user.id,
+                created_at=now + timedelta(minutes=offset),
+            )
+            db.session.add(session)
+            db.session.flush()
+            db.session.add(
+                CountLine(count_session_id=session.id, item_id=soap.id, raw_count=raw_count)
+            )
+        db.session.commit()
+        venue_id = venue.id
+
+    result = app.test_cli_runner().invoke(args=["rebuild-inventory-activity"])
+
+    assert result.exit_code == 0
+    assert "2 status change(s), 2 count change(s)" in result.output
+
+    with app.app_context():
+        events = list_events(venue_id)
+
+    status_events = [event for event in events if event.event_type == "status"]
+    count_events = [event for event in events if event.event_type == "raw_count"]
+    assert [(event.old_status, event.new_status) for event in status_events] == [
+        ("not_checked", "good"),
+        ("good", "low"),
+    ]
+    assert [(event.old_raw_count, event.new_raw_count) for event in count_events] == [
+        (None, 4),
+        (4, 1),
+    ]
+    assert {event.actor_name for event in events} == {"counter@example.com"}
+
+
+def test_venue_rename_updates_activity_event_names(client, app):
+    quick_login(client, "admin")
+
+    with app.app_context():
+        venue = Venue(name="Old Lodge", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        lamps = create_tracked_item(venue, "Lamps")
+        db.session.commit()
+        venue_id = venue.id
+        lamps_id = lamps.id
+
+    client.post(
+        f"/venues/{venue_id}/check",
+        data={"check_mode": "raw_counts", f"count_{lamps_id}": "2"},
+        follow_redirects=False,
+    )
+    response = client.post(
+        f"/venues/{venue_id}/settings",
+        data={"action": "save", "name": "New Lodge", "is_active": "1"},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+
+    with app.app_context():
+        events = list_events(venue_id)
+
+    assert [event.venue_name for event in events] == ["New Lodge"]
+
+
+def add_activity_events(venue, item_names, *, count_per_item=3):
+    now = datetime(2026, 1, 5, 12, 0, 0)
+    items = [create_tracked_item(venue, name) for name in item_names]
+    events = []
+    for index in range(count_per_item):
+        for item in items:
+            # Shared timestamps and source ids force the tie-breaking keys to matter.
+            events.append(
+                InventoryActivityEvent(
+                    event_type="status" if index % 2 == 0 else "raw_count",
+                    source_id=100 + index,
+                    venue_id=venue.id,
+                    item_id=item.id,
+                    actor_user_id=None,
+                    old_status=None,
+                    new_status="good" if index % 2 == 0 else None,
+                    new_raw_count=None if index % 2 == 0 else index,
+                    changed_at=now - timedelta(hours=index // 2),
+                    venue_name=venue.name,
+                    item_name=item.name,
+                    actor_name=f"Actor {index % 2}",
+                )
+            )
+    db.session.add_all(events)
+    db.session.commit()
+    return len(events)
+
+
+def activity_row_keys(page):
+    return [(row["type_key"], row["item_name"], row["changed_at_text"]) for row in page["rows"]]
+
+
+def test_activity_cursor_pages_match_offset_pages_for_every_sort(app):
+    with app.app_context():
+        venue = Venue(name="Keyset Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        total = add_activity_events(venue, ["Bowls", "Forks", "Plates"])
+
+        for sort in ("newest", "oldest", "venue", "item", "actor", "type"):
+            offset_pages = [
+                build_activity_page(sort=sort, page=page, page_size=4)
+                for page in range(1, 4)
+            ]
+            cursor_page = build_activity_page(sort=sort, page=1, page_size=4)
+            cursor_pages = [cursor_page]
+            while cursor_page["next_cursor"]:
+                cursor_page = build_activity_page(
+                    sort=sort,
+                    cursor=cursor_page["next_cursor"],
+                    page_size=4,
+                )
+                cursor_pages.append(cursor_page)
+
+            assert [activity_row_keys(page) for page in cursor_pages] == [
+                activity_row_keys(page) for page in offset_pages
+            ]
+            assert sum(len(page["rows"]) for page in cursor_pages) == total
+            assert cursor_pages[-1]["current_page"] == 3
+            assert cursor_pages[-1]["has_next"] is False
+
+            previous_page = build_activity_page(
+                sort=sort,
+                cursor=cursor_pages[-1]["prev_cursor"],
+                page_size=4,
+            )
+            assert previous_page["current_page"] == 2
+            assert activity_row_keys(previous_page) == activity_row_keys(offset_pages[1])
+
+
+def test_activity_totals_are_capped_unless_exact_count_requested(client, app, monkeypatch):
+    import app.routes.main as main_routes
+
+    monkeypatch.setattr(main_routes, "ACTIVITY_COUNT_CAP", 5)
+    quick_login(client, "user")
+
+    with app.app_context():
+        venue = Venue(name="Capped Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        add_activity_events(venue, ["Cups", "Lids"], count_per_item=4)
+
+    payload = client.get("/dashboard/activity_rows?activity_page=1").get_json()
+    pagination = payload["pagination"]
+
+    assert pagination["total_count"] == 5
+    assert pagination["total_count_capped"] is True
+    assert pagination["total_count_text"] == "5+"
+    assert pagination["has_next"] is False
+    assert pagination["next_cursor"] is None
+    assert pagination["prev_cursor"] is None
+
+    exact_payload = client.get("/dashboard/activity_rows?activity_exact_count=1").get_json()
+
+    assert exact_payload["pagination"]["total_count"] == 8
+    assert exact_payload["pagination"]["total_count_capped"] is False
+    assert exact_payload["filters"]["exact_count"] is True
+
+
+def test_activity_json_endpoint_follows_next_cursor(client, app):
+    quick_login(client, "user")
+
+    with app.app_context():
+        venue = Venue(name="Cursor Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        add_activity_events(venue, [f"Item {index:02d}" for index in range(20)])
+
+    first = client.get("/dashboard/activity_rows").get_json()["pagination"]
+
+    assert first["has_next"] is True
+    assert first["next_cursor"]
+    assert "activity_cursor=" in first["next_url"]
+
+    second_response = client.get(
+        "/dashboard/activity_rows",
+        query_string={"activity_page": "2", "activity_cursor": first["next_cursor"]},
+    )
+    second = second_response.get_json()["pagination"]
+
+    assert second["current_page"] == 2
+    assert second["showing_from"] == 51
+    assert second["showing_to"] == 60
+    assert second["has_next"] is False
+    assert second["prev_cursor"]
+
+    invalid = client.get(
+        "/dashboard/activity_rows",
+        query_string={"activity_page": "2", "activity_cursor": "not-a-cursor"},
+    ).get_json()["pagination"]
+
+    assert invalid["current_page"] == 2
+    assert invalid["showing_from"] == 51
+
+
+def test_tampered_activity_cursor_is_treated_as_no_cursor(client, app):
+    quick_login(client, "staff")
+
+    def encode(payload):
+        raw = json.dumps(payload).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    valid_keys = ["2026-01-01T00:00:00", "Venue", "Item", "status", 1]
+    tampered_cursors = [
+        encode({"s": "newest", "p": 2, "d": "next", "k": [["x"], "Venue", "Item", "status", 1]}),
+        encode({"s": "newest", "p": 2, "d": "next", "k": valid_keys[:4] + [{"id": 1}]}),
+        encode({"s": "newest", "p": 2, "d": "next", "k": valid_keys[:4] + [True]}),
+        encode({"s": "newest", "p": [2], "d": "next", "k": valid_keys}),
+        encode({"s": "newest", "p": 2, "d": ["next"], "k": valid_keys}),
+        encode({"s": "newest", "p": 2, "d": "next", "k": {"changed_at": 1}}),
+        encode([1, 2, 3]),
+    ]
+
+    for cursor in tampered_cursors:
+        response = client.get(
+            "/dashboard/activity_rows",
+            query_string={"activity_page": "1", "activity_cursor": cursor},
+        )
+
+        assert response.status_code == 200, cursor
+        assert response.get_json()["pagination"]["current_page"] == 1
+    valid_cursor = encode({"s": "newest", "p": 2, "d": "next", "k": valid_keys})
+    assert decode_activity_cursor(valid_cursor, "newest")["page"] == 2
+
+
+def test_activity_search_prefix_matches_names_and_status_labels(app):
+    with app.app_context():
+        venue = Venue(name="Maplewood Lodge", active=True)
+        other_venue = Venue(name="Pine Barn", active=True)
+        db.session.add_all([venue, other_venue])
+        db.session.flush()
+        add_activity_events(venue, ["Coffee Filters"], count_per_item=2)
+        add_activity_events(other_venue, ["Trash Bags"], count_per_item=1)
+
+        venue_rows = build_activity_page(search="maple")["rows"]
+        item_rows = build_activity_page(search="filt coff")["rows"]
+        status_rows = build_activity_page(search="not check")["rows"]
+        miss_rows = build_activity_page(search="lodge bags")["rows"]
+
+    assert {row["venue_name"] for row in venue_rows} == {"Maplewood Lodge"}
+    assert len(venue_rows) == 2
+    assert [row["item_name"] for row in item_rows] == ["Coffee Filters", "Coffee Filters"]
+    assert sorted(row["venue_name"] for row in status_rows) == ["Maplewood Lodge", "Pine Barn"]
+    assert miss_rows == []
+
+
+def test_activity_search_index_follows_renames_deletes_and_rebuilds(app):
+    from app.services.inventory_activity import (
+        delete_inventory_activity_events,
+        rebuild_inventory_activity_events,
+        sync_venue_activity_name,
+    )
+
+    with app.app_context():
+        venue = Venue(name="Harbor House", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        add_activity_events(venue, ["Candles"], count_per_item=1)
+
+        venue.name = "Lighthouse"
+        sync_venue_activity_name(venue)
+        db.session.commit()
+
+        assert build_activity_page(search="harbor")["rows"] == []
+        assert len(build_activity_page(search="light")["rows"]) == 1
+
+        delete_inventory_activity_events(venue_ids=[venue.id])
+        db.session.commit()
+
+        assert build_activity_page(search="light")["rows"] == []
+
+        candles = Item.query.filter_by(name="Candles").one()
+        check = Check(venue_id=venue.id, user_id=None, created_at=datetime.now(timezone.utc))
+        db.session.add(check)
+        db.session.flush()
+        db.session.add(CheckLine(check_id=check.id, item_id=candles.id, status="out"))
+        rebuild_inventory_activity_events()
+        db.session.commit()
+
+        rows = build_activity_page(search="lighthouse cand")["rows"]
+
+    assert [row["detail_text"] for row in rows] == ["Initial status recorded as Out"]
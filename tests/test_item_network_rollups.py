@@ -0,0 +1,199 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import Item, ItemNetworkRollup, User, Venue, VenueItem, VenueItemCount
+from app.routes.supplies import build_supply_audit_rows, expand_supply_venue_rows
+from app.services.item_network_rollups import refresh_item_network_rollups
+
+
+def quick_login(client, role="staff"):
+    return client.post(
+        "/login",
+        data={"quick_login_role": role},
+        follow_redirects=False,
+    )
+
+
+def create_item(name, *, tracking_mode="quantity", default_par_level=None):
+    item = Item(
+        name=name,
+        item_type="consumable",
+        tracking_mode=tracking_mode,
+        item_category="durable" if tracking_mode == "singleton_asset" else "consumable",
+        active=True,
+        default_par_level=default_par_level,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.session.add(item)
+    db.session.flush()
+    return item
+
+
+def track(venue, item, *, par_override=None):
+    db.session.add(
+        VenueItem(venue_id=venue.id, item_id=item.id, active=True, expected_qty=par_override)
+    )
+    db.session.flush()
+
+
+def get_supply_row(item_id):
+    (row,) = expand_supply_venue_rows(build_supply_audit_rows(item_ids=[item_id]))
+    return row
+
+
+def test_quick_check_count_refreshes_item_network_rollup(client, app):
+    quick_login(client, "staff")
+
+    with app.app_context():
+        north = Venue(name="North Hall", active=True)
+        south = Venue(name="South Hall", active=True)
+        db.session.add_all([north, south])
+        db.session.flush()
+        cups = create_item("Network Cups", default_par_level=10)
+        track(north, cups)
+        track(south, cups, par_override=4)
+        db.session.commit()
+        north_id = north.id
+        south_id = south.id
+        cups_id = cups.id
+
+    response = client.post(
+        f"/venues/{north_id}/check",
+        data={"check_mode": "raw_counts", f"count_{cups_id}": "6"},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+
+    with app.app_context():
+        rollup = ItemNetworkRollup.query.filter_by(item_id=cups_id).one()
+        details = json.loads(rollup.venue_details_json)
+        row = get_supply_row(cups_id)
+
+    assert rollup.tracked_venue_count == 2
+    assert rollup.counted_venue_count == 1
+    assert rollup.missing_count_venue_count == 1
+    assert rollup.total_raw_count == 6
+    assert rollup.total_par_count == 14
+    assert rollup.signal_count_total == 6
+    assert {detail["venue_id"] for detail in details} == {north_id, south_id}
+    assert row["total_raw_count"] == 6
+    assert row["total_par_count"] == 14
+    venue_names = [venue_row["venue_name"] for venue_row in row["venue_rows"]]
+    assert venue_names == ["North Hall", "South Hall"]
+    assert row["venue_rows"][0]["raw_count"] == 6
+    assert row["venue_rows"][0]["checked_by"] == "Staff User"
+    assert row["venue_rows"][1]["par_count"] == 4
+
+    with app.app_context():
+        staff = User.query.filter_by(display_name="Staff User").one()
+        staff.display_name = "Renamed Staff"
+        db.session.commit()
+        renamed_row = get_supply_row(cups_id)
+
+    assert renamed_row["venue_rows"][0]["checked_by"] == "Renamed Staff"
+
+
+def test_supplies_page_loads_venue_rows_on_demand(client, app):
+    quick_login(client, "user")
+
+    with app.app_context():
+        venue = Venue(name="Lazy Network Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        blankets = create_item("Network Blankets", default_par_level=3)
+        track(venue, blankets)
+        refresh_item_network_rollups([blankets.id])
+        db.session.commit()
+        blankets_id = blankets.id
+
+    page = client.get("/supplies")
+    desktop = client.get(f"/supplies/{blankets_id}/venue-rows")
+    mobile = client.get(f"/supplies/{blankets_id}/venue-rows?layout=mobile")
+    missing = client.get("/supplies/999999/venue-rows")
+
+    assert page.status_code == 200
+    assert b"Network Blankets" in page.data
+    assert b"Lazy Network Hall" not in page.data
+    assert f"/supplies/{blankets_id}/venue-rows?layout=desktop".encode() in page.data
+    assert b"Lazy Network Hall" in desktop.data and b"<tr>" in desktop.data
+    assert b"supply-mobile-venue-card" in mobile.data
+    assert missing.status_code == 404
+
+
+def test_supply_rows_evaluate_staleness_from_stored_rollup_at_read_time(app):
+    with app.app_context():
+        venue = Venue(name="Stale Network Hall", active=True, stale_threshold_days=2)
+        db.session.add(venue)
+        db.session.flush()
+        towels = create_item("Network Towels", default_par_level=5)
+        track(venue, towels)
+        db.session.add(
+            VenueItemCount(
+                venue_id=venue.id,
+                item_id=towels.id,
+                raw_count=3,
+                updated_at=datetime.now(timezone.utc) - timedelta(days=5),
+            )
+        )
+        refresh_item_network_rollups([towels.id])
+        db.session.commit()
+
+        row = get_supply_row(towels.id)
+
+    assert row["counted_venue_count"] == 1
+    assert row["stale_update_venue_count"] == 1
+    assert row["venue_rows"][0]["is_stale"] is True
+
+
+def test_venue_tracking_change_refreshes_item_network_rollup(client, app):
+    quick_login(client, "admin")
+
+    with app.app_context():
+        venue = Venue(name="Tracking Network Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        lantern = create_item("Network Lantern", tracking_mode="singleton_asset")
+        track(venue, lantern)
+        refresh_item_network_rollups([lantern.id])
+        db.session.commit()
+        venue_id = venue.id
+        lantern_id = lantern.id
+
+    response = client.post(
+        f"/venues/{venue_id}/settings",
+        data={"action": "save_tracking"},
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+
+    with app.app_context():
+        rollup = ItemNetworkRollup.query.filter_by(item_id=lantern_id).one()
+
+    assert rollup.tracked_venue_count == 0
+    assert json.loads(rollup.venue_details_json) == []
+
+
+def test_rebuild_item_network_rollups_cli_command(app):
+    with app.app_context():
+        venue = Venue(name="Rebuild Network Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        soap = create_item("Network Soap")
+        track(venue, soap)
+        db.session.add(ItemNetworkRollup(item_id=soap.id, tracked_venue_count=7))
+        db.session.commit()
+        soap_id = soap.id
+
+    result = app.test_cli_runner().invoke(args=["rebuild-item-network-rollups"])
+
+    assert result.exit_code == 0
+    assert "1 item(s)" in result.output
+
+    with app.app_context():
+        rollup = ItemNetworkRollup.query.filter_by(item_id=soap_id).one()
+
+    assert rollup.tracked_venue_count == 1
+    assert rollup.missing_count_venue_count == 1
@@ -0,0 +1,99 @@
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import make_server
+
+from app import db
+from app.models import Check, CountSession, User
+from app.services.perf_seed import rebuild_derived_tables, seed_perf_dataset
+
+SCRIPT_PATH = Path(__file__).resolve().parents[1] / "scripts" / "loadtest.py"
+PERF_PASSWORD = "perf-seed-password"
+
+
+@pytest.fixture
+def loadtest(monkeypatch):
+    spec = importlib.util.spec_from_file_location("loadtest", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "loadtest", module)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def live_server(app):
+    app.config["WTF_CSRF_ENABLED"] = True
+    with app.app_context():
+        seed_perf_dataset(venues=2, items=10, days=2, checks_per_day=1, seed=3)
+        rebuild_derived_tables()
+        db.session.add(
+            User(
+                email="perf-viewer@perf.example.com",
+                display_name="Perf Viewer",
+                password_hash=generate_password_hash(PERF_PASSWORD),
+                role="viewer",
+                active=True,
+            )
+        )
+        db.session.commit()
+
+    # A single-threaded server keeps the shared in-memory SQLite connection safe.
+    server = make_server("127.0.0.1", 0, app, threaded=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+
+
+def test_load_test_signs_in_and_drives_every_scenario(app, live_server, loadtest):
+    with app.app_context():
+        saves_before = Check.query.count() + CountSession.query.count()
+
+    config = loadtest.LoadTestConfig(
+        base_url=live_server,
+        accounts=[
+            ("perf-user-0002@perf.example.com", "staff"),
+            ("perf-viewer@perf.example.com", "viewer"),
+        ],
+        password=PERF_PASSWORD,
+        users=2,
+        duration=3.0,
+        timeout=10.0,
+        scroll_pages=2,
+        mix={name: 1 for name in loadtest.SCENARIOS},
+        seed=5,
+    )
+    summary = loadtest.run_load_test(config)
+
+    assert summary["errors"] == 0, summary["error_kinds"]
+    assert summary["requests"] > 0
+    assert summary["throughput_rps"] > 0
+    assert summary["endpoints"]["login"]["requests"] == 2
+    assert {"dashboard_venues", "restocking_rows", "quick_check_get"} <= set(
+        summary["endpoints"]
+    )
+    if "quick_check_post" in summary["endpoints"]:
+        with app.app_context():
+            assert Check.query.count() + CountSession.query.count() > saves_before
+    assert "req/s" in loadtest.format_summary(summary)
+
+
+def test_load_test_rejects_a_bad_password_and_unknown_scenarios(live_server, loadtest):
+    config = loadtest.LoadTestConfig(
+        base_url=live_server,
+        accounts=[("perf-user-0002@perf.example.com", "staff")],
+        password="wrong-password",
+        users=1,
+        duration=0.1,
+    )
+
+    with pytest.raises(loadtest.LoadTestError, match="Could not sign in"):
+        loadtest.run_load_test(config)
+    with pytest.raises(loadtest.LoadTestError, match="Unknown scenario"):
+        loadtest.parse_mix("nope=1")
+    assert "quick_check_post" not in loadtest.parse_mix("quick_check_post=0")
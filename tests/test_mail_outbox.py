@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import LoginVerificationChallenge, OutboxMessage, PasswordActionToken, User
+from app.services import mail_outbox
+from app.services.mail_outbox import (
+    claim_outbox_messages,
+    dispatch_outbox_batch,
+    outbox_retry_delay,
+    summarize_outbox,
+)
+from app.services.mail_service import MAIL_STATUS_QUEUED, send_transactional_email
+from app.services.request_performance import utcnow_naive
+
+
+@pytest.fixture
+def smtp_outbox(app, monkeypatch):
+    app.config.update(
+        MAIL_ENABLED=True,
+        MAIL_SUPPRESS_SEND=False,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=1025,
+        MAIL_DEFAULT_SENDER="noreply@example.test",
+        MAIL_OUTBOX_ENABLED=True,
+        MAIL_OUTBOX_MAX_ATTEMPTS=3,
+        MAIL_OUTBOX_RETRY_SECONDS=30,
+    )
+    sent = []
+    failures = []
+
+    def fake_send_smtp_messages(messages):
+        errors = []
+        for message in messages:
+            errors.append(failures.pop(0) if failures else None)
+            if errors[-1] is None:
+                sent.append(message)
+        return errors
+
+    monkeypatch.setattr("app.services.mail_service._send_smtp_messages", fake_send_smtp_messages)
+    monkeypatch.setattr(mail_outbox, "_last_purge_at", None)
+    return sent, failures
+
+
+def create_user(*, email, password):
+    now = datetime.now(timezone.utc)
+    user = User(
+        email=email,
+        password_hash=generate_password_hash(password),
+        role="viewer",
+        active=True,
+        force_password_change=False,
+        password_changed_at=now,
+        created_at=now,
+    )
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def queue_message(**values):
+    result = send_transactional_email(
+        to_address=values.get("to_address", "someone@example.com"),
+        subject="Hello",
+        body_text="Body",
+        expires_at=values.get("expires_at"),
+    )
+    db.session.commit()
+    assert result.status == MAIL_STATUS_QUEUED
+    return OutboxMessage.query.order_by(OutboxMessage.id.desc()).first()
+
+
+def test_login_challenge_email_is_queued_with_the_challenge(app, client, smtp_outbox):
+    sent, _ = smtp_outbox
+    app.config["AUTH_ALLOW_DEV_QUICK_LOGIN"] = False
+    app.config["LOGIN_EMAIL_2FA_ENABLED"] = True
+    with app.app_context():
+        create_user(email="queued@example.com", password="Queued!123")
+        db.session.commit()
+
+    response = client.post(
+        "/login",
+        data={"email": "queued@example.com", "password": "Queued!123"},
+        follow_redirects=False,
+    )
+
+    assert response.headers["Location"].endswith("/verify-login")
+    assert sent == []
+    with app.app_context():
+        (message,) = OutboxMessage.query.all()
+        challenge = LoginVerificationChallenge.query.one()
+        assert message.to_address == "queued@example.com"
+        assert message.status == "queued"
+        assert message.expires_at == challenge.expires_at.replace(tzinfo=None)
+
+        counts = dispatch_outbox_batch()
+        db.session.refresh(message)
+        assert counts["sent"] == 1
+        assert message.status == "sent"
+        assert message.body_text is None and message.sent_at is not None
+    assert sent[0]["To"] == "queued@example.com"
+
+
+def test_password_link_token_is_written_with_its_queued_email(
+    app, client, smtp_outbox, monkeypatch
+):
+    with app.app_context():
+        create_user(email="reset@example.com", password="Reset!1234")
+        db.session.commit()
+
+    client.post("/forgot-password", data={"email": "reset@example.com"})
+
+    with app.app_context():
+        (message,) = OutboxMessage.query.all()
+        token = PasswordActionToken.query.one()
+        assert message.to_address == "reset@example.com"
+        assert message.expires_at == token.expires_at.replace(tzinfo=None)
+
+    def fail_to_queue(**_kwargs):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr("app.services.mail_service._queue_transactional_email", fail_to_queue)
+    with pytest.raises(RuntimeError):
+        client.post("/forgot-password", data={"email": "reset@example.com"})
+
+    with app.app_context():
+        db.session.remove()
+        assert OutboxMessage.query.count() == 1
+        assert PasswordActionToken.query.count() == 1
+        assert PasswordActionToken.query.one().consumed_at is None
+
+
+def test_failed_sends_back_off_then_dead_letter(app, smtp_outbox):
+    _, failures = smtp_outbox
+    failures.extend([OSError("down")] * 3)
+    with app.app_context():
+        message = queue_message()
+        start = utcnow_naive()
+
+        assert dispatch_outbox_batch(now=start)["retried"] == 1
+        db.session.refresh(message)
+        assert (message.status, message.attempts) == ("queued", 1)
+        assert message.next_attempt_at >= start + timedelta(seconds=30)
+        assert dispatch_outbox_batch(now=start)["claimed"] == 0
+
+        dispatch_outbox_batch(now=start + timedelta(seconds=31))
+        db.session.refresh(message)
+        assert message.attempts == 2
+        assert message.next_attempt_at >= start + timedelta(seconds=60)
+
+        assert dispatch_outbox_batch(now=start + timedelta(hours=1))["dead"] == 1
+        db.session.refresh(message)
+        assert (message.status, message.last_error) == ("dead", "Mail delivery failed.")
+        assert summarize_outbox()["counts"]["dead"] == 1
+
+    assert [outbox_retry_delay(n, base_seconds=30) for n in (1, 2, 3)] == [30, 60, 120]
+    assert outbox_retry_delay(20, base_seconds=30) == 3600
+
+
+def test_expired_messages_are_dead_lettered_unsent(app, smtp_outbox):
+    sent, _ = smtp_outbox
+    with app.app_context():
+        message = queue_message(expires_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+
+        counts = dispatch_outbox_batch(now=utcnow_naive() + timedelta(minutes=10))
+
+        db.session.refresh(message)
+        assert counts["dead"] == 1
+        assert message.status == "dead"
+    assert sent == []
+
+
+def test_claims_are_exclusive_until_they_go_stale(app, smtp_outbox):
+    with app.app_context():
+        queue_message()
+        queue_message(to_address="other@example.com")
+        now = utcnow_naive()
+
+        first = claim_outbox_messages(limit=1, claim_timeout_seconds=300, now=now)
+        second = claim_outbox_messages(limit=5, claim_timeout_seconds=300, now=now)
+        assert len(first) == len(second) == 1
+        assert first[0].id != second[0].id
+        assert claim_outbox_messages(limit=5, claim_timeout_seconds=300, now=now) == []
+
+        reclaimed = claim_outbox_messages(
+            limit=5, claim_timeout_seconds=300, now=now + timedelta(seconds=301)
+        )
+        assert sorted(message.id for message in reclaimed) == sorted(
+            [first[0].id, second[0].id]
+        )
+
+
+def test_mail_worker_command_drains_the_outbox(app, smtp_outbox):
+    sent, _ = smtp_outbox
+    with app.app_context():
+        queue_message()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["mail-worker", "--once"])
+    status = runner.invoke(args=["mail-worker", "--status"])
+
+    assert result.exit_code == 0, result.output
+    assert "Sent 1, retrying 0, dead-lettered 0." in result.output
+    assert "sent: 1" in status.output
+    assert len(sent) == 1
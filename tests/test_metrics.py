@@ -0,0 +1,152 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from app.services.metrics import MetricsRegistry, registry
+
+
+def quick_login(client, role):
+    return client.post("/login", data={"quick_login_role": role}, follow_redirects=False)
+
+
+def sample_value(text, name, **labels):
+    """Return the value of one sample line in exposition text, or None."""
+    for line in text.splitlines():
+        if not line.startswith((name + "{", name + " ")):
+            continue
+        series, _, value = line.rpartition(" ")
+        rendered = dict(re.findall(r'(\w+)="([^"]*)"', series))
+        if all(rendered.get(key) == expected for key, expected in labels.items()):
+            return float(value)
+    return None
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_registry_renders_counters_and_cumulative_histograms():
+    local = MetricsRegistry()
+    jobs = local.counter("jobs_total", "Jobs run.", ("queue",))
+    latency = local.histogram("job_seconds", "Job latency.", buckets=(0.1, 1.0))
+
+    jobs.inc(queue='mail "urgent"')
+    jobs.inc(2, queue='mail "urgent"')
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value)
+
+    text = local.render()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{queue="mail \\"urgent\\""} 3' in text
+    assert 'job_seconds_bucket{le="0.1"} 1' in text
+    assert 'job_seconds_bucket{le="1"} 2' in text
+    assert 'job_seconds_bucket{le="+Inf"} 3' in text
+    assert "job_seconds_count 3" in text
+    with pytest.raises(ValueError):
+        jobs.inc(worker="a")
+
+
+def test_multiprocess_snapshots_are_summed_across_workers(tmp_path):
+    workers = []
+    for pid in (101, 102):
+        worker = MetricsRegistry()
+        worker._pid = pid
+        worker.configure(multiproc_dir=tmp_path)
+        worker.counter("hits_total", "Hits.", ("route",)).inc(pid - 100, route="/")
+        worker.histogram("wait_seconds", "Wait.", buckets=(1.0,)).observe(0.5)
+        workers.append(worker)
+    workers[1].flush()
+
+    text = workers[0].render()
+
+    assert sorted(path.name.split("-")[1] for path in tmp_path.glob("metrics-*.json")) == [
+        "101",
+        "102",
+    ]
+    assert 'hits_total{route="/"} 3' in text
+    assert 'wait_seconds_bucket{le="1"} 2' in text
+
+
+def test_gauges_are_summed_over_live_workers_only(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    workers = []
+    for pid in (os.getpid(), exited.pid):
+        worker = MetricsRegistry()
+        worker._pid = pid
+        worker.configure(multiproc_dir=tmp_path)
+        worker.gauge("queue_depth", "Queued jobs.").set(5)
+        worker.flush()
+        workers.append(worker)
+
+    text = workers[0].render()
+
+    assert "# TYPE queue_depth gauge" in text
+    assert sample_value(text, "queue_depth") == 5
+
+
+def test_metrics_endpoint_requires_admin_or_token(app, client):
+    assert client.get("/metrics").status_code == 401
+
+    quick_login(client, "staff")
+    assert client.get("/metrics").status_code == 403
+
+    app.config["METRICS_TOKEN"] = "scrape-token"
+    anonymous = app.test_client()
+    assert anonymous.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = anonymous.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+
+
+def test_metrics_cover_requests_sql_mail_rate_limits_exports_and_caches(app, client):
+    from app.services.mail_service import send_transactional_email
+
+    client.post("/login", data={"email": "nobody@example.com", "password": "wrong"})
+    quick_login(client, "admin")
+    assert client.get("/dashboard?tab=restocking").status_code == 200
+    export = client.get("/supplies/export.csv?scope=all")
+    # Streamed exports are measured once the body has been sent.
+    assert export.status_code == 200 and export.data
+    for _ in range(2):
+        assert client.get("/supplies?q=rope").status_code == 200
+    with app.app_context():
+        app.config["MAIL_ENABLED"] = False
+        send_transactional_email(to_address="a@example.com", subject="Hi", body_text="Hello")
+
+    text = client.get("/metrics").get_data(as_text=True)
+
+    assert sample_value(
+        text,
+        "aolrc_http_request_duration_seconds_count",
+        blueprint="main",
+        endpoint="main.dashboard",
+        method="GET",
+        status="200",
+    ) == 1
+    assert sample_value(
+        text, "aolrc_db_statement_duration_seconds_count", endpoint="main.dashboard"
+    ) > 0
+    assert sample_value(text, "aolrc_db_pool_checkout_seconds_count") > 0
+    assert sample_value(text, "aolrc_mail_send_total", status="disabled") == 1
+    assert sample_value(
+        text, "aolrc_rate_limit_decisions_total", operation="peek", decision="allowed"
+    ) >= 1
+    assert sample_value(
+        text, "aolrc_export_bytes_count", endpoint="supplies.export_supplies_audit"
+    ) == 1
+    assert sample_value(
+        text, "aolrc_cache_lookups_total", cache="search_query", result="miss"
+    ) == 1
+    assert sample_value(
+        text, "aolrc_cache_lookups_total", cache="search_query", result="hit"
+    ) == 1
+    assert sample_value(
+        text, "aolrc_http_request_duration_seconds_count", endpoint="metrics"
+    ) is None
@@ -27,6 +27,7 @@ from app.services.orders import (
     build_order_seed_rows,
     build_purchase_summary_rows,
 )
+from app.services.venue_item_state import record_check_state, record_count_session_state
 
 
 def quick_login(client, role="admin"):
@@ -94,6 +95,7 @@ def add_status_check(venue, item_status_pairs, *, created_at):
     for item, status in item_status_pairs:
         db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
     db.session.flush()
+    record_check_state(check, [(item.id, status) for item, status in item_status_pairs])
     return check
 
 
@@ -123,6 +125,10 @@ def add_count_session(venue, item_count_pairs, *, created_at):
                 )
             )
     db.session.flush()
+    record_count_session_state(
+        session,
+        [(item.id, raw_count) for item, raw_count in item_count_pairs],
+    )
     return session
 
 
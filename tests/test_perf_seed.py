@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import func
+
+from app import db
+from app.models import (
+    Check,
+    CheckLine,
+    CountLine,
+    InventoryActivityEvent,
+    Item,
+    OrderLine,
+    Venue,
+    VenueFile,
+    VenueItemCount,
+    VenueItemState,
+)
+from app.services.perf_seed import seed_perf_dataset
+
+
+def dataset_fingerprint():
+    return {
+        "check_lines": db.session.query(CheckLine.check_id, CheckLine.item_id, CheckLine.status)
+        .order_by(CheckLine.check_id, CheckLine.item_id)
+        .all(),
+        "count_total": db.session.query(func.sum(CountLine.raw_count)).scalar(),
+        "parents": Item.query.filter(Item.is_group_parent.is_(True)).count(),
+        "singletons": Item.query.filter(Item.tracking_mode == "singleton_asset").count(),
+        "order_lines": OrderLine.query.count(),
+        "files": [row.stored_filename for row in VenueFile.query.order_by(VenueFile.id)],
+    }
+
+
+def test_perf_seed_command_loads_history_and_rebuilds_derived_tables(app):
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(
+        args=[
+            "perf-seed",
+            "--venues", "3",
+            "--items", "24",
+            "--days", "5",
+            "--checks-per-day", "2",
+            "--seed", "7",
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "check_lines:" in result.output
+    assert "rows/s" in result.output
+    with app.app_context():
+        assert Venue.query.count() == 3
+        assert Check.query.count() == 3 * 5 * 2
+        assert CheckLine.query.count() > 0
+        assert VenueItemCount.query.count() > 0
+        assert VenueItemState.query.count() > 0
+        assert InventoryActivityEvent.query.count() > 0
+
+    repeat = runner.invoke(args=["perf-seed", "--venues", "1", "--items", "2", "--days", "1"])
+
+    assert repeat.exit_code != 0
+    assert "already present" in repeat.output
+
+
+def test_perf_seed_is_deterministic_for_a_seed(app):
+    now = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+    fingerprints = []
+    with app.app_context():
+        for _ in range(2):
+            db.drop_all()
+            db.create_all()
+            seed_perf_dataset(venues=2, items=30, days=20, checks_per_day=1, seed=11, now=now)
+            db.session.commit()
+            fingerprints.append(dataset_fingerprint())
+
+    assert fingerprints[0] == fingerprints[1]
+    assert fingerprints[0]["parents"] >= 1
+    assert fingerprints[0]["check_lines"]
@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+
+from app import db
+from app.models import User
+from app.services.query_budget import (
+    QueryBudgetExceeded,
+    capture_query_stats,
+    normalize_statement,
+    query_budget,
+)
+
+
+def add_users(count):
+    db.session.add_all(
+        User(email=f"budget-{index}@example.com", password_hash="x", role="viewer", active=True)
+        for index in range(count)
+    )
+    db.session.commit()
+    return [user.id for user in User.query.order_by(User.id)]
+
+
+def register_lookup_views(app, user_ids):
+    def one_by_one_view():
+        def view():
+            for user_id in user_ids:
+                db.session.query(User.email).filter(User.id == user_id).scalar()
+            return "ok"
+
+        return view
+
+    def bulk_view():
+        def view():
+            db.session.query(User.email).filter(User.id.in_(user_ids)).all()
+            return "ok"
+
+        return view
+
+    app.add_url_rule(
+        "/_budget/n-plus-one",
+        "budget_n_plus_one",
+        query_budget(20)(one_by_one_view()),
+    )
+    app.add_url_rule("/_budget/tight", "budget_tight", query_budget(0)(bulk_view()))
+    app.add_url_rule("/_budget/bulk", "budget_bulk", query_budget(1)(bulk_view()))
+    app.add_url_rule("/_budget/undeclared", "budget_undeclared", one_by_one_view())
+
+
+def test_normalize_statement_collapses_expanded_lists():
+    assert normalize_statement("SELECT *\n  FROM users WHERE id IN (?, ?, ?)") == (
+        "SELECT * FROM users WHERE id IN (?)"
+    )
+    assert normalize_statement("SELECT * FROM users WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == (
+        "SELECT * FROM users WHERE id IN (?)"
+    )
+    assert normalize_statement("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == (
+        "INSERT INTO t (a, b) VALUES (?)"
+    )
+
+
+def test_declared_budgets_raise_with_offending_statements(app, client):
+    with app.app_context():
+        user_ids = add_users(8)
+    register_lookup_views(app, user_ids)
+
+    with pytest.raises(QueryBudgetExceeded) as n_plus_one:
+        client.get("/_budget/n-plus-one")
+    message = str(n_plus_one.value)
+    assert "possible N+1" in message
+    assert "8x SELECT users.email AS users_email FROM users WHERE users.id = ?" in message
+
+    with pytest.raises(QueryBudgetExceeded, match=r"ran 1 SQL statements \(budget 0\)"):
+        client.get("/_budget/tight")
+
+    with capture_query_stats(app) as captured:
+        assert client.get("/_budget/bulk").status_code == 200
+    assert [(endpoint, stats.statements) for endpoint, stats in captured] == [("budget_bulk", 1)]
+    assert captured[0][1].db_time > 0
+
+
+def test_log_mode_and_undeclared_views_only_warn(app, client, caplog):
+    with app.app_context():
+        user_ids = add_users(8)
+    register_lookup_views(app, user_ids)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        assert client.get("/_budget/undeclared").status_code == 200
+        app.config["QUERY_BUDGET_MODE"] = "log"
+        assert client.get("/_budget/tight").status_code == 200
+
+    warnings = [record.getMessage() for record in caplog.records]
+    assert any("budget_undeclared" in text and "possible N+1" in text for text in warnings)
+    assert any("budget_tight" in text and "(budget 0)" in text for text in warnings)
+
+
+def test_hot_views_declare_budgets_through_role_decorators(app):
+    quick_check = app.view_functions["venue_items.quick_check"].query_budget
+    restocking_rows = app.view_functions["main.dashboard_restocking_rows"].query_budget
+
+    assert quick_check.limit_for("GET") == 10
+    assert quick_check.limit_for("POST") == 40
+    assert restocking_rows.limit_for("GET") == 5
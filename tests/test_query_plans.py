@@ -0,0 +1,146 @@
+import os
+import re
+import uuid
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Check, CheckLine, CountLine, CountSession, VenueItem, VenueItemState
+from app.services.inventory_activity import _count_history_events, _status_history_events
+from app.services.inventory_signals import _build_state_query
+from app.services.restocking import _restock_base_subquery
+
+# Set to a disposable Postgres database to check the same hot paths with EXPLAIN there.
+POSTGRES_URL_ENV = "QUERY_PLAN_POSTGRES_URL"
+
+HOT_TABLES = (
+    "checks",
+    "check_lines",
+    "count_sessions",
+    "count_lines",
+    "venue_items",
+    "venue_item_state",
+)
+
+# name -> (statement builder, tables that must be reached through an index lookup)
+HOT_QUERIES = {
+    "venue latest check": (
+        lambda: select(func.max(Check.created_at)).where(Check.venue_id == 1),
+        {"checks"},
+    ),
+    "venue latest count": (
+        lambda: select(func.max(CountSession.created_at)).where(CountSession.venue_id == 1),
+        {"count_sessions"},
+    ),
+    "item status history exists": (
+        lambda: select(CheckLine.id).where(CheckLine.item_id == 1).limit(1),
+        {"check_lines"},
+    ),
+    "item count history exists": (
+        lambda: select(CountLine.id).where(CountLine.item_id == 1).limit(1),
+        {"count_lines"},
+    ),
+    "venue tracked items": (
+        lambda: select(VenueItem.item_id).where(
+            VenueItem.venue_id == 1,
+            VenueItem.active.is_(True),
+        ),
+        {"venue_items"},
+    ),
+    "item tracking venues": (
+        lambda: select(VenueItem.venue_id).where(
+            VenueItem.item_id.in_([1, 2]),
+            VenueItem.active.is_(True),
+        ),
+        {"venue_items"},
+    ),
+    "latest status signals": (
+        lambda: _build_state_query(
+            VenueItemState.status,
+            VenueItemState.status_updated_at,
+            VenueItemState.status_user_id,
+            venue_ids=[1],
+            item_ids=[1, 2],
+        ).statement,
+        {"venue_item_state"},
+    ),
+    "venue restock rows": (
+        lambda: select(_restock_base_subquery(venue_ids=[1])),
+        {"checks", "check_lines", "venue_items"},
+    ),
+    "item restock rows": (
+        lambda: select(_restock_base_subquery(item_ids=[1])),
+        {"check_lines", "venue_items"},
+    ),
+    "status activity history": (_status_history_events, {"checks"}),
+    "count activity history": (_count_history_events, {"count_sessions"}),
+}
+
+
+def compile_literal(statement, dialect):
+    return str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def sqlite_plan_problems(details, searched_tables):
+    problems = []
+    for detail in details:
+        match = re.match(r"(SCAN|SEARCH) (\w+)( USING .*)?$", detail)
+        if not match or match.group(2) not in HOT_TABLES:
+            continue
+        operation, table, using = match.groups()
+        if operation == "SCAN" and using is None:
+            problems.append(f"full table scan: {detail}")
+        elif operation == "SCAN" and table in searched_tables:
+            problems.append(f"index scan instead of lookup: {detail}")
+    return problems
+
+
+def test_hot_queries_use_indexes_on_sqlite(app):
+    with app.app_context():
+        connection = db.session.connection()
+        failures = {}
+        for name, (build, searched_tables) in HOT_QUERIES.items():
+            sql = compile_literal(build(), connection.dialect)
+            plan_rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+            details = [row[3] for row in plan_rows]
+            problems = sqlite_plan_problems(details, searched_tables)
+            if problems:
+                failures[name] = problems
+
+    assert failures == {}
+
+
+@pytest.mark.skipif(
+    not os.environ.get(POSTGRES_URL_ENV),
+    reason=f"{POSTGRES_URL_ENV} is not set",
+)
+def test_hot_queries_use_indexes_on_postgres(app):
+    engine = sa.create_engine(os.environ[POSTGRES_URL_ENV])
+    schema = f"query_plans_{uuid.uuid4().hex[:8]}"
+    failures = {}
+    with app.app_context(), engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.exec_driver_sql(f"CREATE SCHEMA {schema}")
+            connection.exec_driver_sql(f"SET LOCAL search_path TO {schema}")
+            db.metadata.create_all(connection)
+            # Empty tables always favour sequential scans; ask whether an index path exists at all.
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for name, (build, searched_tables) in HOT_QUERIES.items():
+                sql = compile_literal(build(), connection.dialect)
+                plan_rows = connection.exec_driver_sql(f"EXPLAIN {sql}").all()
+                plan = "\n".join(row[0] for row in plan_rows)
+                problems = [
+                    f"sequential scan on {table}"
+                    for table in sorted(searched_tables)
+                    if re.search(rf"Seq Scan on {table}\b", plan)
+                ]
+                if problems:
+                    failures[name] = problems
+        finally:
+            transaction.rollback()
+    engine.dispose()
+
+    assert failures == {}
@@ -15,6 +15,7 @@ from app.models import (
     VenueNote,
 )
 from app.routes.main import build_recent_venue_activity_rows
+from app.services.venue_item_state import record_check_state, record_count_session_state
 from app.services.venue_profile import build_venue_profile_view_model
 
 
@@ -73,6 +74,7 @@ def add_status_check(venue, item_status_pairs, *, created_at):
     for item, status in item_status_pairs:
         db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
     db.session.flush()
+    record_check_state(check, [(item.id, status) for item, status in item_status_pairs])
     return check
 
 
@@ -103,6 +105,10 @@ def add_count_session(venue, item_count_pairs, *, created_at):
                 )
             )
     db.session.flush()
+    record_count_session_state(
+        session,
+        [(item.id, raw_count) for item, raw_count in item_count_pairs],
+    )
     return session
 
 
@@ -1008,3 +1014,158 @@ def test_same_value_recount_updates_profile_freshness_without_new_count_activity
     assert count_line_count == 2
     assert row["raw_count"] == 6
     assert row["count_freshness"]["updated_at"] > initial_row["count_freshness"]["updated_at"]
+
+
+def count_statements(app, callback):
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        callback()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def test_quick_check_get_query_count_does_not_grow_with_tracked_items(client, app):
+    quick_login(client, "staff")
+
+    venue_ids = []
+    with app.app_context():
+        staff_user_id = User.query.filter_by(email="staff@example.com").one().id
+        for venue_name, item_count in (("Small Lodge", 2), ("Large Lodge", 12)):
+            venue = Venue(name=venue_name, active=True)
+            db.session.add(venue)
+            db.session.flush()
+            items = [
+                create_tracked_item(
+                    venue,
+                    f"{venue_name} Item {index}",
+                    tracking_mode="singleton_asset" if index % 3 == 0 else "quantity",
+                    default_par_level=6,
+                )
+                for index in range(item_count)
+            ]
+            add_status_check(
+                venue,
+                [(item, "low") for item in items],
+                created_at=datetime.now(timezone.utc) - timedelta(hours=2),
+            )
+            add_count_session(
+                venue,
+                [(item, 3) for item in items if item.tracking_mode == "quantity"],
+                created_at=datetime.now(timezone.utc) - timedelta(hours=1),
+            )
+            db.session.add_all(
+                VenueNote(
+                    venue_id=venue.id,
+                    author_user_id=staff_user_id,
+                    item_id=item.id,
+                    title="Check shelf",
+                    body="Restock soon.",
+                )
+                for item in items
+            )
+            db.session.commit()
+            venue_ids.append(venue.id)
+
+    statement_counts = []
+    for venue_id in venue_ids:
+        responses = []
+        statements = count_statements(
+            app,
+            lambda: responses.append(client.get(f"/venues/{venue_id}/check")),
+        )
+        assert responses[0].status_code == 200
+        statement_counts.append(len(statements))
+
+    assert statement_counts[0] == statement_counts[1]
+
+
+def test_signal_loader_memoizes_lookups_within_a_request(app):
+    from app.services.signal_loader import get_inventory_signal_loader
+
+    with app.app_context():
+        venue = Venue(name="Memo Lodge", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        cups = create_tracked_item(venue, "Cups", default_par_level=4, venue_par_override=9)
+        add_count_session(venue, [(cups, 2)], created_at=datetime.now(timezone.utc))
+        db.session.commit()
+        venue_id = venue.id
+
+    with app.test_request_context("/"):
+        loader = get_inventory_signal_loader()
+        first = count_statements(app, lambda: build_venue_profile_view_model(venue_id))
+        second = count_statements(app, lambda: build_venue_profile_view_model(venue_id))
+
+        assert get_inventory_signal_loader() is loader
+        assert len(second) < len(first)
+
+        db.session.commit()
+
+        assert get_inventory_signal_loader() is not loader
+
+
+def test_quick_check_save_statement_count_does_not_grow_with_submitted_items(client, app):
+    quick_login(client, "staff")
+
+    venues = []
+    with app.app_context():
+        for venue_name, item_count in (("Small Barn", 3), ("Large Barn", 15)):
+            venue = Venue(name=venue_name, active=True)
+            db.session.add(venue)
+            db.session.flush()
+            items = [
+                create_tracked_item(
+                    venue,
+                    f"{venue_name} Item {index}",
+                    tracking_mode="singleton_asset" if index % 3 == 0 else "quantity",
+                    default_par_level=6,
+                )
+                for index in range(item_count)
+            ]
+            # Existing counts exercise the ON CONFLICT update branch as well as inserts.
+            add_count_session(
+                venue,
+                [(item, 1) for item in items[::2] if item.tracking_mode == "quantity"],
+                created_at=datetime.now(timezone.utc) - timedelta(days=1),
+            )
+            db.session.commit()
+            venues.append((venue.id, [(item.id, item.tracking_mode) for item in items]))
+
+    statement_counts = []
+    for venue_id, items in venues:
+        form = {"check_mode": "raw_counts"}
+        for item_id, tracking_mode in items:
+            if tracking_mode == "singleton_asset":
+                form[f"status_{item_id}"] = "out"
+            else:
+                form[f"count_{item_id}"] = "4"
+        responses = []
+        statements = count_statements(
+            app,
+            lambda: responses.append(client.post(f"/venues/{venue_id}/check", data=form)),
+        )
+        assert responses[0].status_code == 302
+        statement_counts.append(len(statements))
+
+    assert statement_counts[0] == statement_counts[1]
+
+    with app.app_context():
+        for venue_id, items in venues:
+            counts = {
+                row.item_id: row.raw_count
+                for row in VenueItemCount.query.filter_by(venue_id=venue_id).all()
+            }
+            assert counts == {
+                item_id: 0 if tracking_mode == "singleton_asset" else 4
+                for item_id, tracking_mode in items
+            }
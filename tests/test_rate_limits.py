@@ -0,0 +1,244 @@
+import re
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.config import Config
+from app.models import RateLimitCounter, User
+from app.services.metrics import registry
+from app.services.rate_limits import (
+    CounterTableRateLimiter,
+    SlidingWindowCounterRateLimiter,
+    SlidingWindowRateLimiter,
+    create_counter_file_engine,
+    init_rate_limits,
+    rate_limiter,
+)
+
+WINDOW = 300
+START = 1_800_000_000  # a multiple of every sub-window length used below
+
+
+def sample_value(text, name, **labels):
+    """Return the value of one sample line in exposition text, or None."""
+    for line in text.splitlines():
+        if not line.startswith((name + "{", name + " ")):
+            continue
+        series, _, value = line.rpartition(" ")
+        rendered = dict(re.findall(r'(\w+)="([^"]*)"', series))
+        if all(rendered.get(key) == expected for key, expected in labels.items()):
+            return float(value)
+    return None
+
+
+def post_login(client, email, remote_addr):
+    return client.post(
+        "/login",
+        data={"email": email, "password": "wrong-password", "next": ""},
+        environ_overrides={"REMOTE_ADDR": remote_addr},
+        follow_redirects=False,
+    )
+
+
+@pytest.fixture
+def counter_limiter(app):
+    with app.app_context():
+        yield CounterTableRateLimiter(db.engine)
+
+
+def test_counter_table_matches_the_memory_limiter_on_sub_window_boundaries(counter_limiter):
+    memory = SlidingWindowRateLimiter()
+    options = {"limit": 3, "window_seconds": WINDOW}
+
+    for offset in (0, 30, 60):
+        shared = counter_limiter.record("login-ip", "203.0.113.9", now=START + offset, **options)
+        exact = memory.record("login-ip", "203.0.113.9", now=START + offset, **options)
+        assert (shared.count, shared.limited) == (exact.count, exact.limited)
+
+    assert shared.limited
+    assert shared.retry_after_seconds == exact.retry_after_seconds + WINDOW // 10
+    assert counter_limiter.peek("login-ip", "203.0.113.9", now=START + 300, **options).limited
+    # An attempt keeps counting until its whole sub-window has left the window.
+    assert memory.peek("login-ip", "203.0.113.9", now=START + 330, **options).count == 1
+    assert counter_limiter.peek("login-ip", "203.0.113.9", now=START + 330, **options).count == 2
+    assert counter_limiter.peek("login-ip", "203.0.113.9", now=START + 360, **options).count == 1
+    assert counter_limiter.peek("login-ip", "other", now=START, **options).count == 0
+
+    counter_limiter.clear("login-ip", "203.0.113.9")
+    assert counter_limiter.peek("login-ip", "203.0.113.9", now=START + 60, **options).count == 0
+
+
+def test_counter_table_keeps_one_row_per_sub_window_and_purges_expired_rows(app, counter_limiter):
+    options = {"limit": 10, "window_seconds": WINDOW}
+    for offset in (0, 1, 2, 31):
+        counter_limiter.record("feedback_submission", "user:7", now=START + offset, **options)
+    long_key = "x" * 400
+    counter_limiter.record("login-account", long_key, now=START, **options)
+
+    with app.app_context():
+        rows = RateLimitCounter.query.filter_by(bucket="feedback_submission").all()
+        assert sorted((row.window_start - START, row.count) for row in rows) == [(0, 3), (30, 1)]
+        assert RateLimitCounter.query.filter_by(bucket="login-account").one().key.startswith(
+            "sha256:"
+        )
+
+    counter_limiter._last_purge_at = None
+    counter_limiter.record("login-ip", "fresh", now=START + 10 * WINDOW, **options)
+    with app.app_context():
+        assert RateLimitCounter.query.count() == 1
+
+
+def test_file_backend_is_shared_between_workers(tmp_path):
+    path = tmp_path / "rate_limits.sqlite3"
+    first_worker = CounterTableRateLimiter(create_counter_file_engine(path))
+    second_worker = CounterTableRateLimiter(create_counter_file_engine(path))
+    options = {"limit": 2, "window_seconds": WINDOW}
+
+    first_worker.record("reset-password-ip", "198.51.100.4", now=START, **options)
+    decision = second_worker.record("reset-password-ip", "198.51.100.4", now=START + 5, **options)
+
+    assert (decision.count, decision.limited) == (2, True)
+    assert first_worker.peek("reset-password-ip", "198.51.100.4", now=START + 6, **options).limited
+
+
+def test_database_backend_throttles_logins_across_app_instances(app, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backend", rate_limiter.backend)
+    app.config["AUTH_LOGIN_ACCOUNT_THROTTLE_LIMIT"] = 2
+    app.config["AUTH_LOGIN_IP_THROTTLE_LIMIT"] = 50
+    with app.app_context():
+        rate_limiter.backend = CounterTableRateLimiter(db.engine)
+
+    assert post_login(app.test_client(), "nobody@example.com", "192.0.2.1").status_code == 401
+    # Simulate a second worker: a fresh limiter object over the same table.
+    with app.app_context():
+        rate_limiter.backend = CounterTableRateLimiter(db.engine)
+    response = post_login(app.test_client(), "nobody@example.com", "192.0.2.2")
+
+    assert response.status_code == 429
+    with app.app_context():
+        assert RateLimitCounter.query.filter_by(key="nobody@example.com").count() == 1
+
+    app.config["RATE_LIMIT_BACKEND"] = "redis"
+    with pytest.raises(RuntimeError):
+        init_rate_limits(app)
+
+
+def test_postgres_record_is_one_upsert_and_count_statement():
+    limiter = CounterTableRateLimiter(create_engine("postgresql://limiter@localhost/limits"))
+
+    (statement,) = limiter._record_statements("login-ip", "k", now=START, window_seconds=WINDOW)
+    sql = str(statement.compile(dialect=limiter.engine.dialect))
+
+    assert sql.startswith("WITH recorded AS")
+    assert "ON CONFLICT (bucket, key, window_start) DO UPDATE" in sql
+    assert "RETURNING rate_limit_counters.count, rate_limit_counters.window_start" in sql
+
+
+def test_file_backend_throttles_logins_on_a_file_backed_sqlite_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backend", rate_limiter.backend)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("RATE_LIMIT_FILE", str(tmp_path / "rate_limits.sqlite3"))
+    # Counters in the app's own SQLite file would wait behind the login's write lock.
+    monkeypatch.setattr(Config, "RATE_LIMIT_BACKEND", "database")
+    with pytest.raises(RuntimeError, match="RATE_LIMIT_BACKEND=file"):
+        create_app()
+
+    monkeypatch.setattr(Config, "RATE_LIMIT_BACKEND", "file")
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        LOGIN_EMAIL_2FA_ENABLED=False,
+        AUTH_LOGIN_ACCOUNT_THROTTLE_LIMIT=2,
+        AUTH_LOGIN_IP_THROTTLE_LIMIT=50,
+    )
+    with app.app_context():
+        db.create_all()
+        now = datetime.now(timezone.utc)
+        # Stale failures make the login flush a write before it records the attempt.
+        db.session.add(
+            User(
+                email="stale@example.com",
+                password_hash=generate_password_hash("Stale!123"),
+                role="staff",
+                active=True,
+                force_password_change=False,
+                password_changed_at=now,
+                created_at=now,
+                failed_login_attempts=3,
+            )
+        )
+        db.session.commit()
+    client = app.test_client()
+
+    statuses = [post_login(client, "stale@example.com", "192.0.2.1").status_code for _ in range(2)]
+
+    assert statuses == [401, 429]
+    with app.app_context():
+        assert User.query.filter_by(email="stale@example.com").one().failed_login_attempts == 1
+        db.engine.dispose()
+
+
+def test_counter_limiter_tracks_evenly_spaced_attempts_within_one(app):
+    memory = SlidingWindowRateLimiter()
+    counter = SlidingWindowCounterRateLimiter()
+    options = {"limit": 100, "window_seconds": WINDOW}
+
+    for step in range(40):
+        now = START + 7 + step * 23
+        exact = memory.record("login-account", "a@example.com", now=now, **options)
+        estimate = counter.record("login-account", "a@example.com", now=now, **options)
+        assert abs(estimate.count - exact.count) <= 1
+
+
+def test_counter_limiter_blocks_bursts_and_decays_across_windows():
+    counter = SlidingWindowCounterRateLimiter()
+    options = {"limit": 3, "window_seconds": WINDOW}
+
+    decisions = [
+        counter.record("login-ip", "ip", now=START + offset, **options) for offset in (0, 1, 2)
+    ]
+
+    assert [decision.limited for decision in decisions] == [False, False, True]
+    assert decisions[-1].retry_after_seconds == WINDOW - 2
+    assert counter.peek("login-ip", "ip", now=START + WINDOW - 1, **options).limited
+    halfway = counter.peek("login-ip", "ip", now=START + WINDOW + WINDOW // 2, **options)
+    assert (halfway.count, halfway.limited) == (1, False)
+    assert counter.peek("login-ip", "ip", now=START + 2 * WINDOW, **options).count == 0
+
+    counter.record("login-ip", "ip", now=START, **options)
+    counter.clear("login-ip", "ip")
+    assert counter.peek("login-ip", "ip", now=START, **options).count == 0
+
+
+def test_counter_limiter_caps_keys_and_sweeps_idle_ones():
+    registry.reset()
+    counter = SlidingWindowCounterRateLimiter(max_keys=32)
+    options = {"limit": 5, "window_seconds": WINDOW}
+
+    for index in range(500):
+        counter.record("login-account", f"user{index}@example.com", now=START, **options)
+
+    assert counter.stats()["keys"] <= 32
+    assert counter.stats()["approx_bytes"] > 0
+    counter.record("feedback_submission", "user:1", now=START + 3 * WINDOW, **options)
+    assert counter.sweep(now=START + 3 * WINDOW) >= 1
+    assert counter.stats()["keys"] == 1
+
+    text = registry.render()
+    assert sample_value(text, "aolrc_rate_limit_keys") == 1
+    assert sample_value(text, "aolrc_rate_limit_evictions_total", reason="capacity") >= 468
+    assert sample_value(text, "aolrc_rate_limit_evictions_total", reason="idle") >= 1
+    registry.reset()
+
+
+def test_counter_backend_is_selected_by_config(app, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backend", rate_limiter.backend)
+    app.config.update(RATE_LIMIT_BACKEND="counter", RATE_LIMIT_MAX_KEYS=5_000)
+    init_rate_limits(app)
+
+    assert isinstance(rate_limiter.backend, SlidingWindowCounterRateLimiter)
+    assert rate_limiter.backend.max_keys == 5_000
@@ -0,0 +1,209 @@
+import json
+from datetime import timedelta
+
+from app import db
+from app.models import RequestPerformanceSample
+from app.services import request_performance
+from app.services.admin_hub import build_admin_performance_view_model
+from app.services.request_performance import (
+    build_args_fingerprint,
+    choose_sample_reason,
+    purge_request_performance_samples,
+    sample_weight,
+    utcnow_naive,
+)
+
+
+def quick_login(client, role):
+    return client.post("/login", data={"quick_login_role": role}, follow_redirects=False)
+
+
+def add_sample(endpoint, total_ms, *, args="", reason="sampled", recorded_at=None, **values):
+    fingerprint, summary = build_args_fingerprint({}, [tuple(args.split("="))] if args else [])
+    sample = RequestPerformanceSample(
+        recorded_at=recorded_at or utcnow_naive(),
+        endpoint=endpoint,
+        method="GET",
+        args_fingerprint=fingerprint,
+        args_summary=summary,
+        user_role="staff",
+        status_code=200,
+        total_ms=total_ms,
+        db_ms=values.get("db_ms", total_ms / 2),
+        statement_count=values.get("statement_count", 4),
+        response_bytes=1024,
+        reason=reason,
+        weight=values.get("weight", 1.0),
+        top_statements_json=json.dumps(values.get("top_statements", [])),
+    )
+    db.session.add(sample)
+    return sample
+
+
+def test_fingerprint_ignores_argument_order_and_redacts_tokens():
+    first = build_args_fingerprint({"venue_id": 3}, [("q", "rope"), ("coverage", "low")])
+    second = build_args_fingerprint({"venue_id": 3}, [("coverage", "low"), ("q", "rope")])
+    other = build_args_fingerprint({"venue_id": 4}, [("coverage", "low"), ("q", "rope")])
+
+    assert first == second
+    assert first[0] != other[0]
+    assert first[1] == "venue_id=3&coverage=low&q=rope"
+    assert build_args_fingerprint({"token": "abc123"}, [])[1] == "token=***"
+
+
+def test_sample_reason_keeps_slow_requests_and_samples_the_rest():
+    assert choose_sample_reason(900, slow_ms=500, rate_percent=0) == "slow"
+    assert choose_sample_reason(20, slow_ms=500, rate_percent=0) is None
+    assert choose_sample_reason(20, slow_ms=500, rate_percent=5, rng=lambda: 0.01) == "sampled"
+    assert choose_sample_reason(20, slow_ms=500, rate_percent=5, rng=lambda: 0.5) is None
+    assert sample_weight("slow", rate_percent=5) == 1.0
+    assert sample_weight("sampled", rate_percent=5) == 20.0
+
+
+def test_slow_requests_are_journaled_with_query_details(app, client):
+    app.config["PERF_SAMPLE_SLOW_MS"] = 1
+    app.config["PERF_SAMPLE_RATE_PERCENT"] = 0
+    quick_login(client, "staff")
+
+    assert client.get("/supplies?q=rope&coverage=low").status_code == 200
+    assert client.get("/static/css/styles.css").status_code == 200
+
+    with app.app_context():
+        samples = RequestPerformanceSample.query.filter_by(endpoint="supplies.index").all()
+        assert RequestPerformanceSample.query.filter_by(endpoint="static").count() == 0
+
+    assert len(samples) == 1
+    sample = samples[0]
+    assert (sample.reason, sample.weight) == ("slow", 1.0)
+    assert sample.user_role == "staff"
+    assert sample.args_summary == "coverage=low&q=rope"
+    assert sample.statement_count > 0
+    assert sample.response_bytes > 0
+    assert json.loads(sample.top_statements_json)
+
+
+def test_streamed_exports_are_timed_and_sized_once_sent(app, client):
+    app.config["PERF_SAMPLE_SLOW_MS"] = 1
+    quick_login(client, "staff")
+
+    response = client.get("/supplies/export.csv?scope=all")
+    body = response.data
+    endpoint = "supplies.export_supplies_audit"
+    with app.app_context():
+        assert RequestPerformanceSample.query.filter_by(endpoint=endpoint).count() == 0
+    response.close()
+
+    with app.app_context():
+        sample = RequestPerformanceSample.query.filter_by(endpoint=endpoint).one()
+    assert (sample.response_bytes, sample.status_code) == (len(body), 200)
+
+
+def test_fast_requests_are_skipped_when_sampling_is_off(app, client):
+    app.config["PERF_SAMPLE_SLOW_MS"] = 60_000
+    app.config["PERF_SAMPLE_RATE_PERCENT"] = 0
+    quick_login(client, "staff")
+
+    assert client.get("/supplies").status_code == 200
+
+    with app.app_context():
+        assert RequestPerformanceSample.query.count() == 0
+
+
+def test_expired_samples_are_purged(app, monkeypatch):
+    with app.app_context():
+        add_sample("main.dashboard", 40, recorded_at=utcnow_naive() - timedelta(days=30))
+        add_sample("main.dashboard", 40)
+        db.session.commit()
+
+        with db.engine.begin() as connection:
+            deleted = purge_request_performance_samples(connection, retention_days=14)
+
+        assert deleted == 1
+        assert RequestPerformanceSample.query.count() == 1
+
+        monkeypatch.setattr(request_performance, "_last_purge_at", None)
+        add_sample("main.dashboard", 40, recorded_at=utcnow_naive() - timedelta(days=30))
+        db.session.commit()
+        request_performance.record_request_sample(
+            {
+                "recorded_at": utcnow_naive(),
+                "endpoint": "main.dashboard",
+                "method": "GET",
+                "args_fingerprint": "0" * 16,
+                "args_summary": "",
+                "user_role": "admin",
+                "status_code": 200,
+                "total_ms": 12.0,
+                "db_ms": 3.0,
+                "statement_count": 5,
+                "response_bytes": None,
+                "reason": "sampled",
+                "top_statements_json": "[]",
+            },
+            retention_days=14,
+        )
+
+        assert RequestPerformanceSample.query.count() == 2
+
+
+def test_performance_view_model_ranks_endpoints_and_drills_into_arguments(app):
+    with app.app_context():
+        for total_ms in (100, 120, 140):
+            add_sample("main.dashboard", total_ms)
+        for total_ms in (300, 900):
+            add_sample("supplies.index", total_ms, args="q=rope", reason="slow")
+        add_sample(
+            "supplies.index",
+            60,
+            args="q=tape",
+            top_statements=[["SELECT items.id FROM items", 3]],
+        )
+        add_sample("supplies.index", 5000, recorded_at=utcnow_naive() - timedelta(days=10))
+        db.session.commit()
+
+        view = build_admin_performance_view_model(days="7", endpoint="supplies.index")
+
+    assert view["window_days"] == 7
+    assert view["sample_count"] == 6
+    assert view["slow_count"] == 2
+    assert [row["endpoint"] for row in view["endpoint_rows"]] == [
+        "supplies.index",
+        "main.dashboard",
+    ]
+    supplies = view["endpoint_rows"][0]
+    assert (supplies["count"], supplies["p50"], supplies["max"]) == (3, 300, 900)
+
+    drilldown = view["drilldown"]
+    assert [row["args_summary"] for row in drilldown["combination_rows"]] == ["q=rope", "q=tape"]
+    assert [sample["total_ms"] for sample in drilldown["slowest_samples"]] == [900, 300, 60]
+    assert drilldown["slowest_samples"][2]["top_statements"] == [
+        {"statement": "SELECT items.id FROM items", "count": 3}
+    ]
+
+
+def test_performance_percentiles_scale_sampled_rows_up_to_requests(app):
+    with app.app_context():
+        for total_ms in (900, 1200):
+            add_sample("supplies.index", total_ms, reason="slow", statement_count=40)
+        add_sample("supplies.index", 50, weight=100.0, statement_count=4)
+        db.session.commit()
+
+        (row,) = build_admin_performance_view_model(days="7")["endpoint_rows"]
+
+    assert (row["count"], row["estimated_requests"], row["slow_count"]) == (3, 102.0, 2)
+    assert (row["p50"], row["p95"], row["p99"], row["max"]) == (50, 50, 900, 1200)
+    assert round(row["avg_statements"], 2) == round((400 + 80) / 102, 2)
+
+
+def test_performance_page_renders_drilldown_for_admins(app, client):
+    with app.app_context():
+        add_sample("supplies.index", 800, args="q=rope", reason="slow")
+        db.session.commit()
+    quick_login(client, "admin")
+
+    response = client.get("/admin/performance?days=30&view=supplies.index")
+
+    assert response.status_code == 200
+    assert b"supplies.index" in response.data
+    assert b"q=rope" in response.data
+    assert b"By Arguments" in response.data
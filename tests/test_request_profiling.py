@@ -0,0 +1,125 @@
+import pstats
+
+import pytest
+
+from app.services.request_profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    RequestProfileError,
+    issue_profile_token,
+    list_request_profiles,
+    save_sampling_rule,
+)
+
+
+def quick_login(client, role):
+    return client.post("/login", data={"quick_login_role": role}, follow_redirects=False)
+
+
+@pytest.fixture
+def profile_dir(app, tmp_path):
+    app.config["REQUEST_PROFILE_DIR"] = str(tmp_path)
+    return tmp_path
+
+
+def test_admin_header_profiles_the_request_and_shows_hot_functions(app, client, profile_dir):
+    quick_login(client, "admin")
+
+    response = client.get("/supplies", headers={PROFILE_HEADER: "1"})
+
+    assert response.status_code == 200
+    request_id = response.headers[PROFILE_ID_HEADER]
+    assert (profile_dir / f"{request_id}.prof").exists()
+    with app.app_context():
+        (summary,) = list_request_profiles()
+    assert summary["endpoint"] == "supplies.index"
+    assert summary["trigger"] == "admin"
+
+    detail = client.get(f"/admin/profiles/{request_id}?sort=tottime&q=build_supply")
+    assert detail.status_code == 200
+    assert b"build_supply_audit_rows" in detail.data
+
+    download = client.get(f"/admin/profiles/{request_id}/download")
+    assert download.status_code == 200
+    assert download.mimetype == "application/octet-stream"
+    stats_path = profile_dir / "downloaded.prof"
+    stats_path.write_bytes(download.data)
+    assert pstats.Stats(str(stats_path)).total_calls > 0
+
+
+def test_streamed_export_is_profiled_until_its_body_is_sent(app, client, profile_dir):
+    quick_login(client, "admin")
+
+    response = client.get("/supplies/export.csv?scope=all", headers={PROFILE_HEADER: "1"})
+    request_id = response.headers[PROFILE_ID_HEADER]
+    assert response.data
+    assert not (profile_dir / f"{request_id}.prof").exists()
+    response.close()
+
+    functions = {
+        function_name
+        for _filename, _line, function_name in pstats.Stats(
+            str(profile_dir / f"{request_id}.prof")
+        ).stats
+    }
+    assert {"iter_csv_chunks", "build_supplies_audit_export_rows"} <= functions
+
+
+def test_profile_flag_requires_an_admin_with_a_valid_token(app, client, profile_dir):
+    quick_login(client, "staff")
+    assert PROFILE_ID_HEADER not in client.get("/supplies", headers={PROFILE_HEADER: "1"}).headers
+
+    admin_client = app.test_client()
+    quick_login(admin_client, "admin")
+    assert PROFILE_ID_HEADER not in admin_client.get("/supplies?_profile=forged").headers
+    with app.app_context():
+        token = issue_profile_token(999)
+    assert PROFILE_ID_HEADER not in admin_client.get(f"/supplies?_profile={token}").headers
+
+    page = admin_client.get("/admin/profiles").get_data(as_text=True)
+    token = page.split("_profile=", 1)[1].split("<", 1)[0].strip()
+    response = admin_client.get(f"/supplies?q=rope&_profile={token}")
+
+    assert PROFILE_ID_HEADER in response.headers
+    with app.app_context():
+        (summary,) = list_request_profiles()
+    assert summary["args_summary"] == "q=rope"
+
+
+def test_sampling_rule_profiles_a_share_of_one_endpoint(app, client, profile_dir):
+    with app.test_request_context():
+        with pytest.raises(RequestProfileError):
+            save_sampling_rule("missing.endpoint", 50)
+        with pytest.raises(RequestProfileError):
+            save_sampling_rule("supplies.index", 0)
+
+    quick_login(client, "admin")
+    response = client.post(
+        "/admin/profiles/sampling",
+        data={"endpoint": "supplies.index", "percent": "100", "action": "save"},
+    )
+    assert response.status_code == 302
+
+    staff_client = app.test_client()
+    quick_login(staff_client, "staff")
+    assert PROFILE_ID_HEADER in staff_client.get("/supplies").headers
+    assert PROFILE_ID_HEADER not in staff_client.get("/dashboard").headers
+    with app.app_context():
+        (summary,) = list_request_profiles()
+    assert (summary["trigger"], summary["user_role"]) == ("sampled", "staff")
+
+    client.post("/admin/profiles/sampling", data={"action": "clear"})
+    assert PROFILE_ID_HEADER not in staff_client.get("/supplies").headers
+
+
+def test_stored_profiles_are_pruned_and_ids_validated(app, client, profile_dir):
+    app.config["REQUEST_PROFILE_KEEP"] = 2
+    quick_login(client, "admin")
+
+    for _ in range(3):
+        client.get("/supplies", headers={PROFILE_HEADER: "1"})
+
+    assert len(list(profile_dir.glob("*.prof"))) == 2
+    assert client.get("/admin/profiles/..%2Fsecrets").status_code == 404
+    assert client.get("/admin/profiles/0123456789abcdef/download").status_code == 404
+    assert client.get("/admin/profiles").status_code == 200
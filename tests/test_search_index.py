@@ -0,0 +1,130 @@
+import random
+import re
+from datetime import datetime, timezone
+
+from app import db
+from app.models import Check, Item, Venue, VenueItem
+from app.services.search_index import (
+    CONTAINS_MATCH,
+    PREFIX_MATCH,
+    SearchField,
+    SearchIndex,
+    clear_search_index_cache,
+    get_search_index,
+    inventory_search_generation,
+)
+
+
+def reference_rank(values, query):
+    """The per-row regex tiers the views used before the shared index."""
+    rank = 0
+    for text, match in values:
+        text = text.lower()
+        if match == "word":
+            if text.startswith(query):
+                return rank
+            if re.search(rf"(^|\W){re.escape(query)}", text):
+                return rank + 1
+            if query in text:
+                return rank + 2
+            rank += 3
+        elif match == PREFIX_MATCH:
+            if text.startswith(query):
+                return rank
+            if query in text:
+                return rank + 1
+            rank += 2
+        else:
+            if query in text:
+                return rank
+            rank += 1
+    return None
+
+
+def test_search_index_ranks_match_regex_tiers():
+    fields = (
+        SearchField("item_name"),
+        SearchField("venue_name"),
+        SearchField("tracking", CONTAINS_MATCH),
+        SearchField("status", PREFIX_MATCH),
+    )
+    rng = random.Random(7)
+    words = [
+        "Cups", "cupboard", "Paper", "paper-towels", "Tea", "steam", "Lodge", "Out", "low", "b_c",
+    ]
+    documents = [
+        (
+            " ".join(rng.sample(words, 2)),
+            rng.choice(["Cedar Lodge", "Maple Hall", "Lodgepole Barn", ""]),
+            rng.choice(["asset", "quantity"]),
+            rng.choice(["Low", "Out", "Not Checked", "Good"]),
+        )
+        for _ in range(200)
+    ]
+    index = SearchIndex(documents, fields)
+
+    queries = ("cup", "paper", "towels", "lodge", "-tow", "ea", "ass", "not c", "low", "_c", "zzz")
+    for query in queries:
+        expected = [
+            reference_rank(list(zip(values, [field.match for field in fields])), query)
+            for values in documents
+        ]
+        assert index.ranks(query) == expected
+        assert index.ranks(f"  {query.upper()} ") == expected
+
+
+def test_get_search_index_builds_documents_only_when_the_generation_changes():
+    clear_search_index_cache()
+    fields = (SearchField("name"),)
+    builds = []
+
+    def documents(*names):
+        def build():
+            builds.append(names)
+            return [(name,) for name in names]
+
+        return build
+
+    first = get_search_index("catalog", 1, documents("Cups", "Napkins"), fields)
+    second = get_search_index("catalog", 1, documents("Cups", "Plates"), fields)
+    changed = get_search_index("catalog", 2, documents("Cups", "Plates"), fields)
+
+    assert second is first
+    assert changed is not first
+    assert builds == [("Cups", "Napkins"), ("Cups", "Plates")]
+    assert changed.ranks("pla") == [None, 0]
+    assert first.ranks("nap") == [None, 0]
+
+
+def test_inventory_search_generation_changes_with_searchable_writes(app):
+    with app.app_context():
+        venue = Venue(name="Harbor House", active=True)
+        item = Item(name="Cups", item_type="consumable")
+        db.session.add_all([venue, item])
+        db.session.flush()
+        link = VenueItem(venue_id=venue.id, item_id=item.id)
+        db.session.add(link)
+        db.session.commit()
+
+        seen = [inventory_search_generation()]
+        assert inventory_search_generation() == seen[0]
+
+        item.name = "Paper Cups"
+        db.session.commit()
+        seen.append(inventory_search_generation())
+
+        venue.name = "Lighthouse"
+        db.session.commit()
+        seen.append(inventory_search_generation())
+
+        link.expected_qty = 12
+        db.session.commit()
+        seen.append(inventory_search_generation())
+
+        db.session.add(
+            Check(venue_id=venue.id, user_id=None, created_at=datetime.now(timezone.utc))
+        )
+        db.session.commit()
+        seen.append(inventory_search_generation())
+
+    assert len(set(seen)) == len(seen)
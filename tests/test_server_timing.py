@@ -0,0 +1,73 @@
+import re
+
+from app import db
+from app.models import Venue
+from app.services.server_timing import timing_span
+
+
+def quick_login(client, role):
+    return client.post("/login", data={"quick_login_role": role}, follow_redirects=False)
+
+
+def parse_server_timing(value):
+    metrics = {}
+    for part in value.split(","):
+        name, *params = [piece.strip() for piece in part.split(";")]
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+def test_server_timing_is_off_by_default(client):
+    quick_login(client, "admin")
+
+    response = client.get("/dashboard")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+
+def test_admins_mode_reports_db_template_view_and_service_spans(app, client):
+    app.config["SERVER_TIMING_MODE"] = "admins"
+    with app.app_context():
+        venue = Venue(name="Timing Lodge", active=True)
+        db.session.add(venue)
+        db.session.commit()
+        venue_id = venue.id
+
+    quick_login(client, "staff")
+    assert "Server-Timing" not in client.get(f"/venues/{venue_id}").headers
+
+    admin_client = app.test_client()
+    quick_login(admin_client, "admin")
+    response = admin_client.get(f"/venues/{venue_id}")
+
+    assert response.status_code == 200
+    metrics = parse_server_timing(response.headers["Server-Timing"])
+    assert {"app", "db", "tpl", "view", "span.venue_profile"} <= set(metrics)
+    assert re.fullmatch(r'"SQL \(\d+ queries\)"', metrics["db"]["desc"])
+    durations = {name: float(params["dur"]) for name, params in metrics.items()}
+    assert durations["tpl"] > 0
+    assert durations["db"] + durations["tpl"] + durations["view"] <= durations["app"] + 0.5
+
+
+def test_all_mode_covers_anonymous_requests_and_repeated_spans(app, client):
+    app.config["SERVER_TIMING_MODE"] = "all"
+
+    @app.get("/_timed")
+    def timed():
+        for _ in range(3):
+            with timing_span("lookup step"):
+                pass
+        return "ok"
+
+    metrics = parse_server_timing(client.get("/_timed").headers["Server-Timing"])
+
+    assert metrics["span.lookup_step"]["desc"] == '"3x"'
+    assert "Server-Timing" in client.get("/login").headers
+
+
+def test_timing_span_is_a_no_op_outside_requests():
+    with timing_span("idle") as span:
+        pass
+
+    assert span._started_at is None
@@ -43,3 +43,44 @@ def test_development_quick_login_reaches_dashboard(client, app):
         user_count = db.session.query(User).count()
 
     assert user_count == 1
+
+
+def test_database_lock_errors_return_retryable_503(app, client):
+    from sqlalchemy.exc import OperationalError
+
+    @app.get("/_locked")
+    def locked():
+        raise OperationalError("UPDATE venues", {}, Exception("database is locked"))
+
+    @app.get("/_broken")
+    def broken():
+        raise OperationalError("SELECT 1", {}, Exception("no such table: venues"))
+
+    response = client.get("/_locked")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["X-Database-Busy"] == "1"
+
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+    assert client.get("/_broken").status_code == 500
+
+
+def test_database_busy_responses_can_be_disabled(monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app
+    from app.config import Config
+
+    monkeypatch.setattr(Config, "DATABASE_BUSY_RESPONSES_ENABLED", False)
+    app = create_app()
+    app.config.update(TESTING=True, PROPAGATE_EXCEPTIONS=False)
+
+    @app.get("/_locked")
+    def locked():
+        raise OperationalError("UPDATE venues", {}, Exception("database is locked"))
+
+    response = app.test_client().get("/_locked")
+
+    assert response.status_code == 500
+    assert "X-Database-Busy" not in response.headers
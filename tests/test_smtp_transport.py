@@ -0,0 +1,217 @@
+import smtplib
+import socket
+import socketserver
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from app.services.mail_service import MAIL_STATUS_SENT, deliver_transactional_emails
+from app.services.smtp_transport import SmtpConnectionPool, SmtpSettings, smtp_pool
+
+
+class StandInSmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.append(self.connection)
+        self.reply("220 stand-in ready")
+        while line := self.rfile.readline():
+            verb, _, argument = line.decode().strip().partition(" ")
+            verb = verb.upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stand-in", "250-AUTH PLAIN", "250 OK")
+            elif verb == "AUTH":
+                server.logins += 1
+                self.reply("235 Authenticated")
+            elif verb == "RCPT" and "refused" in argument:
+                self.reply("550 No such user")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 Go ahead")
+                body = b"".join(iter(lambda: self.rfile.readline(), b".\r\n"))
+                server.messages.append(body.decode())
+                self.reply("250 Queued")
+            elif verb == "QUIT":
+                server.quits += 1
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class StandInSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInSmtpHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.logins = 0
+        self.quits = 0
+        self.messages = []
+        self.open_sockets = []
+
+    def drop_connections(self):
+        """Close every session server-side, like a provider's idle timeout."""
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandInSmtpServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def settings_for(server):
+    return SmtpSettings(
+        server="127.0.0.1",
+        port=server.server_address[1],
+        username="mailer",
+        password="secret",
+        timeout=5,
+    )
+
+
+def build_message(recipient, subject="Hello"):
+    message = EmailMessage()
+    message["From"] = "noreply@example.test"
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content("Body")
+    return message
+
+
+def test_batch_shares_one_session_until_it_goes_idle(smtp_server):
+    clock = FakeClock()
+    pool = SmtpConnectionPool(clock=clock)
+    settings = settings_for(smtp_server)
+
+    errors = pool.send_messages(
+        settings,
+        [build_message(f"user{n}@example.com") for n in range(3)],
+        idle_seconds=30,
+        max_messages=100,
+    )
+    clock.now += 10
+    pool.send_messages(
+        settings, [build_message("later@example.com")], idle_seconds=30, max_messages=100
+    )
+
+    assert errors == [None, None, None]
+    assert (smtp_server.connections, smtp_server.logins, len(smtp_server.messages)) == (1, 1, 4)
+    assert pool.idle_count() == 1
+
+    clock.now += 31
+    pool.send_messages(
+        settings, [build_message("idle@example.com")], idle_seconds=30, max_messages=100
+    )
+    assert smtp_server.connections == 2
+    assert smtp_server.quits == 1
+    pool.close_all()
+    assert pool.idle_count() == 0
+
+
+def test_dropped_session_is_replaced_and_the_message_retried(smtp_server):
+    pool = SmtpConnectionPool()
+    settings = settings_for(smtp_server)
+    pool.send_messages(settings, [build_message("a@example.com")], idle_seconds=30, max_messages=9)
+
+    smtp_server.drop_connections()
+    errors = pool.send_messages(
+        settings, [build_message("b@example.com")], idle_seconds=30, max_messages=9
+    )
+
+    assert errors == [None]
+    assert smtp_server.connections == 2
+    assert "b@example.com" in smtp_server.messages[-1]
+    pool.close_all()
+
+
+def test_refused_recipient_fails_alone_and_sessions_rotate(smtp_server):
+    pool = SmtpConnectionPool()
+    settings = settings_for(smtp_server)
+
+    errors = pool.send_messages(
+        settings,
+        [
+            build_message("one@example.com"),
+            build_message("refused@example.com"),
+            build_message("two@example.com"),
+            build_message("three@example.com"),
+        ],
+        idle_seconds=0,
+        max_messages=2,
+    )
+
+    assert errors[0] is None and errors[2] is None and errors[3] is None
+    assert isinstance(errors[1], smtplib.SMTPRecipientsRefused)
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 2
+    assert pool.idle_count() == 0
+    assert smtp_server.quits == 2
+
+
+def test_unreachable_server_fails_every_message_in_the_batch():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    pool = SmtpConnectionPool()
+
+    errors = pool.send_messages(
+        SmtpSettings(server="127.0.0.1", port=port, timeout=1),
+        [build_message("a@example.com"), build_message("b@example.com")],
+        idle_seconds=30,
+        max_messages=9,
+    )
+
+    assert all(isinstance(error, OSError) for error in errors) and len(errors) == 2
+
+
+def test_deliver_transactional_emails_uses_the_shared_pool(app, smtp_server):
+    app.config.update(
+        MAIL_ENABLED=True,
+        MAIL_SUPPRESS_SEND=False,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=smtp_server.server_address[1],
+        MAIL_USERNAME="mailer",
+        MAIL_PASSWORD="secret",
+        MAIL_DEFAULT_SENDER="noreply@example.test",
+    )
+    emails = [
+        {"to_address": f"staff{n}@example.com", "subject": "Welcome", "body_text": "Hi"}
+        for n in range(3)
+    ] + [{"to_address": "", "subject": "Welcome", "body_text": "Hi"}]
+
+    try:
+        with app.app_context():
+            results = deliver_transactional_emails(emails)
+    finally:
+        smtp_pool.close_all()
+
+    assert [result.status for result in results] == [MAIL_STATUS_SENT] * 3 + ["failed"]
+    assert (smtp_server.connections, smtp_server.logins, len(smtp_server.messages)) == (1, 1, 3)
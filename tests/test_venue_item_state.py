@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta, timezone
+
+from app import db
+from app.models import (
+    Check,
+    CheckLine,
+    CountLine,
+    CountSession,
+    Item,
+    User,
+    Venue,
+    VenueItem,
+    VenueItemState,
+)
+from app.services.inventory_signals import (
+    build_latest_count_signal_map,
+    build_latest_status_signal_map,
+)
+from app.services.inventory_status import ensure_utc
+from app.services.venue_item_state import (
+    rebuild_venue_item_state,
+    record_check_state,
+    record_count_session_state,
+)
+
+
+def quick_login(client, role="staff"):
+    return client.post(
+        "/login",
+        data={"quick_login_role": role},
+        follow_redirects=False,
+    )
+
+
+def create_tracked_item(venue, name, *, sort_order=0):
+    item = Item(
+        name=name,
+        item_type="consumable",
+        tracking_mode="quantity",
+        item_category="consumable",
+        active=True,
+        sort_order=sort_order,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.session.add(item)
+    db.session.flush()
+    db.session.add(VenueItem(venue_id=venue.id, item_id=item.id, active=True))
+    db.session.flush()
+    return item
+
+
+def add_history_check(venue, item_status_pairs, *, created_at, user_id=None):
+    check = Check(venue_id=venue.id, user_id=user_id, created_at=created_at)
+    db.session.add(check)
+    db.session.flush()
+    for item, status in item_status_pairs:
+        db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
+    db.session.flush()
+    return check
+
+
+def add_history_count_session(venue, item_count_pairs, *, created_at, user_id=None):
+    session = CountSession(venue_id=venue.id, user_id=user_id, created_at=created_at)
+    db.session.add(session)
+    db.session.flush()
+    for item, raw_count in item_count_pairs:
+        db.session.add(CountLine(count_session_id=session.id, item_id=item.id, raw_count=raw_count))
+    db.session.flush()
+    return session
+
+
+def test_quick_check_posts_update_venue_item_state(client, app):
+    quick_login(client, "staff")
+
+    with app.app_context():
+        venue = Venue(name="Aspen Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        cups = create_tracked_item(venue, "Cups", sort_order=1)
+        napkins = create_tracked_item(venue, "Napkins", sort_order=2)
+        db.session.commit()
+        venue_id = venue.id
+        cups_id = cups.id
+        napkins_id = napkins.id
+
+    status_response = client.post(
+        f"/venues/{venue_id}/check",
+        data={"check_mode": "status", f"status_{cups_id}": "low"},
+        follow_redirects=False,
+    )
+    count_response = client.post(
+        f"/venues/{venue_id}/check",
+        data={"check_mode": "raw_counts", f"count_{napkins_id}": "7"},
+        follow_redirects=False,
+    )
+
+    assert status_response.status_code == 302
+    assert count_response.status_code == 302
+
+    with app.app_context():
+        staff_user = User.query.filter_by(role="staff").first()
+        cups_state = VenueItemState.query.filter_by(venue_id=venue_id, item_id=cups_id).one()
+        napkins_state = VenueItemState.query.filter_by(venue_id=venue_id, item_id=napkins_id).one()
+        status_map = build_latest_status_signal_map(venue_ids=[venue_id])
+        count_map = build_latest_count_signal_map(venue_ids=[venue_id])
+
+    assert cups_state.status == "low"
+    assert cups_state.status_user_id == staff_user.id
+    assert cups_state.raw_count is None
+    assert napkins_state.raw_count == 7
+    assert napkins_state.status is None
+    assert set(status_map) == {(venue_id, cups_id)}
+    assert status_map[(venue_id, cups_id)]["status"] == "low"
+    assert status_map[(venue_id, cups_id)]["actor_label"]
+    assert set(count_map) == {(venue_id, napkins_id)}
+    assert count_map[(venue_id, napkins_id)]["raw_count"] == 7
+
+
+def test_backdated_signals_do_not_overwrite_newer_state(app):
+    now = datetime.now(timezone.utc)
+
+    with app.app_context():
+        venue = Venue(name="Birch Lodge", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        item = create_tracked_item(venue, "Towels")
+
+        newer_check = add_history_check(
+            venue, [(item, "good")], created_at=now - timedelta(hours=1)
+        )
+        record_check_state(newer_check, [(item.id, "good")])
+        older_check = add_history_check(venue, [(item, "out")], created_at=now - timedelta(days=3))
+        record_check_state(older_check, [(item.id, "out")])
+
+        newer_session = add_history_count_session(
+            venue, [(item, 12)], created_at=now - timedelta(hours=2)
+        )
+        record_count_session_state(newer_session, [(item.id, 12)])
+        older_session = add_history_count_session(
+            venue, [(item, 1)], created_at=now - timedelta(days=4)
+        )
+        record_count_session_state(older_session, [(item.id, 1)])
+        db.session.commit()
+
+        status_entry = build_latest_status_signal_map(venue_ids=[venue.id])[(venue.id, item.id)]
+        count_entry = build_latest_count_signal_map(item_ids=[item.id])[(venue.id, item.id)]
+
+    assert status_entry["status"] == "good"
+    assert status_entry["updated_at"] == now - timedelta(hours=1)
+    assert count_entry["raw_count"] == 12
+    assert count_entry["updated_at"] == now - timedelta(hours=2)
+
+
+def test_signal_maps_short_circuit_empty_filters(app):
+    with app.app_context():
+        assert build_latest_status_signal_map(venue_ids=[]) == {}
+        assert build_latest_count_signal_map(item_ids=[]) == {}
+
+
+def test_rebuild_venue_item_state_matches_history(app):
+    now = datetime.now(timezone.utc)
+
+    with app.app_context():
+        venue = Venue(name="Cedar Camp", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        first = create_tracked_item(venue, "Soap", sort_order=1)
+        second = create_tracked_item(venue, "Lanterns", sort_order=2)
+        same_time = now - timedelta(days=1)
+        add_history_check(venue, [(first, "ok"), (second, "low")], created_at=same_time)
+        add_history_check(venue, [(first, "out")], created_at=same_time)
+        add_history_check(venue, [(second, "good")], created_at=now - timedelta(days=5))
+        add_history_count_session(venue, [(first, 3)], created_at=now - timedelta(days=2))
+        add_history_count_session(venue, [(first, 9)], created_at=now - timedelta(hours=3))
+        db.session.commit()
+
+        summary = rebuild_venue_item_state()
+        db.session.commit()
+
+        state_rows = VenueItemState.query.filter_by(venue_id=venue.id).all()
+        states = {row.item_id: row for row in state_rows}
+        first_id = first.id
+        second_id = second.id
+
+    assert summary == {"state_rows": 2, "status_rows": 2, "count_rows": 1}
+    assert states[first_id].status == "out"
+    assert states[first_id].raw_count == 9
+    assert ensure_utc(states[first_id].count_updated_at) == now - timedelta(hours=3)
+    assert states[second_id].status == "low"
+    assert states[second_id].raw_count is None
+
+
+def test_rebuild_venue_item_state_cli_command(app):
+    now = datetime.now(timezone.utc)
+
+    with app.app_context():
+        venue = Venue(name="Dogwood Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        item = create_tracked_item(venue, "Cups")
+        add_history_check(venue, [(item, "low")], created_at=now - timedelta(hours=4))
+        db.session.add(VenueItemState(venue_id=venue.id, item_id=item.id, status="good"))
+        db.session.commit()
+        venue_id = venue.id
+        item_id = item.id
+
+    result = app.test_cli_runner().invoke(args=["rebuild-venue-item-state"])
+
+    assert result.exit_code == 0
+    assert "1 venue/item rows" in result.output
+
+    with app.app_context():
+        state = VenueItemState.query.filter_by(venue_id=venue_id, item_id=item_id).one()
+
+    assert state.status == "low"
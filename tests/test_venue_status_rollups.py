@@ -10,8 +10,12 @@ from app.models import (
     Venue,
     VenueItem,
     VenueItemCount,
+    VenueNote,
+    VenueRollup,
 )
 from app.routes.main import build_venue_rows
+from app.services.venue_item_state import record_check_state, record_count_session_state
+from app.services.venue_rollups import refresh_venue_rollups
 
 
 def quick_login(client, role="viewer"):
@@ -63,6 +67,7 @@ def add_status_check(venue, item_status_pairs, *, created_at):
     for item, status in item_status_pairs:
         db.session.add(CheckLine(check_id=check.id, item_id=item.id, status=status))
     db.session.flush()
+    record_check_state(check, [(item.id, status) for item, status in item_status_pairs])
     return check
 
 
@@ -92,6 +97,10 @@ def add_count_session(venue, item_count_pairs, *, created_at):
                 )
             )
     db.session.flush()
+    record_count_session_state(
+        session,
+        [(item.id, raw_count) for item, raw_count in item_count_pairs],
+    )
     return session
 
 
@@ -215,3 +224,107 @@ def test_dashboard_and_venues_pages_render_status_popover_with_per_item_rollups(
         assert 'data-count-low="1"' in body
         assert 'data-count-out="0"' in body
         assert 'data-count-not-checked="1"' in body
+
+
+def test_quick_check_post_refreshes_stored_venue_rollup(client, app):
+    quick_login(client, "staff")
+
+    with app.app_context():
+        venue = Venue(name="Stored Rollup Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        cups = create_tracked_item(venue, "Stored Cups", default_par_level=12)
+        lantern = create_tracked_item(venue, "Stored Lantern", tracking_mode="singleton_asset")
+        db.session.commit()
+        venue_id = venue.id
+        cups_id = cups.id
+        lantern_id = lantern.id
+
+    response = client.post(
+        f"/venues/{venue_id}/check",
+        data={
+            "check_mode": "raw_counts",
+            f"count_{cups_id}": "5",
+            f"status_{cups_id}": "low",
+            f"status_{lantern_id}": "good",
+        },
+        follow_redirects=False,
+    )
+
+    assert response.status_code == 302
+
+    with app.app_context():
+        rollup = VenueRollup.query.filter_by(venue_id=venue_id).one()
+        row = get_venue_row(build_venue_rows(), venue_id)
+
+    assert rollup.total_tracked == 2
+    assert rollup.low_count == 1
+    assert rollup.low_quantity_count == 1
+    assert rollup.good_count == 1
+    assert rollup.quantity_count_total == 5
+    assert rollup.singleton_current_total == 1
+    assert rollup.total_par == 12
+    assert rollup.last_updated_at is not None
+    assert row["counts"]["low"] == 1
+    assert row["current_total_count"] == 6
+    assert row["total_par_count"] == 12
+
+
+def test_note_and_tracking_changes_refresh_stored_venue_rollup(client, app):
+    quick_login(client, "admin")
+
+    with app.app_context():
+        venue = Venue(name="Tracking Rollup Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        kept = create_tracked_item(venue, "Kept Item")
+        dropped = create_tracked_item(venue, "Dropped Item")
+        refresh_venue_rollups([venue.id])
+        db.session.commit()
+        venue_id = venue.id
+        kept_id = kept.id
+        dropped_id = dropped.id
+
+    note_response = client.post(
+        f"/venues/{venue_id}/check/notes",
+        data={"title": "Rollup note", "body": "Counted after delivery", "item_id": str(kept_id)},
+        headers={"Accept": "application/json"},
+    )
+    deactivate_response = client.post(f"/admin/items/{dropped_id}/deactivate")
+
+    assert note_response.status_code in {200, 201}
+    assert deactivate_response.status_code == 302
+
+    with app.app_context():
+        rollup = VenueRollup.query.filter_by(venue_id=venue_id).one()
+        note_count = VenueNote.query.filter_by(venue_id=venue_id).count()
+
+    assert note_count == 1
+    assert rollup.notes_count == 1
+    assert rollup.total_tracked == 1
+    assert rollup.not_checked_count == 1
+
+
+def test_rebuild_venue_rollups_cli_command_replaces_stale_rows(app):
+    with app.app_context():
+        venue = Venue(name="Stale Rollup Hall", active=True)
+        db.session.add(venue)
+        db.session.flush()
+        item = create_tracked_item(venue, "Stale Item")
+        db.session.add(VenueRollup(venue_id=venue.id, total_tracked=9, good_count=9))
+        db.session.flush()
+        add_status_check(venue, [(item, "out")], created_at=datetime.now(timezone.utc))
+        db.session.commit()
+        venue_id = venue.id
+
+    result = app.test_cli_runner().invoke(args=["rebuild-venue-rollups"])
+
+    assert result.exit_code == 0
+    assert "1 venue(s)" in result.output
+
+    with app.app_context():
+        rollup = VenueRollup.query.filter_by(venue_id=venue_id).one()
+
+    assert rollup.total_tracked == 1
+    assert rollup.good_count == 0
+    assert rollup.out_count == 1